@@ -20,6 +20,7 @@
 #include <vector>
 #include <string>
 #include <stdexcept>
+#include <tuple>
 
 #define NANOGUI_VERSION_MAJOR 0
 #define NANOGUI_VERSION_MINOR 2
@@ -153,12 +154,14 @@ enum class Cursor {
 template <typename T> class ref;
 class AdvancedGridLayout;
 class BoxLayout;
+class Buffer;
 class Button;
 class CheckBox;
 class Canvas;
 class ColorWheel;
 class ColorPicker;
 class ComboBox;
+class FrameCapture;
 class GLFramebuffer;
 class GLShader;
 class GridLayout;
@@ -184,6 +187,7 @@ class TextArea;
 class Texture;
 class Theme;
 class ToolButton;
+class UniformBlock;
 class VScrollPanel;
 class Widget;
 class Window;
@@ -196,12 +200,20 @@ class Window;
  * is effectively a wrapper call to ``glfwInit()``, so if you are managing
  * OpenGL / GLFW on your own *do not call this method*.
  *
+ * \param headless
+ *     Initialize GLFW without a window system. Screens created afterwards
+ *     are headless: they render into an offscreen OpenGL context (EGL
+ *     surfaceless or pbuffer, with an OSMesa fallback) backed by a
+ *     framebuffer object, and receive no input events. This is useful for
+ *     batch rendering and testing on machines without a display server or
+ *     GPU. Not supported by the Metal backend.
+ *
  * \rst
  * Refer to :ref:`nanogui_example_3` for how you might go about managing OpenGL
  * and GLFW on your own, while still using NanoGUI's classes.
  * \endrst
  */
-extern NANOGUI_EXPORT void init();
+extern NANOGUI_EXPORT void init(bool headless = false);
 
 /// Static shutdown; should be called before the application terminates.
 extern NANOGUI_EXPORT void shutdown();
@@ -209,6 +221,12 @@ extern NANOGUI_EXPORT void shutdown();
 /**
  * \brief Enter the application main loop
  *
+ * The main loop sleeps until an event arrives or until a screen must draw an
+ * animation frame requested via \ref Widget::request_animation_frame(). No
+ * CPU time is consumed while the application is idle. Animation frames are
+ * paced according to \ref Screen::set_target_fps() and \ref
+ * Screen::set_vsync().
+ *
  * \param refresh
  *     NanoGUI issues a redraw call whenever an keyboard/mouse/.. event is
  *     received. In the absence of any external events, it enforces a redraw
@@ -255,7 +273,8 @@ extern NANOGUI_EXPORT bool active();
  * the application is redrawn the next time.
  *
  * NanoGUI is not thread-safe, and async() provides a mechanism
- * for queuing up UI-related state changes from other threads.
+ * for queuing up UI-related state changes from other threads. The
+ * main loop is woken up to run the function.
  */
 extern NANOGUI_EXPORT void async(const std::function<void()> &func);
 
@@ -290,6 +309,20 @@ file_dialog(const std::vector<std::pair<std::string, std::string>> &filetypes,
  */
 extern NANOGUI_EXPORT std::pair<bool, bool> test_10bit_edr_support();
 
+/**
+ * \brief Check for the availability of block-compressed texture formats (see
+ * \ref Texture::ComponentFormat).
+ *
+ * With the OpenGL backend, this function queries the context that is
+ * current on the calling thread, hence a \ref Screen must have been created
+ * beforehand. The Metal backend does not support compressed textures yet and
+ * returns <tt>(false, false, false)</tt>.
+ *
+ * \return A <tt>std::tuple</tt> with three boolean values indicating support
+ * for the BC1-BC7, ETC2, and ASTC format families, respectively.
+ */
+extern NANOGUI_EXPORT std::tuple<bool, bool, bool> test_texture_compression_support();
+
 /**
  * \brief Open a native file open dialog, which allows multiple selection.
  *
@@ -332,7 +365,11 @@ extern NANOGUI_EXPORT void chdir_to_bundle_parent();
  */
 extern NANOGUI_EXPORT std::string utf8(uint32_t c);
 
-/// Load a directory of PNG images and upload them to the GPU (suitable for use with ImagePanel)
+/**
+ * \brief Load a directory of PNG images and upload them to the GPU (suitable
+ * for use with ImagePanel). The images are decoded in parallel on a pool of
+ * worker threads.
+ */
 extern NANOGUI_EXPORT std::vector<std::pair<int, std::string>>
     load_image_directory(NVGcontext *ctx, const std::string &path);
 
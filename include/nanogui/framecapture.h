@@ -0,0 +1,228 @@
+/*
+    NanoGUI was developed by Wenzel Jakob <wenzel.jakob@epfl.ch>.
+    The widget drawing code is based on the NanoVG demo application
+    by Mikko Mononen.
+
+    All rights reserved. Use of this source code is governed by a
+    BSD-style license that can be found in the LICENSE.txt file.
+*/
+
+/**
+ * \file nanogui/framecapture.h
+ *
+ * \brief Streams the frames rendered by a \ref Screen to the CPU or to disk.
+ */
+
+#pragma once
+
+#include <nanogui/texture.h>
+#include <nanogui/renderpass.h>
+#include <chrono>
+#include <condition_variable>
+#include <deque>
+#include <exception>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <thread>
+
+NAMESPACE_BEGIN(nanogui)
+
+/**
+ * \class FrameCapture framecapture.h nanogui/framecapture.h
+ *
+ * \brief Renders a sequence of frames of a \ref Screen and reads them back
+ *
+ * Every call to \ref next() redraws the screen and makes the contents of a
+ * previously rendered frame available via \ref data(). Frames are read back
+ * asynchronously (see \ref Texture::download_async()): up to \ref pool_size()
+ * frames are in flight at any time, which keeps the GPU busy while the CPU
+ * processes earlier frames. The consequence is that frames are rendered up to
+ * <tt>pool_size - 1</tt> iterations ahead of the one being returned; set the
+ * pool size to 1 when the application modifies the user interface between
+ * frames and needs each frame to reflect these changes.
+ *
+ * The CPU-side storage consists of a fixed pool of buffers that are reused
+ * throughout the capture, hence memory usage remains constant regardless of
+ * its length. The pointer returned by \ref data() remains valid until \ref
+ * pool_size() further frames have been retrieved.
+ *
+ * Alternatively, \ref set_sink() streams the frames into a file (or a
+ * sequence of files) from a background thread. When this thread cannot keep
+ * up, \ref next() waits for one of the buffers to become available again.
+ *
+ * Headless screens (see \ref Screen::headless()) are captured directly from
+ * their back buffer. Otherwise, each frame is copied into an internal texture
+ * before it is presented. Rows are ordered from top to bottom, and the frames
+ * have the pixel and component format of the screen's framebuffer. Not
+ * supported by the GLES and Metal backends.
+ */
+class NANOGUI_EXPORT FrameCapture : public Object {
+public:
+    /// File formats supported by \ref set_sink()
+    enum class SinkFormat {
+        /// Infer the format from the extension of the file name
+        Auto,
+
+        /// Packed pixel data of all frames concatenated into a single file
+        Raw,
+
+        /// YUV4MPEG2 video with 4:4:4 chroma (requires 8-bit components)
+        Y4M,
+
+        /// Sequence of (uncompressed) PNG files (requires 8-bit components)
+        PNG
+    };
+
+    /**
+     * \brief Prepare a capture of the given screen
+     *
+     * \param screen
+     *     The screen to be captured
+     *
+     * \param n_frames
+     *     The number of frames to capture, or zero to capture until the \c
+     *     until callback requests the capture to stop.
+     *
+     * \param until
+     *     Optional callback that is invoked before rendering each frame. The
+     *     capture stops when it returns \c true. Frames that are in flight at
+     *     this point are still returned.
+     *
+     * \param pool_size
+     *     Number of frames that can be in flight at the same time, which is
+     *     also the number of CPU-side buffers.
+     *
+     * \param fps
+     *     If positive, frames are rendered at this steady rate (the capture
+     *     sleeps as needed). Otherwise, they are rendered as quickly as
+     *     possible. Also specifies the frame rate of YUV4MPEG2 files.
+     */
+    FrameCapture(Screen *screen, size_t n_frames = 0,
+                 const std::function<bool()> &until = { },
+                 size_t pool_size = 3, float fps = 0.f);
+
+    /**
+     * \brief Write the frames into the file \c filename from a background
+     * thread instead of returning them via \ref data()
+     *
+     * For PNG sequences, \c filename must contain a <tt>printf</tt>-style
+     * integer placeholder for the frame index (e.g. <tt>frame_%05i.png</tt>).
+     * If there is none, <tt>_%06i</tt> is inserted before the extension.
+     * Other percent signs must be escaped as <tt>%%</tt>. Must be called
+     * before the first frame is captured.
+     */
+    void set_sink(const std::string &filename, SinkFormat format = SinkFormat::Auto);
+
+    /**
+     * \brief Render and retrieve the next frame
+     *
+     * Returns \c false when the capture is complete. In this case, the sink
+     * (if any) was closed, and errors encountered while writing it are
+     * reported as exceptions.
+     */
+    bool next();
+
+    /// Capture all remaining frames (useful in combination with \ref set_sink())
+    void run();
+
+    /**
+     * \brief Stop capturing and close the sink
+     *
+     * Frames that are still in flight are discarded. Waits until the
+     * background thread has written all frames it received. Called by the
+     * destructor.
+     */
+    void close();
+
+    /// Return the data of the current frame (or \c nullptr when using a sink)
+    const uint8_t *data() const { return m_current; }
+
+    /// Return the index of the current frame
+    size_t frame_index() const { return m_frame_index; }
+
+    /// Return the number of frames that were retrieved so far
+    size_t frame_count() const { return m_frames_done; }
+
+    /// Return the screen being captured
+    Screen *screen() { return m_screen; }
+
+    /// Return the texture that frames are read from
+    Texture *texture() { return m_texture; }
+
+    /// Return the size of the captured frames
+    const Vector2i &size() const { return m_size; }
+
+    /// Return the number of bytes occupied by each frame
+    size_t frame_size() const { return m_frame_size; }
+
+    /// Return the number of frames that can be in flight at the same time
+    size_t pool_size() const { return m_buffers.size(); }
+
+    /// Is a sink attached? (see \ref set_sink())
+    bool has_sink() const { return m_sink_format != SinkFormat::Auto; }
+
+protected:
+    virtual ~FrameCapture();
+
+    /// Render a frame and start reading it back
+    void start_frame();
+
+    /// Obtain a buffer for the next frame, waiting for the sink if needed
+    uint8_t *acquire_buffer();
+
+    /// Body of the background thread writing the sink
+    void write_frames();
+
+    /// Encode a single frame into the sink
+    void write_frame(size_t index, const uint8_t *data);
+
+    /// Rethrow an exception raised by the background thread
+    void check_sink();
+
+protected:
+    ref<Screen> m_screen;
+    ref<Texture> m_texture;
+    ref<RenderPass> m_screen_pass;
+    ref<RenderPass> m_capture_pass;
+    Vector2i m_size;
+    size_t m_frame_size;
+    size_t m_n_frames;
+    std::function<bool()> m_until;
+    float m_fps;
+    std::chrono::steady_clock::time_point m_next_frame;
+    bool m_stopped = false;
+    bool m_closed = false;
+
+    /// A frame that was rendered but not yet retrieved
+    struct PendingFrame {
+        size_t index;
+        ref<Texture::Download> download;
+    };
+
+    std::deque<PendingFrame> m_pending;
+    size_t m_frames_started = 0;
+    size_t m_frames_done = 0;
+    size_t m_frame_index = 0;
+    const uint8_t *m_current = nullptr;
+
+    /// Pool of CPU-side buffers (used round-robin when there is no sink)
+    std::vector<std::unique_ptr<uint8_t[]>> m_buffers;
+    size_t m_next_buffer = 0;
+
+    /* Sink state. The mutex protects the queue of frames to be written, the
+       buffers available for reuse, and the error state. */
+    SinkFormat m_sink_format = SinkFormat::Auto;
+    std::string m_sink_filename;
+    FILE *m_sink_file = nullptr;
+    std::vector<uint8_t> m_sink_scratch;
+    std::thread m_sink_thread;
+    std::mutex m_sink_mutex;
+    std::condition_variable m_sink_cond;
+    std::deque<std::pair<size_t, uint8_t *>> m_sink_queue;
+    std::vector<uint8_t *> m_sink_free;
+    std::exception_ptr m_sink_error;
+    bool m_sink_stop = false;
+};
+
+NAMESPACE_END(nanogui)
@@ -13,6 +13,8 @@
 #pragma once
 
 #include <nanogui/canvas.h>
+#include <nanogui/texture.h>
+#include <memory>
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -21,14 +23,33 @@ NAMESPACE_BEGIN(nanogui)
  *
  * \brief A widget for displaying, panning, and zooming images. Numerical RGBA
  * pixel information is shown at large magnifications.
+ *
+ * Besides a single \ref Texture, the widget can display a tiled
+ * multi-resolution image pyramid (see \ref set_tiled_image()). This
+ * supports images that exceed the maximum texture size or that should not
+ * be resident in GPU memory as a whole.
  */
 class NANOGUI_EXPORT ImageView : public Canvas {
 public:
     using PixelCallback = std::function<void(const Vector2i &, char **, size_t)>;
 
+    /**
+     * \brief Callback that supplies the pixels of one tile of a tiled image
+     *
+     * The arguments are the pyramid level, the tile index, the size of the
+     * tile in pixels (tiles along the right and bottom edge of a level are
+     * smaller), and a buffer that should be filled with the tile's pixels
+     * in row-major order.
+     */
+    using TileCallback = std::function<void(int, const Vector2i &,
+                                            const Vector2i &, uint8_t *)>;
+
     /// Initialize the widget
     ImageView(Widget *parent);
 
+    /// Release the widget and its tile cache
+    virtual ~ImageView();
+
     /// Return the currently active image
     Texture *image() { return m_image; }
     /// Return the currently active image (const version)
@@ -36,6 +57,50 @@ public:
     /// Set the currently active image
     void set_image(Texture *image);
 
+    /**
+     * \brief Display a tiled multi-resolution image pyramid
+     *
+     * Level \c 0 of the pyramid has the specified size, and each further
+     * level halves the resolution of the previous one (rounding up) until
+     * the image fits into a single tile. The tiles of level \c i are thus
+     * <tt>tile_size</tt> pixels wide and cover <tt>tile_size * 2^i</tt>
+     * pixels of the full-resolution image.
+     *
+     * The widget picks the level matching the current \ref scale() and
+     * requests the visible tiles along with a ring of neighboring tiles
+     * (see \ref set_tile_prefetch()) and the next coarser level. The
+     * callback runs on a pool of worker threads and must be thread-safe;
+     * the tiles are then uploaded on the main thread. Until a tile arrives,
+     * the view shows the corresponding region of a coarser cached tile.
+     *
+     * Uploaded tiles are kept in a least-recently-used cache whose GPU
+     * memory usage is bounded by \ref tile_cache_budget(). The tiled image
+     * replaces any previously set image.
+     */
+    void set_tiled_image(const Vector2i &size, int tile_size,
+                         Texture::PixelFormat pixel_format,
+                         Texture::ComponentFormat component_format,
+                         const TileCallback &callback);
+
+    /// Is the widget currently displaying a tiled image pyramid?
+    bool tiled() const { return (bool) m_tiled; }
+
+    /// Return the size of the displayed image (level 0 for tiled images)
+    Vector2i image_size() const;
+
+    /// Return the pyramid level that is currently being displayed
+    int tile_level() const;
+
+    /// Return the maximum amount of GPU memory used by cached tiles in bytes
+    size_t tile_cache_budget() const { return m_tile_cache_budget; }
+    /// Set the maximum amount of GPU memory used by cached tiles in bytes
+    void set_tile_cache_budget(size_t budget) { m_tile_cache_budget = budget; }
+
+    /// Return the number of tile rings around the viewport that are prefetched
+    int tile_prefetch() const { return m_tile_prefetch; }
+    /// Set the number of tile rings around the viewport that are prefetched
+    void set_tile_prefetch(int rings) { m_tile_prefetch = rings; }
+
     /// Center the image on the screen
     void center();
 
@@ -72,6 +137,11 @@ public:
     virtual void draw_contents() override;
 
 protected:
+    struct TiledImage;
+
+    /// Request, upload, and draw the tiles of a tiled image pyramid
+    void draw_tiles(const Matrix4f &ortho);
+
     nanogui::ref<Shader> m_image_shader;
     nanogui::ref<Texture> m_image;
     float m_scale = 0;
@@ -80,6 +150,9 @@ protected:
     Color m_image_border_color;
     Color m_image_background_color;
     PixelCallback m_pixel_callback;
+    std::shared_ptr<TiledImage> m_tiled;
+    size_t m_tile_cache_budget = 256 * 1024 * 1024;
+    int m_tile_prefetch = 1;
 };
 
 NAMESPACE_END(nanogui)
@@ -105,4 +105,41 @@ inline bool nvg_is_font_icon(int value) { return value >= 1024; }
 /// Check for OpenGL errors and warn if one is found (returns 'true' in that case')
 extern NANOGUI_EXPORT bool nanogui_check_glerror(const char *cmd);
 
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+/// Counters reported by \ref gl_state_statistics()
+struct GLStateStatistics {
+    /// Number of state changes that were passed on to OpenGL
+    size_t issued = 0;
+    /// Number of redundant state changes that were skipped
+    size_t skipped = 0;
+};
+
+/**
+ * \brief Return the counters of the OpenGL state cache
+ *
+ * \ref RenderPass and \ref Shader route changes of the bound program, vertex
+ * array, framebuffer, and textures, the viewport and scissor rectangles, and
+ * the depth test, scissor test, culling, and blending state through a cache
+ * that drops calls which would not change anything. Within a render pass,
+ * the program and vertex array of a shader furthermore remain bound after
+ * \ref Shader::end(), so that consecutive draws with the same shader do not
+ * rebind them.
+ *
+ * \param reset
+ *     Set the counters to zero after reading them
+ */
+extern NANOGUI_EXPORT GLStateStatistics gl_state_statistics(bool reset = false);
+
+/**
+ * \brief Discard the contents of the OpenGL state cache
+ *
+ * This must be called when code that does not go through NanoGUI changes the
+ * OpenGL state between \ref RenderPass::begin() and \ref RenderPass::end()
+ * (or between \ref Shader::begin() calls outside of a render pass). NanoGUI
+ * already does so when switching between windows and after rendering the
+ * widgets using NanoVG.
+ */
+extern NANOGUI_EXPORT void gl_state_invalidate();
+#endif
+
 NAMESPACE_END(nanogui)
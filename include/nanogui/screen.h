@@ -16,6 +16,8 @@
 
 #include <nanogui/widget.h>
 #include <nanogui/texture.h>
+#include <nanogui/renderpass.h>
+#include <limits>
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -26,10 +28,15 @@ class Texture;
  *
  * \brief Represents a display surface (i.e. a full-screen or windowed GLFW window)
  * and forms the root element of a hierarchy of nanogui widgets.
+ *
+ * When NanoGUI was initialized in headless mode (see \ref init()), the
+ * screen instead renders into an offscreen framebuffer object, whose color
+ * buffer is accessible via \ref back_buffer().
  */
 class NANOGUI_EXPORT Screen : public Widget {
     friend class Widget;
     friend class Window;
+    friend class FrameCapture;
 public:
     /**
      * Create a new Screen instance
@@ -113,6 +120,62 @@ public:
     /// Send an event that will cause the screen to be redrawn at the next event loop iteration
     void redraw();
 
+    /**
+     * \brief Return the time (as reported by <tt>glfwGetTime()</tt>) when
+     * the next animation frame is due, or infinity if no widget requested one
+     *
+     * \sa Widget::request_animation_frame()
+     */
+    double frame_deadline() const { return m_frame_deadline; }
+
+    /// Return the maximum rate at which animation frames are drawn
+    float target_fps() const { return m_target_fps; }
+
+    /**
+     * \brief Set the maximum rate at which animation frames are drawn
+     *
+     * A value of zero removes the limit, which is useful in combination
+     * with \ref set_vsync(). Redraws caused by user input are not delayed.
+     */
+    void set_target_fps(float fps) { m_target_fps = fps; }
+
+    /// Is presentation synchronized with the vertical refresh of the display?
+    bool vsync() const { return m_vsync; }
+
+    /// Synchronize presentation with the vertical refresh of the display?
+    void set_vsync(bool vsync);
+
+    /// Are mouse motion and scroll events coalesced between frames?
+    bool coalesce_events() const { return m_coalesce_events; }
+
+    /**
+     * \brief Coalesce mouse motion and scroll events between frames?
+     *
+     * High polling rate pointing devices can deliver several hundred cursor
+     * events per second, many more than are drawn. When this option is
+     * enabled, consecutive cursor motion events are merged into a single call
+     * to \ref mouse_motion_event() (or \ref mouse_drag_event()) with the
+     * accumulated relative motion, and consecutive scroll events are merged
+     * into a single \ref scroll_event() with the accumulated offset.
+     *
+     * Merged events are dispatched by \ref flush_events() before the next
+     * frame is drawn, or before any other input event is handled so that the
+     * overall order of events (e.g. motion, then a button press) is
+     * preserved. Until then, \ref mouse_pos() reports the position of the
+     * last dispatched event. Disabled by default.
+     */
+    void set_coalesce_events(bool value);
+
+    /**
+     * \brief Dispatch mouse motion and scroll events that were merged by
+     * \ref set_coalesce_events()
+     *
+     * Called by \ref draw_all(). Applications that manage GLFW themselves and
+     * don't call \ref draw_all() must invoke this function after processing
+     * pending window system events.
+     */
+    void flush_events();
+
     /**
      * \brief Redraw the screen if the redraw flag is set
      *
@@ -208,6 +271,19 @@ public:
     /// Does the framebuffer use a floating point representation
     bool has_float_buffer() const { return m_float_buffer; }
 
+    /// Does the screen render into an offscreen framebuffer (see \ref init())?
+    bool headless() const { return m_headless; }
+
+    /**
+     * \brief Return the color buffer of a headless screen (or \c nullptr)
+     *
+     * The texture has the size, pixel format, and component format of the
+     * screen's framebuffer. Its contents can be read back using \ref
+     * Texture::download() or \ref Texture::download_async() following a
+     * call to \ref draw_all().
+     */
+    Texture *back_buffer();
+
 #if defined(NANOGUI_USE_METAL)
     /// Return the associated CAMetalLayer object
     void *metal_layer() const;
@@ -273,6 +349,22 @@ public:
     void draw_widgets();
 
 protected:
+    /// Dispatch a cursor motion event (in screen coordinates)
+    void dispatch_cursor_pos(const Vector2i &p);
+
+    /// Dispatch a scroll event
+    void dispatch_scroll(const Vector2f &rel);
+
+    /**
+     * \brief Prepare the bookkeeping of a new frame and return whether it
+     * should be drawn
+     *
+     * Dispatches coalesced events (see \ref flush_events()) and checks the
+     * redraw flag and the animation frame deadline. When a frame is due,
+     * both are reset and the frame time is recorded.
+     */
+    bool begin_frame();
+
     GLFWwindow *m_glfw_window = nullptr;
     NVGcontext *m_nvg_context = nullptr;
     GLFWcursor *m_cursors[(size_t) Cursor::CursorCount];
@@ -294,6 +386,21 @@ protected:
     bool m_stencil_buffer;
     bool m_float_buffer;
     bool m_redraw;
+    bool m_headless = false;
+#if defined(NANOGUI_USE_METAL)
+    bool m_vsync = true;
+#else
+    bool m_vsync = false;
+#endif
+    float m_target_fps = 60.f;
+    double m_last_frame = 0.0;
+    double m_frame_deadline = std::numeric_limits<double>::infinity();
+    bool m_coalesce_events = false;
+    bool m_cursor_pending = false;
+    bool m_scroll_pending = false;
+    Vector2i m_pending_cursor_pos = Vector2i(0);
+    Vector2f m_pending_scroll = Vector2f(0.f);
+    ref<RenderPass> m_back_buffer;
     std::function<void(Vector2i)> m_resize_callback;
 #if defined(NANOGUI_USE_METAL)
     void *m_metal_texture = nullptr;
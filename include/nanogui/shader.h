@@ -19,9 +19,63 @@
 #include <nanogui/object.h>
 #include <nanogui/traits.h>
 #include <unordered_map>
+#include <functional>
+#include <vector>
+#include <memory>
 
 NAMESPACE_BEGIN(nanogui)
 
+NAMESPACE_BEGIN(detail)
+/**
+ * \brief Determine the dtype, shape, and address of a uniform value
+ *
+ * Used by \ref Shader::set_uniform() and \ref UniformBlock::set_uniform().
+ * Returns \c false when the value has an unsupported dimension.
+ */
+template <typename Array>
+bool uniform_info(const Array &value, VariableType &vtype, size_t &ndim,
+                  size_t *shape, const void *&data) {
+    ndim = (size_t) -1;
+    shape[0] = shape[1] = shape[2] = 1;
+    vtype = VariableType::Invalid;
+
+    if constexpr (std::is_scalar_v<Array>) {
+        data = &value;
+        ndim = 0;
+        vtype = get_type<Array>();
+    } else if constexpr (is_nanogui_array_v<Array>) {
+        data = value.v;
+        ndim = 1;
+        shape[0] = Array::Size;
+        vtype = get_type<typename Array::Value>();
+    } else if constexpr (is_nanogui_matrix_v<Array>) {
+        data = value.m;
+        ndim = 2;
+        shape[0] = Array::Size;
+        shape[1] = Array::Size;
+        vtype = get_type<typename Array::Value>();
+    } else if constexpr (is_enoki_array_v<Array>) {
+        if constexpr (Array::Depth == 1) {
+            shape[0] = value.size();
+            ndim = 1;
+        } else if constexpr (Array::Depth == 2) {
+            shape[0] = value.size();
+            shape[1] = value[0].size();
+            ndim = 2;
+        } else if constexpr (Array::Depth == 3) {
+            shape[0] = value.size();
+            shape[1] = value[0].size();
+            shape[2] = value[0][0].size();
+            ndim = 3;
+        }
+        data = value.data();
+        vtype = get_type<typename Array::Scalar>();
+    }
+
+    return ndim != (size_t) -1;
+}
+NAMESPACE_END(detail)
+
 class NANOGUI_EXPORT Shader : public Object {
 public:
     /// The type of geometry that should be rendered
@@ -54,12 +108,22 @@ public:
      *
      * \param fragment_shader
      *     The source of the fragment shader as a string.
+     *
+     * \param async_compile
+     *     Return without waiting for the driver to compile and link the
+     *     program. This requires the \c KHR_parallel_shader_compile (or \c
+     *     ARB_parallel_shader_compile) extension, which lets the driver
+     *     compile programs on background threads. Otherwise, or when a
+     *     matching entry of the program cache exists (see \ref
+     *     set_program_cache_dir()), the program is ready immediately. See
+     *     \ref ready() for what can be done with the shader in the meantime.
      */
     Shader(RenderPass *render_pass,
            const std::string &name,
            const std::string &vertex_shader,
            const std::string &fragment_shader,
-           BlendMode blend_mode = BlendMode::None);
+           BlendMode blend_mode = BlendMode::None,
+           bool async_compile = false);
 
     /// Release all resources
     virtual ~Shader();
@@ -73,6 +137,69 @@ public:
     /// Return the blending mode of this shader
     BlendMode blend_mode() const { return m_blend_mode; }
 
+    /**
+     * \brief Check whether the program has finished compiling and linking
+     *
+     * This is always the case unless the shader was created with
+     * <tt>async_compile=true</tt>. Until then, \ref begin(), \ref end(),
+     * and the draw functions do nothing, so that a frame can be rendered
+     * without the geometry of this shader. Parameters passed by name to
+     * \ref set_buffer(), \ref set_uniform(), \ref set_texture(), \ref
+     * set_uniform_block(), and \ref set_buffer_streaming() are recorded and
+     * applied once the program is ready, while functions that need the
+     * parameter layout (e.g. \ref argument_handle()) raise an exception.
+     *
+     * The first call that finds the program complete reflects its
+     * parameters and runs the callback specified via \ref
+     * set_ready_callback(). Compilation and link errors are reported by
+     * raising an exception from this function (and thus from \ref begin()).
+     */
+    bool ready();
+
+    /**
+     * \brief Set a function that is called once the program is ready
+     *
+     * The function runs during the call to \ref ready() (possibly from \ref
+     * begin()) that finds the program complete, or immediately if this has
+     * already happened.
+     */
+    void set_ready_callback(const std::function<void()> &callback);
+
+    /// Return the function called once the program is ready
+    const std::function<void()> &ready_callback() const { return m_ready_callback; }
+
+    /**
+     * \brief Enable an on-disk cache of linked shader programs
+     *
+     * When a directory is specified, shaders created afterwards store the
+     * binary representation of the linked program along with the reflected
+     * parameter layout in this directory. Later instantiations of the same
+     * shader (also in future sessions) load this data instead of compiling,
+     * linking, and reflecting the program. Entries are keyed by a hash of
+     * the shader sources, the GL renderer and version strings, and the
+     * NanoGUI version. Entries that the driver rejects are rebuilt from
+     * source.
+     *
+     * The directory must already exist. An empty string (the default)
+     * disables the cache. The cache is only used by the OpenGL (4.1 or \c
+     * ARB_get_program_binary) and GLES 3 backends.
+     */
+    static void set_program_cache_dir(const std::string &path);
+
+    /// Return the directory of the program cache (empty if disabled)
+    static const std::string &program_cache_dir();
+
+    /**
+     * \brief Return a stable integer handle identifying a named shader
+     * parameter.
+     *
+     * The handle remains valid for the lifetime of the shader. It can be
+     * passed to the overloads of \ref set_buffer(), \ref set_uniform(),
+     * \ref set_texture(), and \ref update_buffer_region() that take a handle
+     * instead of a name, which avoids a string lookup per call.
+     */
+    size_t argument_handle(const std::string &name) const;
+
     /**
      * \brief Upload a buffer (e.g. vertex positions) that will be associated
      * with a named shader parameter.
@@ -81,66 +208,219 @@ public:
      * data---the implementation takes care of routing the data to the right
      * endpoint. Matrices should be specified in column-major order.
      *
-     * The buffer will be replaced if it is already present.
+     * The buffer will be replaced if it is already present. The reserved
+     * \c indices parameter accepts \c uint32, \c uint16, and (except on
+     * Metal) \c uint8 data.
+     *
+     * When \c per_instance is \c true, a vertex attribute advances once per
+     * instance instead of once per vertex when drawing with \ref
+     * draw_array_instanced(). The first dimension of the buffer then
+     * corresponds to the instance count.
+     *
+     * Vertex attributes declared as floating point values in the shader
+     * code (e.g. \c vec3) can also be provided using a more compact dtype:
+     * \c float16, or 8/16/32-bit integers that are converted to floating
+     * point values when the vertex is fetched. When \c normalized is \c true,
+     * integers are mapped to the range <tt>[0, 1]</tt> (unsigned types) or
+     * <tt>[-1, 1]</tt> (signed types), e.g. to store colors as \c uint8 or
+     * normals as \c int16 values. Otherwise, they retain their magnitude.
+     * Integer attributes (e.g. \c ivec2) accept any 8/16/32-bit integer
+     * dtype. OpenGL ES 2 does not support 32-bit integer and \c float16
+     * vertex data. Metal vertex functions read buffers directly and must
+     * perform such conversions themselves, hence \c normalized is not
+     * supported by the Metal backend.
+     *
+     * The Python bindings also accept non-contiguous arrays (see \ref
+     * set_buffer_strided()).
      */
     void set_buffer(const std::string &name, VariableType type, size_t ndim,
-                    const size_t *shape, const void *data);
+                    const size_t *shape, const void *data,
+                    bool per_instance = false, bool normalized = false);
 
     void set_buffer(const std::string &name, VariableType type,
-                    std::initializer_list<size_t> shape, const void *data) {
-        set_buffer(name, type, shape.end() - shape.begin(), shape.begin(), data);
+                    std::initializer_list<size_t> shape, const void *data,
+                    bool per_instance = false, bool normalized = false) {
+        set_buffer(name, type, shape.end() - shape.begin(), shape.begin(), data,
+                   per_instance, normalized);
+    }
+
+    /// Upload a buffer identified by a handle (see \ref argument_handle())
+    void set_buffer(size_t handle, VariableType type, size_t ndim,
+                    const size_t *shape, const void *data,
+                    bool per_instance = false, bool normalized = false);
+
+    void set_buffer(size_t handle, VariableType type,
+                    std::initializer_list<size_t> shape, const void *data,
+                    bool per_instance = false, bool normalized = false) {
+        set_buffer(handle, type, shape.end() - shape.begin(), shape.begin(), data,
+                   per_instance, normalized);
+    }
+
+    /**
+     * \brief Associate a shared \ref nanogui::Buffer with a named vertex
+     * attribute or with the \c indices parameter
+     *
+     * The shader references the buffer instead of storing a copy of its
+     * contents, and contents uploaded later on are used starting with the
+     * next call to \ref begin(). \c per_instance and \c normalized have the
+     * same meaning as in \ref set_buffer(). Passing \c nullptr detaches the buffer, and
+     * uploading data via \ref set_buffer() gives the parameter separate
+     * storage again.
+     */
+    void set_buffer(const std::string &name, nanogui::Buffer *buffer,
+                    bool per_instance = false, bool normalized = false);
+
+    /// Associate a shared buffer with a parameter identified by a handle (see \ref argument_handle())
+    void set_buffer(size_t handle, nanogui::Buffer *buffer,
+                    bool per_instance = false, bool normalized = false);
+
+    /**
+     * \brief Upload a buffer whose entries are not necessarily contiguous
+     *
+     * This function is equivalent to \ref set_buffer() except that the
+     * distance between consecutive entries along each dimension is given by
+     * \c strides (in bytes). Vertex attributes with contiguous rows (e.g. a
+     * view selecting some of the columns of a larger array) are uploaded
+     * without copying and read using the row stride (see \ref
+     * set_buffer_interleaved()). Other layouts are first gathered into a
+     * contiguous array.
+     */
+    void set_buffer_strided(const std::string &name, VariableType type,
+                            size_t ndim, const size_t *shape,
+                            const int64_t *strides, const void *data,
+                            bool per_instance = false, bool normalized = false);
+
+    /// Upload a strided buffer identified by a handle (see \ref argument_handle())
+    void set_buffer_strided(size_t handle, VariableType type,
+                            size_t ndim, const size_t *shape,
+                            const int64_t *strides, const void *data,
+                            bool per_instance = false, bool normalized = false);
+
+    /// Describes a vertex attribute stored in an interleaved buffer
+    struct VertexAttribute {
+        /// Name of the attribute in the shader code
+        std::string name;
+        /// Type of the individual components
+        VariableType dtype;
+        /// Number of components per vertex
+        size_t components;
+        /// Byte offset of the attribute relative to the start of a vertex
+        size_t offset;
+        /// Map integer components to <tt>[0, 1]</tt> or <tt>[-1, 1]</tt> (see \ref set_buffer())
+        bool normalized = false;
+    };
+
+    /**
+     * \brief Upload a single buffer providing several vertex attributes
+     *
+     * \c data contains \c count vertices that are \c stride bytes apart, each
+     * storing the listed \c attributes at the specified byte offsets (e.g.
+     * an array of structures with position, normal, and color fields). The
+     * data is transferred into one GPU buffer that all of these attributes
+     * read from, which reduces the number of buffer binds and improves the
+     * locality of vertex fetches compared to one buffer per attribute.
+     *
+     * The buffer is streamed when the first attribute was configured using
+     * \ref set_buffer_streaming(). Attributes of an interleaved buffer cannot
+     * be modified using \ref update_buffer_region(), and passing one of them
+     * to \ref set_buffer() gives it separate storage again.
+     *
+     * The Python bindings take a NumPy array with a structured dtype instead.
+     * Its fields provide the attributes of the same name, or those listed by
+     * the optional \c attributes dictionary mapping attribute names to field
+     * names. The optional \c normalized argument lists the names of
+     * attributes whose integer components should be normalized.
+     *
+     * Interleaved buffers are not supported by the Metal backend.
+     */
+    void set_buffer_interleaved(const std::vector<VertexAttribute> &attributes,
+                                size_t count, size_t stride, const void *data,
+                                bool per_instance = false);
+
+    /**
+     * \brief Overwrite a range of rows of a vertex or index buffer that was
+     * previously uploaded using \ref set_buffer().
+     *
+     * \c offset and <tt>shape[0]</tt> are expressed in rows of the buffer
+     * (i.e. vertices for vertex attributes and entries for the \c indices
+     * buffer). The remaining dimensions and the dtype must match the current
+     * contents. Only the specified region is transferred to the GPU.
+     *
+     * Regions that extend past the end of the buffer grow it. The underlying
+     * storage is enlarged geometrically, so that repeated appends have an
+     * amortized linear cost.
+     */
+    void update_buffer_region(const std::string &name, VariableType type,
+                              size_t offset, size_t ndim, const size_t *shape,
+                              const void *data);
+
+    void update_buffer_region(const std::string &name, VariableType type,
+                              size_t offset, std::initializer_list<size_t> shape,
+                              const void *data) {
+        update_buffer_region(name, type, offset, shape.end() - shape.begin(),
+                             shape.begin(), data);
+    }
+
+    /// Update a buffer identified by a handle (see \ref argument_handle())
+    void update_buffer_region(size_t handle, VariableType type,
+                              size_t offset, size_t ndim, const size_t *shape,
+                              const void *data);
+
+    void update_buffer_region(size_t handle, VariableType type,
+                              size_t offset, std::initializer_list<size_t> shape,
+                              const void *data) {
+        update_buffer_region(handle, type, offset, shape.end() - shape.begin(),
+                             shape.begin(), data);
     }
 
+    /**
+     * \brief Store a vertex or index buffer in a streaming ring buffer
+     *
+     * This mode is meant for geometry that is regenerated on every frame.
+     * Instead of (re-)allocating a dedicated GPU buffer upon each call to
+     * \ref set_buffer(), the data is suballocated from a large ring buffer
+     * shared by all streaming arguments of this shader.
+     *
+     * Where supported (OpenGL 4.4 or \c ARB_buffer_storage), the ring buffer
+     * is persistently mapped. Otherwise, it is written using unsynchronized
+     * mappings and orphaned when it wraps around. In both cases, fences ensure
+     * that regions still being read by the GPU are not overwritten.
+     *
+     * The contents of streaming buffers are transient: they must be uploaded
+     * again before every draw call, and they cannot be modified using \ref
+     * update_buffer_region(). Switching the mode discards the current contents.
+     */
+    void set_buffer_streaming(const std::string &name, bool streaming = true);
+
     /**
      * \brief Upload a uniform variable (e.g. a vector or matrix) that will be
      * associated with a named shader parameter.
      */
     template <typename Array> void set_uniform(const std::string &name,
                                                const Array &value) {
-        size_t shape[3] = { 1, 1, 1 };
-        size_t ndim = (size_t) -1;
+        size_t shape[3], ndim;
         const void *data;
-        VariableType vtype = VariableType::Invalid;
-
-        if constexpr (std::is_scalar_v<Array>) {
-            data = &value;
-            ndim = 0;
-            vtype = get_type<Array>();
-        } else if constexpr (is_nanogui_array_v<Array>) {
-            data = value.v;
-            ndim = 1;
-            shape[0] = Array::Size;
-            vtype = get_type<typename Array::Value>();
-        } else if constexpr (is_nanogui_matrix_v<Array>) {
-            data = value.m;
-            ndim = 2;
-            shape[0] = Array::Size;
-            shape[1] = Array::Size;
-            vtype = get_type<typename Array::Value>();
-        } else if constexpr (is_enoki_array_v<Array>) {
-            if constexpr (Array::Depth == 1) {
-                shape[0] = value.size();
-                ndim = 1;
-            } else if constexpr (Array::Depth == 2) {
-                shape[0] = value.size();
-                shape[1] = value[0].size();
-                ndim = 2;
-            } else if constexpr (Array::Depth == 3) {
-                shape[0] = value.size();
-                shape[1] = value[0].size();
-                shape[2] = value[0][0].size();
-                ndim = 3;
-            }
-            data = value.data();
-            vtype = get_type<typename Array::Scalar>();
-        }
+        VariableType vtype;
 
-        if (ndim == (size_t) -1)
+        if (!detail::uniform_info(value, vtype, ndim, shape, data))
             throw std::runtime_error("Shader::set_uniform(): invalid input array dimension!");
 
         set_buffer(name, vtype, ndim, shape, data);
     }
 
+    /// Upload a uniform variable identified by a handle (see \ref argument_handle())
+    template <typename Array> void set_uniform(size_t handle,
+                                               const Array &value) {
+        size_t shape[3], ndim;
+        const void *data;
+        VariableType vtype;
+
+        if (!detail::uniform_info(value, vtype, ndim, shape, data))
+            throw std::runtime_error("Shader::set_uniform(): invalid input array dimension!");
+
+        set_buffer(handle, vtype, ndim, shape, data);
+    }
+
     /**
      * \brief Associate a texture with a named shader parameter
      *
@@ -148,6 +428,24 @@ public:
      */
     void set_texture(const std::string &name, Texture *texture);
 
+    /// Associate a texture with a parameter identified by a handle (see \ref argument_handle())
+    void set_texture(size_t handle, Texture *texture);
+
+    /**
+     * \brief Associate a \ref UniformBlock with a named uniform block
+     * declared in the shader code
+     *
+     * The same block can be attached to any number of shaders. Its contents
+     * are uploaded at most once after every modification, when the first
+     * shader using it is activated via \ref begin().
+     *
+     * The association will be replaced if it is already present.
+     */
+    void set_uniform_block(const std::string &name, UniformBlock *block);
+
+    /// Associate a uniform block with a parameter identified by a handle (see \ref argument_handle())
+    void set_uniform_block(size_t handle, UniformBlock *block);
+
     /**
      * \brief Begin drawing using this shader
      *
@@ -179,14 +477,48 @@ public:
      *     and triangles, respectively (unless specified using strips).
      *
      * \param indexed
-     *     Render indexed geometry? In this case, an
-     *     \c uint32_t valued buffer with name \c indices
-     *     must have been uploaded using \ref set().
+     *     Render indexed geometry? In this case, a \c uint32_t,
+     *     \c uint16_t, or \c uint8_t (OpenGL only) valued buffer with
+     *     name \c indices must have been uploaded using \ref set_buffer().
+     *     Smaller index types reduce memory usage and bandwidth.
      */
     void draw_array(PrimitiveType primitive_type,
                     size_t offset, size_t count,
                     bool indexed = false);
 
+    /**
+     * \brief Render several instances of the same geometry using a single
+     * draw call
+     *
+     * The parameters \c primitive_type, \c offset, \c count, and \c indexed
+     * have the same meaning as in \ref draw_array(). Vertex attributes
+     * uploaded with <tt>per_instance=true</tt> (see \ref set_buffer())
+     * advance once per instance.
+     *
+     * \param instance_count
+     *     Number of instances to render.
+     */
+    void draw_array_instanced(PrimitiveType primitive_type,
+                              size_t offset, size_t count,
+                              size_t instance_count,
+                              bool indexed = false);
+
+    /**
+     * \brief Render several ranges of the geometry arrays using a single
+     * draw call
+     *
+     * This is equivalent to calling \ref draw_array() once for each pair of
+     * entries <tt>offsets[i]</tt> and <tt>counts[i]</tt>, but submits all
+     * ranges at once (via \c glMultiDrawArrays / \c glMultiDrawElements
+     * where available).
+     *
+     * \param draw_count
+     *     Number of entries of the \c offsets and \c counts arrays
+     */
+    void draw_multi(PrimitiveType primitive_type, size_t draw_count,
+                    const int32_t *offsets, const int32_t *counts,
+                    bool indexed = false);
+
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
     uint32_t shader_handle() const { return m_shader_handle; }
 #elif defined(NANOGUI_USE_METAL)
@@ -208,38 +540,336 @@ protected:
         FragmentSampler,
         UniformBuffer,
         IndexBuffer,
+        UniformBlockBuffer,
     };
 
     struct Buffer {
         void *buffer = nullptr;
         BufferType type = Unknown;
         VariableType dtype = VariableType::Invalid;
+        /// Component type of a vertex attribute as declared in the shader code
+        VariableType attribute_dtype = VariableType::Invalid;
         int index = 0;
         size_t ndim = 0;
         size_t shape[3] { 0, 0, 0 };
         size_t size = 0;
+        size_t capacity = 0;
+        size_t offset = 0;
+        /// Distance between consecutive vertices in bytes (0: tightly packed)
+        size_t stride = 0;
+        /// Byte offset of the attribute within each vertex
+        size_t attribute_offset = 0;
+        /// Handle of the argument holding the storage of an interleaved buffer
+        size_t source = (size_t) -1;
+        /// Shared buffer referenced by the argument (see \ref nanogui::Buffer)
+        nanogui::Buffer *shared = nullptr;
+        /// Revision of the shared buffer seen by the last call to \ref begin()
+        uint32_t revision = 0;
+        bool streaming = false;
+        bool per_instance = false;
+        /// Map integer vertex data to <tt>[0, 1]</tt> or <tt>[-1, 1]</tt>
+        bool normalized = false;
         bool dirty = false;
+        std::string name;
 
         std::string to_string() const;
     };
 
+    /// Create a record for a new shader parameter and return its handle
+    size_t register_argument(const std::string &name);
+
+    /// Return the handle of a named shader parameter or throw an exception
+    size_t find_argument(const std::string &name, const char *caller) const;
+
+    /// Return the record associated with a handle or throw an exception
+    Buffer &argument(size_t handle, const char *caller) {
+        if (!m_ready)
+            throw_not_ready(caller);
+        else if (handle >= m_buffers.size())
+            throw std::runtime_error(std::string(caller) +
+                                     ": invalid argument handle!");
+        return m_buffers[handle];
+    }
+
+    /// Raise an exception for an operation that requires a ready program
+    [[noreturn]] void throw_not_ready(const char *caller) const;
+
+    /**
+     * \brief Postpone a name-based call until the program is ready
+     *
+     * A pending call with the same \c key (e.g. an earlier value of the same
+     * parameter) is discarded.
+     */
+    void defer(const std::string &key, std::function<void()> &&func);
+
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    /// Check link errors, reflect the parameters and mark the program as ready
+    void finalize_program();
+
+    /// Try to initialize the program and parameter layout from a cache entry
+    bool load_program_binary(const std::string &path);
+
+    /// Write the program and parameter layout to a cache entry
+    void save_program_binary(const std::string &path) const;
+
+    /// Transfer the contents of a vertex or index buffer to the GPU
+    void upload_buffer(Buffer &buf, const void *data, size_t size);
+
+    /**
+     * \brief Detach an attribute from an interleaved buffer
+     *
+     * When \c handle refers to the attribute holding the storage, the other
+     * attributes of the interleaved buffer become unbound.
+     */
+    void release_interleaved(size_t handle);
+
+    /// Stop referencing the shared buffer associated with an argument (if any)
+    void release_shared(size_t handle);
+
+    /// Adopt the current shape and dtype of the shared buffer of an argument
+    void sync_shared(size_t handle);
+#endif
+
+    /// Flag a parameter so that the next call to \ref begin() binds it
+    void mark_dirty(size_t handle) {
+        Buffer &buf = m_buffers[handle];
+        if (!buf.dirty) {
+            buf.dirty = true;
+            m_dirty.push_back(handle);
+        }
+    }
+
 protected:
     RenderPass* m_render_pass;
     std::string m_name;
-    std::unordered_map<std::string, Buffer> m_buffers;
+    /// Records of all shader parameters, indexed by their handle
+    std::vector<Buffer> m_buffers;
+    /// Maps parameter names to handles
+    std::unordered_map<std::string, size_t> m_argument_handles;
+    /// Handles of parameters that changed since the last \ref begin()
+    std::vector<size_t> m_dirty;
+    /// Handles of texture parameters (bound on every \ref begin())
+    std::vector<size_t> m_textures;
+    /// Handles of uniform block parameters (bound on every \ref begin())
+    std::vector<size_t> m_uniform_blocks;
+    /// Handles of parameters referencing a shared \ref nanogui::Buffer
+    std::vector<size_t> m_shared_buffers;
+    /// Handle of the reserved 'indices' parameter
+    size_t m_indices = 0;
+    /// Are all parameters associated with data?
+    bool m_all_bound = false;
     BlendMode m_blend_mode;
+    /// Has the program finished compiling and linking?
+    bool m_ready = true;
+    std::function<void()> m_ready_callback;
+    /// Name-based calls made before the program was ready
+    std::vector<std::pair<std::string, std::function<void()>>> m_deferred;
 
     #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+        struct StreamBuffer;
+        std::unique_ptr<StreamBuffer> m_stream_buffer;
         uint32_t m_shader_handle = 0;
+        /// Shader objects and cache entry of a program that is still linking
+        uint32_t m_pending_shaders[2] { 0, 0 };
+        std::string m_pending_cache_path;
+        /// Set by \ref begin() when the program was not ready yet
+        bool m_skip_draws = false;
     #  if defined(NANOGUI_USE_OPENGL)
         uint32_t m_vertex_array_handle = 0;
         bool m_uses_point_size = false;
+        /// Scratch space for the index buffer offsets used by \ref draw_multi()
+        std::vector<const void *> m_multi_draw_offsets;
     #  endif
     #elif defined(NANOGUI_USE_METAL)
         void *m_pipeline_state;
     #endif
 };
 
+/**
+ * \brief Uniform buffer object that can be shared by several shaders
+ *
+ * A uniform block stores the members of a GLSL interface block such as
+ *
+ * \code
+ * layout(std140) uniform Camera {
+ *     mat4 view;
+ *     mat4 proj;
+ * };
+ * \endcode
+ *
+ * Its layout is reflected from the shader passed to the constructor. Every
+ * shader that declares the same block with \c std140 layout can then use it
+ * via \ref Shader::set_uniform_block(). Updating a value shared by many
+ * shaders thus requires a single transfer per frame instead of one call to
+ * \ref Shader::set_uniform() per shader.
+ *
+ * Uniform blocks require OpenGL 3.1 or OpenGL ES 3. They are not supported by
+ * the Metal backend.
+ */
+class NANOGUI_EXPORT UniformBlock : public Object {
+public:
+    /**
+     * \brief Create a uniform buffer matching the layout of the uniform block
+     * \c name declared by \c shader
+     */
+    UniformBlock(const Shader *shader, const std::string &name);
+
+    /// Release all resources
+    virtual ~UniformBlock();
+
+    /// Return the name of the uniform block
+    const std::string &name() const { return m_name; }
+
+    /// Return the size of the uniform block in bytes
+    size_t size() const { return m_data.size(); }
+
+    /**
+     * \brief Set the value of a member of the uniform block
+     *
+     * The dtype and shape must match the declaration of the member. Arrays
+     * add a leading dimension, and matrices should be specified in
+     * column-major order. The GPU copy is updated by the next call to \ref
+     * upload().
+     */
+    void set_buffer(const std::string &name, VariableType type, size_t ndim,
+                    const size_t *shape, const void *data);
+
+    void set_buffer(const std::string &name, VariableType type,
+                    std::initializer_list<size_t> shape, const void *data) {
+        set_buffer(name, type, shape.end() - shape.begin(), shape.begin(), data);
+    }
+
+    /// Set the value of a member (e.g. a vector or matrix) of the uniform block
+    template <typename Array> void set_uniform(const std::string &name,
+                                               const Array &value) {
+        size_t shape[3], ndim;
+        const void *data;
+        VariableType vtype;
+
+        if (!detail::uniform_info(value, vtype, ndim, shape, data))
+            throw std::runtime_error("UniformBlock::set_uniform(): invalid input array dimension!");
+
+        set_buffer(name, vtype, ndim, shape, data);
+    }
+
+    /**
+     * \brief Transfer modified members to the GPU
+     *
+     * This function is called by \ref Shader::begin() and only needs to be
+     * invoked manually when the buffer is used outside of NanoGUI.
+     */
+    void upload();
+
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    uint32_t buffer_handle() const { return m_buffer_handle; }
+#endif
+
+protected:
+    struct Member {
+        VariableType dtype = VariableType::Invalid;
+        size_t ndim = 0;
+        size_t shape[3] { 1, 1, 1 };
+        size_t offset = 0;
+        size_t array_stride = 0;
+        size_t matrix_stride = 0;
+
+        std::string to_string() const;
+    };
+
+protected:
+    std::string m_name;
+    std::unordered_map<std::string, Member> m_members;
+    std::vector<uint8_t> m_data;
+    /// Byte range of \ref m_data that was modified since the last upload
+    size_t m_dirty_start = 0, m_dirty_end = 0;
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    uint32_t m_buffer_handle = 0;
+#endif
+};
+
+/**
+ * \brief GPU buffer with vertex or index data that can be shared by several
+ * shaders
+ *
+ * \ref Shader::set_buffer() copies data into storage owned by the shader,
+ * hence geometry that is rendered using several shaders (e.g. in a depth
+ * pre-pass, a shading pass, and a picking pass) is stored once per shader.
+ * A buffer instead holds a single copy that any number of shaders can
+ * reference (see \ref Shader::set_buffer(const std::string &, Buffer *, bool)).
+ * New contents uploaded to it are seen by all of them.
+ *
+ * Shared buffers are not supported by the Metal backend.
+ */
+class NANOGUI_EXPORT Buffer : public Object {
+public:
+    /// The kind of data stored in the buffer
+    enum class Type {
+        /// Vertex attributes (a two-dimensional array)
+        Vertex,
+        /// Indices (a one-dimensional \c uint32, \c uint16, or \c uint8 array)
+        Index
+    };
+
+    /// Create an empty buffer
+    Buffer(Type type);
+
+    /// Release all resources
+    virtual ~Buffer();
+
+    /// Return the kind of data stored in the buffer
+    Type type() const { return m_type; }
+
+    /// Return the type of the stored values (\c Invalid if empty)
+    VariableType dtype() const { return m_dtype; }
+
+    /// Return the number of dimensions of the stored array
+    size_t ndim() const { return m_ndim; }
+
+    /// Return the shape of the stored array
+    const size_t *shape() const { return m_shape; }
+
+    /// Return the size of the contents in bytes
+    size_t size() const { return m_size; }
+
+    /**
+     * \brief Return a counter that is incremented by every call to \ref
+     * upload()
+     *
+     * Shaders compare it against the value seen during their last call to
+     * \ref Shader::begin() to detect modifications.
+     */
+    uint32_t revision() const { return m_revision; }
+
+    /**
+     * \brief Replace the contents of the buffer
+     *
+     * The existing GPU storage is reused when it is large enough.
+     */
+    void upload(VariableType type, size_t ndim, const size_t *shape,
+                const void *data);
+
+    void upload(VariableType type, std::initializer_list<size_t> shape,
+                const void *data) {
+        upload(type, shape.end() - shape.begin(), shape.begin(), data);
+    }
+
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    uint32_t buffer_handle() const { return m_buffer_handle; }
+#endif
+
+protected:
+    Type m_type;
+    VariableType m_dtype = VariableType::Invalid;
+    size_t m_ndim = 0;
+    size_t m_shape[3] { 0, 0, 0 };
+    size_t m_size = 0;
+    size_t m_capacity = 0;
+    uint32_t m_revision = 0;
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    uint32_t m_buffer_handle = 0;
+#endif
+};
+
 /// Access binary data stored in nanogui_resources.cpp
 #define NANOGUI_RESOURCE_STRING(name) std::string(name, name + name##_size)
 
@@ -19,6 +19,10 @@
 #include <nanogui/object.h>
 #include <nanogui/vector.h>
 #include <nanogui/traits.h>
+#include <functional>
+#include <future>
+#include <utility>
+#include <vector>
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -63,7 +67,18 @@ public:
 
         // Floating point formats
         Float16  = (uint16_t) VariableType::Float16,
-        Float32  = (uint32_t) VariableType::Float32
+        Float32  = (uint32_t) VariableType::Float32,
+
+        /**
+         * Block-compressed formats. The pixel format specifies the channels
+         * stored by the blocks: \c BC1 (RGB or RGBA), \c BC2 and \c BC3
+         * (RGBA), \c BC4 (R), \c BC5 (RA), \c BC6H (RGB, unsigned half
+         * precision), \c BC7 (RGBA), \c ETC2 (R and RA via EAC, RGB, or
+         * RGBA), and \c ASTC4x4 / \c ASTC8x8 (RGBA). Such textures cannot be
+         * render targets, and mip maps must be uploaded using \ref
+         * upload_mipmap(). See \ref test_texture_compression_support().
+         */
+        BC1 = 0x80, BC2, BC3, BC4, BC5, BC6H, BC7, ETC2, ASTC4x4, ASTC8x8
     };
 
     /// Texture interpolation mode
@@ -96,7 +111,17 @@ public:
         ShaderRead = 0x01,
 
         /// Target framebuffer for rendering
-        RenderTarget = 0x02
+        RenderTarget = 0x02,
+
+        /**
+         * Contents are replaced frequently (e.g. by video frames). The
+         * texture has immutable storage, and \ref upload() writes through a
+         * ring of pixel unpack buffers so that copying the next frame can
+         * overlap with the GPU consuming the previous one. Requires \ref
+         * ShaderRead and cannot be combined with \ref RenderTarget, MSAA,
+         * or \ref resize(). Ignored by the Metal backend.
+         */
+        Streaming = 0x04
     };
 
     /**
@@ -126,6 +151,64 @@ public:
             InterpolationMode mag_interpolation_mode = InterpolationMode::Bilinear,
             WrapMode wrap_mode                       = WrapMode::ClampToEdge);
 
+    /**
+     * \brief Load a set of images in the background
+     *
+     * The files are decoded in parallel on a pool of worker threads. Each
+     * texture is then created and uploaded on the main thread using \ref
+     * async(), which means that the returned futures only become ready while
+     * \ref mainloop() is running. Blocking on them from the main thread will
+     * therefore deadlock.
+     *
+     * The optional \c callback is invoked on the main thread as soon as a
+     * texture is ready and receives its index within \c filenames. It is
+     * passed \c nullptr when the file could not be loaded, in which case the
+     * associated future holds the exception.
+     */
+    static std::vector<std::future<ref<Texture>>>
+    load_async(const std::vector<std::string> &filenames,
+               const std::function<void(size_t, Texture *)> &callback = { },
+               InterpolationMode min_interpolation_mode = InterpolationMode::Bilinear,
+               InterpolationMode mag_interpolation_mode = InterpolationMode::Bilinear,
+               WrapMode wrap_mode                       = WrapMode::ClampToEdge);
+
+    /**
+     * \brief Create a texture from pixel data stored in a file
+     *
+     * The file is mapped into memory and uploaded in chunks of rows using
+     * \ref upload_sub_region(), so that only a small part of it is resident
+     * at any time. Four kinds of files are supported:
+     *
+     * - NumPy arrays (<tt>.npy</tt>) with shape <tt>(height, width)</tt> or
+     *   <tt>(height, width, channels)</tt> in C order, and an 8 or 16 bit
+     *   integer or a 16 or 32 bit floating point dtype.
+     *
+     * - DirectDraw surfaces (<tt>.dds</tt>) with an uncompressed 8, 16, or
+     *   32 bit per channel format, or a BC1-BC7 compressed format.
+     *
+     * - KTX 1.1 files (<tt>.ktx</tt>) with an uncompressed or compressed
+     *   format (see \ref ComponentFormat).
+     *
+     * - Headerless files containing packed pixels, whose layout must be
+     *   specified using \c pixel_format, \c component_format, and \c size.
+     *
+     * Files with a header are recognized automatically. In this case, the
+     * remaining parameters are ignored if \c size is zero, and otherwise
+     * checked against the contents of the file. When trilinear interpolation
+     * is requested and a DDS or KTX file contains a complete mip chain, its
+     * levels are uploaded as well. Otherwise, mip maps are generated on the
+     * GPU, which is not possible for block-compressed formats. BGR(A) data
+     * is converted to RGB(A) on backends that lack such textures.
+     */
+    static ref<Texture>
+    from_file_mapped(const std::string &filename,
+                     PixelFormat pixel_format = PixelFormat::RGBA,
+                     ComponentFormat component_format = ComponentFormat::Float32,
+                     const Vector2i &size = Vector2i(0),
+                     InterpolationMode min_interpolation_mode = InterpolationMode::Bilinear,
+                     InterpolationMode mag_interpolation_mode = InterpolationMode::Bilinear,
+                     WrapMode wrap_mode                       = WrapMode::ClampToEdge);
+
     /// Return the pixel format
     PixelFormat pixel_format() const { return m_pixel_format; }
 
@@ -150,21 +233,118 @@ public:
     /// Return the size of this texture
     const Vector2i &size() const { return m_size; }
 
-    /// Return the number of bytes consumed per pixel of this texture
+    /// Return the number of bytes consumed per pixel of this texture (uncompressed formats only)
     size_t bytes_per_pixel() const;
 
     /// Return the number of channels of this texture
     size_t channels() const;
 
+    /// Does the texture use a block-compressed component format?
+    bool compressed() const;
+
+    /// Return the size of the pixel blocks that are compressed together (1x1 if uncompressed)
+    Vector2i block_size() const;
+
+    /// Return the number of bytes consumed per block of pixels (see \ref block_size())
+    size_t bytes_per_block() const;
+
+    /// Return the number of bytes occupied by packed data covering a region of the given size
+    size_t data_size(const Vector2i &size) const;
+
     /// Upload packed pixel data from the CPU to the GPU
     void upload(const uint8_t *data);
 
-    /// Upload packed pixel data to a rectangular sub-region of the texture from the CPU to the GPU
+    /**
+     * \brief Upload packed pixel data to a rectangular sub-region of the
+     * texture from the CPU to the GPU
+     *
+     * For block-compressed formats, the region must be aligned to the block
+     * size (except where it touches the right or bottom edge of the texture).
+     */
     void upload_sub_region(const uint8_t *data, const Vector2i& origin, const Vector2i& size);
 
-    /// Download packed pixel data from the GPU to the CPU
+    /**
+     * \brief Upload packed pixel data for a given mip level
+     *
+     * Level 0 corresponds to \ref upload(), and each further level halves
+     * the resolution. This is mainly useful for precomputed mip chains of
+     * block-compressed textures, which cannot be generated on the GPU. The
+     * texture should then be created with <tt>mipmap_manual=true</tt>, and all
+     * levels down to 1x1 must be provided to enable trilinear interpolation.
+     * Only supported by the OpenGL backend.
+     */
+    void upload_mipmap(uint32_t level, const uint8_t *data);
+
+    /**
+     * \brief Download packed pixel data from the GPU to the CPU
+     *
+     * The Python bindings return a new array. Alternatively, they write into
+     * the C-contiguous array passed via the \c out argument (e.g. to reuse
+     * a buffer across frames), whose shape and dtype must match the texture.
+     */
     void download(uint8_t *data);
 
+    /**
+     * \brief Pending transfer of the texture contents to the CPU (see \ref
+     * Texture::download_async())
+     */
+    class NANOGUI_EXPORT Download : public Object {
+    public:
+        /// Return the texture being downloaded
+        Texture *texture() { return m_texture; }
+
+        /// Return the texture being downloaded (const version)
+        const Texture *texture() const { return m_texture.get(); }
+
+        /// Return the size of the downloaded data in bytes
+        size_t size() const { return m_size; }
+
+        /// Check whether the data has arrived without blocking
+        bool ready();
+
+        /**
+         * \brief Copy the downloaded data into \c data, which must provide
+         * space for \ref size() bytes
+         *
+         * Blocks until the transfer has finished. The data remains available
+         * until the download is destroyed, hence this function may be called
+         * multiple times. The Python bindings accept an \c out argument as in
+         * \ref Texture::download().
+         */
+        void read(uint8_t *data);
+
+    protected:
+        friend class Texture;
+        Download(Texture *texture, size_t size);
+        virtual ~Download();
+
+    protected:
+        ref<Texture> m_texture;
+        size_t m_size;
+    #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+        uint32_t m_buffer_handle = 0;
+        size_t m_capacity = 0;
+        void *m_fence = nullptr;
+    #endif
+    };
+
+    /**
+     * \brief Start an asynchronous download of the texture contents
+     *
+     * The data is copied into a pixel buffer object on the GPU timeline, and
+     * the function returns immediately. The returned \ref Download can be
+     * polled using \ref Download::ready() and provides the data via \ref
+     * Download::read(). When capturing a sequence of frames, keeping two or
+     * three downloads in flight avoids stalling the GPU pipeline. The pixel
+     * buffer objects are recycled once a download is destroyed.
+     *
+     * The rows are ordered as in \ref download(). When \c flip is \c true,
+     * their order is additionally reversed, which is done on the GPU.
+     *
+     * Only supported by the OpenGL backend.
+     */
+    ref<Download> download_async(bool flip = false);
+
     /// Resize the texture (discards the current contents)
     void resize(const Vector2i &size);
 
@@ -186,6 +366,11 @@ protected:
     /// Initialize the texture handle
     void init();
 
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    /// Replace the contents of a streaming texture (see \ref TextureFlags::Streaming)
+    void upload_streaming(const uint8_t *data);
+#endif
+
 protected:
     PixelFormat m_pixel_format;
     ComponentFormat m_component_format;
@@ -200,6 +385,16 @@ protected:
     #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
         uint32_t m_texture_handle = 0;
         uint32_t m_renderbuffer_handle = 0;
+        /// Pixel buffer objects (and their capacity) available to \ref download_async()
+        std::vector<std::pair<uint32_t, size_t>> m_download_buffers;
+        /// Staging texture and framebuffers used to flip downloads on the GPU
+        uint32_t m_flip_texture_handle = 0;
+        uint32_t m_flip_framebuffer_handles[2] { 0, 0 };
+        Vector2i m_flip_size { 0, 0 };
+        /// Ring of pixel unpack buffers and fences used by streaming textures
+        uint32_t m_upload_buffer_handles[3] { 0, 0, 0 };
+        void *m_upload_fences[3] { nullptr, nullptr, nullptr };
+        uint32_t m_upload_index = 0;
     #elif defined(NANOGUI_USE_METAL)
         void *m_texture_handle = nullptr;
         void *m_sampler_state_handle = nullptr;
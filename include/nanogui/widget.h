@@ -16,6 +16,7 @@
 #include <nanogui/theme.h>
 #include <vector>
 #include <algorithm>
+#include <memory>
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -62,7 +63,11 @@ public:
     /// Return the position relative to the parent widget
     const Vector2i &position() const { return m_pos; }
     /// Set the position relative to the parent widget
-    void set_position(const Vector2i &pos) { m_pos = pos; }
+    void set_position(const Vector2i &pos) {
+        if (m_parent && m_pos != pos)
+            m_parent->invalidate_spatial_index();
+        m_pos = pos;
+    }
 
     /// Return the absolute position on screen
     Vector2i absolute_position() const {
@@ -73,17 +78,21 @@ public:
     /// Return the size of the widget
     const Vector2i &size() const { return m_size; }
     /// set the size of the widget
-    void set_size(const Vector2i &size) { m_size = size; }
+    void set_size(const Vector2i &size) {
+        if (m_parent && m_size != size)
+            m_parent->invalidate_spatial_index();
+        m_size = size;
+    }
 
     /// Return the width of the widget
     int width() const { return m_size.x(); }
     /// Set the width of the widget
-    void set_width(int width) { m_size.x() = width; }
+    void set_width(int width) { set_size(Vector2i(width, m_size.y())); }
 
     /// Return the height of the widget
     int height() const { return m_size.y(); }
     /// Set the height of the widget
-    void set_height(int height) { m_size.y() = height; }
+    void set_height(int height) { set_size(Vector2i(m_size.x(), height)); }
 
     /**
      * \brief Set the fixed size of this widget
@@ -186,6 +195,18 @@ public:
     /// Request the focus to be moved to this widget
     void request_focus();
 
+    /**
+     * \brief Request the screen containing this widget to be redrawn for
+     * an animation
+     *
+     * Animated widgets should call this function from \ref draw() as long
+     * as the animation runs. The frame is drawn once \c delay seconds have
+     * elapsed, though no sooner than the target frame rate of the screen
+     * permits (see \ref Screen::set_target_fps()). Requests are one-shot
+     * and may only be issued from the main thread.
+     */
+    void request_animation_frame(double delay = 0.0);
+
     const std::string &tooltip() const { return m_tooltip; }
     void set_tooltip(const std::string &tooltip) { m_tooltip = tooltip; }
 
@@ -224,6 +245,32 @@ public:
     Widget *find_widget(const Vector2i &p);
     const Widget *find_widget(const Vector2i &p) const;
 
+    /// Does \ref find_widget() use a spatial index of the children?
+    bool spatial_index() const { return (bool) m_spatial_index; }
+
+    /**
+     * \brief Accelerate \ref find_widget() using a spatial index of the
+     * children?
+     *
+     * By default, \ref find_widget() tests the children of each widget one
+     * by one. For containers with many children (e.g. a grid of thousands of
+     * buttons), this option maintains a uniform grid over the children's
+     * bounding boxes so that only the few candidates overlapping the query
+     * position are tested. The result is identical to that of a linear
+     * search: the topmost (i.e. last) visible child containing the position
+     * is returned. Disabled by default.
+     *
+     * The index is rebuilt lazily by the next query following a change.
+     * Adding or removing children and calls to \ref set_position() and \ref
+     * set_size() (e.g. by \ref perform_layout()) are tracked automatically.
+     * Code that modifies the geometry or order of the children in other ways
+     * must call \ref invalidate_spatial_index().
+     */
+    void set_spatial_index(bool value);
+
+    /// Request a rebuild of the spatial index (see \ref set_spatial_index())
+    void invalidate_spatial_index() { m_spatial_index_dirty = true; }
+
     /// Handle a mouse button event (default implementation: propagate to children)
     virtual bool mouse_button_event(const Vector2i &p, int button, bool down, int modifiers);
 
@@ -270,6 +317,13 @@ protected:
      */
     float icon_scale() const { return m_theme->m_icon_scale * m_icon_extra_scale; }
 
+    /**
+     * \brief Return the topmost visible child containing the position \c p
+     * (relative to this widget) using the spatial index, rebuilding it first
+     * if needed
+     */
+    Widget *spatial_index_lookup(const Vector2i &p) const;
+
 protected:
     Widget *m_parent;
     ref<Theme> m_theme;
@@ -291,6 +345,11 @@ protected:
      */
     bool m_enabled;
     bool m_focused, m_mouse_focus;
+
+    /// Uniform grid over the children, see \ref set_spatial_index()
+    struct SpatialIndex;
+    std::unique_ptr<SpatialIndex> m_spatial_index;
+    mutable bool m_spatial_index_dirty;
     std::string m_tooltip;
     int m_font_size;
 
@@ -11,11 +11,12 @@ struct VertexOut {
 vertex VertexOut vertex_main(const device float2 *position,
                              constant float4x4 &matrix_image,
                              constant float4x4 &matrix_background,
+                             constant float4 &uv_rect,
                              uint id [[vertex_id]]) {
     float4 p = float4(position[id], 0.f, 1.f);
     VertexOut vert;
     vert.position_image = matrix_image * p;
     vert.position_background = (matrix_background * p).xy;
-    vert.uv = p.xy;
+    vert.uv = uv_rect.xy + p.xy * uv_rect.zw;
     return vert;
 }
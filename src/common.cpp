@@ -20,10 +20,17 @@
 
 #include <nanogui/opengl.h>
 #include <nanogui/metal.h>
+#include <stb_image.h>
 #include <map>
+#include <deque>
+#include <cmath>
+#include <limits>
+#include <atomic>
+#include <future>
 #include <thread>
 #include <chrono>
 #include <mutex>
+#include <condition_variable>
 #include <iostream>
 
 #if !defined(_WIN32)
@@ -44,7 +51,7 @@ extern std::map<GLFWwindow *, Screen *> __nanogui_screens;
   extern void disable_saved_application_state_osx();
 #endif
 
-void init() {
+void init(bool headless) {
     #if !defined(_WIN32)
         /* Avoid locale-related number parsing issues */
         setlocale(LC_NUMERIC, "C");
@@ -63,6 +70,13 @@ void init() {
         }
     );
 
+#if defined(GLFW_PLATFORM_NULL) && !defined(NANOGUI_USE_METAL) && !defined(EMSCRIPTEN)
+    glfwInitHint(GLFW_PLATFORM, headless ? GLFW_PLATFORM_NULL : GLFW_ANY_PLATFORM);
+#else
+    if (headless)
+        throw std::runtime_error("init(): headless mode is not supported by this build!");
+#endif
+
     if (!glfwInit())
         throw std::runtime_error("Could not initialize GLFW!");
 
@@ -73,69 +87,102 @@ void init() {
     glfwSetTime(0);
 }
 
-static bool mainloop_active = false;
-
-#if defined(EMSCRIPTEN)
-static double emscripten_last = 0;
-static float emscripten_refresh = 0;
-#endif
+static std::atomic<bool> mainloop_active { false };
+static float mainloop_refresh = -1.f;
 
 std::mutex m_async_mutex;
 std::vector<std::function<void()>> m_async_functions;
 
-void mainloop(float refresh) {
-    if (mainloop_active)
-        throw std::runtime_error("Main loop is already running!");
+/* GLFW does not deliver events without a window system (headless mode), hence
+   waits for events are emulated using a condition variable in this case */
+static std::mutex mainloop_mutex;
+static std::condition_variable mainloop_cond;
+static bool mainloop_wakeup = false;
+
+void __nanogui_post_empty_event() {
+#if !defined(EMSCRIPTEN)
+    {
+        std::lock_guard<std::mutex> guard(mainloop_mutex);
+        mainloop_wakeup = true;
+    }
+    mainloop_cond.notify_all();
+    glfwPostEmptyEvent();
+#endif
+}
 
-    auto mainloop_iteration = []() {
-        int num_screens = 0;
+#if !defined(EMSCRIPTEN)
+/// Wait for events for up to 'timeout' seconds (indefinitely if infinite)
+static void mainloop_wait(double timeout) {
+#if defined(GLFW_PLATFORM_NULL)
+    if (glfwGetPlatform() == GLFW_PLATFORM_NULL) {
+        std::unique_lock<std::mutex> guard(mainloop_mutex);
+        auto pred = []() { return mainloop_wakeup || !mainloop_active; };
+        if (std::isinf(timeout))
+            mainloop_cond.wait(guard, pred);
+        else if (timeout > 0)
+            mainloop_cond.wait_for(guard, std::chrono::duration<double>(timeout), pred);
+        mainloop_wakeup = false;
+        return;
+    }
+#endif
 
-        #if defined(EMSCRIPTEN)
-            double emscripten_now = glfwGetTime();
-            bool emscripten_redraw = false;
-            if (float((emscripten_now - emscripten_last) * 1000) > emscripten_refresh) {
-                emscripten_redraw = true;
-                emscripten_last = emscripten_now;
-            }
-        #endif
+    if (std::isinf(timeout))
+        glfwWaitEvents();
+    else if (timeout > 0)
+        glfwWaitEventsTimeout(timeout);
+    else
+        glfwPollEvents();
+}
+#endif
 
-        /* Run async functions */ {
-            std::lock_guard<std::mutex> guard(m_async_mutex);
-            for (auto &f : m_async_functions)
-                f();
-            m_async_functions.clear();
-        }
+static void mainloop_iteration() {
+    int num_screens = 0;
 
-        for (auto kv : __nanogui_screens) {
-            Screen *screen = kv.second;
-            if (!screen->visible()) {
-                continue;
-            } else if (glfwWindowShouldClose(screen->glfw_window())) {
-                screen->set_visible(false);
-                continue;
-            }
-            #if defined(EMSCRIPTEN)
-                if (emscripten_redraw || screen->tooltip_fade_in_progress())
-                    screen->redraw();
-            #endif
-            screen->draw_all();
-            num_screens++;
-        }
+    /* Run async functions */ {
+        std::lock_guard<std::mutex> guard(m_async_mutex);
+        for (auto &f : m_async_functions)
+            f();
+        m_async_functions.clear();
+    }
 
-        if (num_screens == 0) {
-            /* Give up if there was nothing to draw */
-            mainloop_active = false;
-            return;
+    double deadline = std::numeric_limits<double>::infinity();
+    for (auto kv : __nanogui_screens) {
+        Screen *screen = kv.second;
+        if (!screen->visible()) {
+            continue;
+        } else if (glfwWindowShouldClose(screen->glfw_window())) {
+            screen->set_visible(false);
+            continue;
         }
 
-        #if !defined(EMSCRIPTEN)
-            /* Wait for mouse/keyboard or empty refresh events */
-            glfwWaitEvents();
-        #endif
-    };
+        screen->draw_all();
+        if (mainloop_refresh >= 0)
+            screen->request_animation_frame(mainloop_refresh * 1e-3);
+        deadline = std::min(deadline, screen->frame_deadline());
+        num_screens++;
+    }
+
+    if (num_screens == 0) {
+        /* Give up if there was nothing to draw */
+        mainloop_active = false;
+        return;
+    }
+
+    #if !defined(EMSCRIPTEN)
+        /* Sleep until an event arrives or an animation frame is due */
+        mainloop_wait(deadline - glfwGetTime());
+    #else
+        (void) deadline;
+    #endif
+}
+
+void mainloop(float refresh) {
+    if (mainloop_active)
+        throw std::runtime_error("Main loop is already running!");
+
+    mainloop_refresh = refresh;
 
 #if defined(EMSCRIPTEN)
-    emscripten_refresh = refresh;
     /* The following will throw an exception and enter the main
        loop within Emscripten. This means that none of the code below
        (or in the caller, for that matter) will be executed */
@@ -144,42 +191,6 @@ void mainloop(float refresh) {
 
     mainloop_active = true;
 
-    std::thread refresh_thread;
-    std::chrono::microseconds quantum;
-    size_t quantum_count = 1;
-    if (refresh >= 0) {
-        quantum = std::chrono::microseconds((int64_t)(refresh * 1'000));
-        while (quantum.count() > 50'000) {
-            quantum /= 2;
-            quantum_count *= 2;
-        }
-    } else {
-        quantum = std::chrono::microseconds(50'000);
-        quantum_count = std::numeric_limits<size_t>::max();
-    }
-
-    /* If there are no mouse/keyboard events, try to refresh the
-       view roughly every 50 ms (default); this is to support animations
-       such as progress bars while keeping the system load
-       reasonably low */
-    refresh_thread = std::thread(
-        [quantum, quantum_count]() {
-            while (true) {
-                for (size_t i = 0; i < quantum_count; ++i) {
-                    if (!mainloop_active)
-                        return;
-                    std::this_thread::sleep_for(quantum);
-                    for (auto kv : __nanogui_screens) {
-                        if (kv.second->tooltip_fade_in_progress())
-                            kv.second->redraw();
-                    }
-                }
-                for (auto kv : __nanogui_screens)
-                    kv.second->redraw();
-            }
-        }
-    );
-
     try {
         while (mainloop_active)
             mainloop_iteration();
@@ -190,17 +201,19 @@ void mainloop(float refresh) {
         std::cerr << "Caught exception in main loop: " << e.what() << std::endl;
         leave();
     }
-
-    refresh_thread.join();
 }
 
 void async(const std::function<void()> &func) {
-    std::lock_guard<std::mutex> guard(m_async_mutex);
-    m_async_functions.push_back(func);
+    {
+        std::lock_guard<std::mutex> guard(m_async_mutex);
+        m_async_functions.push_back(func);
+    }
+    __nanogui_post_empty_event();
 }
 
 void leave() {
     mainloop_active = false;
+    __nanogui_post_empty_event();
 }
 
 bool active() {
@@ -216,7 +229,66 @@ std::pair<bool, bool> test_10bit_edr_support() {
 }
 
 
+/* Pool of worker threads that run background tasks (e.g. image decoding) */
+static struct WorkerPool {
+    std::mutex mutex;
+    std::condition_variable cond;
+    std::deque<std::function<void()>> queue;
+    std::vector<std::thread> threads;
+    bool stop = false;
+
+    void run() {
+        while (true) {
+            std::function<void()> func;
+            /* Fetch the next task */ {
+                std::unique_lock<std::mutex> guard(mutex);
+                cond.wait(guard, [&]{ return stop || !queue.empty(); });
+                if (stop)
+                    return;
+                func = std::move(queue.front());
+                queue.pop_front();
+            }
+            try {
+                func();
+            } catch (const std::exception &e) {
+                std::cerr << "Caught exception in worker thread: " << e.what() << std::endl;
+            }
+        }
+    }
+
+    void shutdown() {
+        /* Discard pending tasks and wait for running ones to finish */ {
+            std::lock_guard<std::mutex> guard(mutex);
+            stop = true;
+            queue.clear();
+        }
+        cond.notify_all();
+        for (auto &thread : threads)
+            thread.join();
+        threads.clear();
+        stop = false;
+    }
+
+    ~WorkerPool() { shutdown(); }
+} worker_pool;
+
+void __nanogui_run_worker(std::function<void()> &&func) {
+#if defined(EMSCRIPTEN)
+    func();
+#else
+    std::lock_guard<std::mutex> guard(worker_pool.mutex);
+    if (worker_pool.threads.empty()) {
+        unsigned int count = std::max(1u, std::thread::hardware_concurrency());
+        for (unsigned int i = 0; i < count; ++i)
+            worker_pool.threads.emplace_back([]{ worker_pool.run(); });
+    }
+    worker_pool.queue.push_back(std::move(func));
+    worker_pool.cond.notify_one();
+#endif
+}
+
 void shutdown() {
+    worker_pool.shutdown();
     glfwTerminate();
 
 #if defined(NANOGUI_USE_METAL)
@@ -267,7 +339,7 @@ int __nanogui_get_image(NVGcontext *ctx, const std::string &name, uint8_t *data,
 
 std::vector<std::pair<int, std::string>>
 load_image_directory(NVGcontext *ctx, const std::string &path) {
-    std::vector<std::pair<int, std::string> > result;
+    std::vector<std::string> filenames;
 #if !defined(_WIN32)
     DIR *dp = opendir(path.c_str());
     if (!dp)
@@ -286,12 +358,7 @@ load_image_directory(NVGcontext *ctx, const std::string &path) {
 #endif
         if (strstr(fname, "png") == nullptr)
             continue;
-        std::string full_name = path + "/" + std::string(fname);
-        int img = nvgCreateImage(ctx, full_name.c_str(), 0);
-        if (img == 0)
-            throw std::runtime_error("Could not open image data!");
-        result.push_back(
-            std::make_pair(img, full_name.substr(0, full_name.length() - 4)));
+        filenames.push_back(path + "/" + std::string(fname));
 #if !defined(_WIN32)
     }
     closedir(dp);
@@ -299,6 +366,41 @@ load_image_directory(NVGcontext *ctx, const std::string &path) {
     } while (FindNextFileA(handle, &ffd) != 0);
     FindClose(handle);
 #endif
+
+    /* Decode the images in parallel using the same settings as nvgCreateImage(),
+       then create the NanoVG images on the calling thread */
+    struct Image {
+        Vector2i size;
+        std::unique_ptr<uint8_t[], void(*)(void*)> data { nullptr, stbi_image_free };
+    };
+
+    stbi_set_unpremultiply_on_load(1);
+    stbi_convert_iphone_png_to_rgb(1);
+
+    std::vector<std::future<Image>> images;
+    images.reserve(filenames.size());
+    for (const std::string &filename : filenames) {
+        auto promise = std::make_shared<std::promise<Image>>();
+        images.push_back(promise->get_future());
+        __nanogui_run_worker([promise, filename]() {
+            Image image;
+            int n = 0;
+            image.data.reset(stbi_load(filename.c_str(), &image.size.x(),
+                                       &image.size.y(), &n, 4));
+            promise->set_value(std::move(image));
+        });
+    }
+
+    std::vector<std::pair<int, std::string>> result;
+    for (size_t i = 0; i < filenames.size(); ++i) {
+        Image image = images[i].get();
+        int img = image.data ? nvgCreateImageRGBA(ctx, image.size.x(), image.size.y(),
+                                                  0, image.data.get()) : 0;
+        if (img == 0)
+            throw std::runtime_error("Could not open image data!");
+        result.push_back(
+            std::make_pair(img, filenames[i].substr(0, filenames[i].length() - 4)));
+    }
     return result;
 }
 
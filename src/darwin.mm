@@ -167,6 +167,12 @@ void metal_window_set_content_scale(void *nswin_, float scale) {
     }
 }
 
+void metal_window_set_vsync(void *nswin_, bool vsync) {
+    NSWindow *nswin = (__bridge NSWindow *) nswin_;
+    CAMetalLayer *layer = (CAMetalLayer *) nswin.contentView.layer;
+    layer.displaySyncEnabled = vsync ? YES : NO;
+}
+
 void* metal_window_layer(void *nswin_) {
     NSWindow *nswin = (__bridge NSWindow *) nswin_;
     return (__bridge void *) nswin.contentView.layer;
@@ -541,6 +541,7 @@ public:
     virtual void draw(NVGcontext *ctx) {
         /* Animate the scrollbar */
         m_progress->set_value(std::fmod((float) glfwGetTime() / 10, 1.0f));
+        request_animation_frame();
 
         /* Draw the user interface */
         Screen::draw(ctx);
@@ -581,7 +582,7 @@ int main(int /* argc */, char ** /* argv */) {
             app->dec_ref();
             app->draw_all();
             app->set_visible(true);
-            nanogui::mainloop(1 / 60.f * 1000);
+            nanogui::mainloop();
         }
 
         nanogui::shutdown();
@@ -232,6 +232,9 @@ public:
     }
 
     virtual void draw(NVGcontext *ctx) {
+        // Keep the cube spinning
+        request_animation_frame();
+
         // Draw the user interface
         Screen::draw(ctx);
     }
@@ -247,7 +250,7 @@ int main(int /* argc */, char ** /* argv */) {
             nanogui::ref<ExampleApplication> app = new ExampleApplication();
             app->draw_all();
             app->set_visible(true);
-            nanogui::mainloop(1 / 60.f * 1000);
+            nanogui::mainloop();
         }
 
         nanogui::shutdown();
@@ -0,0 +1,459 @@
+/*
+    src/framecapture.cpp -- Streams the frames rendered by a Screen to the
+    CPU or to disk
+
+    NanoGUI was developed by Wenzel Jakob <wenzel.jakob@epfl.ch>.
+    The widget drawing code is based on the NanoVG demo application
+    by Mikko Mononen.
+
+    All rights reserved. Use of this source code is governed by a
+    BSD-style license that can be found in the LICENSE.txt file.
+*/
+
+#include <nanogui/framecapture.h>
+#include <nanogui/screen.h>
+#include <algorithm>
+#include <cctype>
+#include <cmath>
+#include <cstring>
+#include <iostream>
+
+NAMESPACE_BEGIN(nanogui)
+
+FrameCapture::FrameCapture(Screen *screen, size_t n_frames,
+                           const std::function<bool()> &until,
+                           size_t pool_size, float fps)
+    : m_screen(screen), m_size(screen->framebuffer_size()), m_n_frames(n_frames),
+      m_until(until), m_fps(fps) {
+#if defined(NANOGUI_USE_METAL)
+    throw std::runtime_error("FrameCapture::FrameCapture(): not supported by the Metal backend!");
+#elif defined(NANOGUI_USE_GLES)
+    throw std::runtime_error("FrameCapture::FrameCapture(): not supported on GLES!");
+#else
+    if (pool_size == 0)
+        throw std::runtime_error("FrameCapture::FrameCapture(): 'pool_size' must be positive!");
+
+    if (screen->headless()) {
+        m_texture = screen->back_buffer();
+    } else {
+        // Frames are copied into a texture of their own before being presented
+        m_texture = new Texture(screen->pixel_format(), screen->component_format(),
+                                m_size, Texture::InterpolationMode::Nearest,
+                                Texture::InterpolationMode::Nearest,
+                                Texture::WrapMode::ClampToEdge, 1,
+                                Texture::TextureFlags::ShaderRead |
+                                Texture::TextureFlags::RenderTarget);
+        m_screen_pass = new RenderPass({ screen });
+        m_capture_pass = new RenderPass({ m_texture.get() });
+    }
+
+    m_frame_size = m_texture->data_size(m_size);
+    for (size_t i = 0; i < pool_size; ++i)
+        m_buffers.emplace_back(new uint8_t[m_frame_size]);
+#endif
+}
+
+FrameCapture::~FrameCapture() {
+    try {
+        close();
+    } catch (const std::exception &e) {
+        std::cerr << "FrameCapture::~FrameCapture(): " << e.what() << std::endl;
+    }
+}
+
+void FrameCapture::set_sink(const std::string &filename, SinkFormat format) {
+    if (m_frames_started > 0 || m_closed)
+        throw std::runtime_error("FrameCapture::set_sink(): the capture has already started!");
+    else if (has_sink())
+        throw std::runtime_error("FrameCapture::set_sink(): a sink was already specified!");
+
+    if (format == SinkFormat::Auto) {
+        std::string extension;
+        size_t dot = filename.rfind('.');
+        if (dot != std::string::npos)
+            extension = filename.substr(dot);
+        std::transform(extension.begin(), extension.end(), extension.begin(),
+                       [](char c) { return (char) tolower(c); });
+
+        if (extension == ".y4m")
+            format = SinkFormat::Y4M;
+        else if (extension == ".png")
+            format = SinkFormat::PNG;
+        else
+            format = SinkFormat::Raw;
+    }
+
+    if (format != SinkFormat::Raw &&
+        m_texture->component_format() != Texture::ComponentFormat::UInt8)
+        throw std::runtime_error("FrameCapture::set_sink(): Y4M and PNG files require "
+                                 "a framebuffer with 8-bit components!");
+
+    m_sink_filename = filename;
+    if (format == SinkFormat::PNG) {
+        /* The file name serves as a printf() format string. Only permit a
+           single integer conversion and escaped percent signs. */
+        size_t conversions = 0;
+        for (size_t i = 0; i < filename.size(); ++i) {
+            if (filename[i] != '%')
+                continue;
+            if (i + 1 < filename.size() && filename[i + 1] == '%') {
+                ++i;
+                continue;
+            }
+            size_t j = i + 1;
+            while (j < filename.size() && isdigit((unsigned char) filename[j]))
+                ++j;
+            if (j == filename.size() || (filename[j] != 'd' && filename[j] != 'i'))
+                throw std::runtime_error(
+                    "FrameCapture::set_sink(): invalid placeholder in \"" + filename +
+                    "\" (use e.g. %05i for the frame index and %% for a percent sign)!");
+            conversions++;
+            i = j;
+        }
+        if (conversions > 1)
+            throw std::runtime_error(
+                "FrameCapture::set_sink(): \"" + filename +
+                "\" contains more than one placeholder for the frame index!");
+
+        // Insert a placeholder for the frame index if needed
+        if (conversions == 0) {
+            size_t dot = filename.rfind('.');
+            if (dot == std::string::npos)
+                dot = filename.size();
+            m_sink_filename = filename.substr(0, dot) + "_%06i" + filename.substr(dot);
+        }
+    } else {
+        m_sink_file = fopen(filename.c_str(), "wb");
+        if (!m_sink_file)
+            throw std::runtime_error("FrameCapture::set_sink(): could not open \"" +
+                                     filename + "\"!");
+    }
+
+    if (format == SinkFormat::Y4M) {
+        // Frame rates are specified as a fraction
+        int rate_num = m_fps > 0.f ? (int) std::lround(m_fps * 1000.f) : 30,
+            rate_den = m_fps > 0.f ? 1000 : 1;
+        fprintf(m_sink_file, "YUV4MPEG2 W%i H%i F%i:%i Ip A1:1 C444\n",
+                m_size.x(), m_size.y(), rate_num, rate_den);
+    }
+
+    m_sink_format = format;
+    for (auto &buffer : m_buffers)
+        m_sink_free.push_back(buffer.get());
+
+    m_sink_thread = std::thread([this]() { write_frames(); });
+}
+
+void FrameCapture::start_frame() {
+    if (m_fps > 0.f) {
+        /* Pace the frames. When rendering falls behind, the schedule restarts
+           from the current time instead of producing a burst of frames. */
+        auto now = std::chrono::steady_clock::now();
+        if (m_frames_started > 0 && m_next_frame > now)
+            std::this_thread::sleep_until(m_next_frame);
+        else
+            m_next_frame = now;
+        m_next_frame += std::chrono::duration_cast<std::chrono::steady_clock::duration>(
+            std::chrono::duration<double>(1.0 / m_fps));
+    }
+
+    m_screen->redraw();
+    if (m_screen_pass) {
+        m_screen->begin_frame();
+        m_screen->draw_setup();
+        m_screen->draw_contents();
+        m_screen->draw_widgets();
+        m_screen_pass->blit_to(Vector2i(0), m_size, m_capture_pass, Vector2i(0));
+        m_screen->draw_teardown();
+    } else {
+        m_screen->draw_all();
+    }
+
+    if (m_screen->framebuffer_size() != m_size)
+        throw std::runtime_error(
+            "FrameCapture::next(): the framebuffer was resized during the capture!");
+
+    m_pending.push_back({ m_frames_started++, m_texture->download_async() });
+}
+
+uint8_t *FrameCapture::acquire_buffer() {
+    if (!has_sink()) {
+        uint8_t *buffer = m_buffers[m_next_buffer].get();
+        m_next_buffer = (m_next_buffer + 1) % m_buffers.size();
+        return buffer;
+    }
+
+    std::unique_lock<std::mutex> guard(m_sink_mutex);
+    m_sink_cond.wait(guard, [&]() { return !m_sink_free.empty() || m_sink_error; });
+    if (m_sink_error)
+        std::rethrow_exception(m_sink_error);
+    uint8_t *buffer = m_sink_free.back();
+    m_sink_free.pop_back();
+    return buffer;
+}
+
+bool FrameCapture::next() {
+    check_sink();
+    if (m_closed)
+        return false;
+
+    while (!m_stopped && m_pending.size() < m_buffers.size()) {
+        if ((m_n_frames > 0 && m_frames_started == m_n_frames) || (m_until && m_until())) {
+            m_stopped = true;
+            break;
+        }
+        start_frame();
+    }
+
+    if (m_pending.empty()) {
+        close();
+        return false;
+    }
+
+    PendingFrame frame = std::move(m_pending.front());
+    m_pending.pop_front();
+
+    uint8_t *data = acquire_buffer();
+    frame.download->read(data);
+
+    m_frame_index = frame.index;
+    m_frames_done++;
+
+    if (has_sink()) {
+        m_current = nullptr;
+        std::lock_guard<std::mutex> guard(m_sink_mutex);
+        m_sink_queue.emplace_back(frame.index, data);
+        m_sink_cond.notify_all();
+    } else {
+        m_current = data;
+    }
+
+    return true;
+}
+
+void FrameCapture::run() {
+    while (next())
+        ;
+}
+
+void FrameCapture::close() {
+    if (m_closed)
+        return;
+    m_closed = m_stopped = true;
+    m_pending.clear();
+
+    if (m_sink_thread.joinable()) {
+        {
+            std::lock_guard<std::mutex> guard(m_sink_mutex);
+            m_sink_stop = true;
+        }
+        m_sink_cond.notify_all();
+        m_sink_thread.join();
+    }
+
+    if (m_sink_file) {
+        bool failed = fclose(m_sink_file) != 0;
+        m_sink_file = nullptr;
+        if (failed && !m_sink_error)
+            m_sink_error = std::make_exception_ptr(std::runtime_error(
+                "FrameCapture: could not write to \"" + m_sink_filename + "\"!"));
+    }
+
+    check_sink();
+}
+
+void FrameCapture::check_sink() {
+    std::exception_ptr error;
+    {
+        std::lock_guard<std::mutex> guard(m_sink_mutex);
+        std::swap(error, m_sink_error);
+    }
+    if (error)
+        std::rethrow_exception(error);
+}
+
+void FrameCapture::write_frames() {
+    while (true) {
+        std::pair<size_t, uint8_t *> item;
+        bool failed;
+
+        {
+            std::unique_lock<std::mutex> guard(m_sink_mutex);
+            m_sink_cond.wait(guard, [&]() { return !m_sink_queue.empty() || m_sink_stop; });
+            if (m_sink_queue.empty())
+                break;
+            item = m_sink_queue.front();
+            m_sink_queue.pop_front();
+            failed = (bool) m_sink_error;
+        }
+
+        std::exception_ptr error;
+        if (!failed) {
+            try {
+                write_frame(item.first, item.second);
+            } catch (...) {
+                error = std::current_exception();
+            }
+        }
+
+        {
+            std::lock_guard<std::mutex> guard(m_sink_mutex);
+            m_sink_free.push_back(item.second);
+            if (error)
+                m_sink_error = error;
+        }
+        m_sink_cond.notify_all();
+    }
+}
+
+/// Append a PNG chunk to 'file'
+static bool png_write_chunk(FILE *file, const char *type, const uint8_t *data, size_t size) {
+    static uint32_t crc_table[256] = { 0 };
+    if (crc_table[1] == 0) {
+        for (uint32_t i = 0; i < 256; ++i) {
+            uint32_t c = i;
+            for (int k = 0; k < 8; ++k)
+                c = (c & 1) ? (0xEDB88320u ^ (c >> 1)) : (c >> 1);
+            crc_table[i] = c;
+        }
+    }
+
+    uint32_t crc = 0xFFFFFFFFu;
+    auto update = [&](const uint8_t *ptr, size_t n) {
+        for (size_t i = 0; i < n; ++i)
+            crc = crc_table[(crc ^ ptr[i]) & 0xFF] ^ (crc >> 8);
+    };
+    update((const uint8_t *) type, 4);
+    update(data, size);
+    crc ^= 0xFFFFFFFFu;
+
+    uint8_t header[8] = { (uint8_t) (size >> 24), (uint8_t) (size >> 16),
+                          (uint8_t) (size >> 8), (uint8_t) size };
+    memcpy(header + 4, type, 4);
+    uint8_t footer[4] = { (uint8_t) (crc >> 24), (uint8_t) (crc >> 16),
+                          (uint8_t) (crc >> 8), (uint8_t) crc };
+
+    return fwrite(header, 8, 1, file) == 1 &&
+           (size == 0 || fwrite(data, size, 1, file) == 1) &&
+           fwrite(footer, 4, 1, file) == 1;
+}
+
+void FrameCapture::write_frame(size_t index, const uint8_t *data) {
+    Texture::PixelFormat pixel_format = m_texture->pixel_format();
+    size_t channels = m_texture->channels(),
+           width = (size_t) m_size.x(),
+           height = (size_t) m_size.y(),
+           pixels = width * height;
+    bool bgr = pixel_format == Texture::PixelFormat::BGR ||
+               pixel_format == Texture::PixelFormat::BGRA;
+    std::string error = "FrameCapture: could not write to \"" + m_sink_filename + "\"!";
+
+    switch (m_sink_format) {
+        case SinkFormat::Raw:
+            if (fwrite(data, m_frame_size, 1, m_sink_file) != 1)
+                throw std::runtime_error(error);
+            break;
+
+        case SinkFormat::Y4M: {
+                // Convert to planar Y'CbCr (BT.601, studio range)
+                m_sink_scratch.resize(pixels * 3);
+                uint8_t *y = m_sink_scratch.data(), *cb = y + pixels, *cr = cb + pixels;
+                size_t ir = bgr ? 2 : 0, ig = channels >= 3 ? 1 : 0,
+                       ib = channels >= 3 ? (bgr ? 0 : 2) : 0;
+
+                for (size_t i = 0; i < pixels; ++i) {
+                    const uint8_t *p = data + i * channels;
+                    int r = p[ir], g = p[ig], b = p[ib];
+                    y[i]  = (uint8_t) (((66 * r + 129 * g + 25 * b + 128) >> 8) + 16);
+                    cb[i] = (uint8_t) (((-38 * r - 74 * g + 112 * b + 128) >> 8) + 128);
+                    cr[i] = (uint8_t) (((112 * r - 94 * g - 18 * b + 128) >> 8) + 128);
+                }
+
+                if (fwrite("FRAME\n", 6, 1, m_sink_file) != 1 ||
+                    fwrite(m_sink_scratch.data(), pixels * 3, 1, m_sink_file) != 1)
+                    throw std::runtime_error(error);
+            }
+            break;
+
+        case SinkFormat::PNG: {
+                std::vector<char> filename(m_sink_filename.size() + 32);
+                snprintf(filename.data(), filename.size(), m_sink_filename.c_str(), (int) index);
+                error = std::string("FrameCapture: could not write to \"") +
+                        filename.data() + "\"!";
+
+                /* Assemble the zlib stream of the filtered scanlines using
+                   uncompressed (stored) deflate blocks */
+                size_t row_size = width * channels + 1,
+                       raw_size = row_size * height,
+                       n_blocks = std::max((raw_size + 65534) / 65535, (size_t) 1);
+                m_sink_scratch.resize(2 + raw_size + n_blocks * 5 + 4);
+
+                uint8_t *out = m_sink_scratch.data();
+                *out++ = 0x78; *out++ = 0x01;
+
+                uint32_t adler_a = 1, adler_b = 0;
+                size_t row = 0, col = 0, remaining = raw_size;
+                for (size_t block = 0; block < n_blocks; ++block) {
+                    size_t size = std::min(remaining, (size_t) 65535);
+                    remaining -= size;
+                    *out++ = remaining == 0 ? 1 : 0;
+                    *out++ = (uint8_t) size; *out++ = (uint8_t) (size >> 8);
+                    *out++ = (uint8_t) ~size; *out++ = (uint8_t) (~size >> 8);
+
+                    for (size_t i = 0; i < size; ++i) {
+                        uint8_t value;
+                        if (col == 0) {
+                            value = 0; // filter type 'None'
+                        } else {
+                            size_t pixel = (col - 1) / channels, ch = (col - 1) % channels;
+                            if (bgr && ch < 3)
+                                ch = 2 - ch;
+                            value = data[(row * width + pixel) * channels + ch];
+                        }
+                        if (++col == row_size) {
+                            col = 0;
+                            row++;
+                        }
+
+                        *out++ = value;
+                        adler_a = (adler_a + value) % 65521;
+                        adler_b = (adler_b + adler_a) % 65521;
+                    }
+                }
+
+                uint32_t adler = (adler_b << 16) | adler_a;
+                *out++ = (uint8_t) (adler >> 24); *out++ = (uint8_t) (adler >> 16);
+                *out++ = (uint8_t) (adler >> 8);  *out++ = (uint8_t) adler;
+
+                const uint8_t color_type[5] = { 0, 0, 4, 2, 6 };
+                uint8_t ihdr[13] = {
+                    (uint8_t) (width >> 24),  (uint8_t) (width >> 16),
+                    (uint8_t) (width >> 8),   (uint8_t) width,
+                    (uint8_t) (height >> 24), (uint8_t) (height >> 16),
+                    (uint8_t) (height >> 8),  (uint8_t) height,
+                    8, color_type[channels], 0, 0, 0
+                };
+
+                FILE *file = fopen(filename.data(), "wb");
+                if (!file)
+                    throw std::runtime_error(error);
+
+                bool success =
+                    fwrite("\x89PNG\r\n\x1a\n", 8, 1, file) == 1 &&
+                    png_write_chunk(file, "IHDR", ihdr, sizeof(ihdr)) &&
+                    png_write_chunk(file, "IDAT", m_sink_scratch.data(),
+                                    (size_t) (out - m_sink_scratch.data())) &&
+                    png_write_chunk(file, "IEND", nullptr, 0);
+                success &= fclose(file) == 0;
+
+                if (!success)
+                    throw std::runtime_error(error);
+            }
+            break;
+
+        default:
+            break;
+    }
+}
+
+NAMESPACE_END(nanogui)
@@ -16,9 +16,91 @@
 #include <nanogui/screen.h>
 #include <nanogui/opengl.h>
 #include <nanogui_resources.h>
+#include <algorithm>
+#include <iostream>
+#include <list>
+#include <mutex>
+#include <unordered_map>
+#include <unordered_set>
 
 NAMESPACE_BEGIN(nanogui)
 
+extern void __nanogui_run_worker(std::function<void()> &&func);
+
+/// A tile that is being filled in by a worker thread
+struct TileRequest {
+    uint64_t key;
+    Vector2i size;
+    std::vector<uint8_t> data;
+    std::atomic<bool> cancelled { false };
+    bool failed = false;
+};
+
+/// State shared between an image view and the worker threads loading its tiles
+struct TileQueue {
+    std::mutex mutex;
+    std::vector<std::shared_ptr<TileRequest>> completed;
+    /// Only accessed on the main thread, reset when the image view goes away
+    ImageView *view = nullptr;
+};
+
+struct ImageView::TiledImage {
+    struct Tile {
+        ref<Texture> texture;
+        std::list<uint64_t>::iterator lru;
+        size_t bytes;
+        uint64_t frame; // last frame in which the tile was requested or drawn
+    };
+
+    Vector2i size;
+    int tile_size;
+    int levels;
+    Texture::PixelFormat pixel_format;
+    Texture::ComponentFormat component_format;
+    size_t bytes_per_pixel;
+    std::shared_ptr<const TileCallback> callback;
+    std::shared_ptr<TileQueue> queue;
+
+    /// Uploaded tiles and their usage order (most recently used first)
+    std::unordered_map<uint64_t, Tile> cache;
+    std::list<uint64_t> lru;
+    size_t cache_size = 0;
+    uint64_t frame = 0;
+
+    std::unordered_map<uint64_t, std::shared_ptr<TileRequest>> pending;
+    std::unordered_set<uint64_t> failed;
+
+    static uint64_t key(int level, const Vector2i &tile) {
+        return ((uint64_t) level << 56) | ((uint64_t) tile.y() << 28) |
+               (uint64_t) tile.x();
+    }
+
+    /// Size of a pyramid level in pixels
+    Vector2i level_size(int level) const {
+        return Vector2i((size.x() + (1 << level) - 1) >> level,
+                        (size.y() + (1 << level) - 1) >> level);
+    }
+
+    /// Number of tiles along each axis of a pyramid level
+    Vector2i tile_count(int level) const {
+        Vector2i s = level_size(level);
+        return Vector2i((s.x() + tile_size - 1) / tile_size,
+                        (s.y() + tile_size - 1) / tile_size);
+    }
+
+    /// Size of a tile in pixels (smaller along the right and bottom edge)
+    Vector2i tile_pixels(int level, const Vector2i &tile) const {
+        return min(Vector2i(tile_size), level_size(level) - tile * tile_size);
+    }
+
+    void release() {
+        queue->view = nullptr;
+        for (auto &kv : pending)
+            kv.second->cancelled = true;
+        pending.clear();
+    }
+};
+
 ImageView::ImageView(Widget *parent) : Canvas(parent, 1, false, false, false) {
     render_pass()->set_clear_color(0, Color(0.3f, 0.3f, 0.32f, 1.f));
 
@@ -45,12 +127,78 @@ ImageView::ImageView(Widget *parent) : Canvas(parent, 1, false, false, false) {
     m_image_background_color = Color(0.f, 0.f, 0.f, 0.f);
 }
 
+ImageView::~ImageView() {
+    if (m_tiled)
+        m_tiled->release();
+}
+
 void ImageView::set_image(Texture *image) {
     if (image->mag_interpolation_mode() != Texture::InterpolationMode::Nearest)
         throw std::runtime_error(
             "ImageView::set_image(): interpolation mode must be set to 'Nearest'!");
     m_image_shader->set_texture("image", image);
     m_image = image;
+    if (m_tiled) {
+        m_tiled->release();
+        m_tiled = nullptr;
+    }
+}
+
+void ImageView::set_tiled_image(const Vector2i &size, int tile_size,
+                                Texture::PixelFormat pixel_format,
+                                Texture::ComponentFormat component_format,
+                                const TileCallback &callback) {
+    if (size.x() <= 0 || size.y() <= 0 || tile_size <= 0)
+        throw std::runtime_error(
+            "ImageView::set_tiled_image(): invalid image or tile size!");
+    if (!callback)
+        throw std::runtime_error(
+            "ImageView::set_tiled_image(): a tile callback must be specified!");
+
+    /* Tiles are uploaded without conversion, so check that the hardware
+       supports the requested format */
+    ref<Texture> probe = new Texture(pixel_format, component_format, Vector2i(1),
+                                     Texture::InterpolationMode::Bilinear,
+                                     Texture::InterpolationMode::Nearest);
+    if (probe->compressed())
+        throw std::runtime_error(
+            "ImageView::set_tiled_image(): block-compressed tiles are not supported!");
+    if (probe->pixel_format() != pixel_format ||
+        probe->component_format() != component_format)
+        throw std::runtime_error("ImageView::set_tiled_image(): pixel format "
+                                 "not supported by the hardware!");
+
+    auto tiled = std::make_shared<TiledImage>();
+    tiled->size = size;
+    tiled->tile_size = tile_size;
+    tiled->levels = 1;
+    while (std::max(tiled->level_size(tiled->levels - 1).x(),
+                    tiled->level_size(tiled->levels - 1).y()) > tile_size)
+        tiled->levels++;
+    tiled->pixel_format = pixel_format;
+    tiled->component_format = component_format;
+    tiled->bytes_per_pixel = probe->bytes_per_pixel();
+    tiled->callback = std::make_shared<const TileCallback>(callback);
+    tiled->queue = std::make_shared<TileQueue>();
+    tiled->queue->view = this;
+
+    if (m_tiled)
+        m_tiled->release();
+    m_tiled = tiled;
+    m_image = nullptr;
+}
+
+Vector2i ImageView::image_size() const {
+    if (m_tiled)
+        return m_tiled->size;
+    return m_image ? m_image->size() : Vector2i(0);
+}
+
+int ImageView::tile_level() const {
+    if (!m_tiled)
+        return 0;
+    int level = (int) std::floor(std::log2(1.f / scale()));
+    return std::max(0, std::min(level, m_tiled->levels - 1));
 }
 
 float ImageView::scale() const {
@@ -62,9 +210,9 @@ void ImageView::set_scale(float scale) {
 }
 
 void ImageView::center() {
-    if (!m_image)
+    if (!m_image && !m_tiled)
         return;
-    m_offset = Vector2i(.5f * (Vector2f(m_size) * screen()->pixel_ratio() - Vector2f(m_image->size()) * scale()));
+    m_offset = Vector2i(.5f * (Vector2f(m_size) * screen()->pixel_ratio() - Vector2f(image_size()) * scale()));
 }
 
 void ImageView::reset() {
@@ -87,7 +235,7 @@ Vector2f ImageView::pixel_to_pos(const Vector2f &p) const {
 }
 
 bool ImageView::keyboard_event(int key, int /* scancode */, int action, int /* modifiers */) {
-    if (!m_enabled || !m_image)
+    if (!m_enabled || (!m_image && !m_tiled))
         return false;
 
     if (action == GLFW_PRESS) {
@@ -101,7 +249,7 @@ bool ImageView::keyboard_event(int key, int /* scancode */, int action, int /* m
 
 bool ImageView::mouse_drag_event(const Vector2i & /* p */, const Vector2i &rel,
                                  int /* button */, int /* modifiers */) {
-    if (!m_enabled || !m_image)
+    if (!m_enabled || (!m_image && !m_tiled))
         return false;
 
     m_offset += rel * screen()->pixel_ratio();
@@ -110,16 +258,16 @@ bool ImageView::mouse_drag_event(const Vector2i & /* p */, const Vector2i &rel,
 }
 
 bool ImageView::scroll_event(const Vector2i &p, const Vector2f &rel) {
-    if (!m_enabled || !m_image)
+    if (!m_enabled || (!m_image && !m_tiled))
         return false;
 
     Vector2f p1 = pos_to_pixel(p - m_pos);
     m_scale += rel.y();
 
     // Restrict scaling to a reasonable range
+    Vector2i size = image_size();
     m_scale = std::max(
-        m_scale, std::min(0.f, std::log2(40.f / std::max(m_image->size().x(),
-                                                         m_image->size().y())) * 5.f));
+        m_scale, std::min(0.f, std::log2(40.f / std::max(size.x(), size.y())) * 5.f));
     m_scale = std::min(m_scale, 45.f);
 
     Vector2f p2 = pos_to_pixel(p - m_pos);
@@ -128,13 +276,13 @@ bool ImageView::scroll_event(const Vector2i &p, const Vector2f &rel) {
 }
 
 void ImageView::draw(NVGcontext *ctx) {
-    if (!m_enabled || !m_image)
+    if (!m_enabled || (!m_image && !m_tiled))
         return;
 
     Canvas::draw(ctx);
 
     Vector2i top_left = Vector2i(pixel_to_pos(Vector2f(0.f, 0.f))),
-             size     = Vector2i(pixel_to_pos(Vector2f(m_image->size())) - Vector2f(top_left));
+             size     = Vector2i(pixel_to_pos(Vector2f(image_size())) - Vector2f(top_left));
 
     if (m_draw_image_border) {
         nvgBeginPath(ctx);
@@ -157,7 +305,7 @@ void ImageView::draw(NVGcontext *ctx) {
         nvgTextAlign(ctx, NVG_ALIGN_CENTER | NVG_ALIGN_MIDDLE);
 
         Vector2i start = max(Vector2i(0), Vector2i(pos_to_pixel(Vector2f(0.f, 0.f))) - 1),
-                 end   = min(Vector2i(pos_to_pixel(Vector2f(m_size))) + 1, m_image->size() - 1);
+                 end   = min(Vector2i(pos_to_pixel(Vector2f(m_size))) + 1, image_size() - 1);
 
         char text_buf[80],
             *text[4] = { text_buf, text_buf + 20, text_buf + 40, text_buf + 60 };
@@ -192,7 +340,7 @@ void ImageView::draw(NVGcontext *ctx) {
 }
 
 void ImageView::draw_contents() {
-    if (!m_image)
+    if (!m_image && !m_tiled)
         return;
 
     /* Ensure that 'offset' is a multiple of the pixel ratio */
@@ -200,7 +348,7 @@ void ImageView::draw_contents() {
     m_offset = (Vector2f(Vector2i(m_offset / pixel_ratio)) * pixel_ratio);
 
     Vector2f bound1 = Vector2f(m_size) * pixel_ratio,
-             bound2 = -Vector2f(m_image->size()) * scale();
+             bound2 = -Vector2f(image_size()) * scale();
 
     if ((m_offset.x() >= bound1.x()) != (m_offset.x() < bound2.x()))
         m_offset.x() = std::max(std::min(m_offset.x(), bound1.x()), bound2.x());
@@ -209,6 +357,14 @@ void ImageView::draw_contents() {
 
     Vector2i viewport_size = render_pass()->viewport().second;
 
+    Matrix4f ortho =
+        Matrix4f::ortho(0.f, viewport_size.x(), viewport_size.y(), 0.f, -1.f, 1.f);
+
+    if (m_tiled) {
+        draw_tiles(ortho);
+        return;
+    }
+
     float scale = std::pow(2.f, m_scale / 5.f);
 
     Matrix4f matrix_background =
@@ -216,7 +372,7 @@ void ImageView::draw_contents() {
                                  m_image->size().y() * scale / 20.f, 1.f));
 
     Matrix4f matrix_image =
-        Matrix4f::ortho(0.f, viewport_size.x(), viewport_size.y(), 0.f, -1.f, 1.f) *
+        ortho *
         Matrix4f::translate(Vector3f(m_offset.x(), (int) m_offset.y(), 0.f)) *
         Matrix4f::scale(Vector3f(m_image->size().x() * scale,
                                  m_image->size().y() * scale, 1.f));
@@ -224,10 +380,226 @@ void ImageView::draw_contents() {
     m_image_shader->set_uniform("matrix_image",      Matrix4f(matrix_image));
     m_image_shader->set_uniform("matrix_background", Matrix4f(matrix_background));
     m_image_shader->set_uniform("background_color",  m_image_background_color);
+    m_image_shader->set_uniform("uv_rect",           Vector4f(0.f, 0.f, 1.f, 1.f));
 
     m_image_shader->begin();
     m_image_shader->draw_array(Shader::PrimitiveType::Triangle, 0, 6, false);
     m_image_shader->end();
 }
 
+void ImageView::draw_tiles(const Matrix4f &ortho) {
+    TiledImage &t = *m_tiled;
+    float scale = this->scale();
+    int level = tile_level();
+    t.frame++;
+
+    /* Upload tiles that were loaded by the worker threads */ {
+        std::vector<std::shared_ptr<TileRequest>> completed;
+        {
+            std::lock_guard<std::mutex> guard(t.queue->mutex);
+            completed.swap(t.queue->completed);
+        }
+
+        for (auto &request : completed) {
+            auto it = t.pending.find(request->key);
+            if (it == t.pending.end() || it->second != request)
+                continue; // no longer needed
+            t.pending.erase(it);
+
+            if (request->failed) {
+                t.failed.insert(request->key);
+                continue;
+            }
+
+            ref<Texture> texture =
+                new Texture(t.pixel_format, t.component_format, request->size,
+                            Texture::InterpolationMode::Bilinear,
+                            Texture::InterpolationMode::Nearest);
+            texture->upload(request->data.data());
+
+            t.lru.push_front(request->key);
+            t.cache[request->key] = { texture, t.lru.begin(), request->data.size(), 0 };
+            t.cache_size += request->data.size();
+        }
+    }
+
+    /* Region of the full-resolution image covered by the viewport */
+    Vector2i viewport_size = render_pass()->viewport().second;
+    Vector2f p0 = max(-m_offset / scale, Vector2f(0.f)),
+             p1 = min((Vector2f(viewport_size) - m_offset) / scale, Vector2f(t.size));
+
+    auto tile_range = [&](int level, int border, Vector2i &lo, Vector2i &hi) {
+        float extent = float(t.tile_size << level);
+        Vector2i count = t.tile_count(level);
+        for (int i = 0; i < 2; ++i) {
+            lo[i] = std::max(0, (int) std::floor(p0[i] / extent) - border);
+            hi[i] = std::min(count[i] - 1, (int) std::ceil(p1[i] / extent) - 1 + border);
+        }
+        return lo.x() <= hi.x() && lo.y() <= hi.y();
+    };
+
+    std::unordered_set<uint64_t> wanted;
+    auto request_tile = [&](int level, const Vector2i &tile) {
+        uint64_t key = TiledImage::key(level, tile);
+        if (!wanted.insert(key).second)
+            return;
+
+        auto it = t.cache.find(key);
+        if (it != t.cache.end()) {
+            it->second.frame = t.frame;
+            t.lru.splice(t.lru.begin(), t.lru, it->second.lru);
+            return;
+        }
+        if (t.pending.find(key) != t.pending.end() ||
+            t.failed.find(key) != t.failed.end())
+            return;
+
+        auto request = std::make_shared<TileRequest>();
+        request->key = key;
+        request->size = t.tile_pixels(level, tile);
+        t.pending[key] = request;
+
+        __nanogui_run_worker([request, level, tile, callback = t.callback,
+                              queue = t.queue, bytes_per_pixel = t.bytes_per_pixel]() {
+            if (request->cancelled)
+                return;
+            try {
+                request->data.resize((size_t) request->size.x() *
+                                     (size_t) request->size.y() * bytes_per_pixel);
+                (*callback)(level, tile, request->size, request->data.data());
+            } catch (const std::exception &e) {
+                std::cerr << "ImageView: could not load tile (" << tile.x() << ", "
+                          << tile.y() << ") of level " << level << ": " << e.what()
+                          << std::endl;
+                request->failed = true;
+            }
+
+            {
+                std::lock_guard<std::mutex> guard(queue->mutex);
+                queue->completed.push_back(request);
+            }
+
+            async([queue]() {
+                Screen *screen = queue->view ? queue->view->screen() : nullptr;
+                if (screen)
+                    screen->redraw();
+            });
+        });
+    };
+
+    /* Request the visible tiles and the surrounding rings (nearest first),
+       the next coarser level, and the coarsest level as a last resort */
+    Vector2i lo, hi;
+    if (tile_range(level, m_tile_prefetch, lo, hi)) {
+        std::vector<Vector2i> tiles;
+        for (int y = lo.y(); y <= hi.y(); ++y)
+            for (int x = lo.x(); x <= hi.x(); ++x)
+                tiles.emplace_back(x, y);
+
+        Vector2f center = (p0 + p1) * (.5f / float(t.tile_size << level));
+        auto distance = [&](const Vector2i &tile) {
+            Vector2f d = Vector2f(tile) + .5f - center;
+            return d.x() * d.x() + d.y() * d.y();
+        };
+        std::stable_sort(tiles.begin(), tiles.end(),
+            [&](const Vector2i &a, const Vector2i &b) {
+                return distance(a) < distance(b);
+            });
+
+        for (const Vector2i &tile : tiles)
+            request_tile(level, tile);
+    }
+    if (level + 1 < t.levels && tile_range(level + 1, 0, lo, hi)) {
+        for (int y = lo.y(); y <= hi.y(); ++y)
+            for (int x = lo.x(); x <= hi.x(); ++x)
+                request_tile(level + 1, Vector2i(x, y));
+    }
+    request_tile(t.levels - 1, Vector2i(0));
+
+    /* Cancel requests for tiles that are no longer needed */
+    for (auto it = t.pending.begin(); it != t.pending.end(); ) {
+        if (wanted.find(it->first) == wanted.end()) {
+            it->second->cancelled = true;
+            it = t.pending.erase(it);
+        } else {
+            ++it;
+        }
+    }
+
+    /* Draw the visible tiles, substituting the corresponding region of a
+       coarser tile when a tile has not been loaded yet */
+    m_image_shader->set_uniform("background_color", m_image_background_color);
+    Matrix4f offset = Matrix4f::translate(Vector3f(m_offset.x(), (int) m_offset.y(), 0.f));
+
+    if (tile_range(level, 0, lo, hi)) {
+        for (int y = lo.y(); y <= hi.y(); ++y) {
+            for (int x = lo.x(); x <= hi.x(); ++x) {
+                Vector2i tile(x, y);
+                TiledImage::Tile *source = nullptr;
+                int source_level = level;
+                for (; source_level < t.levels; ++source_level) {
+                    int shift = source_level - level;
+                    auto it = t.cache.find(TiledImage::key(
+                        source_level, Vector2i(x >> shift, y >> shift)));
+                    if (it != t.cache.end()) {
+                        source = &it->second;
+                        break;
+                    }
+                }
+                if (!source)
+                    continue;
+
+                source->frame = t.frame;
+                t.lru.splice(t.lru.begin(), t.lru, source->lru);
+
+                /* Tile rectangle and source texture rectangle in pixels of
+                   the full-resolution image */
+                int shift = source_level - level;
+                Vector2f origin = Vector2f(tile * (t.tile_size << level)),
+                         extent = min(origin + float(t.tile_size << level),
+                                      Vector2f(t.size)) - origin,
+                         source_origin =
+                             Vector2f(Vector2i(x >> shift, y >> shift) *
+                                      (t.tile_size << source_level)),
+                         source_extent =
+                             Vector2f(source->texture->size() * (1 << source_level));
+
+                Vector2f uv_origin = (origin - source_origin) / source_extent,
+                         uv_extent = extent / source_extent;
+
+                Matrix4f matrix_image =
+                    ortho * offset *
+                    Matrix4f::translate(Vector3f(origin.x() * scale, origin.y() * scale, 0.f)) *
+                    Matrix4f::scale(Vector3f(extent.x() * scale, extent.y() * scale, 1.f));
+
+                Matrix4f matrix_background =
+                    Matrix4f::translate(Vector3f(origin.x() * scale / 20.f,
+                                                 origin.y() * scale / 20.f, 0.f)) *
+                    Matrix4f::scale(Vector3f(extent.x() * scale / 20.f,
+                                             extent.y() * scale / 20.f, 1.f));
+
+                m_image_shader->set_texture("image", source->texture.get());
+                m_image_shader->set_uniform("matrix_image", matrix_image);
+                m_image_shader->set_uniform("matrix_background", matrix_background);
+                m_image_shader->set_uniform("uv_rect",
+                    Vector4f(uv_origin.x(), uv_origin.y(), uv_extent.x(), uv_extent.y()));
+
+                m_image_shader->begin();
+                m_image_shader->draw_array(Shader::PrimitiveType::Triangle, 0, 6, false);
+                m_image_shader->end();
+            }
+        }
+    }
+
+    /* Evict the least recently used tiles that were not requested or drawn in this frame */
+    while (t.cache_size > m_tile_cache_budget && !t.lru.empty()) {
+        auto it = t.cache.find(t.lru.back());
+        if (it->second.frame == t.frame)
+            break;
+        t.cache_size -= it->second.bytes;
+        t.lru.pop_back();
+        t.cache.erase(it);
+    }
+}
+
 NAMESPACE_END(nanogui)
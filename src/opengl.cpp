@@ -1,4 +1,8 @@
 #include <nanogui/opengl.h>
+#include "opengl_check.h"
+#include "opengl_state.h"
+#include <stdexcept>
+#include <cstring>
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -56,4 +60,223 @@ bool nanogui_check_glerror(const char *cmd) {
     return true;
 }
 
+static GLenum gl_capability(GLState::Capability cap) {
+    switch (cap) {
+        case GLState::DepthTest:        return GL_DEPTH_TEST;
+        case GLState::ScissorTest:      return GL_SCISSOR_TEST;
+        case GLState::CullFace:         return GL_CULL_FACE;
+        case GLState::Blend:            return GL_BLEND;
+#if defined(NANOGUI_USE_OPENGL)
+        case GLState::ProgramPointSize: return GL_PROGRAM_POINT_SIZE;
+#endif
+        default: throw std::runtime_error("GLState: invalid capability!");
+    }
+}
+
+GLState &gl_state() {
+    static GLState state;
+    return state;
+}
+
+void GLState::invalidate() {
+    program = vertex_array = framebuffer = active_texture = Unknown;
+    textures.clear();
+    viewport_known = scissor_known = false;
+    for (int i = 0; i < CapabilityCount; ++i)
+        enabled[i] = -1;
+    depth_mask = -1;
+    depth_func = cull_face = Unknown;
+    blend_func[0] = blend_func[1] = Unknown;
+}
+
+void GLState::update_context() {
+    GLFWwindow *current = glfwGetCurrentContext();
+    if (current == context)
+        return;
+    context = current;
+    buffer_storage = parallel_shader_compile = program_binary = -1;
+}
+
+void GLState::use_program(GLuint handle) {
+    if (count(program != handle)) {
+        CHK(glUseProgram(handle));
+        program = handle;
+    }
+}
+
+void GLState::bind_vertex_array(GLuint handle) {
+#if defined(NANOGUI_USE_OPENGL)
+    if (count(vertex_array != handle)) {
+        CHK(glBindVertexArray(handle));
+        vertex_array = handle;
+    }
+#else
+    (void) handle;
+#endif
+}
+
+void GLState::bind_framebuffer(GLuint handle) {
+    if (handle == 0)
+        handle = default_framebuffer;
+    if (count(framebuffer != handle)) {
+        CHK(glBindFramebuffer(GL_FRAMEBUFFER, handle));
+        framebuffer = handle;
+    }
+}
+
+void GLState::bind_texture_unit(GLuint unit, GLuint handle) {
+    if (textures.size() <= unit)
+        textures.resize(unit + 1, Unknown);
+    if (!count(textures[unit] != handle))
+        return;
+    if (count(active_texture != unit)) {
+        CHK(glActiveTexture(GL_TEXTURE0 + unit));
+        active_texture = unit;
+    }
+    CHK(glBindTexture(GL_TEXTURE_2D, handle));
+    textures[unit] = handle;
+}
+
+void GLState::bind_texture(GLenum target, GLuint handle) {
+    if (active_texture == Unknown) {
+        GLint value = 0;
+        CHK(glGetIntegerv(GL_ACTIVE_TEXTURE, &value));
+        active_texture = (GLuint) value - GL_TEXTURE0;
+    }
+    if (target == GL_TEXTURE_2D) {
+        bind_texture_unit(active_texture, handle);
+    } else {
+        // Bindings of other targets are not tracked
+        count(true);
+        CHK(glBindTexture(target, handle));
+    }
+}
+
+void GLState::set_viewport(GLint x, GLint y, GLint w, GLint h) {
+    if (count(!viewport_known || viewport[0] != x || viewport[1] != y ||
+              viewport[2] != w || viewport[3] != h)) {
+        CHK(glViewport(x, y, w, h));
+        viewport[0] = x; viewport[1] = y; viewport[2] = w; viewport[3] = h;
+        viewport_known = true;
+    }
+}
+
+void GLState::set_scissor(GLint x, GLint y, GLint w, GLint h) {
+    if (count(!scissor_known || scissor[0] != x || scissor[1] != y ||
+              scissor[2] != w || scissor[3] != h)) {
+        CHK(glScissor(x, y, w, h));
+        scissor[0] = x; scissor[1] = y; scissor[2] = w; scissor[3] = h;
+        scissor_known = true;
+    }
+}
+
+void GLState::set_enabled(Capability cap, bool value) {
+#if !defined(NANOGUI_USE_OPENGL)
+    if (cap == ProgramPointSize)
+        return;
+#endif
+    if (count(enabled[cap] != (int8_t) value)) {
+        if (value)
+            CHK(glEnable(gl_capability(cap)));
+        else
+            CHK(glDisable(gl_capability(cap)));
+        enabled[cap] = (int8_t) value;
+    }
+}
+
+void GLState::set_depth_mask(bool value) {
+    if (count(depth_mask != (int8_t) value)) {
+        CHK(glDepthMask(value ? GL_TRUE : GL_FALSE));
+        depth_mask = (int8_t) value;
+    }
+}
+
+void GLState::set_depth_func(GLenum func) {
+    if (count(depth_func != func)) {
+        CHK(glDepthFunc(func));
+        depth_func = func;
+    }
+}
+
+void GLState::set_cull_face(GLenum mode) {
+    if (count(cull_face != mode)) {
+        CHK(glCullFace(mode));
+        cull_face = mode;
+    }
+}
+
+void GLState::set_blend_func(GLenum src, GLenum dst) {
+    if (count(blend_func[0] != src || blend_func[1] != dst)) {
+        CHK(glBlendFunc(src, dst));
+        blend_func[0] = src;
+        blend_func[1] = dst;
+    }
+}
+
+bool GLState::is_enabled(Capability cap) {
+    if (enabled[cap] == -1)
+        enabled[cap] = glIsEnabled(gl_capability(cap)) ? 1 : 0;
+    return enabled[cap] == 1;
+}
+
+bool GLState::get_depth_mask() {
+    if (depth_mask == -1) {
+        GLboolean value;
+        CHK(glGetBooleanv(GL_DEPTH_WRITEMASK, &value));
+        depth_mask = value ? 1 : 0;
+    }
+    return depth_mask == 1;
+}
+
+void GLState::get_viewport(GLint *out) {
+    if (!viewport_known) {
+        CHK(glGetIntegerv(GL_VIEWPORT, viewport));
+        viewport_known = true;
+    }
+    memcpy(out, viewport, sizeof(viewport));
+}
+
+void GLState::get_scissor(GLint *out) {
+    if (!scissor_known) {
+        CHK(glGetIntegerv(GL_SCISSOR_BOX, scissor));
+        scissor_known = true;
+    }
+    memcpy(out, scissor, sizeof(scissor));
+}
+
+void GLState::forget_program(GLuint handle) {
+    if (program == handle)
+        program = Unknown;
+}
+
+void GLState::forget_vertex_array(GLuint handle) {
+    if (vertex_array == handle)
+        vertex_array = Unknown;
+}
+
+void GLState::forget_framebuffer(GLuint handle) {
+    if (framebuffer == handle)
+        framebuffer = Unknown;
+    if (default_framebuffer == handle)
+        default_framebuffer = 0;
+}
+
+void GLState::forget_texture(GLuint handle) {
+    for (GLuint &texture : textures) {
+        if (texture == handle)
+            texture = Unknown;
+    }
+}
+
+GLStateStatistics gl_state_statistics(bool reset) {
+    GLStateStatistics stats = gl_state().stats;
+    if (reset)
+        gl_state().stats = GLStateStatistics();
+    return stats;
+}
+
+void gl_state_invalidate() {
+    gl_state().invalidate();
+}
+
 NAMESPACE_END(nanogui)
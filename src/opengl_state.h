@@ -0,0 +1,140 @@
+#pragma once
+
+#include <nanogui/opengl.h>
+#include <vector>
+
+NAMESPACE_BEGIN(nanogui)
+
+/**
+ * Shadow copy of the OpenGL state modified by RenderPass and Shader. Each
+ * setter compares against the cached value and only calls into OpenGL when
+ * the state actually changes. Entries start out (and return to, following
+ * invalidate()) an unknown state, in which the next setter always issues its
+ * call and queries read back the value from OpenGL.
+ */
+struct GLState {
+    /// Capabilities tracked by set_enabled()
+    enum Capability { DepthTest = 0, ScissorTest, CullFace, Blend, ProgramPointSize,
+                      CapabilityCount };
+
+    static constexpr GLuint Unknown = (GLuint) -1;
+
+    GLuint program = Unknown;
+    GLuint vertex_array = Unknown;
+    GLuint framebuffer = Unknown;
+    GLuint active_texture = Unknown;
+    std::vector<GLuint> textures;
+    GLint viewport[4], scissor[4];
+    bool viewport_known = false, scissor_known = false;
+    int8_t enabled[CapabilityCount];
+    int8_t depth_mask = -1;
+    GLenum depth_func = Unknown, cull_face = Unknown;
+    GLenum blend_func[2] { Unknown, Unknown };
+
+    /// Number of nested RenderPass::begin()/end() pairs
+    int pass_depth = 0;
+
+    /**
+     * Framebuffer that is bound in place of the default framebuffer (handle
+     * 0), e.g. the back buffer of a headless Screen. Unlike the other
+     * entries, this is not reset by invalidate().
+     */
+    GLuint default_framebuffer = 0;
+
+    /**
+     * Optional features of the OpenGL context 'context' (-1: not yet
+     * queried). These are not reset by invalidate() but discarded by
+     * update_context() when a different context becomes current.
+     */
+    GLFWwindow *context = nullptr;
+    int8_t buffer_storage = -1, parallel_shader_compile = -1, program_binary = -1;
+
+    /**
+     * Capabilities that Shader::end() left enabled within a render pass. They
+     * are disabled by the next shader that does not need them, or at the end
+     * of the render pass.
+     */
+    bool lingering[CapabilityCount] { };
+
+    GLStateStatistics stats;
+
+    GLState() { invalidate(); }
+
+    /// Forget everything, e.g. after the context changed or NanoVG rendered
+    void invalidate();
+
+    /// Discard the cached features if the current context changed
+    void update_context();
+
+    void use_program(GLuint handle);
+    void bind_vertex_array(GLuint handle);
+    void bind_framebuffer(GLuint handle);
+
+    /// Bind a 2D texture to a specific texture unit
+    void bind_texture_unit(GLuint unit, GLuint handle);
+
+    /// Bind a texture to the currently active texture unit
+    void bind_texture(GLenum target, GLuint handle);
+
+    void set_viewport(GLint x, GLint y, GLint w, GLint h);
+    void set_scissor(GLint x, GLint y, GLint w, GLint h);
+    void set_enabled(Capability cap, bool value);
+    void set_depth_mask(bool value);
+    void set_depth_func(GLenum func);
+    void set_cull_face(GLenum mode);
+    void set_blend_func(GLenum src, GLenum dst);
+
+    /// Enable a capability needed by a draw call (see release())
+    void acquire(Capability cap) {
+        set_enabled(cap, true);
+        lingering[cap] = false;
+    }
+
+    /// Disable a capability acquired by a draw call (lazily within render passes)
+    void release(Capability cap) {
+        if (pass_depth > 0)
+            lingering[cap] = true;
+        else
+            set_enabled(cap, false);
+    }
+
+    /// Disable a capability if it was left enabled by a previous draw call
+    void settle(Capability cap) {
+        if (lingering[cap]) {
+            set_enabled(cap, false);
+            lingering[cap] = false;
+        }
+    }
+
+    /// Disable all capabilities left enabled by previous draw calls
+    void release_lingering() {
+        for (int i = 0; i < CapabilityCount; ++i)
+            settle((Capability) i);
+    }
+
+    /// Query the current value (reading it back from OpenGL if unknown)
+    bool is_enabled(Capability cap);
+    bool get_depth_mask();
+    void get_viewport(GLint *out);
+    void get_scissor(GLint *out);
+
+    /// Drop references to objects that are about to be deleted
+    void forget_program(GLuint handle);
+    void forget_vertex_array(GLuint handle);
+    void forget_framebuffer(GLuint handle);
+    void forget_texture(GLuint handle);
+
+    /// Update the counters (returns 'changed')
+    bool count(bool changed) {
+        if (changed)
+            stats.issued++;
+        else
+            stats.skipped++;
+        return changed;
+    }
+};
+
+/// Return the state cache of the current OpenGL context
+extern GLState &gl_state();
+
+NAMESPACE_END(nanogui)
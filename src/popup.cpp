@@ -37,7 +37,7 @@ void Popup::refresh_relative_placement() {
         return;
     m_parent_window->refresh_relative_placement();
     m_visible &= m_parent_window->visible_recursive();
-    m_pos = m_parent_window->position() + m_anchor_pos - Vector2i(0, m_anchor_offset);
+    set_position(m_parent_window->position() + m_anchor_pos - Vector2i(0, m_anchor_offset));
 }
 
 void Popup::draw(NVGcontext* ctx) {
@@ -2,6 +2,7 @@
 
 #include "python.h"
 #include <nanobind/stl/array.h>
+#include <nanobind/tensor.h>
 
 class PyCanvas : public Canvas {
 public:
@@ -23,6 +24,48 @@ public:
     }
 };
 
+extern VariableType dtype_to_enoki(nb::dlpack::dtype dtype);
+
+/// Wrap a Python tile callback that returns the pixels of a tile as an array
+static void image_view_set_tiled_image(
+    ImageView &view, const Vector2i &size, int tile_size,
+    Texture::PixelFormat pixel_format, Texture::ComponentFormat component_format,
+    const std::function<nb::object(int, const Vector2i &, const Vector2i &)> &func) {
+    size_t channels;
+    switch (pixel_format) {
+        case Texture::PixelFormat::R:    channels = 1; break;
+        case Texture::PixelFormat::RA:   channels = 2; break;
+        case Texture::PixelFormat::RGB:
+        case Texture::PixelFormat::BGR:  channels = 3; break;
+        case Texture::PixelFormat::RGBA:
+        case Texture::PixelFormat::BGRA: channels = 4; break;
+        default: throw std::runtime_error(
+            "ImageView::set_tiled_image(): unsupported pixel format!");
+    }
+    VariableType dtype = (VariableType) component_format;
+
+    view.set_tiled_image(size, tile_size, pixel_format, component_format,
+        [func, channels, dtype](int level, const Vector2i &tile,
+                                const Vector2i &size, uint8_t *data) {
+            nb::gil_scoped_acquire acquire;
+            auto tensor = nb::cast<nb::tensor<nb::device::cpu, nb::c_contig>>(
+                func(level, tile, size));
+
+            size_t n_channels = tensor.ndim() == 3 ? tensor.shape(2) : 1;
+            if ((tensor.ndim() != 2 && tensor.ndim() != 3) ||
+                tensor.shape(0) != (size_t) size.y() ||
+                tensor.shape(1) != (size_t) size.x() || n_channels != channels)
+                throw std::runtime_error(
+                    "ImageView::set_tiled_image(): tile array has the wrong shape!");
+            else if (dtype_to_enoki(tensor.dtype()) != dtype)
+                throw std::runtime_error(
+                    "ImageView::set_tiled_image(): tile array has the wrong dtype!");
+
+            memcpy(data, tensor.data(),
+                   (size_t) size.x() * (size_t) size.y() * channels * type_size(dtype));
+        });
+}
+
 void register_canvas(nb::module_ &m) {
     nb::class_<Canvas, Widget, PyCanvas>(m, "Canvas", D(Canvas))
         .def(nb::init<Widget *, uint8_t, bool, bool, bool>(),
@@ -42,6 +85,16 @@ void register_canvas(nb::module_ &m) {
         .def(nb::init<Widget *>(), D(ImageView, ImageView))
         .def("image", nb::overload_cast<>(&ImageView::image, nb::const_), D(ImageView, image))
         .def("set_image", &ImageView::set_image, D(ImageView, set_image))
+        .def("set_tiled_image", &image_view_set_tiled_image, "size"_a, "tile_size"_a,
+             "pixel_format"_a, "component_format"_a, "callback"_a,
+             D(ImageView, set_tiled_image))
+        .def("tiled", &ImageView::tiled, D(ImageView, tiled))
+        .def("image_size", &ImageView::image_size, D(ImageView, image_size))
+        .def("tile_level", &ImageView::tile_level, D(ImageView, tile_level))
+        .def("tile_cache_budget", &ImageView::tile_cache_budget, D(ImageView, tile_cache_budget))
+        .def("set_tile_cache_budget", &ImageView::set_tile_cache_budget, D(ImageView, set_tile_cache_budget))
+        .def("tile_prefetch", &ImageView::tile_prefetch, D(ImageView, tile_prefetch))
+        .def("set_tile_prefetch", &ImageView::set_tile_prefetch, D(ImageView, set_tile_prefetch))
         .def("reset", &ImageView::reset, D(ImageView, reset))
         .def("center", &ImageView::center, D(ImageView, center))
         .def("offset", &ImageView::offset, D(ImageView, offset))
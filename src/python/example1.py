@@ -455,6 +455,7 @@ class TestApp(Screen):
 
     def draw(self, ctx):
         self.progress.set_value(math.fmod(time.time() / 10, 1))
+        self.request_animation_frame()
         super(TestApp, self).draw(ctx)
 
     def draw_contents(self):
@@ -484,7 +485,7 @@ if __name__ == "__main__":
     test = TestApp()
     test.draw_all()
     test.set_visible(True)
-    nanogui.mainloop(refresh=1 / 60.0 * 1000)
+    nanogui.mainloop()
     del test
     gc.collect()
     nanogui.shutdown()
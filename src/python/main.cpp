@@ -5,9 +5,12 @@
 #include <mutex>
 #include <condition_variable>
 #include <nanobind/stl/pair.h>
+#include <nanobind/stl/tuple.h>
 
 #if defined(__APPLE__) || defined(__linux__)
 #  include <signal.h>
+#  include <unistd.h>
+#  include <cerrno>
 #endif
 
 #if defined(__APPLE__) || defined(__linux__)
@@ -56,12 +59,31 @@ extern void register_nanovg(nb::module_ &m);
 extern void register_render(nb::module_ &m);
 
 #if defined(__APPLE__) || defined(__linux__)
+/* The SIGINT handler may only use async-signal-safe functions. It notifies a
+   watcher thread via a pipe, which then asks the main loop to terminate. */
 static void (*sigint_handler_prev)(int) = nullptr;
+static int sigint_pipe[2] = { -1, -1 };
+
 static void sigint_handler(int sig) {
-    nanogui::leave();
+    int saved_errno = errno;
+    char c = 1;
+    (void) !write(sigint_pipe[1], &c, 1);
+    errno = saved_errno;
     signal(sig, sigint_handler_prev);
     raise(sig);
 }
+
+static void sigint_watcher() {
+    char c;
+    while (true) {
+        ssize_t rv = read(sigint_pipe[0], &c, 1);
+        if (rv < 0 && errno == EINTR)
+            continue;
+        if (rv != 1 || c == 0)
+            break;
+        nanogui::leave();
+    }
+}
 #endif
 
 NB_MODULE(nanogui_ext, m_) {
@@ -79,26 +101,45 @@ NB_MODULE(nanogui_ext, m_) {
     m.attr("api") = "metal";
 #endif
 
-    m.def("init", &nanogui::init, D(init));
+    m.def("init", &nanogui::init, "headless"_a = false, D(init));
     m.def("shutdown", &nanogui::shutdown, D(shutdown));
 
     m.def("mainloop", [](float refresh) {
         nb::gil_scoped_release release;
 
         #if defined(__APPLE__) || defined(__linux__)
-            sigint_handler_prev = signal(SIGINT, sigint_handler);
+            struct SigintGuard {
+                std::thread watcher;
+
+                SigintGuard() {
+                    if (pipe(sigint_pipe) != 0)
+                        return;
+                    watcher = std::thread(sigint_watcher);
+                    sigint_handler_prev = signal(SIGINT, sigint_handler);
+                }
+
+                ~SigintGuard() {
+                    if (!watcher.joinable())
+                        return;
+                    signal(SIGINT, sigint_handler_prev);
+                    char c = 0; /* Stop the watcher thread */
+                    (void) !write(sigint_pipe[1], &c, 1);
+                    watcher.join();
+                    close(sigint_pipe[0]);
+                    close(sigint_pipe[1]);
+                    sigint_pipe[0] = sigint_pipe[1] = -1;
+                }
+            } guard;
         #endif
 
         mainloop(refresh);
-
-        #if defined(__APPLE__) || defined(__linux__)
-            signal(SIGINT, sigint_handler_prev);
-        #endif
     }, "refresh"_a = -1, D(mainloop));
 
     m.def("async", &nanogui::async, D(async));
     m.def("leave", &nanogui::leave, D(leave));
     m.def("test_10bit_edr_support", &test_10bit_edr_support, D(test_10bit_edr_support));
+    m.def("test_texture_compression_support", &test_texture_compression_support,
+          D(test_texture_compression_support));
     m.def("active", &nanogui::active, D(active));
     m.def("file_dialog",
           (std::string(*)(
@@ -249,6 +249,68 @@ static const char *__doc_nanogui_BoxLayout_set_spacing = R"doc(Sets the spacing
 
 static const char *__doc_nanogui_BoxLayout_spacing = R"doc(The spacing this BoxLayout is using to pad in between widgets.)doc";
 
+static const char *__doc_nanogui_Buffer =
+R"doc(GPU buffer with vertex or index data that can be shared by several
+shaders
+
+Shader::set_buffer() copies data into storage owned by the shader,
+hence geometry that is rendered using several shaders (e.g. in a depth
+pre-pass, a shading pass, and a picking pass) is stored once per
+shader. A buffer instead holds a single copy that any number of
+shaders can reference (see Shader::set_buffer(const std::string &,
+Buffer *, bool)). New contents uploaded to it are seen by all of them.
+
+Shared buffers are not supported by the Metal backend.)doc";
+
+static const char *__doc_nanogui_Buffer_Buffer = R"doc(Create an empty buffer)doc";
+
+static const char *__doc_nanogui_Buffer_Type = R"doc(The kind of data stored in the buffer)doc";
+
+static const char *__doc_nanogui_Buffer_Type_Index = R"doc(Indices (a one-dimensional ``uint32``, ``uint16``, or ``uint8`` array))doc";
+
+static const char *__doc_nanogui_Buffer_Type_Vertex = R"doc(Vertex attributes (a two-dimensional array))doc";
+
+static const char *__doc_nanogui_Buffer_buffer_handle = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_dtype = R"doc(Return the type of the stored values (``Invalid`` if empty))doc";
+
+static const char *__doc_nanogui_Buffer_m_buffer_handle = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_capacity = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_dtype = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_ndim = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_revision = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_shape = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_size = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_m_type = R"doc()doc";
+
+static const char *__doc_nanogui_Buffer_ndim = R"doc(Return the number of dimensions of the stored array)doc";
+
+static const char *__doc_nanogui_Buffer_revision =
+R"doc(Return a counter that is incremented by every call to upload()
+
+Shaders compare it against the value seen during their last call to
+Shader::begin() to detect modifications.)doc";
+
+static const char *__doc_nanogui_Buffer_shape = R"doc(Return the shape of the stored array)doc";
+
+static const char *__doc_nanogui_Buffer_size = R"doc(Return the size of the contents in bytes)doc";
+
+static const char *__doc_nanogui_Buffer_type = R"doc(Return the kind of data stored in the buffer)doc";
+
+static const char *__doc_nanogui_Buffer_upload =
+R"doc(Replace the contents of the buffer
+
+The existing GPU storage is reused when it is large enough.)doc";
+
+static const char *__doc_nanogui_Buffer_upload_2 = R"doc()doc";
+
 static const char *__doc_nanogui_Button =
 R"doc(\class Button button.h nanogui/button.h
 
@@ -1008,10 +1070,199 @@ static const char *__doc_nanogui_FormHelper_widget_font_size = R"doc(The size of
 
 static const char *__doc_nanogui_FormHelper_window = R"doc(Access the currently active Window instance)doc";
 
+static const char *__doc_nanogui_FrameCapture =
+R"doc(Renders a sequence of frames of a Screen and reads them back
+
+Every call to next() redraws the screen and makes the contents of a
+previously rendered frame available via data(). Frames are read back
+asynchronously (see Texture::download_async()): up to pool_size()
+frames are in flight at any time, which keeps the GPU busy while the
+CPU processes earlier frames. The consequence is that frames are
+rendered up to ``pool_size - 1`` iterations ahead of the one being
+returned; set the pool size to 1 when the application modifies the
+user interface between frames and needs each frame to reflect these
+changes.
+
+The CPU-side storage consists of a fixed pool of buffers that are
+reused throughout the capture, hence memory usage remains constant
+regardless of its length. The pointer returned by data() remains valid
+until pool_size() further frames have been retrieved.
+
+Alternatively, set_sink() streams the frames into a file (or a
+sequence of files) from a background thread. When this thread cannot
+keep up, next() waits for one of the buffers to become available
+again.
+
+Headless screens (see Screen::headless()) are captured directly from
+their back buffer. Otherwise, each frame is copied into an internal
+texture before it is presented. Rows are ordered from top to bottom,
+and the frames have the pixel and component format of the screen's
+framebuffer. Not supported by the GLES and Metal backends.)doc";
+
+static const char *__doc_nanogui_FrameCapture_FrameCapture =
+R"doc(Prepare a capture of the given screen
+
+Parameter ``screen``:
+    The screen to be captured
+
+Parameter ``n_frames``:
+    The number of frames to capture, or zero to capture until the
+    ``until`` callback requests the capture to stop.
+
+Parameter ``until``:
+    Optional callback that is invoked before rendering each frame. The
+    capture stops when it returns ``True``. Frames that are in flight
+    at this point are still returned.
+
+Parameter ``pool_size``:
+    Number of frames that can be in flight at the same time, which is
+    also the number of CPU-side buffers.
+
+Parameter ``fps``:
+    If positive, frames are rendered at this steady rate (the capture
+    sleeps as needed). Otherwise, they are rendered as quickly as
+    possible. Also specifies the frame rate of YUV4MPEG2 files.)doc";
+
+static const char *__doc_nanogui_FrameCapture_PendingFrame = R"doc(A frame that was rendered but not yet retrieved)doc";
+
+static const char *__doc_nanogui_FrameCapture_PendingFrame_download = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_PendingFrame_index = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_SinkFormat = R"doc(File formats supported by set_sink())doc";
+
+static const char *__doc_nanogui_FrameCapture_SinkFormat_Auto = R"doc(Infer the format from the extension of the file name)doc";
+
+static const char *__doc_nanogui_FrameCapture_SinkFormat_PNG = R"doc(Sequence of (uncompressed) PNG files (requires 8-bit components))doc";
+
+static const char *__doc_nanogui_FrameCapture_SinkFormat_Raw = R"doc(Packed pixel data of all frames concatenated into a single file)doc";
+
+static const char *__doc_nanogui_FrameCapture_SinkFormat_Y4M = R"doc(YUV4MPEG2 video with 4:4:4 chroma (requires 8-bit components))doc";
+
+static const char *__doc_nanogui_FrameCapture_acquire_buffer = R"doc(Obtain a buffer for the next frame, waiting for the sink if needed)doc";
+
+static const char *__doc_nanogui_FrameCapture_check_sink = R"doc(Rethrow an exception raised by the background thread)doc";
+
+static const char *__doc_nanogui_FrameCapture_close =
+R"doc(Stop capturing and close the sink
+
+Frames that are still in flight are discarded. Waits until the
+background thread has written all frames it received. Called by the
+destructor.)doc";
+
+static const char *__doc_nanogui_FrameCapture_data = R"doc(Return the data of the current frame (or ``nullptr`` when using a sink))doc";
+
+static const char *__doc_nanogui_FrameCapture_frame_count = R"doc(Return the number of frames that were retrieved so far)doc";
+
+static const char *__doc_nanogui_FrameCapture_frame_index = R"doc(Return the index of the current frame)doc";
+
+static const char *__doc_nanogui_FrameCapture_frame_size = R"doc(Return the number of bytes occupied by each frame)doc";
+
+static const char *__doc_nanogui_FrameCapture_has_sink = R"doc(Is a sink attached? (see set_sink()))doc";
+
+static const char *__doc_nanogui_FrameCapture_m_buffers = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_capture_pass = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_closed = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_current = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_fps = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_frame_index = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_frame_size = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_frames_done = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_frames_started = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_n_frames = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_next_buffer = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_next_frame = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_pending = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_screen = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_screen_pass = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_cond = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_error = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_file = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_filename = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_format = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_free = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_mutex = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_queue = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_scratch = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_stop = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_sink_thread = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_size = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_stopped = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_texture = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_m_until = R"doc()doc";
+
+static const char *__doc_nanogui_FrameCapture_next =
+R"doc(Render and retrieve the next frame
+
+Returns ``False`` when the capture is complete. In this case, the sink
+(if any) was closed, and errors encountered while writing it are
+reported as exceptions.)doc";
+
+static const char *__doc_nanogui_FrameCapture_pool_size = R"doc(Return the number of frames that can be in flight at the same time)doc";
+
+static const char *__doc_nanogui_FrameCapture_run = R"doc(Capture all remaining frames (useful in combination with set_sink()))doc";
+
+static const char *__doc_nanogui_FrameCapture_screen = R"doc(Return the screen being captured)doc";
+
+static const char *__doc_nanogui_FrameCapture_set_sink =
+R"doc(Write the frames into the file ``filename`` from a background thread
+instead of returning them via data()
+
+For PNG sequences, ``filename`` must contain a ``printf``-style integer
+placeholder for the frame index (e.g. ``frame_%05i.png``). If there is
+none, ``_%06i`` is inserted before the extension. Other percent signs
+must be escaped as ``%%``. Must be called before the first frame is
+captured.)doc";
+
+static const char *__doc_nanogui_FrameCapture_size = R"doc(Return the size of the captured frames)doc";
+
+static const char *__doc_nanogui_FrameCapture_start_frame = R"doc(Render a frame and start reading it back)doc";
+
+static const char *__doc_nanogui_FrameCapture_texture = R"doc(Return the texture that frames are read from)doc";
+
+static const char *__doc_nanogui_FrameCapture_write_frame = R"doc(Encode a single frame into the sink)doc";
+
+static const char *__doc_nanogui_FrameCapture_write_frames = R"doc(Body of the background thread writing the sink)doc";
+
 static const char *__doc_nanogui_GLFramebuffer = R"doc()doc";
 
 static const char *__doc_nanogui_GLShader = R"doc()doc";
 
+static const char *__doc_nanogui_GLStateStatistics = R"doc(Counters reported by gl_state_statistics())doc";
+
+static const char *__doc_nanogui_GLStateStatistics_issued = R"doc(Number of state changes that were passed on to OpenGL)doc";
+
+static const char *__doc_nanogui_GLStateStatistics_skipped = R"doc(Number of redundant state changes that were skipped)doc";
+
 static const char *__doc_nanogui_Graph =
 R"doc(\class Graph graph.h nanogui/graph.h
 
@@ -1272,20 +1523,37 @@ static const char *__doc_nanogui_ImageView_2 =
 R"doc(\class ImageView imageview.h nanogui/imageview.h
 
 A widget for displaying, panning, and zooming images. Numerical RGBA
-pixel information is shown at large magnifications.)doc";
+pixel information is shown at large magnifications.
+
+Besides a single Texture, the widget can display a tiled multi-
+resolution image pyramid (see set_tiled_image()). This supports images
+that exceed the maximum texture size or that should not be resident in
+GPU memory as a whole.)doc";
 
 static const char *__doc_nanogui_ImageView_ImageView = R"doc(Initialize the widget)doc";
 
+static const char *__doc_nanogui_ImageView_TileCallback =
+R"doc(Callback that supplies the pixels of one tile of a tiled image
+
+The arguments are the pyramid level, the tile index, the size of the
+tile in pixels (tiles along the right and bottom edge of a level are
+smaller), and a buffer that should be filled with the tile's pixels in
+row-major order.)doc";
+
 static const char *__doc_nanogui_ImageView_center = R"doc(Center the image on the screen)doc";
 
 static const char *__doc_nanogui_ImageView_draw = R"doc()doc";
 
 static const char *__doc_nanogui_ImageView_draw_contents = R"doc()doc";
 
+static const char *__doc_nanogui_ImageView_draw_tiles = R"doc(Request, upload, and draw the tiles of a tiled image pyramid)doc";
+
 static const char *__doc_nanogui_ImageView_image = R"doc(Return the currently active image)doc";
 
 static const char *__doc_nanogui_ImageView_image_2 = R"doc(Return the currently active image (const version))doc";
 
+static const char *__doc_nanogui_ImageView_image_size = R"doc(Return the size of the displayed image (level 0 for tiled images))doc";
+
 static const char *__doc_nanogui_ImageView_keyboard_event = R"doc()doc";
 
 static const char *__doc_nanogui_ImageView_m_draw_image_border = R"doc()doc";
@@ -1332,6 +1600,38 @@ components)doc";
 
 static const char *__doc_nanogui_ImageView_set_scale = R"doc(Set the current magnification of the image)doc";
 
+static const char *__doc_nanogui_ImageView_set_tile_cache_budget = R"doc(Set the maximum amount of GPU memory used by cached tiles in bytes)doc";
+
+static const char *__doc_nanogui_ImageView_set_tile_prefetch = R"doc(Set the number of tile rings around the viewport that are prefetched)doc";
+
+static const char *__doc_nanogui_ImageView_set_tiled_image =
+R"doc(Display a tiled multi-resolution image pyramid
+
+Level ``0`` of the pyramid has the specified size, and each further
+level halves the resolution of the previous one (rounding up) until the
+image fits into a single tile. The tiles of level ``i`` are thus
+``tile_size`` pixels wide and cover ``tile_size * 2^i`` pixels of the
+full-resolution image.
+
+The widget picks the level matching the current scale() and requests
+the visible tiles along with a ring of neighboring tiles (see
+set_tile_prefetch()) and the next coarser level. The callback runs on a
+pool of worker threads and must be thread-safe; the tiles are then
+uploaded on the main thread. Until a tile arrives, the view shows the
+corresponding region of a coarser cached tile.
+
+Uploaded tiles are kept in a least-recently-used cache whose GPU memory
+usage is bounded by tile_cache_budget(). The tiled image replaces any
+previously set image.)doc";
+
+static const char *__doc_nanogui_ImageView_tile_cache_budget = R"doc(Return the maximum amount of GPU memory used by cached tiles in bytes)doc";
+
+static const char *__doc_nanogui_ImageView_tile_level = R"doc(Return the pyramid level that is currently being displayed)doc";
+
+static const char *__doc_nanogui_ImageView_tile_prefetch = R"doc(Return the number of tile rings around the viewport that are prefetched)doc";
+
+static const char *__doc_nanogui_ImageView_tiled = R"doc(Is the widget currently displaying a tiled image pyramid?)doc";
+
 static const char *__doc_nanogui_IntBox =
 R"doc(\class IntBox textbox.h nanogui/textbox.h
 
@@ -1790,7 +2090,11 @@ static const char *__doc_nanogui_Screen_2 =
 R"doc(\class Screen screen.h nanogui/screen.h
 
 Represents a display surface (i.e. a full-screen or windowed GLFW
-window) and forms the root element of a hierarchy of nanogui widgets.)doc";
+window) and forms the root element of a hierarchy of nanogui widgets.
+
+When NanoGUI was initialized in headless mode (see init()), the screen
+instead renders into an offscreen framebuffer object, whose color
+buffer is accessible via back_buffer().)doc";
 
 static const char *__doc_nanogui_Screen_Screen =
 R"doc(Create a new Screen instance
@@ -1848,8 +2152,24 @@ an existing ``GLFWwindow`` instance
 You will also be responsible in this case to deliver GLFW callbacks to
 the appropriate callback event handlers below)doc";
 
+static const char *__doc_nanogui_Screen_back_buffer =
+R"doc(Return the color buffer of a headless screen (or ``nullptr``)
+
+The texture has the size, pixel format, and component format of the
+screen's framebuffer. Its contents can be read back using
+Texture::download() or Texture::download_async() following a call to
+draw_all().)doc";
+
 static const char *__doc_nanogui_Screen_background = R"doc(Return the screen's background color)doc";
 
+static const char *__doc_nanogui_Screen_begin_frame =
+R"doc(Prepare the bookkeeping of a new frame and return whether it should be
+drawn
+
+Dispatches coalesced events (see flush_events()) and checks the redraw
+flag and the animation frame deadline. When a frame is due, both are
+reset and the frame time is recorded.)doc";
+
 static const char *__doc_nanogui_Screen_caption = R"doc(Get the window title bar caption)doc";
 
 static const char *__doc_nanogui_Screen_center_window = R"doc()doc";
@@ -1864,12 +2184,18 @@ You typically won't need to call this function yourself, as it is
 called by the default implementation of draw_contents() (which is
 called by draw_all()))doc";
 
+static const char *__doc_nanogui_Screen_coalesce_events = R"doc(Are mouse motion and scroll events coalesced between frames?)doc";
+
 static const char *__doc_nanogui_Screen_component_format = R"doc(Return the component format underlying the screen)doc";
 
 static const char *__doc_nanogui_Screen_cursor_pos_callback_event = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_depth_stencil_texture = R"doc(Return the associated depth/stencil texture)doc";
 
+static const char *__doc_nanogui_Screen_dispatch_cursor_pos = R"doc(Dispatch a cursor motion event (in screen coordinates))doc";
+
+static const char *__doc_nanogui_Screen_dispatch_scroll = R"doc(Dispatch a scroll event)doc";
+
 static const char *__doc_nanogui_Screen_dispose_window = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_draw_all =
@@ -1910,6 +2236,21 @@ static const char *__doc_nanogui_Screen_drop_callback_event = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_drop_event = R"doc(Handle a file drop event)doc";
 
+static const char *__doc_nanogui_Screen_flush_events =
+R"doc(Dispatch mouse motion and scroll events that were merged by
+set_coalesce_events()
+
+Called by draw_all(). Applications that manage GLFW themselves and
+don't call draw_all() must invoke this function after processing
+pending window system events.)doc";
+
+static const char *__doc_nanogui_Screen_frame_deadline =
+R"doc(Return the time (as reported by ``glfwGetTime()``) when the next
+animation frame is due, or infinity if no widget requested one
+
+See also:
+    Widget::request_animation_frame())doc";
+
 static const char *__doc_nanogui_Screen_framebuffer_size =
 R"doc(Return the framebuffer size (potentially larger than size() on high-
 DPI screens))doc";
@@ -1922,6 +2263,8 @@ static const char *__doc_nanogui_Screen_has_float_buffer = R"doc(Does the frameb
 
 static const char *__doc_nanogui_Screen_has_stencil_buffer = R"doc(Does the framebuffer have a stencil buffer)doc";
 
+static const char *__doc_nanogui_Screen_headless = R"doc(Does the screen render into an offscreen framebuffer (see init())?)doc";
+
 static const char *__doc_nanogui_Screen_initialize = R"doc(Initialize the Screen)doc";
 
 static const char *__doc_nanogui_Screen_key_callback_event = R"doc()doc";
@@ -1930,12 +2273,18 @@ static const char *__doc_nanogui_Screen_keyboard_character_event = R"doc(Text in
 
 static const char *__doc_nanogui_Screen_keyboard_event = R"doc(Default keyboard event handler)doc";
 
+static const char *__doc_nanogui_Screen_m_back_buffer = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_background = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_caption = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_coalesce_events = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_cursor = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_cursor_pending = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_cursors = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_depth_buffer = R"doc()doc";
@@ -1952,10 +2301,16 @@ static const char *__doc_nanogui_Screen_m_float_buffer = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_focus_path = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_frame_deadline = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_fullscreen = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_glfw_window = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_headless = R"doc()doc";
+
+static const char *__doc_nanogui_Screen_m_last_frame = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_last_interaction = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_metal_drawable = R"doc()doc";
@@ -1970,6 +2325,10 @@ static const char *__doc_nanogui_Screen_m_mouse_state = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_nvg_context = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_pending_cursor_pos = R"doc()doc";
+
+static const char *__doc_nanogui_Screen_m_pending_scroll = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_pixel_ratio = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_process_events = R"doc()doc";
@@ -1978,10 +2337,16 @@ static const char *__doc_nanogui_Screen_m_redraw = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_resize_callback = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_scroll_pending = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_m_shutdown_glfw = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_m_stencil_buffer = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_m_target_fps = R"doc()doc";
+
+static const char *__doc_nanogui_Screen_m_vsync = R"doc()doc";
+
 static const char *__doc_nanogui_Screen_metal_layer = R"doc(Return the associated CAMetalLayer object)doc";
 
 static const char *__doc_nanogui_Screen_metal_texture = R"doc(Return the texure of the currently active Metal drawable (or NULL))doc";
@@ -2020,20 +2385,48 @@ static const char *__doc_nanogui_Screen_set_background = R"doc(Set the screen's
 
 static const char *__doc_nanogui_Screen_set_caption = R"doc(Set the window title bar caption)doc";
 
+static const char *__doc_nanogui_Screen_set_coalesce_events =
+R"doc(Coalesce mouse motion and scroll events between frames?
+
+High polling rate pointing devices can deliver several hundred cursor
+events per second, many more than are drawn. When this option is
+enabled, consecutive cursor motion events are merged into a single call
+to mouse_motion_event() (or mouse_drag_event()) with the accumulated
+relative motion, and consecutive scroll events are merged into a single
+scroll_event() with the accumulated offset.
+
+Merged events are dispatched by flush_events() before the next frame is
+drawn, or before any other input event is handled so that the overall
+order of events (e.g. motion, then a button press) is preserved. Until
+then, mouse_pos() reports the position of the last dispatched event.
+Disabled by default.)doc";
+
 static const char *__doc_nanogui_Screen_set_resize_callback = R"doc()doc";
 
 static const char *__doc_nanogui_Screen_set_shutdown_glfw = R"doc(Shut down GLFW when the window is closed?)doc";
 
 static const char *__doc_nanogui_Screen_set_size = R"doc(Set window size)doc";
 
+static const char *__doc_nanogui_Screen_set_target_fps =
+R"doc(Set the maximum rate at which animation frames are drawn
+
+A value of zero removes the limit, which is useful in combination with
+set_vsync(). Redraws caused by user input are not delayed.)doc";
+
 static const char *__doc_nanogui_Screen_set_visible = R"doc(Set the top-level window visibility (no effect on full-screen windows))doc";
 
+static const char *__doc_nanogui_Screen_set_vsync = R"doc(Synchronize presentation with the vertical refresh of the display?)doc";
+
 static const char *__doc_nanogui_Screen_shutdown_glfw = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_target_fps = R"doc(Return the maximum rate at which animation frames are drawn)doc";
+
 static const char *__doc_nanogui_Screen_tooltip_fade_in_progress = R"doc(Is a tooltip currently fading in?)doc";
 
 static const char *__doc_nanogui_Screen_update_focus = R"doc()doc";
 
+static const char *__doc_nanogui_Screen_vsync = R"doc(Is presentation synchronized with the vertical refresh of the display?)doc";
+
 static const char *__doc_nanogui_Serializer = R"doc()doc";
 
 static const char *__doc_nanogui_Shader = R"doc()doc";
@@ -2058,6 +2451,8 @@ static const char *__doc_nanogui_Shader_BufferType_FragmentTexture = R"doc()doc"
 
 static const char *__doc_nanogui_Shader_BufferType_IndexBuffer = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_BufferType_UniformBlockBuffer = R"doc()doc";
+
 static const char *__doc_nanogui_Shader_BufferType_UniformBuffer = R"doc()doc";
 
 static const char *__doc_nanogui_Shader_BufferType_Unknown = R"doc()doc";
@@ -2068,20 +2463,44 @@ static const char *__doc_nanogui_Shader_BufferType_VertexSampler = R"doc()doc";
 
 static const char *__doc_nanogui_Shader_BufferType_VertexTexture = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_attribute_dtype = R"doc(Component type of a vertex attribute as declared in the shader code)doc";
+
+static const char *__doc_nanogui_Shader_Buffer_attribute_offset = R"doc(Byte offset of the attribute within each vertex)doc";
+
 static const char *__doc_nanogui_Shader_Buffer_buffer = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_capacity = R"doc()doc";
+
 static const char *__doc_nanogui_Shader_Buffer_dirty = R"doc()doc";
 
 static const char *__doc_nanogui_Shader_Buffer_dtype = R"doc()doc";
 
 static const char *__doc_nanogui_Shader_Buffer_index = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_name = R"doc()doc";
+
 static const char *__doc_nanogui_Shader_Buffer_ndim = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_normalized = R"doc(Map integer vertex data to ``[0, 1]`` or ``[-1, 1]``)doc";
+
+static const char *__doc_nanogui_Shader_Buffer_offset = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_Buffer_per_instance = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_Buffer_revision = R"doc(Revision of the shared buffer seen by the last call to begin())doc";
+
 static const char *__doc_nanogui_Shader_Buffer_shape = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_shared = R"doc(Shared buffer referenced by the argument (see nanogui::Buffer))doc";
+
 static const char *__doc_nanogui_Shader_Buffer_size = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_Buffer_source = R"doc(Handle of the argument holding the storage of an interleaved buffer)doc";
+
+static const char *__doc_nanogui_Shader_Buffer_streaming = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_Buffer_stride = R"doc(Distance between consecutive vertices in bytes (0: tightly packed))doc";
+
 static const char *__doc_nanogui_Shader_Buffer_to_string = R"doc()doc";
 
 static const char *__doc_nanogui_Shader_Buffer_type = R"doc()doc";
@@ -2112,7 +2531,39 @@ Parameter ``vertex_shader``:
     The source of the vertex shader as a string.
 
 Parameter ``fragment_shader``:
-    The source of the fragment shader as a string.)doc";
+    The source of the fragment shader as a string.
+
+Parameter ``async_compile``:
+    Return without waiting for the driver to compile and link the
+    program. This requires the ``KHR_parallel_shader_compile`` (or
+    ``ARB_parallel_shader_compile``) extension, which lets the driver
+    compile programs on background threads. Otherwise, or when a
+    matching entry of the program cache exists (see
+    set_program_cache_dir()), the program is ready immediately. See
+    ready() for what can be done with the shader in the meantime.)doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute = R"doc(Describes a vertex attribute stored in an interleaved buffer)doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute_components = R"doc(Number of components per vertex)doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute_dtype = R"doc(Type of the individual components)doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute_name = R"doc(Name of the attribute in the shader code)doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute_normalized = R"doc(Map integer components to ``[0, 1]`` or ``[-1, 1]`` (see set_buffer()))doc";
+
+static const char *__doc_nanogui_Shader_VertexAttribute_offset = R"doc(Byte offset of the attribute relative to the start of a vertex)doc";
+
+static const char *__doc_nanogui_Shader_argument =
+R"doc(Return the record associated with a handle or throw an exception)doc";
+
+static const char *__doc_nanogui_Shader_argument_handle =
+R"doc(Return a stable integer handle identifying a named shader parameter.
+
+The handle remains valid for the lifetime of the shader. It can be
+passed to the overloads of set_buffer(), set_uniform(), set_texture(),
+and update_buffer_region() that take a handle instead of a name, which
+avoids a string lookup per call.)doc";
 
 static const char *__doc_nanogui_Shader_begin =
 R"doc(Begin drawing using this shader
@@ -2126,6 +2577,12 @@ statement.)doc";
 
 static const char *__doc_nanogui_Shader_blend_mode = R"doc(Return the blending mode of this shader)doc";
 
+static const char *__doc_nanogui_Shader_defer =
+R"doc(Postpone a name-based call until the program is ready
+
+A pending call with the same ``key`` (e.g. an earlier value of the same
+parameter) is discarded.)doc";
+
 static const char *__doc_nanogui_Shader_draw_array =
 R"doc(Render geometry arrays, either directly or using an index array.
 
@@ -2141,27 +2598,121 @@ Parameter ``offset``:
     lines and triangles, respectively (unless specified using strips).
 
 Parameter ``indexed``:
-    Render indexed geometry? In this case, an ``uint32_t`` valued
-    buffer with name ``indices`` must have been uploaded using set().)doc";
+    Render indexed geometry? In this case, a ``uint32_t``,
+    ``uint16_t``, or ``uint8_t`` (OpenGL only) valued buffer with name
+    ``indices`` must have been uploaded using set_buffer(). Smaller
+    index types reduce memory usage and bandwidth.)doc";
+
+static const char *__doc_nanogui_Shader_draw_array_instanced =
+R"doc(Render several instances of the same geometry using a single draw
+call
+
+The parameters ``primitive_type``, ``offset``, ``count``, and
+``indexed`` have the same meaning as in draw_array(). Vertex
+attributes uploaded with ``per_instance=true`` (see set_buffer())
+advance once per instance.
+
+Parameter ``instance_count``:
+    Number of instances to render.)doc";
+
+static const char *__doc_nanogui_Shader_draw_multi =
+R"doc(Render several ranges of the geometry arrays using a single draw call
+
+This is equivalent to calling draw_array() once for each pair of
+entries ``offsets[i]`` and ``counts[i]``, but submits all ranges at
+once (via ``glMultiDrawArrays`` / ``glMultiDrawElements`` where
+available).
+
+Parameter ``draw_count``:
+    Number of entries of the ``offsets`` and ``counts`` arrays)doc";
 
 static const char *__doc_nanogui_Shader_end = R"doc(End drawing using this shader)doc";
 
+static const char *__doc_nanogui_Shader_finalize_program = R"doc(Check link errors, reflect the parameters and mark the program as ready)doc";
+
+static const char *__doc_nanogui_Shader_find_argument = R"doc(Return the handle of a named shader parameter or throw an exception)doc";
+
+static const char *__doc_nanogui_Shader_load_program_binary = R"doc(Try to initialize the program and parameter layout from a cache entry)doc";
+
+static const char *__doc_nanogui_Shader_m_all_bound = R"doc(Are all parameters associated with data?)doc";
+
+static const char *__doc_nanogui_Shader_m_argument_handles = R"doc(Maps parameter names to handles)doc";
+
 static const char *__doc_nanogui_Shader_m_blend_mode = R"doc()doc";
 
-static const char *__doc_nanogui_Shader_m_buffers = R"doc()doc";
+static const char *__doc_nanogui_Shader_m_buffers = R"doc(Records of all shader parameters, indexed by their handle)doc";
+
+static const char *__doc_nanogui_Shader_m_deferred = R"doc(Name-based calls made before the program was ready)doc";
+
+static const char *__doc_nanogui_Shader_m_dirty = R"doc(Handles of parameters that changed since the last begin())doc";
+
+static const char *__doc_nanogui_Shader_m_indices = R"doc(Handle of the reserved 'indices' parameter)doc";
+
+static const char *__doc_nanogui_Shader_m_multi_draw_offsets = R"doc(Scratch space for the index buffer offsets used by draw_multi())doc";
 
 static const char *__doc_nanogui_Shader_m_name = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_m_pending_cache_path = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_m_pending_shaders = R"doc(Shader objects and cache entry of a program that is still linking)doc";
+
 static const char *__doc_nanogui_Shader_m_pipeline_state = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_m_ready = R"doc(Has the program finished compiling and linking?)doc";
+
+static const char *__doc_nanogui_Shader_m_ready_callback = R"doc()doc";
+
 static const char *__doc_nanogui_Shader_m_render_pass = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_m_shared_buffers = R"doc(Handles of parameters referencing a shared nanogui::Buffer)doc";
+
+static const char *__doc_nanogui_Shader_m_skip_draws = R"doc(Set by begin() when the program was not ready yet)doc";
+
+static const char *__doc_nanogui_Shader_m_textures = R"doc(Handles of texture parameters (bound on every begin()))doc";
+
+static const char *__doc_nanogui_Shader_m_uniform_blocks = R"doc(Handles of uniform block parameters (bound on every begin()))doc";
+
+static const char *__doc_nanogui_Shader_mark_dirty = R"doc(Flag a parameter so that the next call to begin() binds it)doc";
+
 static const char *__doc_nanogui_Shader_name = R"doc(Return the name of this shader)doc";
 
 static const char *__doc_nanogui_Shader_pipeline_state = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_program_cache_dir = R"doc(Return the directory of the program cache (empty if disabled))doc";
+
+static const char *__doc_nanogui_Shader_ready =
+R"doc(Check whether the program has finished compiling and linking
+
+This is always the case unless the shader was created with
+``async_compile=true``. Until then, begin(), end(), and the draw
+functions do nothing, so that a frame can be rendered without the
+geometry of this shader. Parameters passed by name to set_buffer(),
+set_uniform(), set_texture(), set_uniform_block(), and
+set_buffer_streaming() are recorded and applied once the program is
+ready, while functions that need the parameter layout (e.g.
+argument_handle()) raise an exception.
+
+The first call that finds the program complete reflects its parameters
+and runs the callback specified via set_ready_callback(). Compilation
+and link errors are reported by raising an exception from this
+function (and thus from begin()).)doc";
+
+static const char *__doc_nanogui_Shader_ready_callback = R"doc(Return the function called once the program is ready)doc";
+
+static const char *__doc_nanogui_Shader_register_argument = R"doc(Create a record for a new shader parameter and return its handle)doc";
+
+static const char *__doc_nanogui_Shader_release_interleaved =
+R"doc(Detach an attribute from an interleaved buffer
+
+When ``handle`` refers to the attribute holding the storage, the other
+attributes of the interleaved buffer become unbound.)doc";
+
+static const char *__doc_nanogui_Shader_release_shared = R"doc(Stop referencing the shared buffer associated with an argument (if any))doc";
+
 static const char *__doc_nanogui_Shader_render_pass = R"doc(Return the render pass associated with this shader)doc";
 
+static const char *__doc_nanogui_Shader_save_program_binary = R"doc(Write the program and parameter layout to a cache entry)doc";
+
 static const char *__doc_nanogui_Shader_set_buffer =
 R"doc(Upload a buffer (e.g. vertex positions) that will be associated with a
 named shader parameter.
@@ -2171,19 +2722,186 @@ Note that this function should be used both for 'varying' and
 the right endpoint. Matrices should be specified in column-major
 order.
 
-The buffer will be replaced if it is already present.)doc";
+The buffer will be replaced if it is already present. The reserved
+``indices`` parameter accepts ``uint32``, ``uint16``, and (except on
+Metal) ``uint8`` data.
+
+When ``per_instance`` is ``True``, a vertex attribute advances once
+per instance instead of once per vertex when drawing with
+draw_array_instanced(). The first dimension of the buffer then
+corresponds to the instance count.
+
+Vertex attributes declared as floating point values in the shader code
+(e.g. ``vec3``) can also be provided using a more compact dtype:
+``float16``, or 8/16/32-bit integers that are converted to floating
+point values when the vertex is fetched. When ``normalized`` is
+``True``, integers are mapped to the range ``[0, 1]`` (unsigned types)
+or ``[-1, 1]`` (signed types), e.g. to store colors as ``uint8`` or
+normals as ``int16`` values. Otherwise, they retain their magnitude.
+Integer attributes (e.g. ``ivec2``) accept any 8/16/32-bit integer
+dtype. OpenGL ES 2 does not support 32-bit integer and ``float16``
+vertex data. Metal vertex functions read buffers directly and must
+perform such conversions themselves, hence ``normalized`` is not
+supported by the Metal backend.
+
+The Python bindings also accept non-contiguous arrays (see
+set_buffer_strided()).)doc";
 
 static const char *__doc_nanogui_Shader_set_buffer_2 = R"doc()doc";
 
+static const char *__doc_nanogui_Shader_set_buffer_3 = R"doc(Upload a buffer identified by a handle (see argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_4 = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_5 =
+R"doc(Associate a shared nanogui::Buffer with a named vertex attribute or
+with the ``indices`` parameter
+
+The shader references the buffer instead of storing a copy of its
+contents, and contents uploaded later on are used starting with the
+next call to begin(). ``per_instance`` and ``normalized`` have the
+same meaning as in set_buffer(). Passing ``nullptr`` detaches the
+buffer, and uploading data via set_buffer() gives the parameter
+separate storage again.)doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_6 = R"doc(Associate a shared buffer with a parameter identified by a handle (see argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_interleaved =
+R"doc(Upload a single buffer providing several vertex attributes
+
+``data`` contains ``count`` vertices that are ``stride`` bytes apart,
+each storing the listed ``attributes`` at the specified byte offsets
+(e.g. an array of structures with position, normal, and color fields).
+The data is transferred into one GPU buffer that all of these
+attributes read from, which reduces the number of buffer binds and
+improves the locality of vertex fetches compared to one buffer per
+attribute.
+
+The buffer is streamed when the first attribute was configured using
+set_buffer_streaming(). Attributes of an interleaved buffer cannot be
+modified using update_buffer_region(), and passing one of them to
+set_buffer() gives it separate storage again.
+
+The Python bindings take a NumPy array with a structured dtype
+instead. Its fields provide the attributes of the same name, or those
+listed by the optional ``attributes`` dictionary mapping attribute
+names to field names. The optional ``normalized`` argument lists the
+names of attributes whose integer components should be normalized.
+
+Interleaved buffers are not supported by the Metal backend.)doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_streaming =
+R"doc(Store a vertex or index buffer in a streaming ring buffer
+
+This mode is meant for geometry that is regenerated on every frame.
+Instead of (re-)allocating a dedicated GPU buffer upon each call to
+set_buffer(), the data is suballocated from a large ring buffer shared
+by all streaming arguments of this shader.
+
+Where supported (OpenGL 4.4 or ``ARB_buffer_storage``), the ring
+buffer is persistently mapped. Otherwise, it is written using
+unsynchronized mappings and orphaned when it wraps around. In both
+cases, fences ensure that regions still being read by the GPU are not
+overwritten.
+
+The contents of streaming buffers are transient: they must be uploaded
+again before every draw call, and they cannot be modified using
+update_buffer_region(). Switching the mode discards the current
+contents.)doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_strided =
+R"doc(Upload a buffer whose entries are not necessarily contiguous
+
+This function is equivalent to set_buffer() except that the distance
+between consecutive entries along each dimension is given by
+``strides`` (in bytes). Vertex attributes with contiguous rows (e.g. a
+view selecting some of the columns of a larger array) are uploaded
+without copying and read using the row stride (see
+set_buffer_interleaved()). Other layouts are first gathered into a
+contiguous array.)doc";
+
+static const char *__doc_nanogui_Shader_set_buffer_strided_2 = R"doc(Upload a strided buffer identified by a handle (see argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_set_program_cache_dir =
+R"doc(Enable an on-disk cache of linked shader programs
+
+When a directory is specified, shaders created afterwards store the
+binary representation of the linked program along with the reflected
+parameter layout in this directory. Later instantiations of the same
+shader (also in future sessions) load this data instead of compiling,
+linking, and reflecting the program. Entries are keyed by a hash of
+the shader sources, the GL renderer and version strings, and the
+NanoGUI version. Entries that the driver rejects are rebuilt from
+source.
+
+The directory must already exist. An empty string (the default)
+disables the cache. The cache is only used by the OpenGL (4.1 or
+``ARB_get_program_binary``) and GLES 3 backends.)doc";
+
+static const char *__doc_nanogui_Shader_set_ready_callback =
+R"doc(Set a function that is called once the program is ready
+
+The function runs during the call to ready() (possibly from begin())
+that finds the program complete, or immediately if this has already
+happened.)doc";
+
 static const char *__doc_nanogui_Shader_set_texture =
 R"doc(Associate a texture with a named shader parameter
 
 The association will be replaced if it is already present.)doc";
 
+static const char *__doc_nanogui_Shader_set_texture_2 =
+R"doc(Associate a texture with a parameter identified by a handle (see
+argument_handle()))doc";
+
 static const char *__doc_nanogui_Shader_set_uniform =
 R"doc(Upload a uniform variable (e.g. a vector or matrix) that will be
 associated with a named shader parameter.)doc";
 
+static const char *__doc_nanogui_Shader_set_uniform_2 =
+R"doc(Upload a uniform variable identified by a handle (see
+argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_set_uniform_block =
+R"doc(Associate a UniformBlock with a named uniform block declared in the
+shader code
+
+The same block can be attached to any number of shaders. Its contents
+are uploaded at most once after every modification, when the first
+shader using it is activated via begin().
+
+The association will be replaced if it is already present.)doc";
+
+static const char *__doc_nanogui_Shader_set_uniform_block_2 =
+R"doc(Associate a uniform block with a parameter identified by a handle (see
+argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_sync_shared = R"doc(Adopt the current shape and dtype of the shared buffer of an argument)doc";
+
+static const char *__doc_nanogui_Shader_throw_not_ready = R"doc(Raise an exception for an operation that requires a ready program)doc";
+
+static const char *__doc_nanogui_Shader_update_buffer_region =
+R"doc(Overwrite a range of rows of a vertex or index buffer that was
+previously uploaded using set_buffer().
+
+``offset`` and ``shape[0]`` are expressed in rows of the buffer (i.e.
+vertices for vertex attributes and entries for the ``indices``
+buffer). The remaining dimensions and the dtype must match the current
+contents. Only the specified region is transferred to the GPU.
+
+Regions that extend past the end of the buffer grow it. The underlying
+storage is enlarged geometrically, so that repeated appends have an
+amortized linear cost.)doc";
+
+static const char *__doc_nanogui_Shader_update_buffer_region_2 = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_update_buffer_region_3 =
+R"doc(Update a buffer identified by a handle (see argument_handle()))doc";
+
+static const char *__doc_nanogui_Shader_update_buffer_region_4 = R"doc()doc";
+
+static const char *__doc_nanogui_Shader_upload_buffer = R"doc(Transfer the contents of a vertex or index buffer to the GPU)doc";
+
 static const char *__doc_nanogui_Slider = R"doc()doc";
 
 static const char *__doc_nanogui_Slider_2 =
@@ -2687,6 +3405,33 @@ static const char *__doc_nanogui_Texture_3 = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_ComponentFormat = R"doc(Number format of pixel components)doc";
 
+static const char *__doc_nanogui_Texture_ComponentFormat_ASTC4x4 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_ASTC8x8 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC1 =
+R"doc(Block-compressed formats. The pixel format specifies the channels
+stored by the blocks: ``BC1`` (RGB or RGBA), ``BC2`` and ``BC3``
+(RGBA), ``BC4`` (R), ``BC5`` (RA), ``BC6H`` (RGB, unsigned half
+precision), ``BC7`` (RGBA), ``ETC2`` (R and RA via EAC, RGB, or RGBA),
+and ``ASTC4x4`` / ``ASTC8x8`` (RGBA). Such textures cannot be render
+targets, and mip maps must be uploaded using upload_mipmap(). See
+test_texture_compression_support().)doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC2 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC3 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC4 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC5 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC6H = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_BC7 = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_ComponentFormat_ETC2 = R"doc()doc";
+
 static const char *__doc_nanogui_Texture_ComponentFormat_Float16 = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_ComponentFormat_Float32 = R"doc()doc";
@@ -2703,6 +3448,39 @@ static const char *__doc_nanogui_Texture_ComponentFormat_UInt32 = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_ComponentFormat_UInt8 = R"doc()doc";
 
+static const char *__doc_nanogui_Texture_Download =
+R"doc(Pending transfer of the texture contents to the CPU (see
+Texture::download_async()))doc";
+
+static const char *__doc_nanogui_Texture_Download_Download = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_m_buffer_handle = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_m_capacity = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_m_fence = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_m_size = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_m_texture = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_Download_read =
+R"doc(Copy the downloaded data into ``data``, which must provide space for
+size() bytes
+
+Blocks until the transfer has finished. The data remains available
+until the download is destroyed, hence this function may be called
+multiple times. The Python bindings accept an ``out`` argument as in
+Texture::download().)doc";
+
+static const char *__doc_nanogui_Texture_Download_ready = R"doc(Check whether the data has arrived without blocking)doc";
+
+static const char *__doc_nanogui_Texture_Download_size = R"doc(Return the size of the downloaded data in bytes)doc";
+
+static const char *__doc_nanogui_Texture_Download_texture = R"doc(Return the texture being downloaded)doc";
+
+static const char *__doc_nanogui_Texture_Download_texture_2 = R"doc(Return the texture being downloaded (const version))doc";
+
 static const char *__doc_nanogui_Texture_InterpolationMode = R"doc(Texture interpolation mode)doc";
 
 static const char *__doc_nanogui_Texture_InterpolationMode_Bilinear = R"doc(Bilinear ineterpolation)doc";
@@ -2747,6 +3525,13 @@ static const char *__doc_nanogui_Texture_TextureFlags_RenderTarget = R"doc(Targe
 
 static const char *__doc_nanogui_Texture_TextureFlags_ShaderRead = R"doc(Texture to be read in shaders)doc";
 
+static const char *__doc_nanogui_Texture_TextureFlags_Streaming =
+R"doc(Contents are replaced frequently (e.g. by video frames). The texture
+has immutable storage, and upload() writes through a ring of pixel
+unpack buffers so that copying the next frame can overlap with the GPU
+consuming the previous one. Requires ShaderRead and cannot be combined
+with RenderTarget, MSAA, or resize(). Ignored by the Metal backend.)doc";
+
 static const char *__doc_nanogui_Texture_WrapMode = R"doc(How should out-of-bounds texture evaluations be handled?)doc";
 
 static const char *__doc_nanogui_Texture_WrapMode_ClampToEdge = R"doc(Clamp evaluations to the edge of the texture)doc";
@@ -2755,22 +3540,100 @@ static const char *__doc_nanogui_Texture_WrapMode_MirrorRepeat = R"doc(Repeat, b
 
 static const char *__doc_nanogui_Texture_WrapMode_Repeat = R"doc(Repeat the texture)doc";
 
-static const char *__doc_nanogui_Texture_bytes_per_pixel = R"doc(Return the number of bytes consumed per pixel of this texture)doc";
+static const char *__doc_nanogui_Texture_block_size = R"doc(Return the size of the pixel blocks that are compressed together (1x1 if uncompressed))doc";
+
+static const char *__doc_nanogui_Texture_bytes_per_block = R"doc(Return the number of bytes consumed per block of pixels (see block_size()))doc";
+
+static const char *__doc_nanogui_Texture_bytes_per_pixel = R"doc(Return the number of bytes consumed per pixel of this texture (uncompressed formats only))doc";
 
 static const char *__doc_nanogui_Texture_channels = R"doc(Return the number of channels of this texture)doc";
 
 static const char *__doc_nanogui_Texture_component_format = R"doc(Return the component format)doc";
 
-static const char *__doc_nanogui_Texture_download = R"doc(Download packed pixel data from the GPU to the CPU)doc";
+static const char *__doc_nanogui_Texture_compressed = R"doc(Does the texture use a block-compressed component format?)doc";
+
+static const char *__doc_nanogui_Texture_data_size = R"doc(Return the number of bytes occupied by packed data covering a region of the given size)doc";
+
+static const char *__doc_nanogui_Texture_download =
+R"doc(Download packed pixel data from the GPU to the CPU
+
+The Python bindings return a new array. Alternatively, they write into
+the C-contiguous array passed via the ``out`` argument (e.g. to reuse a
+buffer across frames), whose shape and dtype must match the texture.)doc";
+
+static const char *__doc_nanogui_Texture_download_async =
+R"doc(Start an asynchronous download of the texture contents
+
+The data is copied into a pixel buffer object on the GPU timeline, and
+the function returns immediately. The returned Download can be polled
+using Download::ready() and provides the data via Download::read().
+When capturing a sequence of frames, keeping two or three downloads in
+flight avoids stalling the GPU pipeline. The pixel buffer objects are
+recycled once a download is destroyed.
+
+The rows are ordered as in download(). When ``flip`` is ``True``,
+their order is additionally reversed, which is done on the GPU.
+
+Only supported by the OpenGL backend.)doc";
 
 static const char *__doc_nanogui_Texture_flags = R"doc(Return a combination of flags (from Texture::TextureFlags))doc";
 
+static const char *__doc_nanogui_Texture_from_file_mapped =
+R"doc(Create a texture from pixel data stored in a file
+
+The file is mapped into memory and uploaded in chunks of rows using
+upload_sub_region(), so that only a small part of it is resident at
+any time. Four kinds of files are supported:
+
+- NumPy arrays (``.npy``) with shape ``(height, width)`` or ``(height,
+width, channels)`` in C order, and an 8 or 16 bit integer or a 16 or
+32 bit floating point dtype.
+
+- DirectDraw surfaces (``.dds``) with an uncompressed 8, 16, or 32 bit
+per channel format, or a BC1-BC7 compressed format.
+
+- KTX 1.1 files (``.ktx``) with an uncompressed or compressed format
+(see ComponentFormat).
+
+- Headerless files containing packed pixels, whose layout must be
+specified using ``pixel_format``, ``component_format``, and ``size``.
+
+Files with a header are recognized automatically. In this case, the
+remaining parameters are ignored if ``size`` is zero, and otherwise
+checked against the contents of the file. When trilinear interpolation
+is requested and a DDS or KTX file contains a complete mip chain, its
+levels are uploaded as well. Otherwise, mip maps are generated on the
+GPU, which is not possible for block-compressed formats. BGR(A) data
+is converted to RGB(A) on backends that lack such textures.)doc";
+
 static const char *__doc_nanogui_Texture_init = R"doc(Initialize the texture handle)doc";
 
+static const char *__doc_nanogui_Texture_load_async =
+R"doc(Load a set of images in the background
+
+The files are decoded in parallel on a pool of worker threads. Each
+texture is then created and uploaded on the main thread using async(),
+which means that the returned futures only become ready while
+mainloop() is running. Blocking on them from the main thread will
+therefore deadlock.
+
+The optional ``callback`` is invoked on the main thread as soon as a
+texture is ready and receives its index within ``filenames``. It is
+passed ``nullptr`` when the file could not be loaded, in which case
+the associated future holds the exception.)doc";
+
 static const char *__doc_nanogui_Texture_m_component_format = R"doc()doc";
 
+static const char *__doc_nanogui_Texture_m_download_buffers = R"doc(Pixel buffer objects (and their capacity) available to download_async())doc";
+
 static const char *__doc_nanogui_Texture_m_flags = R"doc()doc";
 
+static const char *__doc_nanogui_Texture_m_flip_framebuffer_handles = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_m_flip_size = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_m_flip_texture_handle = R"doc(Staging texture and framebuffers used to flip downloads on the GPU)doc";
+
 static const char *__doc_nanogui_Texture_m_mag_interpolation_mode = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_m_min_interpolation_mode = R"doc()doc";
@@ -2785,6 +3648,12 @@ static const char *__doc_nanogui_Texture_m_size = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_m_texture_handle = R"doc()doc";
 
+static const char *__doc_nanogui_Texture_m_upload_buffer_handles = R"doc(Ring of pixel unpack buffers and fences used by streaming textures)doc";
+
+static const char *__doc_nanogui_Texture_m_upload_fences = R"doc()doc";
+
+static const char *__doc_nanogui_Texture_m_upload_index = R"doc()doc";
+
 static const char *__doc_nanogui_Texture_m_wrap_mode = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_mag_interpolation_mode = R"doc(Return the interpolation mode for minimization)doc";
@@ -2805,7 +3674,25 @@ static const char *__doc_nanogui_Texture_texture_handle = R"doc()doc";
 
 static const char *__doc_nanogui_Texture_upload = R"doc(Upload packed pixel data from the CPU to the GPU)doc";
 
-static const char *__doc_nanogui_Texture_upload_origin = R"doc(Upload packed pixel data to a rectangular sub-region of the texture from the CPU to the GPU)doc";
+static const char *__doc_nanogui_Texture_upload_mipmap =
+R"doc(Upload packed pixel data for a given mip level
+
+Level 0 corresponds to upload(), and each further level halves the
+resolution. This is mainly useful for precomputed mip chains of block-
+compressed textures, which cannot be generated on the GPU. The texture
+should then be created with ``mipmap_manual=true``, and all levels down
+to 1x1 must be provided to enable trilinear interpolation. Only
+supported by the OpenGL backend.)doc";
+
+static const char *__doc_nanogui_Texture_upload_origin =
+R"doc(Upload packed pixel data to a rectangular sub-region of the texture
+from the CPU to the GPU
+
+For block-compressed formats, the region must be aligned to the block
+size (except where it touches the right or bottom edge of the
+texture).)doc";
+
+static const char *__doc_nanogui_Texture_upload_streaming = R"doc(Replace the contents of a streaming texture (see TextureFlags::Streaming))doc";
 
 static const char *__doc_nanogui_Texture_generate_mipmap = R"doc(Generates the mipmap. Done automatically upon upload if manual mipmapping is disabled)doc";
 
@@ -3026,6 +3913,83 @@ Simple radio+toggle button with an icon.)doc";
 
 static const char *__doc_nanogui_ToolButton_ToolButton = R"doc()doc";
 
+static const char *__doc_nanogui_UniformBlock =
+R"doc(Uniform buffer object that can be shared by several shaders
+
+A uniform block stores the members of a GLSL interface block such as
+
+```
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 proj;
+};
+```
+
+Its layout is reflected from the shader passed to the constructor.
+Every shader that declares the same block with ``std140`` layout can
+then use it via Shader::set_uniform_block(). Updating a value shared
+by many shaders thus requires a single transfer per frame instead of
+one call to Shader::set_uniform() per shader.
+
+Uniform blocks require OpenGL 3.1 or OpenGL ES 3. They are not
+supported by the Metal backend.)doc";
+
+static const char *__doc_nanogui_UniformBlock_Member = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_array_stride = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_dtype = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_matrix_stride = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_ndim = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_offset = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_shape = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_Member_to_string = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_UniformBlock =
+R"doc(Create a uniform buffer matching the layout of the uniform block
+``name`` declared by ``shader``)doc";
+
+static const char *__doc_nanogui_UniformBlock_buffer_handle = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_m_buffer_handle = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_m_data = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_m_dirty_end = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_m_dirty_start = R"doc(Byte range of m_data that was modified since the last upload)doc";
+
+static const char *__doc_nanogui_UniformBlock_m_members = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_m_name = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_name = R"doc(Return the name of the uniform block)doc";
+
+static const char *__doc_nanogui_UniformBlock_set_buffer =
+R"doc(Set the value of a member of the uniform block
+
+The dtype and shape must match the declaration of the member. Arrays
+add a leading dimension, and matrices should be specified in
+column-major order. The GPU copy is updated by the next call to
+upload().)doc";
+
+static const char *__doc_nanogui_UniformBlock_set_buffer_2 = R"doc()doc";
+
+static const char *__doc_nanogui_UniformBlock_set_uniform = R"doc(Set the value of a member (e.g. a vector or matrix) of the uniform block)doc";
+
+static const char *__doc_nanogui_UniformBlock_size = R"doc(Return the size of the uniform block in bytes)doc";
+
+static const char *__doc_nanogui_UniformBlock_upload =
+R"doc(Transfer modified members to the GPU
+
+This function is called by Shader::begin() and only needs to be
+invoked manually when the buffer is used outside of NanoGUI.)doc";
+
 static const char *__doc_nanogui_VScrollPanel = R"doc()doc";
 
 static const char *__doc_nanogui_VScrollPanel_2 =
@@ -3103,6 +4067,8 @@ Widget is the base class of all widgets in ``nanogui``. It can also be
 used as an panel to arrange an arbitrary number of child widgets using
 a layout generator (see Layout).)doc";
 
+static const char *__doc_nanogui_Widget_SpatialIndex = R"doc(Uniform grid over the children, see set_spatial_index())doc";
+
 static const char *__doc_nanogui_Widget_Widget = R"doc(Construct a new widget with the given parent widget)doc";
 
 static const char *__doc_nanogui_Widget_absolute_position = R"doc(Return the absolute position on screen)doc";
@@ -3174,6 +4140,8 @@ Remark:
     nanogui::Widget::m_icon_extra_scale. This tiered scaling strategy
     may not be appropriate with fonts other than ``entypo.ttf``.)doc";
 
+static const char *__doc_nanogui_Widget_invalidate_spatial_index = R"doc(Request a rebuild of the spatial index (see set_spatial_index()))doc";
+
 static const char *__doc_nanogui_Widget_keyboard_character_event = R"doc(Handle text input (UTF-32 format) (default implementation: do nothing))doc";
 
 static const char *__doc_nanogui_Widget_keyboard_event = R"doc(Handle a keyboard event (default implementation: do nothing))doc";
@@ -3235,6 +4203,10 @@ static const char *__doc_nanogui_Widget_m_pos = R"doc()doc";
 
 static const char *__doc_nanogui_Widget_m_size = R"doc()doc";
 
+static const char *__doc_nanogui_Widget_m_spatial_index = R"doc()doc";
+
+static const char *__doc_nanogui_Widget_m_spatial_index_dirty = R"doc()doc";
+
 static const char *__doc_nanogui_Widget_m_theme = R"doc()doc";
 
 static const char *__doc_nanogui_Widget_m_tooltip = R"doc()doc";
@@ -3273,6 +4245,16 @@ static const char *__doc_nanogui_Widget_remove_child = R"doc(Remove a child widg
 
 static const char *__doc_nanogui_Widget_remove_child_at = R"doc(Remove a child widget by index)doc";
 
+static const char *__doc_nanogui_Widget_request_animation_frame =
+R"doc(Request the screen containing this widget to be redrawn for an
+animation
+
+Animated widgets should call this function from draw() as long as the
+animation runs. The frame is drawn once ``delay`` seconds have
+elapsed, though no sooner than the target frame rate of the screen
+permits (see Screen::set_target_fps()). Requests are one-shot and may
+only be issued from the main thread.)doc";
+
 static const char *__doc_nanogui_Widget_request_focus = R"doc(Request the focus to be moved to this widget)doc";
 
 static const char *__doc_nanogui_Widget_screen = R"doc(Walk up the hierarchy and return the parent screen)doc";
@@ -3318,6 +4300,23 @@ static const char *__doc_nanogui_Widget_set_position = R"doc(Set the position re
 
 static const char *__doc_nanogui_Widget_set_size = R"doc(set the size of the widget)doc";
 
+static const char *__doc_nanogui_Widget_set_spatial_index =
+R"doc(Accelerate find_widget() using a spatial index of the children?
+
+By default, find_widget() tests the children of each widget one by
+one. For containers with many children (e.g. a grid of thousands of
+buttons), this option maintains a uniform grid over the children's
+bounding boxes so that only the few candidates overlapping the query
+position are tested. The result is identical to that of a linear
+search: the topmost (i.e. last) visible child containing the position
+is returned. Disabled by default.
+
+The index is rebuilt lazily by the next query following a change.
+Adding or removing children and calls to set_position() and
+set_size() (e.g. by perform_layout()) are tracked automatically. Code
+that modifies the geometry or order of the children in other ways must
+call invalidate_spatial_index().)doc";
+
 static const char *__doc_nanogui_Widget_set_theme = R"doc(Set the Theme used to draw this widget)doc";
 
 static const char *__doc_nanogui_Widget_set_tooltip = R"doc()doc";
@@ -3330,6 +4329,13 @@ static const char *__doc_nanogui_Widget_set_width = R"doc(Set the width of the w
 
 static const char *__doc_nanogui_Widget_size = R"doc(Return the size of the widget)doc";
 
+static const char *__doc_nanogui_Widget_spatial_index = R"doc(Does find_widget() use a spatial index of the children?)doc";
+
+static const char *__doc_nanogui_Widget_spatial_index_lookup =
+R"doc(Return the topmost visible child containing the position ``p``
+(relative to this widget) using the spatial index, rebuilding it first
+if needed)doc";
+
 static const char *__doc_nanogui_Widget_theme = R"doc(Return the Theme used to draw this widget)doc";
 
 static const char *__doc_nanogui_Widget_theme_2 = R"doc(Return the Theme used to draw this widget)doc";
@@ -3412,7 +4418,8 @@ R"doc(Enqueue a function to be executed executed before the application is
 redrawn the next time.
 
 NanoGUI is not thread-safe, and async() provides a mechanism for
-queuing up UI-related state changes from other threads.)doc";
+queuing up UI-related state changes from other threads. The main loop
+is woken up to run the function.)doc";
 
 static const char *__doc_nanogui_chdir_to_bundle_parent =
 R"doc(Move to the application bundle's parent directory
@@ -3507,6 +4514,12 @@ static const char *__doc_nanogui_detail_FormWidget_value_2 = R"doc(Returns the v
 
 static const char *__doc_nanogui_detail_detector = R"doc(Detector pattern that is used to drive many type traits below)doc";
 
+static const char *__doc_nanogui_detail_uniform_info =
+R"doc(Determine the dtype, shape, and address of a uniform value
+
+Used by Shader::set_uniform() and UniformBlock::set_uniform(). Returns
+``false`` when the value has an unsupported dimension.)doc";
+
 static const char *__doc_nanogui_dot = R"doc()doc";
 
 static const char *__doc_nanogui_file_dialog =
@@ -3537,12 +4550,43 @@ Parameter ``multiple``:
 
 static const char *__doc_nanogui_get_type = R"doc(Convert from a C++ type to an element of VariableType)doc";
 
+static const char *__doc_nanogui_gl_state_invalidate =
+R"doc(Discard the contents of the OpenGL state cache
+
+This must be called when code that does not go through NanoGUI changes
+the OpenGL state between RenderPass::begin() and RenderPass::end() (or
+between Shader::begin() calls outside of a render pass). NanoGUI
+already does so when switching between windows and after rendering the
+widgets using NanoVG.)doc";
+
+static const char *__doc_nanogui_gl_state_statistics =
+R"doc(Return the counters of the OpenGL state cache
+
+RenderPass and Shader route changes of the bound program, vertex
+array, framebuffer, and textures, the viewport and scissor rectangles,
+and the depth test, scissor test, culling, and blending state through
+a cache that drops calls which would not change anything. Within a
+render pass, the program and vertex array of a shader furthermore
+remain bound after Shader::end(), so that consecutive draws with the
+same shader do not rebind them.
+
+Parameter ``reset``:
+    Set the counters to zero after reading them)doc";
+
 static const char *__doc_nanogui_init =
 R"doc(Static initialization; should be called once before invoking **any**
 NanoGUI functions **if** you are having NanoGUI manage OpenGL / GLFW.
 This method is effectively a wrapper call to ``glfwInit()``, so if you
 are managing OpenGL / GLFW on your own *do not call this method*.
 
+Parameter ``headless``:
+    Initialize GLFW without a window system. Screens created
+    afterwards are headless: they render into an offscreen OpenGL
+    context (EGL surfaceless or pbuffer, with an OSMesa fallback)
+    backed by a framebuffer object, and receive no input events. This
+    is useful for batch rendering and testing on machines without a
+    display server or GPU. Not supported by the Metal backend.
+
 \rst Refer to :ref:`nanogui_example_3` for how you might go about
 managing OpenGL and GLFW on your own, while still using NanoGUI's
 classes. \endrst)doc";
@@ -3553,11 +4597,18 @@ mainloop).)doc";
 
 static const char *__doc_nanogui_load_image_directory =
 R"doc(Load a directory of PNG images and upload them to the GPU (suitable
-for use with ImagePanel))doc";
+for use with ImagePanel). The images are decoded in parallel on a pool
+of worker threads.)doc";
 
 static const char *__doc_nanogui_mainloop =
 R"doc(Enter the application main loop
 
+The main loop sleeps until an event arrives or until a screen must
+draw an animation frame requested via
+Widget::request_animation_frame(). No CPU time is consumed while the
+application is idle. Animation frames are paced according to
+Screen::set_target_fps() and Screen::set_vsync().
+
 Parameter ``refresh``:
     NanoGUI issues a redraw call whenever an keyboard/mouse/.. event
     is received. In the absence of any external events, it enforces a
@@ -3744,6 +4795,19 @@ Returns:
     A ``std::pair`` with two boolean values. The first indicates
     10-bit color support, and the second indicates EDR support.)doc";
 
+static const char *__doc_nanogui_test_texture_compression_support =
+R"doc(Check for the availability of block-compressed texture formats (see
+Texture::ComponentFormat).
+
+With the OpenGL backend, this function queries the context that is
+current on the calling thread, hence a Screen must have been created
+beforehand. The Metal backend does not support compressed textures yet
+and returns ``(false, false, false)``.
+
+Returns:
+    A ``std::tuple`` with three boolean values indicating support for
+    the BC1-BC7, ETC2, and ASTC format families, respectively.)doc";
+
 static const char *__doc_nanogui_type_name =
 R"doc(Return the name (e.g. "uint8") associated with a specific variable
 type)doc";
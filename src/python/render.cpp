@@ -4,7 +4,7 @@
 
 #include "python.h"
 
-static VariableType dtype_to_enoki(nb::dlpack::dtype dtype) {
+VariableType dtype_to_enoki(nb::dlpack::dtype dtype) {
     switch ((nb::dlpack::dtype_code) dtype.code) {
         case nb::dlpack::dtype_code::Int:
             switch (dtype.bits) {
@@ -42,9 +42,10 @@ static VariableType dtype_to_enoki(nb::dlpack::dtype dtype) {
     return VariableType::Invalid;
 }
 
-static void
-shader_set_buffer(Shader &shader, const std::string &name,
-                  nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+template <typename Key> void
+shader_set_buffer(Shader &shader, const Key &name,
+                  nb::tensor<nb::device::cpu> tensor,
+                  bool per_instance, bool normalized) {
     if (tensor.ndim() > 3)
         throw nb::type_error("Shader::set_buffer(): tensor rank must be < 3!");
 
@@ -59,10 +60,172 @@ shader_set_buffer(Shader &shader, const std::string &name,
         tensor.ndim() > 2 ? (size_t) tensor.shape(2) : 1
     };
 
-    shader.set_buffer(name, dtype, tensor.ndim(), dim, tensor.data());
+    // Strided views (e.g. 'array[:, :3]') are passed on without copying them
+    int64_t strides[3] { 0, 0, 0 };
+    for (size_t i = 0; i < tensor.ndim(); ++i)
+        strides[i] = tensor.stride(i) * (int64_t) type_size(dtype);
+
+    shader.set_buffer_strided(name, dtype, tensor.ndim(), dim, strides,
+                              tensor.data(), per_instance, normalized);
 }
 
-static nb::tensor<nb::numpy> texture_download(Texture &texture) {
+/// Determine the VariableType of a (non-structured) NumPy dtype
+static VariableType numpy_dtype_to_enoki(nb::handle dtype) {
+    if (!nb::cast<bool>(dtype.attr("isnative")))
+        return VariableType::Invalid;
+
+    std::string kind = nb::cast<std::string>(dtype.attr("kind"));
+    nb::dlpack::dtype dt;
+    dt.bits = (uint8_t) (nb::cast<size_t>(dtype.attr("itemsize")) * 8);
+    dt.lanes = 1;
+
+    if (kind == "i")
+        dt.code = (uint8_t) nb::dlpack::dtype_code::Int;
+    else if (kind == "u")
+        dt.code = (uint8_t) nb::dlpack::dtype_code::UInt;
+    else if (kind == "f")
+        dt.code = (uint8_t) nb::dlpack::dtype_code::Float;
+    else
+        return VariableType::Invalid;
+
+    return dtype_to_enoki(dt);
+}
+
+static void shader_set_buffer_interleaved(Shader &shader, nb::handle array,
+                                          nb::handle attributes,
+                                          bool per_instance,
+                                          nb::handle normalized) {
+    nb::object fields = array.attr("dtype").attr("fields");
+    if (fields.is_none())
+        throw nb::type_error("Shader::set_buffer_interleaved(): expected an "
+                             "array with a structured dtype!");
+
+    // Names of the attributes whose integer components are normalized
+    std::vector<std::string> normalized_names;
+    if (!normalized.is_none()) {
+        for (nb::handle name : normalized)
+            normalized_names.push_back(nb::cast<std::string>(name));
+    }
+
+    /* By default, every field provides the vertex attribute of the same
+       name. Otherwise, 'attributes' maps attribute names to field names. */
+    std::vector<Shader::VertexAttribute> result;
+    nb::object items = (attributes.is_none() ? fields : nb::borrow(attributes)).attr("items")();
+    for (nb::handle item : items) {
+        std::string name  = nb::cast<std::string>(item[0]),
+                    field = attributes.is_none() ? name : nb::cast<std::string>(item[1]);
+
+        nb::object info = fields.attr("get")(field);
+        if (info.is_none())
+            throw nb::type_error(("Shader::set_buffer_interleaved(): the array has "
+                                  "no field named \"" + field + "\"!").c_str());
+
+        nb::object field_dtype = info[0], shape = field_dtype.attr("shape");
+        size_t ndim = nb::len(shape);
+        VariableType dtype = numpy_dtype_to_enoki(field_dtype.attr("base"));
+
+        if (dtype == VariableType::Invalid || ndim > 1)
+            throw nb::type_error(("Shader::set_buffer_interleaved(): field \"" + field +
+                                  "\" has an unsupported dtype!").c_str());
+
+        bool normalize = std::find(normalized_names.begin(), normalized_names.end(),
+                                   name) != normalized_names.end();
+        result.push_back({ name, dtype, ndim == 0 ? 1 : nb::cast<size_t>(shape[0]),
+                           nb::cast<size_t>(info[1]), normalize });
+    }
+
+    Py_buffer view;
+    if (PyObject_GetBuffer(array.ptr(), &view, PyBUF_STRIDES) != 0)
+        throw nb::python_error();
+
+    struct release_view {
+        Py_buffer *view;
+        ~release_view() { PyBuffer_Release(view); }
+    } release { &view };
+
+    if (view.ndim != 1 || view.strides[0] <= 0)
+        throw nb::type_error("Shader::set_buffer_interleaved(): expected a "
+                             "one-dimensional array with a positive stride!");
+
+    shader.set_buffer_interleaved(result, (size_t) view.shape[0],
+                                  (size_t) view.strides[0], view.buf,
+                                  per_instance);
+}
+
+template <typename Key> void
+shader_update_buffer_region(Shader &shader, const Key &name, size_t offset,
+                            nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+    if (tensor.ndim() < 1 || tensor.ndim() > 3)
+        throw nb::type_error("Shader::update_buffer_region(): tensor rank must be between 1 and 3!");
+
+    VariableType dtype = dtype_to_enoki(tensor.dtype());
+
+    if (dtype == VariableType::Invalid)
+        throw nb::type_error("Shader::update_buffer_region(): unsupported array dtype!");
+
+    size_t dim[3] {
+        (size_t) tensor.shape(0),
+        tensor.ndim() > 1 ? (size_t) tensor.shape(1) : 1,
+        tensor.ndim() > 2 ? (size_t) tensor.shape(2) : 1
+    };
+
+    shader.update_buffer_region(name, dtype, offset, tensor.ndim(), dim, tensor.data());
+}
+
+static void
+uniform_block_set_buffer(UniformBlock &block, const std::string &name,
+                         nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+    if (tensor.ndim() > 3)
+        throw nb::type_error("UniformBlock::set_buffer(): tensor rank must be < 3!");
+
+    VariableType dtype = dtype_to_enoki(tensor.dtype());
+
+    if (dtype == VariableType::Invalid)
+        throw nb::type_error("UniformBlock::set_buffer(): unsupported array dtype!");
+
+    size_t dim[3] {
+        tensor.ndim() > 0 ? (size_t) tensor.shape(0) : 1,
+        tensor.ndim() > 1 ? (size_t) tensor.shape(1) : 1,
+        tensor.ndim() > 2 ? (size_t) tensor.shape(2) : 1
+    };
+
+    block.set_buffer(name, dtype, tensor.ndim(), dim, tensor.data());
+}
+
+static void buffer_upload(Buffer &buffer,
+                          nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+    if (tensor.ndim() > 3)
+        throw nb::type_error("Buffer::upload(): tensor rank must be < 3!");
+
+    VariableType dtype = dtype_to_enoki(tensor.dtype());
+
+    if (dtype == VariableType::Invalid)
+        throw nb::type_error("Buffer::upload(): unsupported array dtype!");
+
+    size_t dim[3] {
+        tensor.ndim() > 0 ? (size_t) tensor.shape(0) : 1,
+        tensor.ndim() > 1 ? (size_t) tensor.shape(1) : 1,
+        tensor.ndim() > 2 ? (size_t) tensor.shape(2) : 1
+    };
+
+    buffer.upload(dtype, tensor.ndim(), dim, tensor.data());
+}
+
+using DrawRanges = nb::tensor<int32_t, nb::shape<nb::any>, nb::device::cpu, nb::c_contig>;
+
+static void shader_draw_multi(Shader &shader, Shader::PrimitiveType primitive_type,
+                              DrawRanges offsets, DrawRanges counts, bool indexed) {
+    if (offsets.shape(0) != counts.shape(0))
+        throw std::runtime_error(
+            "Shader::draw_multi(): 'offsets' and 'counts' must have the same size!");
+
+    shader.draw_multi(primitive_type, offsets.shape(0),
+                      (const int32_t *) offsets.data(),
+                      (const int32_t *) counts.data(), indexed);
+}
+
+/// Return the array dtype corresponding to the component format of 'texture'
+static nb::dlpack::dtype texture_dtype(const Texture &texture) {
     nb::dlpack::dtype dt;
 
     switch (texture.component_format()) {
@@ -77,23 +240,138 @@ static nb::tensor<nb::numpy> texture_download(Texture &texture) {
         default: throw std::runtime_error("Invalid component format");
     }
 
+    return dt;
+}
+
+/// Allocate a NumPy array that can hold the contents of 'texture'
+static nb::tensor<nb::numpy> texture_alloc(const Texture &texture, uint8_t *&ptr) {
+    nb::dlpack::dtype dt = texture_dtype(texture);
+
     // Dynamically allocate 'data'
     size_t shape[3] = { (size_t) texture.size().y(),
                         (size_t) texture.size().x(),
                         (size_t) texture.channels() };
-    uint8_t *ptr = new uint8_t[shape[0] * shape[1] * shape[2] * dt.bits / 8];
+    ptr = new uint8_t[shape[0] * shape[1] * shape[2] * dt.bits / 8];
 
     // Delete 'data' when the 'owner' capsule expires
     nb::capsule owner(ptr, [](void *p) noexcept {
        delete[] (uint8_t *) p;
     });
 
-    texture.download(ptr);
-
     return nb::tensor<nb::numpy>(ptr, 3, shape, owner, nullptr, dt);
 }
 
+/// Check that the contents of 'texture' can be written into 'out' as is
+static void texture_check_out(const Texture &texture,
+                              const nb::tensor<nb::device::cpu> &out,
+                              const char *caller) {
+    size_t n_channels = out.ndim() == 3 ? out.shape(2) : 1;
+    VariableType dtype         = dtype_to_enoki(out.dtype()),
+                 dtype_texture = (VariableType) texture.component_format();
+
+    if (out.ndim() != 2 && out.ndim() != 3)
+        throw std::runtime_error(std::string(caller) +
+                                 ": expected a 2 or 3-dimensional array!");
+    else if (out.shape(0) != (size_t) texture.size().y() ||
+             out.shape(1) != (size_t) texture.size().x())
+        throw std::runtime_error(std::string(caller) +
+                                 ": array size does not match the texture!");
+    else if (n_channels != texture.channels())
+        throw std::runtime_error(
+            std::string(caller) + ": number of color channels in array (" +
+            std::to_string(n_channels) + ") does not match the texture (" +
+            std::to_string(texture.channels()) + ")!");
+    else if (dtype != dtype_texture)
+        throw std::runtime_error(
+            std::string(caller) + ": dtype of array (" +
+            type_name(dtype) + ") does not match the texture (" +
+            type_name(dtype_texture) + ")!");
+
+    int64_t stride = 1;
+    for (size_t i = out.ndim(); i-- > 0; ) {
+        if (out.shape(i) != 1 && out.stride(i) != stride)
+            throw std::runtime_error(std::string(caller) +
+                                     ": expected a C-contiguous array!");
+        stride *= (int64_t) out.shape(i);
+    }
+}
+
+static nb::tensor<nb::numpy> texture_download(Texture &texture) {
+    uint8_t *ptr = nullptr;
+    nb::tensor<nb::numpy> result = texture_alloc(texture, ptr);
+    {
+        nb::gil_scoped_release release;
+        texture.download(ptr);
+    }
+    return result;
+}
+
+static void texture_download_out(Texture &texture, nb::tensor<nb::device::cpu> out) {
+    texture_check_out(texture, out, "Texture::download()");
+    nb::gil_scoped_release release;
+    texture.download((uint8_t *) out.data());
+}
+
+/// Arrays are shaped like the texture, which must still have the downloaded size
+static void texture_check_download(const Texture::Download &download) {
+    const Texture *texture = download.texture();
+    if (download.size() != texture->bytes_per_pixel() * (size_t) texture->size().x() *
+                               (size_t) texture->size().y())
+        throw std::runtime_error("Texture::Download::read(): the texture was resized "
+                                 "after the download was started!");
+}
+
+static nb::tensor<nb::numpy> texture_download_read(Texture::Download &download) {
+    texture_check_download(download);
+    uint8_t *ptr = nullptr;
+    nb::tensor<nb::numpy> result = texture_alloc(*download.texture(), ptr);
+    {
+        // Waiting for the transfer does not require the GIL
+        nb::gil_scoped_release release;
+        download.read(ptr);
+    }
+    return result;
+}
+
+static void texture_download_read_out(Texture::Download &download,
+                                      nb::tensor<nb::device::cpu> out) {
+    texture_check_download(download);
+    texture_check_out(*download.texture(), out, "Texture::Download::read()");
+    nb::gil_scoped_release release;
+    download.read((uint8_t *) out.data());
+}
+
+/**
+ * Block-compressed data is specified as a uint8 array of shape (rows of blocks,
+ * blocks per row, bytes per block). Checks that the array covers a region of
+ * the given size.
+ */
+static void texture_check_blocks(const Texture &texture,
+                                 const nb::tensor<nb::device::cpu, nb::c_contig> &tensor,
+                                 const Vector2i &size, const char *caller) {
+    Vector2i block = texture.block_size();
+    size_t rows = (size_t) ((size.y() + block.y() - 1) / block.y()),
+           cols = (size_t) ((size.x() + block.x() - 1) / block.x());
+
+    if (tensor.ndim() != 3 || dtype_to_enoki(tensor.dtype()) != VariableType::UInt8 ||
+        tensor.shape(2) != texture.bytes_per_block())
+        throw std::runtime_error(
+            std::string(caller) + ": expected a uint8 array of compressed blocks with shape "
+            "(rows, columns, " + std::to_string(texture.bytes_per_block()) + ")!");
+    else if (tensor.shape(0) != rows || tensor.shape(1) != cols)
+        throw std::runtime_error(
+            std::string(caller) + ": array size does not match the texture (expected " +
+            std::to_string(rows) + "x" + std::to_string(cols) + " blocks)!");
+}
+
 static void texture_upload(Texture &texture, nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+    if (texture.compressed()) {
+        texture_check_blocks(texture, tensor, texture.size(), "Texture::upload()");
+        nb::gil_scoped_release release;
+        texture.upload((const uint8_t *) tensor.data());
+        return;
+    }
+
     size_t n_channels = tensor.ndim() == 3 ? tensor.shape(2) : 1;
     VariableType dtype         = dtype_to_enoki(tensor.dtype()),
                  dtype_texture = (VariableType) texture.component_format();
@@ -114,10 +392,25 @@ static void texture_upload(Texture &texture, nb::tensor<nb::device::cpu, nb::c_c
             type_name(dtype) + ") does not match the texture (" +
             type_name(dtype_texture) + ")!");
 
+    // Copying the data (e.g. into a pixel unpack buffer) does not require the GIL
+    nb::gil_scoped_release release;
     texture.upload((const uint8_t *) tensor.data());
 }
 
 static void texture_upload_sub_region(Texture &texture, nb::tensor<nb::device::cpu, nb::c_contig> tensor, const Vector2i &origin) {
+    if (texture.compressed()) {
+        Vector2i block = texture.block_size(), size(0);
+        if (tensor.ndim() == 3) {
+            size = Vector2i((int) tensor.shape(1) * block.x(), (int) tensor.shape(0) * block.y());
+            size = Vector2i(std::min(size.x(), texture.size().x() - origin.x()),
+                            std::min(size.y(), texture.size().y() - origin.y()));
+        }
+        texture_check_blocks(texture, tensor, size, "Texture::upload_sub_region()");
+        nb::gil_scoped_release release;
+        texture.upload_sub_region((const uint8_t *) tensor.data(), origin, size);
+        return;
+    }
+
     size_t n_channels = tensor.ndim() == 3 ? tensor.shape(2) : 1;
     VariableType dtype         = dtype_to_enoki(tensor.dtype()),
                  dtype_texture = (VariableType) texture.component_format();
@@ -138,12 +431,60 @@ static void texture_upload_sub_region(Texture &texture, nb::tensor<nb::device::c
             type_name(dtype) + ") does not match the texture (" +
             type_name(dtype_texture) + ")!");
 
+    nb::gil_scoped_release release;
     texture.upload_sub_region(
         (const uint8_t *) tensor.data(), origin,
         { (int32_t) tensor.shape(0), (int32_t) tensor.shape(1) });
 }
+
+static void texture_upload_mipmap(Texture &texture, uint32_t level,
+                                  nb::tensor<nb::device::cpu, nb::c_contig> tensor) {
+    if (level >= 32)
+        throw std::runtime_error("Texture::upload_mipmap(): invalid mip level!");
+    Vector2i size(std::max(texture.size().x() >> level, 1),
+                  std::max(texture.size().y() >> level, 1));
+
+    if (texture.compressed()) {
+        texture_check_blocks(texture, tensor, size, "Texture::upload_mipmap()");
+    } else {
+        size_t n_channels = tensor.ndim() == 3 ? tensor.shape(2) : 1;
+        if ((tensor.ndim() != 2 && tensor.ndim() != 3) ||
+            tensor.shape(0) != (size_t) size.y() || tensor.shape(1) != (size_t) size.x() ||
+            n_channels != texture.channels() ||
+            dtype_to_enoki(tensor.dtype()) != (VariableType) texture.component_format())
+            throw std::runtime_error(
+                "Texture::upload_mipmap(): expected an array of shape (" +
+                std::to_string(size.y()) + ", " + std::to_string(size.x()) + ", " +
+                std::to_string(texture.channels()) + ") with the dtype of the texture!");
+    }
+
+    nb::gil_scoped_release release;
+    texture.upload_mipmap(level, (const uint8_t *) tensor.data());
+}
 #endif
 
+/**
+ * Retrieve the next frame of a capture. Without a sink, the frame is returned
+ * as an array referencing a buffer of the capture's pool, and otherwise its
+ * index is returned.
+ */
+static nb::object frame_capture_next(nb::handle self) {
+    FrameCapture &capture = nb::cast<FrameCapture &>(self);
+    if (!capture.next())
+        throw nb::stop_iteration();
+    else if (capture.has_sink())
+        return nb::int_(capture.frame_index());
+
+    Texture *texture = capture.texture();
+    size_t shape[3] = { (size_t) capture.size().y(),
+                        (size_t) capture.size().x(),
+                        (size_t) texture->channels() };
+
+    // The array keeps the capture (and thereby its buffers) alive
+    return nb::cast(nb::tensor<nb::numpy>((void *) capture.data(), 3, shape, self,
+                                          nullptr, texture_dtype(*texture)));
+}
+
 void register_render(nb::module_ &m) {
     using PixelFormat       = Texture::PixelFormat;
     using ComponentFormat   = Texture::ComponentFormat;
@@ -175,7 +516,17 @@ void register_render(nb::module_ &m) {
         .value("UInt32", ComponentFormat::UInt32, D(Texture, ComponentFormat, UInt32))
         .value("Int32", ComponentFormat::Int32, D(Texture, ComponentFormat, Int32))
         .value("Float16", ComponentFormat::Float16, D(Texture, ComponentFormat, Float16))
-        .value("Float32", ComponentFormat::Float32, D(Texture, ComponentFormat, Float32));
+        .value("Float32", ComponentFormat::Float32, D(Texture, ComponentFormat, Float32))
+        .value("BC1", ComponentFormat::BC1, D(Texture, ComponentFormat, BC1))
+        .value("BC2", ComponentFormat::BC2, D(Texture, ComponentFormat, BC2))
+        .value("BC3", ComponentFormat::BC3, D(Texture, ComponentFormat, BC3))
+        .value("BC4", ComponentFormat::BC4, D(Texture, ComponentFormat, BC4))
+        .value("BC5", ComponentFormat::BC5, D(Texture, ComponentFormat, BC5))
+        .value("BC6H", ComponentFormat::BC6H, D(Texture, ComponentFormat, BC6H))
+        .value("BC7", ComponentFormat::BC7, D(Texture, ComponentFormat, BC7))
+        .value("ETC2", ComponentFormat::ETC2, D(Texture, ComponentFormat, ETC2))
+        .value("ASTC4x4", ComponentFormat::ASTC4x4, D(Texture, ComponentFormat, ASTC4x4))
+        .value("ASTC8x8", ComponentFormat::ASTC8x8, D(Texture, ComponentFormat, ASTC8x8));
 
     nb::enum_<InterpolationMode>(texture, "InterpolationMode", D(Texture, InterpolationMode))
         .value("Nearest", InterpolationMode::Nearest, D(Texture, InterpolationMode, Nearest))
@@ -189,7 +540,8 @@ void register_render(nb::module_ &m) {
 
     nb::enum_<TextureFlags>(texture, "TextureFlags", D(Texture, TextureFlags), nb::is_arithmetic())
         .value("ShaderRead", TextureFlags::ShaderRead, D(Texture, TextureFlags, ShaderRead))
-        .value("RenderTarget", TextureFlags::RenderTarget, D(Texture, TextureFlags, RenderTarget));
+        .value("RenderTarget", TextureFlags::RenderTarget, D(Texture, TextureFlags, RenderTarget))
+        .value("Streaming", TextureFlags::Streaming, D(Texture, TextureFlags, Streaming));
 
     texture
         .def(nb::init<PixelFormat, ComponentFormat, const Vector2i &,
@@ -205,6 +557,34 @@ void register_render(nb::module_ &m) {
              "min_interpolation_mode"_a = InterpolationMode::Bilinear,
              "mag_interpolation_mode"_a = InterpolationMode::Bilinear,
              "wrap_mode"_a = WrapMode::ClampToEdge)
+        .def_static("load_async",
+             [](const std::vector<std::string> &filenames,
+                const std::function<void(size_t, Texture *)> &callback,
+                InterpolationMode min_interpolation_mode,
+                InterpolationMode mag_interpolation_mode, WrapMode wrap_mode) {
+                 // Futures are not exposed to Python, results are reported via 'callback'
+                 Texture::load_async(filenames, callback, min_interpolation_mode,
+                                     mag_interpolation_mode, wrap_mode);
+             }, D(Texture, load_async), "filenames"_a, "callback"_a,
+             "min_interpolation_mode"_a = InterpolationMode::Bilinear,
+             "mag_interpolation_mode"_a = InterpolationMode::Bilinear,
+             "wrap_mode"_a = WrapMode::ClampToEdge)
+        .def_static("from_file_mapped",
+             [](const std::string &filename, PixelFormat pixel_format,
+                ComponentFormat component_format, const Vector2i &size,
+                InterpolationMode min_interpolation_mode,
+                InterpolationMode mag_interpolation_mode, WrapMode wrap_mode) {
+                 nb::gil_scoped_release release;
+                 return Texture::from_file_mapped(filename, pixel_format, component_format,
+                                                  size, min_interpolation_mode,
+                                                  mag_interpolation_mode, wrap_mode);
+             }, D(Texture, from_file_mapped), "filename"_a,
+             "pixel_format"_a = PixelFormat::RGBA,
+             "component_format"_a = ComponentFormat::Float32,
+             "size"_a = Vector2i(0),
+             "min_interpolation_mode"_a = InterpolationMode::Bilinear,
+             "mag_interpolation_mode"_a = InterpolationMode::Bilinear,
+             "wrap_mode"_a = WrapMode::ClampToEdge)
         .def("pixel_format", &Texture::pixel_format, D(Texture, pixel_format))
         .def("component_format", &Texture::component_format, D(Texture, component_format))
         .def("min_interpolation_mode", &Texture::min_interpolation_mode, D(Texture, min_interpolation_mode))
@@ -215,9 +595,19 @@ void register_render(nb::module_ &m) {
         .def("size", &Texture::size, D(Texture, size))
         .def("bytes_per_pixel", &Texture::bytes_per_pixel, D(Texture, bytes_per_pixel))
         .def("channels", &Texture::channels, D(Texture, channels))
+        .def("compressed", &Texture::compressed, D(Texture, compressed))
+        .def("block_size", &Texture::block_size, D(Texture, block_size))
+        .def("bytes_per_block", &Texture::bytes_per_block, D(Texture, bytes_per_block))
+        .def("data_size", &Texture::data_size, D(Texture, data_size), "size"_a)
         .def("download", &texture_download, D(Texture, download))
+        .def("download", &texture_download_out, D(Texture, download),
+             "out"_a.noconvert())
+        .def("download_async", &Texture::download_async, D(Texture, download_async),
+             "flip"_a = false)
         .def("upload", &texture_upload, D(Texture, upload))
         .def("upload_sub_region", &texture_upload_sub_region, D(Texture, upload, origin))
+        .def("upload_mipmap", &texture_upload_mipmap, D(Texture, upload_mipmap),
+             "level"_a, "data"_a)
         .def("generate_mipmap", &Texture::generate_mipmap, D(Texture, generate_mipmap))
         .def("resize", &Texture::resize, D(Texture, resize))
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
@@ -229,6 +619,39 @@ void register_render(nb::module_ &m) {
 #endif
         ;
 
+    nb::class_<Texture::Download, Object>(texture, "Download", D(Texture, Download))
+        .def("texture", nb::overload_cast<>(&Texture::Download::texture),
+             D(Texture, Download, texture))
+        .def("size", &Texture::Download::size, D(Texture, Download, size))
+        .def("ready", &Texture::Download::ready, D(Texture, Download, ready))
+        .def("read", &texture_download_read, D(Texture, Download, read))
+        .def("read", &texture_download_read_out, D(Texture, Download, read),
+             "out"_a.noconvert());
+
+    auto frame_capture = nb::class_<FrameCapture, Object>(m, "FrameCapture", D(FrameCapture));
+
+    nb::enum_<FrameCapture::SinkFormat>(frame_capture, "SinkFormat", D(FrameCapture, SinkFormat))
+        .value("Auto", FrameCapture::SinkFormat::Auto, D(FrameCapture, SinkFormat, Auto))
+        .value("Raw", FrameCapture::SinkFormat::Raw, D(FrameCapture, SinkFormat, Raw))
+        .value("Y4M", FrameCapture::SinkFormat::Y4M, D(FrameCapture, SinkFormat, Y4M))
+        .value("PNG", FrameCapture::SinkFormat::PNG, D(FrameCapture, SinkFormat, PNG));
+
+    frame_capture
+        .def("set_sink", &FrameCapture::set_sink, D(FrameCapture, set_sink),
+             "filename"_a, "format"_a = FrameCapture::SinkFormat::Auto)
+        .def("run", &FrameCapture::run, D(FrameCapture, run))
+        .def("close", &FrameCapture::close, D(FrameCapture, close))
+        .def("frame_index", &FrameCapture::frame_index, D(FrameCapture, frame_index))
+        .def("frame_count", &FrameCapture::frame_count, D(FrameCapture, frame_count))
+        .def("screen", &FrameCapture::screen, D(FrameCapture, screen))
+        .def("texture", &FrameCapture::texture, D(FrameCapture, texture))
+        .def("size", &FrameCapture::size, D(FrameCapture, size))
+        .def("frame_size", &FrameCapture::frame_size, D(FrameCapture, frame_size))
+        .def("pool_size", &FrameCapture::pool_size, D(FrameCapture, pool_size))
+        .def("has_sink", &FrameCapture::has_sink, D(FrameCapture, has_sink))
+        .def("__iter__", [](nb::handle self) { return self; })
+        .def("__next__", &frame_capture_next, D(FrameCapture, next));
+
     auto shader = nb::class_<Shader, Object>(m, "Shader", D(Shader));
 
     nb::enum_<BlendMode>(shader, "BlendMode", D(Shader, BlendMode))
@@ -237,13 +660,57 @@ void register_render(nb::module_ &m) {
 
     shader
         .def(nb::init<RenderPass *, const std::string &,
-                      const std::string &, const std::string &, Shader::BlendMode>(),
+                      const std::string &, const std::string &, Shader::BlendMode,
+                      bool>(),
              D(Shader, Shader), "render_pass"_a, "name"_a, "vertex_shader"_a,
-             "fragment_shader"_a, "blend_mode"_a = BlendMode::None)
+             "fragment_shader"_a, "blend_mode"_a = BlendMode::None,
+             "async_compile"_a = false)
         .def("name", &Shader::name, D(Shader, name))
         .def("blend_mode", &Shader::blend_mode, D(Shader, blend_mode))
-        .def("set_buffer", &shader_set_buffer, D(Shader, set_buffer))
-        .def("set_texture", &Shader::set_texture, D(Shader, set_texture))
+        .def("ready", &Shader::ready, D(Shader, ready))
+        .def("set_ready_callback", &Shader::set_ready_callback,
+             D(Shader, set_ready_callback), "callback"_a)
+        .def("ready_callback", &Shader::ready_callback, D(Shader, ready_callback))
+        .def_static("set_program_cache_dir", &Shader::set_program_cache_dir,
+                    D(Shader, set_program_cache_dir), "path"_a)
+        .def_static("program_cache_dir", &Shader::program_cache_dir,
+                    D(Shader, program_cache_dir))
+        .def("argument_handle", &Shader::argument_handle,
+             D(Shader, argument_handle), "name"_a)
+        .def("set_buffer", &shader_set_buffer<std::string>, D(Shader, set_buffer),
+             "name"_a, "value"_a, "per_instance"_a = false, "normalized"_a = false)
+        .def("set_buffer", &shader_set_buffer<size_t>, D(Shader, set_buffer, 3),
+             "handle"_a, "value"_a, "per_instance"_a = false, "normalized"_a = false)
+        .def("set_buffer",
+             nb::overload_cast<const std::string &, Buffer *, bool, bool>(&Shader::set_buffer),
+             D(Shader, set_buffer, 5), "name"_a, "buffer"_a.none(),
+             "per_instance"_a = false, "normalized"_a = false)
+        .def("set_buffer",
+             nb::overload_cast<size_t, Buffer *, bool, bool>(&Shader::set_buffer),
+             D(Shader, set_buffer, 6), "handle"_a, "buffer"_a.none(),
+             "per_instance"_a = false, "normalized"_a = false)
+        .def("set_buffer_interleaved", &shader_set_buffer_interleaved,
+             D(Shader, set_buffer_interleaved), "value"_a,
+             "attributes"_a.none() = nb::none(), "per_instance"_a = false,
+             "normalized"_a.none() = nb::none())
+        .def("update_buffer_region", &shader_update_buffer_region<std::string>,
+             D(Shader, update_buffer_region), "name"_a, "offset"_a, "array"_a)
+        .def("update_buffer_region", &shader_update_buffer_region<size_t>,
+             D(Shader, update_buffer_region, 3), "handle"_a, "offset"_a, "array"_a)
+        .def("set_buffer_streaming", &Shader::set_buffer_streaming,
+             D(Shader, set_buffer_streaming), "name"_a, "streaming"_a = true)
+        .def("set_texture",
+             nb::overload_cast<const std::string &, Texture *>(&Shader::set_texture),
+             D(Shader, set_texture))
+        .def("set_texture",
+             nb::overload_cast<size_t, Texture *>(&Shader::set_texture),
+             D(Shader, set_texture, 2))
+        .def("set_uniform_block",
+             nb::overload_cast<const std::string &, UniformBlock *>(&Shader::set_uniform_block),
+             D(Shader, set_uniform_block), "name"_a, "block"_a.none())
+        .def("set_uniform_block",
+             nb::overload_cast<size_t, UniformBlock *>(&Shader::set_uniform_block),
+             D(Shader, set_uniform_block, 2), "handle"_a, "block"_a.none())
         .def("begin", &Shader::begin, D(Shader, begin))
         .def("end", &Shader::end, D(Shader, end))
         .def("__enter__", &Shader::begin)
@@ -251,6 +718,11 @@ void register_render(nb::module_ &m) {
              "type"_a.none(), "value"_a.none(), "traceback"_a.none())
         .def("draw_array", &Shader::draw_array, D(Shader, draw_array),
              "primitive_type"_a, "offset"_a, "count"_a, "indexed"_a = false)
+        .def("draw_array_instanced", &Shader::draw_array_instanced,
+             D(Shader, draw_array_instanced), "primitive_type"_a, "offset"_a,
+             "count"_a, "instance_count"_a, "indexed"_a = false)
+        .def("draw_multi", &shader_draw_multi, D(Shader, draw_multi),
+             "primitive_type"_a, "offsets"_a, "counts"_a, "indexed"_a = false)
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
         .def("shader_handle", &Shader::shader_handle)
 #elif defined(NANOGUI_USE_METAL)
@@ -268,6 +740,42 @@ void register_render(nb::module_ &m) {
         .value("Triangle", PrimitiveType::Triangle, D(Shader, PrimitiveType, Triangle))
         .value("TriangleStrip", PrimitiveType::TriangleStrip, D(Shader, PrimitiveType, TriangleStrip));
 
+    nb::class_<UniformBlock, Object>(m, "UniformBlock", D(UniformBlock))
+        .def(nb::init<const Shader *, const std::string &>(),
+             D(UniformBlock, UniformBlock), "shader"_a, "name"_a)
+        .def("name", &UniformBlock::name, D(UniformBlock, name))
+        .def("size", &UniformBlock::size, D(UniformBlock, size))
+        .def("set_buffer", &uniform_block_set_buffer, D(UniformBlock, set_buffer),
+             "name"_a, "value"_a)
+        .def("upload", &UniformBlock::upload, D(UniformBlock, upload))
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+        .def("buffer_handle", &UniformBlock::buffer_handle)
+#endif
+        ;
+
+    auto buffer = nb::class_<Buffer, Object>(m, "Buffer", D(Buffer));
+
+    nb::enum_<Buffer::Type>(buffer, "Type", D(Buffer, Type))
+        .value("Vertex", Buffer::Type::Vertex, D(Buffer, Type, Vertex))
+        .value("Index", Buffer::Type::Index, D(Buffer, Type, Index));
+
+    buffer
+        .def(nb::init<Buffer::Type>(), D(Buffer, Buffer), "type"_a)
+        .def("type", &Buffer::type, D(Buffer, type))
+        .def("dtype", [](const Buffer &b) { return std::string(type_name(b.dtype())); },
+             D(Buffer, dtype))
+        .def("ndim", &Buffer::ndim, D(Buffer, ndim))
+        .def("shape", [](const Buffer &b) {
+                 return std::vector<size_t>(b.shape(), b.shape() + b.ndim());
+             }, D(Buffer, shape))
+        .def("size", &Buffer::size, D(Buffer, size))
+        .def("revision", &Buffer::revision, D(Buffer, revision))
+        .def("upload", &buffer_upload, D(Buffer, upload), "value"_a)
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+        .def("buffer_handle", &Buffer::buffer_handle)
+#endif
+        ;
+
     auto renderpass = nb::class_<RenderPass, Object>(m, "RenderPass", D(RenderPass))
         .def(nb::init<std::vector<Object *>, Object *, Object *, Object *, bool>(),
              D(RenderPass, RenderPass), "color_targets"_a, "depth_target"_a = nullptr,
@@ -313,4 +821,14 @@ void register_render(nb::module_ &m) {
         .value("NotEqual", DepthTest::NotEqual, D(RenderPass, DepthTest, NotEqual))
         .value("GreaterEqual", DepthTest::GreaterEqual, D(RenderPass, DepthTest, GreaterEqual))
         .value("Always", DepthTest::Always, D(RenderPass, DepthTest, Always));
+
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    nb::class_<GLStateStatistics>(m, "GLStateStatistics", D(GLStateStatistics))
+        .def_readonly("issued", &GLStateStatistics::issued, D(GLStateStatistics, issued))
+        .def_readonly("skipped", &GLStateStatistics::skipped, D(GLStateStatistics, skipped));
+
+    m.def("gl_state_statistics", &gl_state_statistics, D(gl_state_statistics),
+          "reset"_a = false);
+    m.def("gl_state_invalidate", &gl_state_invalidate, D(gl_state_invalidate));
+#endif
 }
@@ -158,6 +158,8 @@ void register_widget(nb::module_ &m) {
         .def("focused", &Widget::focused, D(Widget, focused))
         .def("set_focused", &Widget::set_focused, D(Widget, set_focused))
         .def("request_focus", &Widget::request_focus, D(Widget, request_focus))
+        .def("request_animation_frame", &Widget::request_animation_frame,
+             D(Widget, request_animation_frame), "delay"_a = 0.0)
         .def("tooltip", &Widget::tooltip, D(Widget, tooltip))
         .def("set_tooltip", &Widget::set_tooltip, D(Widget, set_tooltip))
         .def("font_size", &Widget::font_size, D(Widget, font_size))
@@ -166,6 +168,9 @@ void register_widget(nb::module_ &m) {
         .def("cursor", &Widget::cursor, D(Widget, cursor))
         .def("set_cursor", &Widget::set_cursor, D(Widget, set_cursor))
         .def("find_widget", (Widget *(Widget::*)(const Vector2i &)) &Widget::find_widget, D(Widget, find_widget))
+        .def("spatial_index", &Widget::spatial_index, D(Widget, spatial_index))
+        .def("set_spatial_index", &Widget::set_spatial_index, D(Widget, set_spatial_index))
+        .def("invalidate_spatial_index", &Widget::invalidate_spatial_index, D(Widget, invalidate_spatial_index))
         .def("contains", &Widget::contains, D(Widget, contains))
         .def("mouse_button_event", &Widget::mouse_button_event, "p"_a, "button"_a,
              "down"_a, "modifiers"_a, D(Widget, mouse_button_event))
@@ -214,6 +219,14 @@ void register_widget(nb::module_ &m) {
         .def("framebuffer_size", &Screen::framebuffer_size, D(Screen, framebuffer_size))
         .def("perform_layout", (void(Screen::*)(void)) &Screen::perform_layout, D(Screen, perform_layout))
         .def("redraw", &Screen::redraw, D(Screen, redraw))
+        .def("frame_deadline", &Screen::frame_deadline, D(Screen, frame_deadline))
+        .def("target_fps", &Screen::target_fps, D(Screen, target_fps))
+        .def("set_target_fps", &Screen::set_target_fps, D(Screen, set_target_fps))
+        .def("vsync", &Screen::vsync, D(Screen, vsync))
+        .def("set_vsync", &Screen::set_vsync, D(Screen, set_vsync))
+        .def("coalesce_events", &Screen::coalesce_events, D(Screen, coalesce_events))
+        .def("set_coalesce_events", &Screen::set_coalesce_events, D(Screen, set_coalesce_events))
+        .def("flush_events", &Screen::flush_events, D(Screen, flush_events))
         .def("clear", &Screen::clear, D(Screen, clear))
         .def("draw_all", &Screen::draw_all, D(Screen, draw_all))
         .def("draw_contents", &Screen::draw_contents, D(Screen, draw_contents))
@@ -226,6 +239,29 @@ void register_widget(nb::module_ &m) {
         .def("has_depth_buffer", &Screen::has_depth_buffer, D(Screen, has_depth_buffer))
         .def("has_stencil_buffer", &Screen::has_stencil_buffer, D(Screen, has_stencil_buffer))
         .def("has_float_buffer", &Screen::has_float_buffer, D(Screen, has_float_buffer))
+        .def("headless", &Screen::headless, D(Screen, headless))
+        .def("back_buffer", &Screen::back_buffer, D(Screen, back_buffer))
+        .def("capture",
+             [](Screen *screen, size_t n_frames, nb::object until, const std::string &sink,
+                FrameCapture::SinkFormat format, size_t pool_size, float fps) {
+                 std::function<bool()> until_func;
+                 if (!until.is_none())
+                     until_func = nb::cast<std::function<bool()>>(until);
+                 ref<FrameCapture> capture =
+                     new FrameCapture(screen, n_frames, until_func, pool_size, fps);
+                 if (!sink.empty())
+                     capture->set_sink(sink, format);
+                 return capture;
+             }, "n_frames"_a = 0, "until"_a.none() = nb::none(), "sink"_a = "",
+             "format"_a = FrameCapture::SinkFormat::Auto, "pool_size"_a = 3, "fps"_a = 0.f,
+             "Capture a sequence of frames (see :py:class:`FrameCapture`).\n\n"
+             "The returned iterator yields each frame as an array of shape "
+             "``(height, width, channels)`` that references a buffer of the "
+             "capture's pool: it is overwritten ``pool_size`` frames later and "
+             "must be copied to retain it. When ``sink`` specifies a file name, "
+             "the frames are written there instead, and the iterator yields their "
+             "indices. Use :py:meth:`FrameCapture.run` to capture all frames at "
+             "once.")
         .def("glfw_window", &Screen::glfw_window, D(Screen, glfw_window),
                 nb::rv_policy::reference)
         .def("nvg_context", &Screen::nvg_context, D(Screen, nvg_context),
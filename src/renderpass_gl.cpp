@@ -3,6 +3,7 @@
 #include <nanogui/opengl.h>
 #include <nanogui/texture.h>
 #include "opengl_check.h"
+#include "opengl_state.h"
 
 NAMESPACE_BEGIN(nanogui)
 
@@ -40,7 +41,7 @@ RenderPass::RenderPass(const std::vector<Object *> &color_targets,
     }
 
     CHK(glGenFramebuffers(1, &m_framebuffer_handle));
-    CHK(glBindFramebuffer(GL_FRAMEBUFFER, m_framebuffer_handle));
+    gl_state().bind_framebuffer(m_framebuffer_handle);
 
 #if defined(NANOGUI_USE_OPENGL)
     std::vector<GLenum> draw_buffers;
@@ -86,6 +87,7 @@ RenderPass::RenderPass(const std::vector<Object *> &color_targets,
     m_viewport_size = m_framebuffer_size;
 
     if (has_screen && !has_texture) {
+        gl_state().forget_framebuffer(m_framebuffer_handle);
         CHK(glDeleteFramebuffers(1, &m_framebuffer_handle));
         m_framebuffer_handle = 0;
     } else {
@@ -141,7 +143,7 @@ RenderPass::RenderPass(const std::vector<Object *> &color_targets,
         }
     }
 
-    CHK(glBindFramebuffer(GL_FRAMEBUFFER, 0));
+    gl_state().bind_framebuffer(0);
 }
 
 RenderPass::~RenderPass() {
@@ -150,6 +152,7 @@ RenderPass::~RenderPass() {
             m_targets[i]->dec_ref();
     }
 
+    gl_state().forget_framebuffer(m_framebuffer_handle);
     CHK(glDeleteFramebuffers(1, &m_framebuffer_handle));
 }
 
@@ -160,18 +163,18 @@ void RenderPass::begin() {
 #endif
     m_active = true;
 
-    CHK(glGetIntegerv(GL_VIEWPORT, m_viewport_backup));
-    CHK(glGetIntegerv(GL_SCISSOR_BOX, m_scissor_backup));
-    GLboolean depth_write;
-    CHK(glGetBooleanv(GL_DEPTH_WRITEMASK, &depth_write));
-    m_depth_write_backup = depth_write;
-
-    m_depth_test_backup = glIsEnabled(GL_DEPTH_TEST);
-    m_scissor_test_backup = glIsEnabled(GL_SCISSOR_TEST);
-    m_cull_face_backup = glIsEnabled(GL_CULL_FACE);
-    m_blend_backup = glIsEnabled(GL_BLEND);
-
-    CHK(glBindFramebuffer(GL_FRAMEBUFFER, m_framebuffer_handle));
+    // The state cache only queries OpenGL for values that it does not know
+    GLState &state = gl_state();
+    state.get_viewport(m_viewport_backup);
+    state.get_scissor(m_scissor_backup);
+    m_depth_write_backup = state.get_depth_mask();
+    m_depth_test_backup = state.is_enabled(GLState::DepthTest);
+    m_scissor_test_backup = state.is_enabled(GLState::ScissorTest);
+    m_cull_face_backup = state.is_enabled(GLState::CullFace);
+    m_blend_backup = state.is_enabled(GLState::Blend);
+    state.pass_depth++;
+
+    state.bind_framebuffer(m_framebuffer_handle);
     set_viewport(m_viewport_offset, m_viewport_size);
 
     if (m_clear) {
@@ -209,9 +212,7 @@ void RenderPass::begin() {
 
     set_depth_test(m_depth_test, m_depth_write);
     set_cull_mode(m_cull_mode);
-
-    if (m_blend_backup)
-        CHK(glDisable(GL_BLEND));
+    state.set_enabled(GLState::Blend, false);
 }
 
 void RenderPass::end() {
@@ -220,36 +221,26 @@ void RenderPass::end() {
         throw std::runtime_error("RenderPass::end(): render pass is not active!");
 #endif
 
-    CHK(glBindFramebuffer(GL_FRAMEBUFFER, 0));
+    GLState &state = gl_state();
+    state.bind_framebuffer(0);
     if (m_blit_target)
         blit_to(Vector2i(0, 0), m_framebuffer_size, m_blit_target, Vector2i(0, 0));
 
-    CHK(glViewport(m_viewport_backup[0], m_viewport_backup[1],
-                   m_viewport_backup[2], m_viewport_backup[3]));
-    CHK(glScissor(m_scissor_backup[0], m_scissor_backup[1],
-                  m_scissor_backup[2], m_scissor_backup[3]));
-
-    if (m_depth_test_backup)
-        CHK(glEnable(GL_DEPTH_TEST));
-    else
-        CHK(glDisable(GL_DEPTH_TEST));
-
-    CHK(glDepthMask(m_depth_write_backup));
-
-    if (m_scissor_test_backup)
-        CHK(glEnable(GL_SCISSOR_TEST));
-    else
-        CHK(glDisable(GL_SCISSOR_TEST));
-
-    if (m_cull_face_backup)
-        CHK(glEnable(GL_CULL_FACE));
-    else
-        CHK(glDisable(GL_CULL_FACE));
-
-    if (m_blend_backup)
-        CHK(glEnable(GL_BLEND));
-    else
-        CHK(glDisable(GL_BLEND));
+    // Shaders leave their state in place until the end of the render pass
+    state.use_program(0);
+    state.bind_vertex_array(0);
+    state.release_lingering();
+    state.pass_depth--;
+
+    state.set_viewport(m_viewport_backup[0], m_viewport_backup[1],
+                       m_viewport_backup[2], m_viewport_backup[3]);
+    state.set_scissor(m_scissor_backup[0], m_scissor_backup[1],
+                      m_scissor_backup[2], m_scissor_backup[3]);
+    state.set_enabled(GLState::DepthTest, m_depth_test_backup);
+    state.set_depth_mask(m_depth_write_backup);
+    state.set_enabled(GLState::ScissorTest, m_scissor_test_backup);
+    state.set_enabled(GLState::CullFace, m_cull_face_backup);
+    state.set_enabled(GLState::Blend, m_blend_backup);
 
     m_active = false;
 }
@@ -282,17 +273,15 @@ void RenderPass::set_viewport(const Vector2i &offset, const Vector2i &size) {
     m_viewport_size = size;
 
     if (m_active) {
+        GLState &state = gl_state();
         int ypos = m_framebuffer_size.y() - m_viewport_size.y() - m_viewport_offset.y();
-        CHK(glViewport(m_viewport_offset.x(), ypos,
-                       m_viewport_size.x(), m_viewport_size.y()));
-        CHK(glScissor(m_viewport_offset.x(), ypos,
-                      m_viewport_size.x(), m_viewport_size.y()));
-
-        if (m_viewport_offset == Vector2i(0, 0) &&
-            m_viewport_size == m_framebuffer_size)
-            CHK(glDisable(GL_SCISSOR_TEST));
-        else
-            CHK(glEnable(GL_SCISSOR_TEST));
+        state.set_viewport(m_viewport_offset.x(), ypos,
+                           m_viewport_size.x(), m_viewport_size.y());
+        state.set_scissor(m_viewport_offset.x(), ypos,
+                          m_viewport_size.x(), m_viewport_size.y());
+        state.set_enabled(GLState::ScissorTest,
+                          !(m_viewport_offset == Vector2i(0, 0) &&
+                            m_viewport_size == m_framebuffer_size));
     }
 }
 
@@ -301,6 +290,7 @@ void RenderPass::set_depth_test(DepthTest depth_test, bool depth_write) {
     m_depth_write = depth_write;
 
     if (m_active) {
+        GLState &state = gl_state();
         if (m_targets[0] && depth_test != DepthTest::Always) {
             GLenum func;
             switch (depth_test) {
@@ -314,12 +304,12 @@ void RenderPass::set_depth_test(DepthTest depth_test, bool depth_write) {
                 default:
                     throw std::runtime_error("Shader::set_depth_test(): invalid depth test mode!");
             }
-            CHK(glEnable(GL_DEPTH_TEST));
-            CHK(glDepthFunc(func));
+            state.set_enabled(GLState::DepthTest, true);
+            state.set_depth_func(func);
         } else {
-            CHK(glDisable(GL_DEPTH_TEST));
+            state.set_enabled(GLState::DepthTest, false);
         }
-        CHK(glDepthMask(depth_write ? GL_TRUE : GL_FALSE));
+        state.set_depth_mask(depth_write);
     }
 }
 
@@ -327,14 +317,15 @@ void RenderPass::set_cull_mode(CullMode cull_mode) {
     m_cull_mode = cull_mode;
 
     if (m_active) {
+        GLState &state = gl_state();
         if (cull_mode == CullMode::Disabled) {
-            CHK(glDisable(GL_CULL_FACE));
+            state.set_enabled(GLState::CullFace, false);
         } else {
-            CHK(glEnable(GL_CULL_FACE));
+            state.set_enabled(GLState::CullFace, true);
             if (cull_mode == CullMode::Front)
-                CHK(glCullFace(GL_FRONT));
+                state.set_cull_face(GL_FRONT);
             else if (cull_mode == CullMode::Back)
-                CHK(glCullFace(GL_BACK));
+                state.set_cull_face(GL_BACK);
             else
                 throw std::runtime_error("Shader::set_cull_mode(): invalid cull mode!");
         }
@@ -378,8 +369,16 @@ void RenderPass::blit_to(const Vector2i &src_offset,
         what = GL_COLOR_BUFFER_BIT;
     #endif
 
-    CHK(glBindFramebuffer(GL_READ_FRAMEBUFFER, m_framebuffer_handle));
+    // Headless screens draw into a framebuffer object instead of the back buffer
+    GLuint source_id = m_framebuffer_handle;
+    if (source_id == 0)
+        source_id = gl_state().default_framebuffer;
+    if (target_id == 0)
+        target_id = gl_state().default_framebuffer;
+
+    CHK(glBindFramebuffer(GL_READ_FRAMEBUFFER, source_id));
     CHK(glBindFramebuffer(GL_DRAW_FRAMEBUFFER, target_id));
+    gl_state().framebuffer = GLState::Unknown;
 
     if (target_id == 0) {
         #if defined(NANOGUI_USE_OPENGL)
@@ -399,7 +398,7 @@ void RenderPass::blit_to(const Vector2i &src_offset,
                           (GLsizei) dst_end.x(), (GLsizei) dst_end.y(),
                           what, GL_NEAREST));
 
-    CHK(glBindFramebuffer(GL_FRAMEBUFFER, 0));
+    gl_state().bind_framebuffer(0);
 #endif
 }
 
@@ -20,6 +20,10 @@
 #include <map>
 #include <iostream>
 
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+#  include "opengl_state.h"
+#endif
+
 #if defined(EMSCRIPTEN)
 #  include <emscripten/emscripten.h>
 #  include <emscripten/html5.h>
@@ -67,6 +71,7 @@
 NAMESPACE_BEGIN(nanogui)
 
 std::map<GLFWwindow *, Screen *> __nanogui_screens;
+extern void __nanogui_post_empty_event();
 
 #if defined(NANOGUI_GLAD)
 static bool glad_initialized = false;
@@ -137,8 +142,14 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
       m_stencil_buffer(stencil_buffer), m_float_buffer(float_buffer), m_redraw(false) {
     memset(m_cursors, 0, sizeof(GLFWcursor *) * (int) Cursor::CursorCount);
 
+#if defined(GLFW_PLATFORM_NULL)
+    m_headless = glfwGetPlatform() == GLFW_PLATFORM_NULL;
+#endif
+
 #if defined(NANOGUI_USE_OPENGL)
     glfwWindowHint(GLFW_CLIENT_API, GLFW_OPENGL_API);
+    glfwWindowHint(GLFW_CONTEXT_CREATION_API,
+                   m_headless ? GLFW_EGL_CONTEXT_API : GLFW_NATIVE_CONTEXT_API);
 
     /* Request a forward compatible OpenGL gl_major.gl_minor core profile context.
        Default value is an OpenGL 3.3 core profile context. */
@@ -152,6 +163,9 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
     glfwWindowHint(GLFW_CONTEXT_VERSION_MAJOR, NANOGUI_GLES_VERSION);
     glfwWindowHint(GLFW_CONTEXT_VERSION_MINOR, 0);
 #elif defined(NANOGUI_USE_METAL)
+    if (m_headless)
+        throw std::runtime_error(
+            "Screen::Screen(): headless mode is not supported by the Metal backend!");
     glfwWindowHint(GLFW_CLIENT_API, GLFW_NO_API);
     m_stencil_buffer = stencil_buffer = false;
 #else
@@ -185,11 +199,25 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
     m_float_buffer = false;
 #endif
 
+    if (m_headless) {
+        /* The window only owns the context, while drawing targets a
+           framebuffer object (see below). Keep its surface minimal. */
+        glfwWindowHint(GLFW_RED_BITS, 8);
+        glfwWindowHint(GLFW_GREEN_BITS, 8);
+        glfwWindowHint(GLFW_BLUE_BITS, 8);
+        glfwWindowHint(GLFW_ALPHA_BITS, 8);
+        glfwWindowHint(GLFW_STENCIL_BITS, 0);
+        glfwWindowHint(GLFW_DEPTH_BITS, 0);
+#if defined(GLFW_FLOATBUFFER)
+        glfwWindowHint(GLFW_FLOATBUFFER, GL_FALSE);
+#endif
+    }
+
     glfwWindowHint(GLFW_VISIBLE, GL_FALSE);
     glfwWindowHint(GLFW_RESIZABLE, resizable ? GL_TRUE : GL_FALSE);
     glfwWindowHint(GLFW_SCALE_TO_MONITOR, GLFW_TRUE);
 
-    for (int i = 0; i < 2; ++i) {
+    for (int i = 0; i < 3; ++i) {
         if (fullscreen) {
             GLFWmonitor *monitor = glfwGetPrimaryMonitor();
             const GLFWvidmode *mode = glfwGetVideoMode(monitor);
@@ -200,12 +228,18 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
                                              caption.c_str(), nullptr, nullptr);
         }
 
-        if (m_glfw_window == nullptr && m_float_buffer) {
+        if (m_glfw_window == nullptr && m_float_buffer && !m_headless) {
             m_float_buffer = false;
 #if defined(GLFW_FLOATBUFFER)
             glfwWindowHint(GLFW_FLOATBUFFER, GL_FALSE);
 #endif
             fprintf(stderr, "Could not allocate floating point framebuffer, retrying without..\n");
+#if defined(NANOGUI_USE_OPENGL)
+        } else if (m_glfw_window == nullptr && m_headless && i == 0) {
+            /* Fall back to software rendering via OSMesa */
+            glfwWindowHint(GLFW_CONTEXT_CREATION_API, GLFW_OSMESA_CONTEXT_API);
+            fprintf(stderr, "Could not create an EGL context, retrying with OSMesa..\n");
+#endif
         } else {
             break;
         }
@@ -227,6 +261,7 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
 
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
     glfwMakeContextCurrent(m_glfw_window);
+    gl_state_invalidate();
 #endif
 
     glfwSetInputMode(m_glfw_window, GLFW_CURSOR, GLFW_CURSOR_NORMAL);
@@ -241,7 +276,7 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
 #endif
 
 #if defined(NANOGUI_USE_OPENGL)
-    if (m_float_buffer) {
+    if (m_float_buffer && !m_headless) {
       GLboolean float_mode;
       CHK(glGetBooleanv(GL_RGBA_FLOAT_MODE, &float_mode));
       if (!float_mode) {
@@ -254,6 +289,39 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
     glfwGetFramebufferSize(m_glfw_window, &m_fbsize[0], &m_fbsize[1]);
 
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    if (m_headless) {
+        /* Render into a framebuffer object that stands in for the back
+           buffer of a window (see GLState::default_framebuffer) */
+        Texture *color = new Texture(
+            pixel_format(), component_format(), m_fbsize,
+            Texture::InterpolationMode::Nearest,
+            Texture::InterpolationMode::Nearest,
+            Texture::WrapMode::ClampToEdge, 1,
+            Texture::TextureFlags::ShaderRead | Texture::TextureFlags::RenderTarget);
+
+        if (color->component_format() != component_format()) {
+            fprintf(stderr, "Could not allocate floating point framebuffer.\n");
+            m_float_buffer = false;
+        }
+
+        Texture *depth = nullptr;
+        if (depth_buffer)
+            depth = new Texture(
+                stencil_buffer ? Texture::PixelFormat::DepthStencil
+                               : Texture::PixelFormat::Depth,
+                Texture::ComponentFormat::Float32, m_fbsize,
+                Texture::InterpolationMode::Bilinear,
+                Texture::InterpolationMode::Bilinear,
+                Texture::WrapMode::ClampToEdge, 1,
+                Texture::TextureFlags::RenderTarget);
+
+        m_back_buffer = new RenderPass({ color }, depth,
+                                       stencil_buffer ? depth : nullptr,
+                                       nullptr, false);
+        gl_state().default_framebuffer = m_back_buffer->framebuffer_handle();
+        gl_state().bind_framebuffer(0);
+    }
+
     CHK(glViewport(0, 0, m_fbsize[0], m_fbsize[1]));
     CHK(glClearColor(m_background[0], m_background[1],
                      m_background[2], m_background[3]));
@@ -261,7 +329,8 @@ Screen::Screen(const Vector2i &size, const std::string &caption, bool resizable,
                 GL_STENCIL_BUFFER_BIT));
 
     glfwSwapInterval(0);
-    glfwSwapBuffers(m_glfw_window);
+    if (!m_headless)
+        glfwSwapBuffers(m_glfw_window);
 #endif
 
 #if defined(__APPLE__)
@@ -489,10 +558,14 @@ void Screen::initialize(GLFWwindow *window, bool shutdown_glfw) {
     /// Fixes retina display-related font rendering issue (#185)
     nvgBeginFrame(m_nvg_context, m_size[0], m_size[1], m_pixel_ratio);
     nvgEndFrame(m_nvg_context);
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    gl_state_invalidate();
+#endif
 }
 
 Screen::~Screen() {
     __nanogui_screens.erase(m_glfw_window);
+    m_back_buffer = nullptr;
     for (size_t i = 0; i < (size_t) Cursor::CursorCount; ++i) {
         if (m_cursors[i])
             glfwDestroyCursor(m_cursors[i]);
@@ -508,8 +581,14 @@ Screen::~Screen() {
 #endif
     }
 
-    if (m_glfw_window && m_shutdown_glfw)
+    if (m_glfw_window && m_shutdown_glfw) {
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+        /* A context created later on may reuse the address of this one */
+        if (gl_state().context == m_glfw_window)
+            gl_state().context = nullptr;
+#endif
         glfwDestroyWindow(m_glfw_window);
+    }
 }
 
 void Screen::set_visible(bool visible) {
@@ -553,6 +632,10 @@ void Screen::clear() {
 void Screen::draw_setup() {
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
     glfwMakeContextCurrent(m_glfw_window);
+    // The state cache is shared by all windows
+    gl_state_invalidate();
+    gl_state().default_framebuffer =
+        m_back_buffer ? m_back_buffer->framebuffer_handle() : 0;
 #elif defined(NANOGUI_USE_METAL)
     void *nswin = glfwGetCocoaWindow(m_glfw_window);
     metal_window_set_size(nswin, m_fbsize);
@@ -582,13 +665,17 @@ void Screen::draw_setup() {
 #endif
 
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
-    CHK(glViewport(0, 0, m_fbsize[0], m_fbsize[1]));
+    if (m_back_buffer && back_buffer()->size() != m_fbsize)
+        m_back_buffer->resize(m_fbsize);
+    gl_state().bind_framebuffer(0);
+    gl_state().set_viewport(0, 0, m_fbsize[0], m_fbsize[1]);
 #endif
 }
 
 void Screen::draw_teardown() {
 #if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
-    glfwSwapBuffers(m_glfw_window);
+    if (!m_headless)
+        glfwSwapBuffers(m_glfw_window);
 #elif defined(NANOGUI_USE_METAL)
     mnvgSetColorTexture(m_nvg_context, nullptr);
     metal_present_and_release_drawable(m_metal_drawable);
@@ -597,10 +684,25 @@ void Screen::draw_teardown() {
 #endif
 }
 
-void Screen::draw_all() {
-    if (m_redraw) {
-        m_redraw = false;
+bool Screen::begin_frame() {
+    flush_events();
+
+    double time = glfwGetTime();
+    if (m_frame_deadline <= time)
+        m_redraw = true;
+
+    if (!m_redraw)
+        return false;
+    m_redraw = false;
+
+    // Widgets request further animation frames while drawing
+    m_last_frame = time;
+    m_frame_deadline = std::numeric_limits<double>::infinity();
+    return true;
+}
 
+void Screen::draw_all() {
+    if (begin_frame()) {
 #if defined(NANOGUI_USE_METAL)
         void *pool = autorelease_init();
 #endif
@@ -624,6 +726,9 @@ void Screen::nvg_flush() {
     NVGparams *params = nvgInternalParams(m_nvg_context);
     params->renderFlush(params->userPtr);
     params->renderViewport(params->userPtr, m_size[0], m_size[1], m_pixel_ratio);
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    gl_state_invalidate();
+#endif
 }
 
 void Screen::draw_widgets() {
@@ -633,6 +738,13 @@ void Screen::draw_widgets() {
 
     double elapsed = glfwGetTime() - m_last_interaction;
 
+    if (elapsed < 1.0) {
+        /* Schedule frames to fade in a pending tooltip */
+        const Widget *widget = find_widget(m_mouse_pos);
+        if (widget && !widget->tooltip().empty())
+            request_animation_frame(0.5 - elapsed);
+    }
+
     if (elapsed > 0.5f) {
         /* Draw tooltips */
         const Widget *widget = find_widget(m_mouse_pos);
@@ -691,6 +803,9 @@ void Screen::draw_widgets() {
     }
 
     nvgEndFrame(m_nvg_context);
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    gl_state_invalidate();
+#endif
 }
 
 bool Screen::keyboard_event(int key, int scancode, int action, int modifiers) {
@@ -723,12 +838,26 @@ bool Screen::resize_event(const Vector2i& size) {
 void Screen::redraw() {
     if (!m_redraw) {
         m_redraw = true;
-        #if !defined(EMSCRIPTEN)
-            glfwPostEmptyEvent();
-        #endif
+        __nanogui_post_empty_event();
     }
 }
 
+void Screen::set_vsync(bool vsync) {
+    m_vsync = vsync;
+#if defined(NANOGUI_USE_OPENGL) || defined(NANOGUI_USE_GLES)
+    #if !defined(EMSCRIPTEN)
+        if (m_headless)
+            return;
+        GLFWwindow *current = glfwGetCurrentContext();
+        glfwMakeContextCurrent(m_glfw_window);
+        glfwSwapInterval(vsync ? 1 : 0);
+        glfwMakeContextCurrent(current);
+    #endif
+#elif defined(NANOGUI_USE_METAL)
+    metal_window_set_vsync(glfwGetCocoaWindow(m_glfw_window), vsync);
+#endif
+}
+
 void Screen::cursor_pos_callback_event(double x, double y) {
     Vector2i p((int) x, (int) y);
 
@@ -737,9 +866,23 @@ void Screen::cursor_pos_callback_event(double x, double y) {
 #endif
 
     m_last_interaction = glfwGetTime();
-    try {
-        p -= Vector2i(1, 2);
+    p -= Vector2i(1, 2);
+
+    if (m_coalesce_events) {
+        /* Merge with the previous motion event. The relative motion is
+           computed with respect to the last dispatched position. */
+        if (m_scroll_pending)
+            flush_events();
+        m_pending_cursor_pos = p;
+        m_cursor_pending = true;
+        return;
+    }
+
+    dispatch_cursor_pos(p);
+}
 
+void Screen::dispatch_cursor_pos(const Vector2i &p) {
+    try {
         bool ret = false;
         if (!m_drag_active) {
             Widget *widget = find_widget(p);
@@ -764,6 +907,7 @@ void Screen::cursor_pos_callback_event(double x, double y) {
 }
 
 void Screen::mouse_button_callback_event(int button, int action, int modifiers) {
+    flush_events();
     m_modifiers = modifiers;
     m_last_interaction = glfwGetTime();
 
@@ -822,6 +966,7 @@ void Screen::mouse_button_callback_event(int button, int action, int modifiers)
 }
 
 void Screen::key_callback_event(int key, int scancode, int action, int mods) {
+    flush_events();
     m_last_interaction = glfwGetTime();
     try {
         m_redraw |= keyboard_event(key, scancode, action, mods);
@@ -831,6 +976,7 @@ void Screen::key_callback_event(int key, int scancode, int action, int mods) {
 }
 
 void Screen::char_callback_event(unsigned int codepoint) {
+    flush_events();
     m_last_interaction = glfwGetTime();
     try {
         m_redraw |= keyboard_character_event(codepoint);
@@ -840,6 +986,7 @@ void Screen::char_callback_event(unsigned int codepoint) {
 }
 
 void Screen::drop_callback_event(int count, const char **filenames) {
+    flush_events();
     std::vector<std::string> arg(count);
     for (int i = 0; i < count; ++i)
         arg[i] = filenames[i];
@@ -848,6 +995,19 @@ void Screen::drop_callback_event(int count, const char **filenames) {
 
 void Screen::scroll_callback_event(double x, double y) {
     m_last_interaction = glfwGetTime();
+
+    if (m_coalesce_events) {
+        if (m_cursor_pending)
+            flush_events();
+        m_pending_scroll += Vector2f(x, y);
+        m_scroll_pending = true;
+        return;
+    }
+
+    dispatch_scroll(Vector2f(x, y));
+}
+
+void Screen::dispatch_scroll(const Vector2f &rel) {
     try {
         if (m_focus_path.size() > 1) {
             const Window *window =
@@ -857,12 +1017,33 @@ void Screen::scroll_callback_event(double x, double y) {
                     return;
             }
         }
-        m_redraw |= scroll_event(m_mouse_pos, Vector2f(x, y));
+        m_redraw |= scroll_event(m_mouse_pos, rel);
     } catch (const std::exception &e) {
         std::cerr << "Caught exception in event handler: " << e.what() << std::endl;
     }
 }
 
+void Screen::set_coalesce_events(bool value) {
+    if (!value)
+        flush_events();
+    m_coalesce_events = value;
+}
+
+void Screen::flush_events() {
+    /* At most one kind of event is pending at any time, since the arrival
+       of the other kind flushes it (see the callbacks above) */
+    if (m_cursor_pending) {
+        m_cursor_pending = false;
+        dispatch_cursor_pos(m_pending_cursor_pos);
+    }
+    if (m_scroll_pending) {
+        Vector2f rel = m_pending_scroll;
+        m_scroll_pending = false;
+        m_pending_scroll = Vector2f(0.f);
+        dispatch_scroll(rel);
+    }
+}
+
 void Screen::resize_callback_event(int, int) {
 #if defined(EMSCRIPTEN)
     return;
@@ -934,6 +1115,7 @@ void Screen::center_window(Window *window) {
 void Screen::move_window_to_front(Window *window) {
     m_children.erase(std::remove(m_children.begin(), m_children.end(), window), m_children.end());
     m_children.push_back(window);
+    invalidate_spatial_index();
     /* Brute force topological sort (no problem for a few windows..) */
     bool changed = false;
     do {
@@ -977,6 +1159,12 @@ Texture::ComponentFormat Screen::component_format() const {
         return Texture::ComponentFormat::UInt8;
 }
 
+Texture *Screen::back_buffer() {
+    if (!m_back_buffer)
+        return nullptr;
+    return dynamic_cast<Texture *>(m_back_buffer->targets()[2]);
+}
+
 #if defined(NANOGUI_USE_METAL)
 void *Screen::metal_layer() const {
     return metal_window_layer(glfwGetCocoaWindow(m_glfw_window));
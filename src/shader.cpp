@@ -1,7 +1,19 @@
 #include <nanogui/shader.h>
+#include <nanogui/texture.h>
+#include <cstring>
 
 NAMESPACE_BEGIN(nanogui)
 
+static std::string shader_program_cache_dir;
+
+void Shader::set_program_cache_dir(const std::string &path) {
+    shader_program_cache_dir = path;
+}
+
+const std::string &Shader::program_cache_dir() {
+    return shader_program_cache_dir;
+}
+
 std::string Shader::Buffer::to_string() const {
     std::string result = "Buffer[type=";
     switch (type) {
@@ -9,6 +21,7 @@ std::string Shader::Buffer::to_string() const {
         case BufferType::FragmentBuffer: result += "fragment"; break;
         case BufferType::UniformBuffer: result += "uniform"; break;
         case BufferType::IndexBuffer: result += "index"; break;
+        case BufferType::UniformBlockBuffer: result += "uniform block"; break;
         default: result += "unknown"; break;
     }
     result += ", dtype=";
@@ -23,4 +36,284 @@ std::string Shader::Buffer::to_string() const {
     return result;
 }
 
+size_t Shader::register_argument(const std::string &name) {
+    if (name == "indices" && !m_buffers.empty())
+        throw std::runtime_error(
+            "Shader::Shader(): argument name 'indices' is reserved!");
+    else if (m_argument_handles.find(name) != m_argument_handles.end())
+        throw std::runtime_error(
+            "Shader::Shader(): \"" + name +
+            "\": duplicate argument name in shader code!");
+
+    size_t handle = m_buffers.size();
+    m_buffers.emplace_back();
+    m_buffers.back().name = name;
+    m_argument_handles[name] = handle;
+    return handle;
+}
+
+size_t Shader::find_argument(const std::string &name, const char *caller) const {
+    auto it = m_argument_handles.find(name);
+    if (it == m_argument_handles.end())
+        throw std::runtime_error(std::string(caller) +
+                                 ": could not find argument named \"" + name + "\"");
+    return it->second;
+}
+
+size_t Shader::argument_handle(const std::string &name) const {
+    if (!m_ready)
+        throw_not_ready("Shader::argument_handle()");
+    return find_argument(name, "Shader::argument_handle()");
+}
+
+void Shader::throw_not_ready(const char *caller) const {
+    throw std::runtime_error(std::string(caller) + ": the program of shader \"" +
+                             m_name + "\" is still being compiled (see "
+                             "Shader::ready())!");
+}
+
+void Shader::defer(const std::string &key, std::function<void()> &&func) {
+    for (auto it = m_deferred.begin(); it != m_deferred.end(); ++it) {
+        if (it->first == key) {
+            m_deferred.erase(it);
+            break;
+        }
+    }
+    m_deferred.emplace_back(key, std::move(func));
+}
+
+void Shader::set_ready_callback(const std::function<void()> &callback) {
+    m_ready_callback = callback;
+    if (m_ready && m_ready_callback)
+        m_ready_callback();
+}
+
+void Shader::set_buffer(const std::string &name, VariableType dtype,
+                        size_t ndim, const size_t *shape, const void *data,
+                        bool per_instance, bool normalized) {
+    if (!m_ready) {
+        size_t size = type_size(dtype);
+        std::vector<size_t> shape_copy(shape, shape + ndim);
+        for (size_t i = 0; i < ndim; ++i)
+            size *= shape[i];
+        std::vector<uint8_t> data_copy((const uint8_t *) data,
+                                       (const uint8_t *) data + size);
+        defer("set_buffer:" + name,
+              [this, name, dtype, shape_copy = std::move(shape_copy),
+               data_copy = std::move(data_copy), per_instance, normalized]() {
+                  set_buffer(name, dtype, shape_copy.size(), shape_copy.data(),
+                             data_copy.data(), per_instance, normalized);
+              });
+        return;
+    }
+    set_buffer(find_argument(name, "Shader::set_buffer()"), dtype, ndim,
+               shape, data, per_instance, normalized);
+}
+
+void Shader::set_buffer(const std::string &name, nanogui::Buffer *buffer,
+                        bool per_instance, bool normalized) {
+    if (!m_ready) {
+        ref<nanogui::Buffer> buffer_ref = buffer;
+        defer("set_buffer:" + name,
+              [this, name, buffer_ref, per_instance, normalized]() mutable {
+                  set_buffer(name, buffer_ref.get(), per_instance, normalized);
+              });
+        return;
+    }
+    set_buffer(find_argument(name, "Shader::set_buffer()"), buffer, per_instance,
+               normalized);
+}
+
+/// Copy a strided array into contiguous (C-order) storage
+static std::vector<uint8_t> gather_strided(VariableType dtype, size_t ndim,
+                                           const size_t *shape,
+                                           const int64_t *strides,
+                                           const void *data) {
+    size_t s[3] = { 1, 1, 1 }, elem_size = type_size(dtype);
+    int64_t st[3] = { 0, 0, 0 };
+    for (size_t i = 0; i < ndim; ++i) {
+        s[i] = shape[i];
+        st[i] = strides[i];
+    }
+
+    std::vector<uint8_t> result(s[0] * s[1] * s[2] * elem_size);
+    uint8_t *dst = result.data();
+    for (size_t i = 0; i < s[0]; ++i) {
+        for (size_t j = 0; j < s[1]; ++j) {
+            for (size_t k = 0; k < s[2]; ++k) {
+                const uint8_t *src = (const uint8_t *) data + (int64_t) i * st[0] +
+                                     (int64_t) j * st[1] + (int64_t) k * st[2];
+                memcpy(dst, src, elem_size);
+                dst += elem_size;
+            }
+        }
+    }
+    return result;
+}
+
+void Shader::set_buffer_strided(const std::string &name, VariableType dtype,
+                                size_t ndim, const size_t *shape,
+                                const int64_t *strides, const void *data,
+                                bool per_instance, bool normalized) {
+    if (ndim > 3)
+        throw std::runtime_error("Shader::set_buffer_strided(): ndim must be <= 3!");
+
+    if (!m_ready) {
+        std::vector<uint8_t> temp = gather_strided(dtype, ndim, shape, strides, data);
+        set_buffer(name, dtype, ndim, shape, temp.data(), per_instance, normalized);
+        return;
+    }
+    set_buffer_strided(find_argument(name, "Shader::set_buffer_strided()"),
+                       dtype, ndim, shape, strides, data, per_instance, normalized);
+}
+
+void Shader::set_buffer_strided(size_t handle, VariableType dtype,
+                                size_t ndim, const size_t *shape,
+                                const int64_t *strides, const void *data,
+                                bool per_instance, bool normalized) {
+    if (ndim > 3)
+        throw std::runtime_error("Shader::set_buffer_strided(): ndim must be <= 3!");
+
+    size_t elem_size = type_size(dtype), size = elem_size;
+    bool contiguous = true;
+    for (size_t i = ndim; i-- > 0; ) {
+        contiguous &= shape[i] == 1 || strides[i] == (int64_t) size;
+        size *= shape[i];
+    }
+
+    if (contiguous) {
+        set_buffer(handle, dtype, ndim, shape, data, per_instance, normalized);
+        return;
+    }
+
+#if !defined(NANOGUI_USE_METAL)
+    // Vertex attributes with contiguous rows are read using the row stride
+    const Buffer &buf = argument(handle, "Shader::set_buffer_strided()");
+    if (buf.type == VertexBuffer && ndim == 2 && shape[0] > 0 &&
+        (shape[1] == 1 || strides[1] == (int64_t) elem_size) &&
+        strides[0] >= (int64_t) (elem_size * shape[1])) {
+        set_buffer_interleaved({ { buf.name, dtype, shape[1], 0, normalized } }, shape[0],
+                               (size_t) strides[0], data, per_instance);
+        return;
+    }
+#endif
+
+    // Otherwise, gather the entries into a contiguous array
+    std::vector<uint8_t> temp = gather_strided(dtype, ndim, shape, strides, data);
+    set_buffer(handle, dtype, ndim, shape, temp.data(), per_instance, normalized);
+}
+
+void Shader::update_buffer_region(const std::string &name, VariableType dtype,
+                                  size_t offset, size_t ndim,
+                                  const size_t *shape, const void *data) {
+    if (!m_ready)
+        throw_not_ready("Shader::update_buffer_region()");
+    update_buffer_region(find_argument(name, "Shader::update_buffer_region()"),
+                         dtype, offset, ndim, shape, data);
+}
+
+void Shader::set_texture(const std::string &name, Texture *texture) {
+    if (!m_ready) {
+        ref<Texture> texture_ref = texture;
+        defer("set_texture:" + name, [this, name, texture_ref]() mutable {
+            set_texture(name, texture_ref.get());
+        });
+        return;
+    }
+    set_texture(find_argument(name, "Shader::set_texture()"), texture);
+}
+
+void Shader::set_uniform_block(const std::string &name, UniformBlock *block) {
+    if (!m_ready) {
+        ref<UniformBlock> block_ref = block;
+        defer("set_uniform_block:" + name, [this, name, block_ref]() mutable {
+            set_uniform_block(name, block_ref.get());
+        });
+        return;
+    }
+    set_uniform_block(find_argument(name, "Shader::set_uniform_block()"), block);
+}
+
+std::string UniformBlock::Member::to_string() const {
+    std::string result = "Member[dtype=";
+    result += type_name(dtype);
+    result += ", shape=[";
+    for (size_t i = 0; i < ndim; ++i) {
+        result += std::to_string(shape[i]);
+        if (i + 1 < ndim)
+            result += ", ";
+    }
+    result += "]]";
+    return result;
+}
+
+void UniformBlock::set_buffer(const std::string &name, VariableType dtype,
+                              size_t ndim, const size_t *shape,
+                              const void *data) {
+    auto it = m_members.find(name);
+    if (it == m_members.end())
+        throw std::runtime_error(
+            "UniformBlock::set_buffer(): block \"" + m_name +
+            "\" has no member named \"" + name + "\"");
+
+    const Member &member = it->second;
+
+    bool mismatch = ndim != member.ndim || dtype != member.dtype;
+    for (size_t i = 0; i < ndim && !mismatch; ++i)
+        mismatch |= shape[i] != member.shape[i];
+
+    if (mismatch) {
+        Member arg;
+        arg.ndim = ndim;
+        for (size_t i = 0; i < 3; ++i)
+            arg.shape[i] = i < ndim ? shape[i] : 1;
+        arg.dtype = dtype;
+        throw std::runtime_error("UniformBlock::set_buffer(\"" + name +
+                                 "\"): shape/dtype mismatch: expected " + member.to_string() +
+                                 ", got " + arg.to_string());
+    }
+
+    /* Arrays add a leading dimension, and matrices are stored as a sequence of
+       column vectors. Each array element and column can be padded. */
+    bool is_array = member.array_stride != 0;
+    const size_t *elem_shape = member.shape + (is_array ? 1 : 0);
+    size_t elem_ndim = member.ndim - (is_array ? 1 : 0),
+           count     = is_array ? member.shape[0] : 1,
+           cols      = elem_ndim == 2 ? elem_shape[0] : 1,
+           rows      = elem_ndim == 2 ? elem_shape[1] :
+                      (elem_ndim == 1 ? elem_shape[0] : 1),
+           src_size  = type_size(dtype);
+
+    const uint8_t *src = (const uint8_t *) data;
+    size_t end = member.offset;
+
+    for (size_t i = 0; i < count; ++i) {
+        for (size_t j = 0; j < cols; ++j) {
+            uint8_t *dst = m_data.data() + member.offset +
+                           i * member.array_stride + j * member.matrix_stride;
+
+            if (dtype == VariableType::Bool) {
+                // Booleans occupy 32 bits in uniform blocks
+                for (size_t k = 0; k < rows; ++k) {
+                    uint32_t value = src[k] ? 1 : 0;
+                    memcpy(dst + k * sizeof(uint32_t), &value, sizeof(uint32_t));
+                }
+            } else {
+                memcpy(dst, src, rows * src_size);
+            }
+
+            src += rows * src_size;
+            end = std::max(end, (size_t) (dst - m_data.data()) + rows * sizeof(uint32_t));
+        }
+    }
+
+    if (m_dirty_start >= m_dirty_end) {
+        m_dirty_start = member.offset;
+        m_dirty_end = end;
+    } else {
+        m_dirty_start = std::min(m_dirty_start, member.offset);
+        m_dirty_end = std::max(m_dirty_end, end);
+    }
+}
+
 NAMESPACE_END(nanogui)
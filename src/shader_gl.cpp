@@ -4,15 +4,498 @@
 #include <nanogui/texture.h>
 #include <nanogui/renderpass.h>
 #include "opengl_check.h"
+#include "opengl_state.h"
+
+#include <algorithm>
+#include <deque>
+#include <fstream>
+#include <cstdio>
 
 #if !defined(GL_HALF_FLOAT)
 #  define GL_HALF_FLOAT 0x140B
 #endif
 
+/// Initial size of the ring buffer backing streaming arguments
+#define NANOGUI_STREAM_BUFFER_SIZE (8 * 1024 * 1024)
+
+/// Alignment of suballocations within the streaming ring buffer
+#define NANOGUI_STREAM_BUFFER_ALIGNMENT 256
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_STREAM_BUFFER 1
+#endif
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_UNIFORM_BLOCKS 1
+#endif
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_PROGRAM_BINARY 1
+#endif
+
+/// Identifies files written by Shader::save_program_binary()
+#define NANOGUI_PROGRAM_CACHE_MAGIC 0x4250474Eu // "NGPB"
+#define NANOGUI_PROGRAM_CACHE_VERSION 1u
+
+#if defined(NANOGUI_USE_OPENGL) && defined(GL_MAP_PERSISTENT_BIT)
+#  define NANOGUI_HAS_BUFFER_STORAGE 1
+#endif
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_PARALLEL_COMPILE 1
+#endif
+
+#if !defined(GL_COMPLETION_STATUS_KHR)
+#  define GL_COMPLETION_STATUS_KHR 0x91B1
+#endif
+
 NAMESPACE_BEGIN(nanogui)
 
+/**
+ * Convert an OpenGL attribute/uniform type into a dtype and shape. The caller
+ * initializes \c ndim to 1 and all entries of \c shape to 1. Returns \c false
+ * when the type is not supported.
+ */
+static bool gl_parse_type(GLenum gl_type, VariableType &dtype, size_t &ndim,
+                          size_t *shape) {
+    switch (gl_type) {
+        case GL_FLOAT:
+            dtype = VariableType::Float32;
+            ndim = 0;
+            break;
+
+        case GL_FLOAT_VEC2:
+            dtype = VariableType::Float32;
+            shape[0] = 2;
+            break;
+
+        case GL_FLOAT_VEC3:
+            dtype = VariableType::Float32;
+            shape[0] = 3;
+            break;
+
+        case GL_FLOAT_VEC4:
+            dtype = VariableType::Float32;
+            shape[0] = 4;
+            break;
+
+        case GL_INT:
+            dtype = VariableType::Int32;
+            ndim = 0;
+            break;
+
+        case GL_INT_VEC2:
+            dtype = VariableType::Int32;
+            shape[0] = 2;
+            break;
+
+        case GL_INT_VEC3:
+            dtype = VariableType::Int32;
+            shape[0] = 3;
+            break;
+
+        case GL_INT_VEC4:
+            dtype = VariableType::Int32;
+            shape[0] = 4;
+            break;
+
+#if defined(NANOGUI_USE_OPENGL)
+        case GL_UNSIGNED_INT:
+            dtype = VariableType::UInt32;
+            ndim = 0;
+            break;
+
+        case GL_UNSIGNED_INT_VEC2:
+            dtype = VariableType::UInt32;
+            shape[0] = 2;
+            break;
+
+        case GL_UNSIGNED_INT_VEC3:
+            dtype = VariableType::UInt32;
+            shape[0] = 3;
+            break;
+
+        case GL_UNSIGNED_INT_VEC4:
+            dtype = VariableType::UInt32;
+            shape[0] = 4;
+            break;
+#endif
+
+        case GL_BOOL:
+            dtype = VariableType::Bool;
+            ndim = 0;
+            break;
+
+        case GL_BOOL_VEC2:
+            dtype = VariableType::Bool;
+            shape[0] = 2;
+            break;
+
+        case GL_BOOL_VEC3:
+            dtype = VariableType::Bool;
+            shape[0] = 3;
+            break;
+
+        case GL_BOOL_VEC4:
+            dtype = VariableType::Bool;
+            shape[0] = 4;
+            break;
+
+        case GL_FLOAT_MAT2:
+            dtype = VariableType::Float32;
+            shape[0] = shape[1] = 2;
+            ndim = 2;
+            break;
+
+        case GL_FLOAT_MAT3:
+            dtype = VariableType::Float32;
+            shape[0] = shape[1] = 3;
+            ndim = 2;
+            break;
+
+        case GL_FLOAT_MAT4:
+            dtype = VariableType::Float32;
+            shape[0] = shape[1] = 4;
+            ndim = 2;
+            break;
+
+        default:
+            return false;
+    }
+
+    return true;
+}
+
+/// Check whether an attribute declared with type 'attribute_dtype' is an integer input
+static bool gl_is_integer_attribute(VariableType attribute_dtype) {
+    return attribute_dtype == VariableType::Int32 ||
+           attribute_dtype == VariableType::UInt32;
+}
+
+/**
+ * Check that vertex data with dtype 'dtype' can be fetched by an attribute
+ * whose components have type 'attribute_dtype' in the shader code. Floating
+ * point attributes accept half precision and (optionally normalized) integer
+ * data, while integer attributes accept integer data of any width.
+ */
+static void gl_check_attribute_format(const std::string &caller,
+                                      const std::string &name,
+                                      VariableType attribute_dtype,
+                                      VariableType dtype, bool normalized) {
+    bool integer = false, supported = false;
+    switch (dtype) {
+        case VariableType::Int8:
+        case VariableType::UInt8:
+        case VariableType::Int16:
+        case VariableType::UInt16:
+            integer = supported = true;
+            break;
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+        case VariableType::Int32:
+        case VariableType::UInt32:
+            integer = supported = true;
+            break;
+
+        case VariableType::Float16:
+#endif
+        case VariableType::Float32:
+            supported = true;
+            break;
+
+        default:
+            break;
+    }
+
+    bool integer_attribute = gl_is_integer_attribute(attribute_dtype);
+    if (!supported || (integer_attribute && !integer))
+        throw std::runtime_error(
+            caller + ": vertex attribute \"" + name + "\" (" +
+            type_name(attribute_dtype) + ") cannot be sourced from " +
+            type_name(dtype) + " data!");
+    else if (normalized && (integer_attribute || !integer))
+        throw std::runtime_error(
+            caller + ": vertex attribute \"" + name + "\" cannot be normalized "
+            "(this requires integer data and a floating point attribute)!");
+}
+
+#if defined(NANOGUI_HAS_BUFFER_STORAGE)
+/// Check whether the current context supports persistently mapped buffers
+static bool gl_has_buffer_storage() {
+    GLState &state = gl_state();
+    state.update_context();
+    if (state.buffer_storage != -1)
+        return state.buffer_storage == 1;
+
+    GLint major = 0, minor = 0, extension_count = 0;
+    CHK(glGetIntegerv(GL_MAJOR_VERSION, &major));
+    CHK(glGetIntegerv(GL_MINOR_VERSION, &minor));
+    bool result = major > 4 || (major == 4 && minor >= 4);
+
+    CHK(glGetIntegerv(GL_NUM_EXTENSIONS, &extension_count));
+    for (GLint i = 0; i < extension_count && !result; ++i) {
+        const char *name = (const char *) glGetStringi(GL_EXTENSIONS, (GLuint) i);
+        result = name && strcmp(name, "GL_ARB_buffer_storage") == 0;
+    }
+
+#if defined(NANOGUI_GLAD)
+    /* glad only loads glBufferStorage() for OpenGL 4.4 contexts. Fetch the
+       entry point of the ARB extension on older ones. */
+    if (result && !glad_glBufferStorage)
+        glad_glBufferStorage =
+            (PFNGLBUFFERSTORAGEPROC) glfwGetProcAddress("glBufferStorage");
+    result = result && glad_glBufferStorage != nullptr;
+#endif
+
+    state.buffer_storage = result ? 1 : 0;
+    return result;
+}
+#endif
+
+#if defined(NANOGUI_HAS_PARALLEL_COMPILE)
+/**
+ * Check whether the driver can compile and link programs on background
+ * threads. The number of threads (MAX_SHADER_COMPILER_THREADS_KHR) defaults
+ * to an implementation-chosen maximum, so it is not set explicitly.
+ */
+static bool gl_has_parallel_shader_compile() {
+    GLState &state = gl_state();
+    state.update_context();
+    if (state.parallel_shader_compile != -1)
+        return state.parallel_shader_compile == 1;
+
+    GLint extension_count = 0;
+    bool result = false;
+    CHK(glGetIntegerv(GL_NUM_EXTENSIONS, &extension_count));
+    for (GLint i = 0; i < extension_count && !result; ++i) {
+        const char *name = (const char *) glGetStringi(GL_EXTENSIONS, (GLuint) i);
+        result = name && (strcmp(name, "GL_KHR_parallel_shader_compile") == 0 ||
+                          strcmp(name, "GL_ARB_parallel_shader_compile") == 0);
+    }
+
+    state.parallel_shader_compile = result ? 1 : 0;
+    return result;
+}
+#endif
+
+#if defined(NANOGUI_HAS_STREAM_BUFFER)
+/**
+ * Ring buffer that backs the streaming arguments of a shader. Allocations
+ * are tracked using monotonically increasing virtual offsets ('head'); the
+ * physical offset of an allocation is its virtual offset modulo 'size'.
+ * Fences record the virtual range that was submitted to the GPU by each
+ * batch of draw calls.
+ */
+struct Shader::StreamBuffer {
+    struct Fence {
+        size_t start;
+        GLsync sync;
+    };
+
+    GLuint handle = 0;
+    uint8_t *mapped = nullptr;
+    size_t size = 0;
+    size_t head = 0;
+    size_t fenced = 0;
+    std::deque<Fence> fences;
+    std::vector<GLuint> retired;
+
+    StreamBuffer(size_t size) { allocate(size); }
+
+    ~StreamBuffer() {
+        release();
+        for (GLuint handle : retired)
+            CHK(glDeleteBuffers(1, &handle));
+    }
+
+    void allocate(size_t size_) {
+        size = size_;
+        head = fenced = 0;
+        CHK(glGenBuffers(1, &handle));
+        CHK(glBindBuffer(GL_COPY_WRITE_BUFFER, handle));
+#if defined(NANOGUI_HAS_BUFFER_STORAGE)
+        if (gl_has_buffer_storage()) {
+            GLbitfield flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT |
+                               GL_MAP_COHERENT_BIT;
+            CHK(glBufferStorage(GL_COPY_WRITE_BUFFER, size, nullptr, flags));
+            mapped = (uint8_t *) glMapBufferRange(GL_COPY_WRITE_BUFFER, 0, size, flags);
+            if (!mapped)
+                throw std::runtime_error(
+                    "Shader::StreamBuffer: unable to map the ring buffer!");
+            return;
+        }
+#endif
+        CHK(glBufferData(GL_COPY_WRITE_BUFFER, size, nullptr, GL_STREAM_DRAW));
+    }
+
+    /// Unmap the ring buffer and (optionally) delete it
+    void release(bool delete_buffer = true) {
+        for (Fence &fence : fences)
+            CHK(glDeleteSync(fence.sync));
+        fences.clear();
+        if (mapped) {
+            CHK(glBindBuffer(GL_COPY_WRITE_BUFFER, handle));
+            CHK(glUnmapBuffer(GL_COPY_WRITE_BUFFER));
+            mapped = nullptr;
+        }
+        if (delete_buffer) {
+            CHK(glDeleteBuffers(1, &handle));
+            handle = 0;
+        }
+    }
+
+    /// Block until the GPU has consumed the oldest batch of draw calls
+    void wait_front() {
+        GLsync sync = fences.front().sync;
+        while (true) {
+            GLenum rv = glClientWaitSync(sync, GL_SYNC_FLUSH_COMMANDS_BIT,
+                                         1000000000ull);
+            if (rv == GL_ALREADY_SIGNALED || rv == GL_CONDITION_SATISFIED)
+                break;
+            else if (rv == GL_WAIT_FAILED)
+                throw std::runtime_error(
+                    "Shader::StreamBuffer: glClientWaitSync() failed!");
+        }
+        CHK(glDeleteSync(sync));
+        fences.pop_front();
+    }
+
+    /// Copy 'data' into the ring buffer and return its physical offset
+    size_t write(const void *data, size_t data_size) {
+        size_t aligned = (data_size + NANOGUI_STREAM_BUFFER_ALIGNMENT - 1) /
+                         NANOGUI_STREAM_BUFFER_ALIGNMENT *
+                         NANOGUI_STREAM_BUFFER_ALIGNMENT;
+
+        // Allocations never straddle the end of the ring
+        size_t start = head;
+        if (start % size + aligned > size)
+            start += size - start % size;
+        size_t end = start + aligned;
+
+        bool orphan = false;
+        if (end - fenced > size) {
+            /* Data that has not been drawn yet would be overwritten. Retire
+               the ring (it remains valid until the next call to end()) and
+               continue in a larger one. */
+            size_t new_size = std::max(2 * size, 2 * (head - fenced + aligned));
+            release(false);
+            retired.push_back(handle);
+            allocate(new_size);
+            start = 0;
+            end = aligned;
+        } else if (!mapped && start % size == 0 && fenced == head &&
+                   !fences.empty()) {
+            /* Wrapping around with no pending data: orphan the storage
+               instead of waiting for the GPU */
+            orphan = true;
+            for (Fence &fence : fences)
+                CHK(glDeleteSync(fence.sync));
+            fences.clear();
+        } else {
+            while (!fences.empty() && fences.front().start + size < end)
+                wait_front();
+        }
+
+        size_t offset = start % size;
+        if (mapped) {
+            memcpy(mapped + offset, data, data_size);
+        } else {
+            GLbitfield flags = GL_MAP_WRITE_BIT | GL_MAP_UNSYNCHRONIZED_BIT |
+                (orphan ? GL_MAP_INVALIDATE_BUFFER_BIT : GL_MAP_INVALIDATE_RANGE_BIT);
+            CHK(glBindBuffer(GL_COPY_WRITE_BUFFER, handle));
+            void *ptr = glMapBufferRange(GL_COPY_WRITE_BUFFER, offset, aligned, flags);
+            if (!ptr)
+                throw std::runtime_error(
+                    "Shader::StreamBuffer: unable to map the ring buffer!");
+            memcpy(ptr, data, data_size);
+            CHK(glUnmapBuffer(GL_COPY_WRITE_BUFFER));
+        }
+
+        if (fenced == head)
+            fenced = start;
+        head = end;
+        return offset;
+    }
+
+    /// Protect all data written so far until the GPU has consumed it
+    void fence() {
+        for (GLuint handle : retired)
+            CHK(glDeleteBuffers(1, &handle));
+        retired.clear();
+
+        if (fenced == head)
+            return;
+        GLsync sync = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0);
+        fences.push_back({ fenced, sync });
+        fenced = head;
+    }
+};
+#else
+struct Shader::StreamBuffer { };
+#endif
+
+#if defined(NANOGUI_HAS_PROGRAM_BINARY)
+/// Check whether the driver can save and restore program binaries
+static bool gl_has_program_binary() {
+    GLState &state = gl_state();
+    state.update_context();
+    if (state.program_binary != -1)
+        return state.program_binary == 1;
+
+    GLint format_count = 0;
+    CHK(glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS, &format_count));
+    bool result = format_count > 0;
+
+#if defined(NANOGUI_GLAD)
+    /* glad only loads these functions for OpenGL 4.1 contexts. Fetch the
+       entry points of ARB_get_program_binary on older ones. */
+    if (result && !glad_glProgramBinary)
+        glad_glProgramBinary =
+            (PFNGLPROGRAMBINARYPROC) glfwGetProcAddress("glProgramBinary");
+    if (result && !glad_glGetProgramBinary)
+        glad_glGetProgramBinary =
+            (PFNGLGETPROGRAMBINARYPROC) glfwGetProcAddress("glGetProgramBinary");
+    if (result && !glad_glProgramParameteri)
+        glad_glProgramParameteri =
+            (PFNGLPROGRAMPARAMETERIPROC) glfwGetProcAddress("glProgramParameteri");
+    result = result && glad_glProgramBinary && glad_glGetProgramBinary &&
+             glad_glProgramParameteri;
+#endif
+
+    state.program_binary = result ? 1 : 0;
+    return result;
+}
+
+/// Return the cache file of a program (FNV-1a hash of sources and driver info)
+static std::string gl_program_cache_path(const std::string &vertex_shader,
+                                         const std::string &fragment_shader) {
+    uint64_t hash = 0xcbf29ce484222325ull;
+    auto accumulate = [&hash](const char *str) {
+        if (str) {
+            for (; *str; ++str)
+                hash = (hash ^ (uint8_t) *str) * 0x100000001b3ull;
+        }
+        hash = hash * 0x100000001b3ull; // separator
+    };
+
+    accumulate(vertex_shader.c_str());
+    accumulate(fragment_shader.c_str());
+    accumulate((const char *) glGetString(GL_VENDOR));
+    accumulate((const char *) glGetString(GL_RENDERER));
+    accumulate((const char *) glGetString(GL_VERSION));
+    accumulate(NANOGUI_VERSION);
+
+    char filename[32];
+    snprintf(filename, sizeof(filename), "%016llx.bin", (unsigned long long) hash);
+
+    std::string path = Shader::program_cache_dir();
+    if (path.back() != '/' && path.back() != '\\')
+        path += '/';
+    return path + filename;
+}
+#endif
+
 static GLuint compile_gl_shader(GLenum type,
-                                const std::string &name,
                                 const std::string &shader_string) {
     if (shader_string.empty())
         return (GLuint) 0;
@@ -21,11 +504,20 @@ static GLuint compile_gl_shader(GLenum type,
     const char *shader_string_const = shader_string.c_str();
     CHK(glShaderSource(id, 1, &shader_string_const, nullptr));
     CHK(glCompileShader(id));
+    return id;
+}
 
-    GLint status;
+/// Raise an exception if a shader created by compile_gl_shader() has errors
+static void check_gl_shader(GLuint id, const std::string &name) {
+    if (id == 0)
+        return;
+
+    GLint status, type;
     CHK(glGetShaderiv(id, GL_COMPILE_STATUS, &status));
 
     if (status != GL_TRUE) {
+        CHK(glGetShaderiv(id, GL_SHADER_TYPE, &type));
+
         const char *type_str = nullptr;
         if (type == GL_VERTEX_SHADER)
             type_str = "vertex shader";
@@ -45,234 +537,416 @@ static GLuint compile_gl_shader(GLenum type,
                           type_str + " \"" + name + "\":\n\n" + error_shader;
         throw std::runtime_error(msg);
     }
-
-    return id;
 }
 
 Shader::Shader(RenderPass *render_pass,
                const std::string &name,
                const std::string &vertex_shader,
                const std::string &fragment_shader,
-               BlendMode blend_mode)
+               BlendMode blend_mode,
+               bool async_compile)
     : m_render_pass(render_pass), m_name(name), m_blend_mode(blend_mode), m_shader_handle(0) {
 
-    GLuint vertex_shader_handle   = compile_gl_shader(GL_VERTEX_SHADER,   name, vertex_shader),
-           fragment_shader_handle = compile_gl_shader(GL_FRAGMENT_SHADER, name, fragment_shader);
+    std::string cache_path;
+#if defined(NANOGUI_HAS_PROGRAM_BINARY)
+    if (!program_cache_dir().empty() && gl_has_program_binary())
+        cache_path = gl_program_cache_path(vertex_shader, fragment_shader);
+#endif
 
-    m_shader_handle = glCreateProgram();
+#if defined(NANOGUI_USE_OPENGL)
+    m_uses_point_size = vertex_shader.find("gl_PointSize") != std::string::npos;
+#endif
 
-    GLint status;
-    CHK(glAttachShader(m_shader_handle, vertex_shader_handle));
-    CHK(glAttachShader(m_shader_handle, fragment_shader_handle));
-    CHK(glLinkProgram(m_shader_handle));
-    CHK(glDeleteShader(vertex_shader_handle));
-    CHK(glDeleteShader(fragment_shader_handle));
-    CHK(glGetProgramiv(m_shader_handle, GL_LINK_STATUS, &status));
+    if (!cache_path.empty() && load_program_binary(cache_path)) {
+        finalize_program();
+    } else {
+        /* Compilation and linking may proceed asynchronously within the
+           driver. Errors are only queried by finalize_program() */
+        m_pending_shaders[0] = compile_gl_shader(GL_VERTEX_SHADER, vertex_shader);
+        m_pending_shaders[1] = compile_gl_shader(GL_FRAGMENT_SHADER, fragment_shader);
+        m_pending_cache_path = cache_path;
+        m_shader_handle = glCreateProgram();
+        m_ready = false;
+
+        CHK(glAttachShader(m_shader_handle, m_pending_shaders[0]));
+        CHK(glAttachShader(m_shader_handle, m_pending_shaders[1]));
+#if defined(NANOGUI_HAS_PROGRAM_BINARY)
+        if (!cache_path.empty())
+            CHK(glProgramParameteri(m_shader_handle, GL_PROGRAM_BINARY_RETRIEVABLE_HINT,
+                                    GL_TRUE));
+#endif
+        CHK(glLinkProgram(m_shader_handle));
 
-    if (status != GL_TRUE) {
-        char error_shader[4096];
-        CHK(glGetProgramInfoLog(m_shader_handle, sizeof(error_shader), nullptr, error_shader));
-        m_shader_handle = 0;
-        throw std::runtime_error("Shader::Shader(name=\"" + name +
-                                 "\"): unable to link shader!\n\n" + error_shader);
+#if defined(NANOGUI_HAS_PARALLEL_COMPILE)
+        if (!async_compile || !gl_has_parallel_shader_compile())
+            finalize_program();
+#else
+        (void) async_compile;
+        finalize_program();
+#endif
     }
 
-    GLint attribute_count, uniform_count;
-    CHK(glGetProgramiv(m_shader_handle, GL_ACTIVE_ATTRIBUTES, &attribute_count));
-    CHK(glGetProgramiv(m_shader_handle, GL_ACTIVE_UNIFORMS, &uniform_count));
-
-    auto register_buffer = [&](BufferType type, const std::string &name,
-                               int index, GLenum gl_type) {
-        if (m_buffers.find(name) != m_buffers.end())
-            throw std::runtime_error(
-                "Shader::Shader(): duplicate attribute/uniform name in shader code!");
-        else if (name == "indices")
-            throw std::runtime_error(
-                "Shader::Shader(): argument name 'indices' is reserved!");
+#if defined(NANOGUI_USE_OPENGL)
+    CHK(glGenVertexArrays(1, &m_vertex_array_handle));
+#endif
+}
 
-        Buffer &buf = m_buffers[name];
-        for (int i = 0; i < 3; ++i)
-            buf.shape[i] = 1;
-        buf.ndim = 1;
-        buf.index = index;
-        buf.type = type;
-
-        switch (gl_type) {
-            case GL_FLOAT:
-                buf.dtype = VariableType::Float32;
-                buf.ndim = 0;
-                break;
+void Shader::finalize_program() {
+    // Programs loaded from the cache already come with a parameter layout
+    if (m_buffers.empty()) {
+        try {
+            check_gl_shader(m_pending_shaders[0], m_name);
+            check_gl_shader(m_pending_shaders[1], m_name);
+        } catch (...) {
+            CHK(glDeleteShader(m_pending_shaders[0]));
+            CHK(glDeleteShader(m_pending_shaders[1]));
+            CHK(glDeleteProgram(m_shader_handle));
+            m_pending_shaders[0] = m_pending_shaders[1] = 0;
+            m_shader_handle = 0;
+            throw;
+        }
 
-            case GL_FLOAT_VEC2:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = 2;
-                break;
+        CHK(glDeleteShader(m_pending_shaders[0]));
+        CHK(glDeleteShader(m_pending_shaders[1]));
+        m_pending_shaders[0] = m_pending_shaders[1] = 0;
 
-            case GL_FLOAT_VEC3:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = 3;
-                break;
+        GLint status;
+        CHK(glGetProgramiv(m_shader_handle, GL_LINK_STATUS, &status));
 
-            case GL_FLOAT_VEC4:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = 4;
-                break;
+        if (status != GL_TRUE) {
+            char error_shader[4096];
+            CHK(glGetProgramInfoLog(m_shader_handle, sizeof(error_shader), nullptr, error_shader));
+            CHK(glDeleteProgram(m_shader_handle));
+            m_shader_handle = 0;
+            throw std::runtime_error("Shader::Shader(name=\"" + m_name +
+                                     "\"): unable to link shader!\n\n" + error_shader);
+        }
 
-            case GL_INT:
-                buf.dtype = VariableType::Int32;
+        GLint attribute_count, uniform_count;
+        CHK(glGetProgramiv(m_shader_handle, GL_ACTIVE_ATTRIBUTES, &attribute_count));
+        CHK(glGetProgramiv(m_shader_handle, GL_ACTIVE_UNIFORMS, &uniform_count));
+
+        m_indices = register_argument("indices");
+        Buffer &indices = m_buffers[m_indices];
+        indices.index = -1;
+        indices.ndim = 1;
+        indices.shape[0] = 0;
+        indices.shape[1] = indices.shape[2] = 1;
+        indices.type = IndexBuffer;
+        indices.dtype = VariableType::UInt32;
+
+        auto register_buffer = [&](BufferType type, const std::string &name,
+                                   int index, GLenum gl_type) {
+            Buffer &buf = m_buffers[register_argument(name)];
+            for (int i = 0; i < 3; ++i)
+                buf.shape[i] = 1;
+            buf.ndim = 1;
+            buf.index = index;
+            buf.type = type;
+
+            if (gl_type == GL_SAMPLER_2D) {
+                buf.dtype = VariableType::Invalid;
                 buf.ndim = 0;
-                break;
-
-            case GL_INT_VEC2:
-                buf.dtype = VariableType::Int32;
-                buf.shape[0] = 2;
-                break;
+                buf.type = FragmentTexture;
+            } else if (!gl_parse_type(gl_type, buf.dtype, buf.ndim, buf.shape)) {
+                throw std::runtime_error("Shader::Shader(): unsupported "
+                                         "uniform/attribute type!");
+            }
 
-            case GL_INT_VEC3:
-                buf.dtype = VariableType::Int32;
-                buf.shape[0] = 3;
-                break;
+            if (type == VertexBuffer) {
+                buf.attribute_dtype = buf.dtype;
+                for (int i = (int) buf.ndim - 1; i >= 0; --i) {
+                    buf.shape[i + 1] = buf.shape[i];
+                }
+                buf.shape[0] = 0;
+                buf.ndim++;
+            }
+        };
 
-            case GL_INT_VEC4:
-                buf.dtype = VariableType::Int32;
-                buf.shape[0] = 4;
-                break;
+        for (int i = 0; i < attribute_count; ++i) {
+            char attr_name[128];
+            GLenum type = 0;
+            GLint size = 0;
+            CHK(glGetActiveAttrib(m_shader_handle, i, sizeof(attr_name), nullptr,
+                                  &size, &type, attr_name));
+            GLint index = glGetAttribLocation(m_shader_handle, attr_name);
+            register_buffer(VertexBuffer, attr_name, index, type);
+        }
 
-#if defined(NANOGUI_USE_OPENGL)
-            case GL_UNSIGNED_INT:
-                buf.dtype = VariableType::UInt32;
-                buf.ndim = 0;
-                break;
+        for (int i = 0; i < uniform_count; ++i) {
+            char uniform_name[128];
+            GLenum type = 0;
+            GLint size = 0;
+            CHK(glGetActiveUniform(m_shader_handle, i, sizeof(uniform_name), nullptr,
+                                   &size, &type, uniform_name));
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+            // Members of uniform blocks are set through the associated UniformBlock
+            GLuint uniform_index = (GLuint) i;
+            GLint block_index = -1;
+            CHK(glGetActiveUniformsiv(m_shader_handle, 1, &uniform_index,
+                                      GL_UNIFORM_BLOCK_INDEX, &block_index));
+            if (block_index != -1)
+                continue;
+#endif
+            GLint index = glGetUniformLocation(m_shader_handle, uniform_name);
+            register_buffer(UniformBuffer, uniform_name, index, type);
+        }
 
-            case GL_UNSIGNED_INT_VEC2:
-                buf.dtype = VariableType::UInt32;
-                buf.shape[0] = 2;
-                break;
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+        GLint block_count = 0;
+        CHK(glGetProgramiv(m_shader_handle, GL_ACTIVE_UNIFORM_BLOCKS, &block_count));
+
+        for (int i = 0; i < block_count; ++i) {
+            char block_name[128];
+            GLint block_size = 0;
+            CHK(glGetActiveUniformBlockName(m_shader_handle, (GLuint) i, sizeof(block_name),
+                                            nullptr, block_name));
+            CHK(glGetActiveUniformBlockiv(m_shader_handle, (GLuint) i,
+                                          GL_UNIFORM_BLOCK_DATA_SIZE, &block_size));
+
+            Buffer &buf = m_buffers[register_argument(block_name)];
+            buf.type = UniformBlockBuffer;
+            buf.index = i;
+            buf.size = (size_t) block_size;
+        }
+#endif
 
-            case GL_UNSIGNED_INT_VEC3:
-                buf.dtype = VariableType::UInt32;
-                buf.shape[0] = 3;
-                break;
+        if (!m_pending_cache_path.empty())
+            save_program_binary(m_pending_cache_path);
+        m_pending_cache_path.clear();
+    }
 
-            case GL_UNSIGNED_INT_VEC4:
-                buf.dtype = VariableType::UInt32;
-                buf.shape[0] = 4;
-                break;
+    for (size_t i = 0; i < m_buffers.size(); ++i) {
+        if (m_buffers[i].type == VertexTexture || m_buffers[i].type == FragmentTexture)
+            m_textures.push_back(i);
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+        if (m_buffers[i].type == UniformBlockBuffer) {
+            // Use the block index as binding point
+            CHK(glUniformBlockBinding(m_shader_handle, (GLuint) m_buffers[i].index,
+                                      (GLuint) m_buffers[i].index));
+            m_uniform_blocks.push_back(i);
+        }
 #endif
+    }
 
-            case GL_BOOL:
-                buf.dtype = VariableType::Bool;
-                buf.ndim = 0;
-                break;
-
-            case GL_BOOL_VEC2:
-                buf.dtype = VariableType::Bool;
-                buf.shape[0] = 2;
-                break;
+    m_ready = true;
 
-            case GL_BOOL_VEC3:
-                buf.dtype = VariableType::Bool;
-                buf.shape[0] = 3;
-                break;
+    // Apply the parameters that were specified in the meantime
+    auto deferred = std::move(m_deferred);
+    m_deferred.clear();
+    for (auto &call : deferred)
+        call.second();
 
-            case GL_BOOL_VEC4:
-                buf.dtype = VariableType::Bool;
-                buf.shape[0] = 4;
-                break;
+    if (m_ready_callback)
+        m_ready_callback();
+}
 
-            case GL_FLOAT_MAT2:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = buf.shape[1] = 2;
-                buf.ndim = 2;
-                break;
+bool Shader::ready() {
+    if (m_ready)
+        return true;
+    else if (!m_shader_handle) // compilation failed
+        return false;
+
+#if defined(NANOGUI_HAS_PARALLEL_COMPILE)
+    GLint completed = GL_FALSE;
+    CHK(glGetProgramiv(m_shader_handle, GL_COMPLETION_STATUS_KHR, &completed));
+    if (completed != GL_TRUE)
+        return false;
+#endif
 
-            case GL_FLOAT_MAT3:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = buf.shape[1] = 3;
-                buf.ndim = 2;
-                break;
+    finalize_program();
+    return true;
+}
 
-            case GL_FLOAT_MAT4:
-                buf.dtype = VariableType::Float32;
-                buf.shape[0] = buf.shape[1] = 4;
-                buf.ndim = 2;
-                break;
+Shader::~Shader() {
+    for (size_t handle : m_uniform_blocks) {
+        if (m_buffers[handle].buffer)
+            ((UniformBlock *) m_buffers[handle].buffer)->dec_ref();
+    }
+    for (size_t handle : m_shared_buffers)
+        m_buffers[handle].shared->dec_ref();
+    CHK(glDeleteShader(m_pending_shaders[0]));
+    CHK(glDeleteShader(m_pending_shaders[1]));
+    gl_state().forget_program(m_shader_handle);
+    CHK(glDeleteProgram(m_shader_handle));
+#if defined(NANOGUI_USE_OPENGL)
+    gl_state().forget_vertex_array(m_vertex_array_handle);
+    CHK(glDeleteVertexArrays(1, &m_vertex_array_handle));
+#endif
+}
 
-            case GL_SAMPLER_2D:
-                buf.dtype = VariableType::Invalid;
-                buf.ndim = 0;
-                buf.type = FragmentTexture;
-                break;
+bool Shader::load_program_binary(const std::string &path) {
+#if defined(NANOGUI_HAS_PROGRAM_BINARY)
+    std::ifstream is(path, std::ios::binary);
+    if (!is)
+        return false;
 
-            default:
-                throw std::runtime_error("Shader::Shader(): unsupported "
-                                         "uniform/attribute type!");
-        };
-
-        if (type == VertexBuffer) {
-            for (int i = (int) buf.ndim - 1; i >= 0; --i) {
-                buf.shape[i + 1] = buf.shape[i];
-            }
-            buf.shape[0] = 0;
-            buf.ndim++;
-        }
+    auto read = [&is](auto &value) {
+        return (bool) is.read((char *) &value, sizeof(value));
     };
 
-    for (int i = 0; i < attribute_count; ++i) {
-        char attr_name[128];
-        GLenum type = 0;
-        GLint size = 0;
-        CHK(glGetActiveAttrib(m_shader_handle, i, sizeof(attr_name), nullptr,
-                              &size, &type, attr_name));
-        GLint index = glGetAttribLocation(m_shader_handle, attr_name);
-        register_buffer(VertexBuffer, attr_name, index, type);
+    uint32_t magic = 0, version = 0, binary_format = 0, binary_size = 0,
+             arg_count = 0;
+    if (!read(magic) || !read(version) || !read(binary_format) ||
+        !read(binary_size) || !read(arg_count) ||
+        magic != NANOGUI_PROGRAM_CACHE_MAGIC ||
+        version != NANOGUI_PROGRAM_CACHE_VERSION)
+        return false;
+
+    std::vector<Buffer> args(arg_count);
+    for (Buffer &arg : args) {
+        uint32_t name_size = 0, ndim = 0, shape[3];
+        int32_t type = 0, dtype = 0, index = 0;
+        uint64_t size = 0;
+        if (!read(name_size) || name_size > 1024)
+            return false;
+        arg.name.resize(name_size);
+        if (!is.read(&arg.name[0], name_size) || !read(type) || !read(dtype) ||
+            !read(index) || !read(ndim) || !read(shape) || !read(size) || ndim > 3)
+            return false;
+        arg.type = (BufferType) type;
+        arg.dtype = (VariableType) dtype;
+        if (arg.type == VertexBuffer)
+            arg.attribute_dtype = arg.dtype;
+        arg.index = index;
+        arg.ndim = ndim;
+        for (int i = 0; i < 3; ++i)
+            arg.shape[i] = shape[i];
+        if (arg.type == UniformBlockBuffer)
+            arg.size = (size_t) size;
     }
 
-    for (int i = 0; i < uniform_count; ++i) {
-        char uniform_name[128];
-        GLenum type = 0;
-        GLint size = 0;
-        CHK(glGetActiveUniform(m_shader_handle, i, sizeof(uniform_name), nullptr,
-                               &size, &type, uniform_name));
-        GLint index = glGetUniformLocation(m_shader_handle, uniform_name);
-        register_buffer(UniformBuffer, uniform_name, index, type);
-    }
+    std::unique_ptr<uint8_t[]> binary(new uint8_t[binary_size]);
+    if (!is.read((char *) binary.get(), binary_size))
+        return false;
 
-    Buffer &buf = m_buffers["indices"];
-    buf.index = -1;
-    buf.ndim = 1;
-    buf.shape[0] = 0;
-    buf.shape[1] = buf.shape[2] = 1;
-    buf.type = IndexBuffer;
-    buf.dtype = VariableType::UInt32;
+    /* The driver rejects binaries created by a different driver version. This
+       is not an error, the program will simply be rebuilt from source. */
+    GLuint program = glCreateProgram();
+    glProgramBinary(program, (GLenum) binary_format, binary.get(), (GLsizei) binary_size);
+    GLint status = GL_FALSE;
+    glGetProgramiv(program, GL_LINK_STATUS, &status);
+    while (glGetError() != GL_NO_ERROR)
+        ;
 
-#if defined(NANOGUI_USE_OPENGL)
-    CHK(glGenVertexArrays(1, &m_vertex_array_handle));
+    if (status != GL_TRUE) {
+        CHK(glDeleteProgram(program));
+        return false;
+    }
 
-    m_uses_point_size = vertex_shader.find("gl_PointSize") != std::string::npos;
+    m_shader_handle = program;
+    for (const Buffer &arg : args) {
+        std::string name = arg.name;
+        m_buffers[register_argument(name)] = arg;
+    }
+    m_indices = find_argument("indices", "Shader::load_program_binary()");
+
+    return true;
+#else
+    (void) path;
+    return false;
 #endif
 }
 
-Shader::~Shader() {
-    CHK(glDeleteProgram(m_shader_handle));
-#if defined(NANOGUI_USE_OPENGL)
-    CHK(glDeleteVertexArrays(1, &m_vertex_array_handle));
+void Shader::save_program_binary(const std::string &path) const {
+#if defined(NANOGUI_HAS_PROGRAM_BINARY)
+    GLint binary_size = 0;
+    CHK(glGetProgramiv(m_shader_handle, GL_PROGRAM_BINARY_LENGTH, &binary_size));
+    if (binary_size <= 0)
+        return;
+
+    std::unique_ptr<uint8_t[]> binary(new uint8_t[binary_size]);
+    GLenum binary_format = 0;
+    CHK(glGetProgramBinary(m_shader_handle, binary_size, nullptr, &binary_format,
+                           binary.get()));
+
+    // Write to a temporary file first so that readers never see partial entries
+    std::string temp_path = path + ".tmp";
+    {
+        std::ofstream os(temp_path, std::ios::binary | std::ios::trunc);
+        auto write = [&os](const auto &value) {
+            os.write((const char *) &value, sizeof(value));
+        };
+
+        write(NANOGUI_PROGRAM_CACHE_MAGIC);
+        write(NANOGUI_PROGRAM_CACHE_VERSION);
+        write((uint32_t) binary_format);
+        write((uint32_t) binary_size);
+        write((uint32_t) m_buffers.size());
+
+        for (const Buffer &buf : m_buffers) {
+            uint32_t shape[3] = { (uint32_t) buf.shape[0], (uint32_t) buf.shape[1],
+                                  (uint32_t) buf.shape[2] };
+            write((uint32_t) buf.name.size());
+            os.write(buf.name.data(), buf.name.size());
+            write((int32_t) buf.type);
+            write((int32_t) (buf.type == VertexBuffer ? buf.attribute_dtype : buf.dtype));
+            write((int32_t) buf.index);
+            write((uint32_t) buf.ndim);
+            write(shape);
+            write((uint64_t) buf.size);
+        }
+
+        os.write((const char *) binary.get(), binary_size);
+
+        if (!os) {
+            fprintf(stderr, "Shader::save_program_binary(): could not write \"%s\"!\n",
+                    temp_path.c_str());
+            return;
+        }
+    }
+
+    // rename() does not replace existing files on Windows
+    if (std::rename(temp_path.c_str(), path.c_str()) != 0 &&
+        (std::remove(path.c_str()) != 0 ||
+         std::rename(temp_path.c_str(), path.c_str()) != 0)) {
+        fprintf(stderr, "Shader::save_program_binary(): could not write \"%s\"!\n",
+                path.c_str());
+        std::remove(temp_path.c_str());
+    }
+#else
+    (void) path;
 #endif
 }
 
-void Shader::set_buffer(const std::string &name,
+void Shader::set_buffer(size_t handle,
                         VariableType dtype,
                         size_t ndim,
                         const size_t *shape,
-                        const void *data) {
-    auto it = m_buffers.find(name);
-    if (it == m_buffers.end())
+                        const void *data,
+                        bool per_instance,
+                        bool normalized) {
+    Buffer &buf = argument(handle, "Shader::set_buffer()");
+
+    if (per_instance && buf.type != VertexBuffer)
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is not a vertex attribute and cannot be per-instance!");
+    else if (normalized && buf.type != VertexBuffer)
         throw std::runtime_error(
-            "Shader::set_buffer(): could not find argument named \"" + name + "\"");
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is not a vertex attribute and cannot be normalized!");
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    if (per_instance)
+        throw std::runtime_error(
+            "Shader::set_buffer(): per-instance attributes require OpenGL ES 3!");
+#endif
 
-    Buffer &buf = m_buffers[name];
+    if (buf.type == IndexBuffer && !(dtype == VariableType::UInt32 ||
+                                     dtype == VariableType::UInt16 ||
+                                     dtype == VariableType::UInt8))
+        throw std::runtime_error(
+            "Shader::set_buffer(): the index buffer must have dtype uint32, "
+            "uint16, or uint8 (got " + std::string(type_name(dtype)) + ")!");
 
-    bool mismatch = ndim != buf.ndim || dtype != buf.dtype;
+    if (buf.type == VertexBuffer)
+        gl_check_attribute_format("Shader::set_buffer()", buf.name,
+                                  buf.attribute_dtype, dtype, normalized);
+
+    // The type of index and vertex data is determined by the most recent upload
+    bool mismatch = ndim != buf.ndim ||
+                    (dtype != buf.dtype && buf.type != IndexBuffer &&
+                     buf.type != VertexBuffer);
     for (size_t i = (buf.type == UniformBuffer ? 0 : 1); i < ndim; ++i)
         mismatch |= shape[i] != buf.shape[i];
 
@@ -283,7 +957,7 @@ void Shader::set_buffer(const std::string &name,
         for (size_t i = 0; i < 3; ++i)
             arg.shape[i] = i < arg.ndim ? shape[i] : 1;
         arg.dtype = dtype;
-        throw std::runtime_error("Buffer::set_buffer(\"" + name +
+        throw std::runtime_error("Buffer::set_buffer(\"" + buf.name +
                                  "\"): shape/dtype mismatch: expected " + buf.to_string() +
                                  ", got " + arg.to_string());
     }
@@ -303,75 +977,525 @@ void Shader::set_buffer(const std::string &name,
             buf.buffer = new uint8_t[size];
         memcpy(buf.buffer, data, size);
     } else {
-        GLuint buffer_id = 0;
-        if (buf.buffer) {
-            buffer_id = (GLuint) ((uintptr_t) buf.buffer);
-        } else {
-            CHK(glGenBuffers(1, &buffer_id));
-            buf.buffer = (void *) ((uintptr_t) buffer_id);
-        }
-        GLenum buf_type = (name == "indices")
-            ? GL_ELEMENT_ARRAY_BUFFER : GL_ARRAY_BUFFER;
-        CHK(glBindBuffer(buf_type, buffer_id));
-        CHK(glBufferData(buf_type, size, data, GL_DYNAMIC_DRAW));
+        release_shared(handle);
+        release_interleaved(handle);
+        upload_buffer(buf, data, size);
     }
 
     buf.dtype = dtype;
     buf.ndim  = ndim;
     buf.size  = size;
-    buf.dirty = true;
+    buf.per_instance = per_instance;
+    buf.normalized = normalized;
+    mark_dirty(handle);
 }
 
-void Shader::set_texture(const std::string &name, Texture *texture) {
-    auto it = m_buffers.find(name);
-    if (it == m_buffers.end())
+void Shader::upload_buffer(Buffer &buf, const void *data, size_t size) {
+#if defined(NANOGUI_HAS_STREAM_BUFFER)
+    if (buf.streaming) {
+        if (!m_stream_buffer)
+            m_stream_buffer = std::make_unique<StreamBuffer>(NANOGUI_STREAM_BUFFER_SIZE);
+        buf.offset = m_stream_buffer->write(data, size);
+        buf.buffer = (void *) ((uintptr_t) m_stream_buffer->handle);
+        return;
+    }
+#endif
+
+    GLuint buffer_id = 0;
+    if (buf.buffer) {
+        buffer_id = (GLuint) ((uintptr_t) buf.buffer);
+    } else {
+        CHK(glGenBuffers(1, &buffer_id));
+        buf.buffer = (void *) ((uintptr_t) buffer_id);
+    }
+    GLenum buf_type = buf.type == IndexBuffer
+        ? GL_ELEMENT_ARRAY_BUFFER : GL_ARRAY_BUFFER;
+#if defined(NANOGUI_USE_OPENGL)
+    // The index buffer binding is part of the vertex array state
+    if (buf.type == IndexBuffer)
+        gl_state().bind_vertex_array(m_vertex_array_handle);
+#endif
+    CHK(glBindBuffer(buf_type, buffer_id));
+    if (size < buf.capacity) {
+        /* Orphan the storage so that the driver need not wait for draw calls
+           still reading the old contents, then keep the allocated capacity */
+        CHK(glBufferData(buf_type, buf.capacity, nullptr, GL_DYNAMIC_DRAW));
+        CHK(glBufferSubData(buf_type, 0, size, data));
+    } else if (size == buf.capacity) {
+        CHK(glBufferData(buf_type, size, data, GL_DYNAMIC_DRAW));
+    } else {
+        CHK(glBufferData(buf_type, size, data, GL_DYNAMIC_DRAW));
+        buf.capacity = size;
+    }
+#if defined(NANOGUI_USE_OPENGL)
+    if (buf.type == IndexBuffer && gl_state().pass_depth == 0)
+        gl_state().bind_vertex_array(0);
+#endif
+}
+
+void Shader::release_interleaved(size_t handle) {
+    Buffer &buf = m_buffers[handle];
+    if (buf.source == (size_t) -1)
+        return;
+
+    auto unbind = [this](Buffer &b) {
+        b.buffer = nullptr;
+        b.shape[0] = 0;
+        b.size = b.capacity = b.offset = 0;
+        b.stride = b.attribute_offset = 0;
+        b.source = (size_t) -1;
+        m_all_bound = false;
+    };
+
+    if (buf.source == handle) {
+        // The other attributes lose access to the storage kept by 'buf'
+        for (size_t i = 0; i < m_buffers.size(); ++i) {
+            if (i != handle && m_buffers[i].source == handle)
+                unbind(m_buffers[i]);
+        }
+        buf.stride = buf.attribute_offset = 0;
+        buf.source = (size_t) -1;
+    } else {
+        unbind(buf);
+    }
+}
+
+void Shader::set_buffer(size_t handle, nanogui::Buffer *shared, bool per_instance,
+                        bool normalized) {
+    Buffer &buf = argument(handle, "Shader::set_buffer()");
+    if (!(buf.type == VertexBuffer || buf.type == IndexBuffer))
         throw std::runtime_error(
-            "Shader::set_texture(): could not find argument named \"" + name + "\"");
-    Buffer &buf = m_buffers[name];
-    if (!(buf.type == VertexTexture || buf.type == FragmentTexture))
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is not a vertex or index buffer!");
+    else if (shared && (shared->type() == nanogui::Buffer::Type::Index) !=
+                       (buf.type == IndexBuffer))
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + buf.name + "\" requires " +
+            (buf.type == IndexBuffer ? "an index" : "a vertex") + " buffer!");
+    else if (per_instance && buf.type != VertexBuffer)
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is not a vertex attribute and cannot be per-instance!");
+    else if (normalized && buf.type != VertexBuffer)
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is not a vertex attribute and cannot be normalized!");
+    else if (buf.streaming)
         throw std::runtime_error(
-            "Shader::set_texture(): argument named \"" + name + "\" is not a texture!");
+            "Shader::set_buffer(): argument named \"" + buf.name +
+            "\" is a streaming buffer!");
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    if (per_instance)
+        throw std::runtime_error(
+            "Shader::set_buffer(): per-instance attributes require OpenGL ES 3!");
+#endif
 
-    buf.buffer = (void *) ((uintptr_t) texture->texture_handle());
-    buf.dirty  = true;
+    if (shared)
+        shared->inc_ref();
+
+    // Release the current storage of the argument
+    release_shared(handle);
+    release_interleaved(handle);
+    if (buf.buffer) {
+        GLuint buffer_id = (GLuint) ((uintptr_t) buf.buffer);
+        CHK(glDeleteBuffers(1, &buffer_id));
+        buf.buffer = nullptr;
+        buf.capacity = 0;
+    }
+
+    buf.per_instance = per_instance;
+    buf.normalized = normalized;
+    if (shared) {
+        buf.shared = shared;
+        m_shared_buffers.push_back(handle);
+        sync_shared(handle);
+    } else {
+        buf.shape[0] = 0;
+        buf.size = 0;
+        m_all_bound = false;
+    }
 }
 
-void Shader::begin() {
-    int texture_unit = 0;
+void Shader::release_shared(size_t handle) {
+    Buffer &buf = m_buffers[handle];
+    if (!buf.shared)
+        return;
 
-    CHK(glUseProgram(m_shader_handle));
+    m_shared_buffers.erase(std::find(m_shared_buffers.begin(),
+                                     m_shared_buffers.end(), handle));
+    buf.shared->dec_ref();
+    buf.shared = nullptr;
+    buf.buffer = nullptr;
+    buf.shape[0] = 0;
+    buf.size = 0;
+    m_all_bound = false;
+}
 
-#if defined(NANOGUI_USE_OPENGL)
-    CHK(glBindVertexArray(m_vertex_array_handle));
+void Shader::sync_shared(size_t handle) {
+    Buffer &buf = m_buffers[handle];
+    const nanogui::Buffer *shared = buf.shared;
+    buf.revision = shared->revision();
+
+    // An empty buffer leaves the argument unbound
+    buf.buffer = nullptr;
+    m_all_bound = false;
+    if (shared->dtype() == VariableType::Invalid)
+        return;
+
+    if (buf.type == VertexBuffer)
+        gl_check_attribute_format("\"" + m_name + "\"", buf.name, buf.attribute_dtype,
+                                  shared->dtype(), buf.normalized);
+
+    // The type of index and vertex data is determined by the contents of the buffer
+    bool mismatch = shared->ndim() != buf.ndim;
+    for (size_t i = 1; i < buf.ndim; ++i)
+        mismatch |= shared->shape()[i] != buf.shape[i];
+
+    if (mismatch) {
+        Buffer arg;
+        arg.type = buf.type;
+        arg.ndim = shared->ndim();
+        for (size_t i = 0; i < 3; ++i)
+            arg.shape[i] = i < arg.ndim ? shared->shape()[i] : 1;
+        arg.dtype = shared->dtype();
+        throw std::runtime_error("\"" + m_name + "\": shared buffer of argument \"" +
+                                 buf.name + "\" has a shape/dtype mismatch: expected " +
+                                 buf.to_string() + ", got " + arg.to_string());
+    }
+
+    buf.dtype = shared->dtype();
+    buf.shape[0] = shared->shape()[0];
+    buf.size = shared->size();
+    buf.buffer = (void *) ((uintptr_t) shared->buffer_handle());
+    mark_dirty(handle);
+}
+
+void Shader::set_buffer_interleaved(const std::vector<VertexAttribute> &attributes,
+                                    size_t count, size_t stride,
+                                    const void *data, bool per_instance) {
+    if (attributes.empty())
+        throw std::runtime_error(
+            "Shader::set_buffer_interleaved(): no attributes specified!");
+
+    // Extent of the part of a vertex that is referenced by the attributes
+    size_t extent = 0;
+    for (const VertexAttribute &attr : attributes) {
+        if (attr.components < 1 || attr.components > 4)
+            throw std::runtime_error(
+                "Shader::set_buffer_interleaved(\"" + attr.name +
+                "\"): the number of components must be between 1 and 4!");
+        extent = std::max(extent, attr.offset + attr.components * type_size(attr.dtype));
+    }
+
+    if (stride < extent)
+        throw std::runtime_error(
+            "Shader::set_buffer_interleaved(): the stride (" + std::to_string(stride) +
+            " bytes) is smaller than the extent of the attributes (" +
+            std::to_string(extent) + " bytes)!");
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    if (per_instance)
+        throw std::runtime_error(
+            "Shader::set_buffer_interleaved(): per-instance attributes require OpenGL ES 3!");
 #endif
 
-    for (auto &[key, buf] : m_buffers) {
-        bool indices = key == "indices";
-        if (!buf.buffer) {
-            if (!indices)
-                fprintf(stderr,
-                        "Shader::begin(): shader \"%s\" has an unbound "
-                        "argument \"%s\"!\n",
-                        m_name.c_str(), key.c_str());
-            continue;
+    // The last vertex need not be padded to the full stride
+    size_t size = count > 0 ? (count - 1) * stride + extent : 0;
+
+    if (!m_ready) {
+        std::vector<uint8_t> data_copy((const uint8_t *) data,
+                                       (const uint8_t *) data + size);
+        defer("set_buffer_interleaved:" + attributes[0].name,
+              [this, attributes, count, stride, data_copy = std::move(data_copy),
+               per_instance]() {
+                  set_buffer_interleaved(attributes, count, stride,
+                                         data_copy.data(), per_instance);
+              });
+        return;
+    }
+
+    std::vector<size_t> handles;
+    for (const VertexAttribute &attr : attributes) {
+        size_t handle = find_argument(attr.name, "Shader::set_buffer_interleaved()");
+        const Buffer &buf = m_buffers[handle];
+
+        if (buf.type != VertexBuffer)
+            throw std::runtime_error(
+                "Shader::set_buffer_interleaved(): argument named \"" + attr.name +
+                "\" is not a vertex attribute!");
+        else if (std::find(handles.begin(), handles.end(), handle) != handles.end())
+            throw std::runtime_error(
+                "Shader::set_buffer_interleaved(): attribute \"" + attr.name +
+                "\" was specified more than once!");
+
+        gl_check_attribute_format("Shader::set_buffer_interleaved()", attr.name,
+                                  buf.attribute_dtype, attr.dtype, attr.normalized);
+
+        if (attr.components != buf.shape[1]) {
+            Buffer arg;
+            arg.type = buf.type;
+            arg.ndim = 2;
+            arg.shape[0] = count;
+            arg.shape[1] = attr.components;
+            arg.dtype = attr.dtype;
+            throw std::runtime_error("Shader::set_buffer_interleaved(\"" + attr.name +
+                                     "\"): shape/dtype mismatch: expected " + buf.to_string() +
+                                     ", got " + arg.to_string());
         }
 
+        handles.push_back(handle);
+    }
+
+    // The first attribute holds the storage, and the others release theirs
+    size_t source = handles[0];
+    for (size_t handle : handles) {
+        release_shared(handle);
+        release_interleaved(handle);
+        Buffer &buf = m_buffers[handle];
+        if (handle != source && buf.buffer && !buf.streaming) {
+            GLuint buffer_id = (GLuint) ((uintptr_t) buf.buffer);
+            CHK(glDeleteBuffers(1, &buffer_id));
+            buf.buffer = nullptr;
+            buf.capacity = 0;
+        }
+    }
+
+    Buffer &src = m_buffers[source];
+    upload_buffer(src, data, size);
+
+    for (size_t i = 0; i < handles.size(); ++i) {
+        Buffer &buf = m_buffers[handles[i]];
+        if (handles[i] != source)
+            buf.buffer = src.buffer;
+        buf.dtype = attributes[i].dtype;
+        buf.ndim = 2;
+        buf.shape[0] = count;
+        buf.size = size;
+        buf.stride = stride;
+        buf.attribute_offset = attributes[i].offset;
+        buf.source = source;
+        buf.per_instance = per_instance;
+        buf.normalized = attributes[i].normalized;
+        mark_dirty(handles[i]);
+    }
+}
+
+void Shader::update_buffer_region(size_t handle,
+                                  VariableType dtype,
+                                  size_t offset,
+                                  size_t ndim,
+                                  const size_t *shape,
+                                  const void *data) {
+    Buffer &buf = argument(handle, "Shader::update_buffer_region()");
+    const std::string &name = buf.name;
+    if (!(buf.type == VertexBuffer || buf.type == IndexBuffer))
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" is not a vertex or index buffer!");
+    else if (buf.shared)
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" references a shared buffer!");
+    else if (!buf.buffer)
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" must first be initialized using set_buffer()!");
+    else if (buf.streaming)
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" is a streaming buffer!");
+    else if (buf.source != (size_t) -1)
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" is part of an interleaved buffer!");
+
+    bool mismatch = ndim != buf.ndim || dtype != buf.dtype;
+    for (size_t i = 1; i < ndim; ++i)
+        mismatch |= shape[i] != buf.shape[i];
+
+    if (mismatch) {
+        Buffer arg;
+        arg.type = buf.type;
+        arg.ndim = ndim;
+        for (size_t i = 0; i < 3; ++i)
+            arg.shape[i] = i < arg.ndim ? shape[i] : 1;
+        arg.dtype = dtype;
+        throw std::runtime_error("Shader::update_buffer_region(\"" + name +
+                                 "\"): shape/dtype mismatch: expected " + buf.to_string() +
+                                 ", got " + arg.to_string());
+    }
+
+    if (offset > buf.shape[0])
+        throw std::runtime_error(
+            "Shader::update_buffer_region(\"" + name + "\"): offset " +
+            std::to_string(offset) + " exceeds the buffer size (" +
+            std::to_string(buf.shape[0]) + ")!");
+
+    size_t row_size = type_size(dtype) * buf.shape[1] * buf.shape[2],
+           start    = offset * row_size,
+           size     = shape[0] * row_size,
+           end      = start + size;
+
+    GLuint buffer_id = (GLuint) ((uintptr_t) buf.buffer);
+    GLenum buf_type = buf.type == IndexBuffer
+        ? GL_ELEMENT_ARRAY_BUFFER : GL_ARRAY_BUFFER;
+
+    if (end > buf.capacity) {
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+        throw std::runtime_error(
+            "Shader::update_buffer_region(\"" + name +
+            "\"): growing a buffer requires OpenGL ES 3!");
+#else
+        size_t capacity = std::max(end, buf.capacity + buf.capacity / 2);
+
+        // Allocate larger storage and carry over the part that is kept
+        GLuint new_buffer_id = 0;
+        CHK(glGenBuffers(1, &new_buffer_id));
+        CHK(glBindBuffer(GL_COPY_WRITE_BUFFER, new_buffer_id));
+        CHK(glBufferData(GL_COPY_WRITE_BUFFER, capacity, nullptr, GL_DYNAMIC_DRAW));
+        if (start > 0) {
+            CHK(glBindBuffer(GL_COPY_READ_BUFFER, buffer_id));
+            CHK(glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER,
+                                    0, 0, start));
+        }
+        CHK(glDeleteBuffers(1, &buffer_id));
+
+        buffer_id = new_buffer_id;
+        buf.buffer = (void *) ((uintptr_t) buffer_id);
+        buf.capacity = capacity;
+#endif
+    }
+
+#if defined(NANOGUI_USE_OPENGL)
+    if (buf.type == IndexBuffer)
+        gl_state().bind_vertex_array(m_vertex_array_handle);
+#endif
+    CHK(glBindBuffer(buf_type, buffer_id));
+    CHK(glBufferSubData(buf_type, start, size, data));
+#if defined(NANOGUI_USE_OPENGL)
+    if (buf.type == IndexBuffer && gl_state().pass_depth == 0)
+        gl_state().bind_vertex_array(0);
+#endif
+
+    if (end > buf.size) {
+        buf.size = end;
+        buf.shape[0] = offset + shape[0];
+    }
+    mark_dirty(handle);
+}
+
+void Shader::set_buffer_streaming(const std::string &name, bool streaming) {
+    if (!m_ready) {
+        defer("set_buffer_streaming:" + name, [this, name, streaming]() {
+            set_buffer_streaming(name, streaming);
+        });
+        return;
+    }
+
+    Buffer &buf = m_buffers[find_argument(name, "Shader::set_buffer_streaming()")];
+    if (!(buf.type == VertexBuffer || buf.type == IndexBuffer))
+        throw std::runtime_error(
+            "Shader::set_buffer_streaming(): argument named \"" + name +
+            "\" is not a vertex or index buffer!");
+
+#if defined(NANOGUI_HAS_STREAM_BUFFER)
+    if (buf.streaming == streaming)
+        return;
+
+    size_t handle = find_argument(name, "Shader::set_buffer_streaming()");
+    release_shared(handle);
+    release_interleaved(handle);
+
+    if (buf.buffer && !buf.streaming) {
         GLuint buffer_id = (GLuint) ((uintptr_t) buf.buffer);
-        GLenum gl_type = 0;
+        CHK(glDeleteBuffers(1, &buffer_id));
+    }
+
+    buf.buffer = nullptr;
+    buf.shape[0] = 0;
+    buf.size = buf.capacity = buf.offset = 0;
+    buf.streaming = streaming;
+    m_all_bound = false;
+#endif
+}
+
+void Shader::set_texture(size_t handle, Texture *texture) {
+    Buffer &buf = argument(handle, "Shader::set_texture()");
+    if (!(buf.type == VertexTexture || buf.type == FragmentTexture))
+        throw std::runtime_error(
+            "Shader::set_texture(): argument named \"" + buf.name + "\" is not a texture!");
 
+    buf.buffer = (void *) ((uintptr_t) texture->texture_handle());
+    mark_dirty(handle);
+}
+
+void Shader::set_uniform_block(size_t handle, UniformBlock *block) {
+    Buffer &buf = argument(handle, "Shader::set_uniform_block()");
+    if (buf.type != UniformBlockBuffer)
+        throw std::runtime_error(
+            "Shader::set_uniform_block(): argument named \"" + buf.name +
+            "\" is not a uniform block!");
+    else if (block && block->size() != buf.size)
+        throw std::runtime_error(
+            "Shader::set_uniform_block(\"" + buf.name + "\"): size mismatch: expected " +
+            std::to_string(buf.size) + " bytes, got " + std::to_string(block->size()) +
+            " (the block should be declared with layout(std140))");
+
+    if (block)
+        block->inc_ref();
+    if (buf.buffer)
+        ((UniformBlock *) buf.buffer)->dec_ref();
+    buf.buffer = block;
+    if (!block)
+        m_all_bound = false;
+}
+
+void Shader::begin() {
+    m_skip_draws = !ready();
+    if (m_skip_draws)
+        return;
+
+    GLState &state = gl_state();
+    state.use_program(m_shader_handle);
 #if defined(NANOGUI_USE_OPENGL)
-        if (!buf.dirty && buf.type != VertexTexture && buf.type != FragmentTexture)
-            continue;
+    state.bind_vertex_array(m_vertex_array_handle);
 #endif
 
+    // Adopt new contents of shared buffers
+    for (size_t handle : m_shared_buffers) {
+        Buffer &buf = m_buffers[handle];
+        if (buf.revision != buf.shared->revision())
+            sync_shared(handle);
+    }
+
+    if (!m_all_bound) {
+        bool all_bound = true;
+        for (const Buffer &buf : m_buffers) {
+            if (buf.buffer || buf.type == IndexBuffer)
+                continue;
+            fprintf(stderr,
+                    "Shader::begin(): shader \"%s\" has an unbound "
+                    "argument \"%s\"!\n",
+                    m_name.c_str(), buf.name.c_str());
+            all_bound = false;
+        }
+        m_all_bound = all_bound;
+    }
+
+    auto bind_argument = [&](Buffer &buf) {
+        const std::string &key = buf.name;
+        GLuint buffer_id = (GLuint) ((uintptr_t) buf.buffer);
+        GLenum gl_type = 0;
         bool uniform_error = false;
+
         switch (buf.type) {
             case IndexBuffer:
                 CHK(glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, buffer_id));
                 break;
 
-            case VertexBuffer:
-                CHK(glBindBuffer(GL_ARRAY_BUFFER, buffer_id));
+            case VertexBuffer: {
+                // Attributes of an interleaved buffer read from the storage of another argument
+                const Buffer &src = buf.source == (size_t) -1 ? buf : m_buffers[buf.source];
+                CHK(glBindBuffer(GL_ARRAY_BUFFER, (GLuint) ((uintptr_t) src.buffer)));
                 CHK(glEnableVertexAttribArray(buf.index));
 
                 switch (buf.dtype) {
@@ -393,17 +1517,21 @@ void Shader::begin() {
                                              "\" has an invalid shapeension (expected ndim=2, got " +
                                              std::to_string(buf.ndim) + ")");
 
-                CHK(glVertexAttribPointer(buf.index, (GLint) buf.shape[1],
-                                          gl_type, GL_FALSE, 0, nullptr));
-                break;
-
-            case VertexTexture:
-            case FragmentTexture:
-                CHK(glActiveTexture(GL_TEXTURE0 + texture_unit));
-                CHK(glBindTexture(GL_TEXTURE_2D, (GLuint) ((uintptr_t) buf.buffer)));
-                if (buf.dirty)
-                    CHK(glUniform1i(buf.index, texture_unit));
-                texture_unit++;
+                const void *pointer = (const void *) (src.offset + buf.attribute_offset);
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+                // Integer inputs (e.g. 'ivec2') must not be converted to floating point
+                if (gl_is_integer_attribute(buf.attribute_dtype))
+                    CHK(glVertexAttribIPointer(buf.index, (GLint) buf.shape[1], gl_type,
+                                               (GLsizei) buf.stride, pointer));
+                else
+#endif
+                    CHK(glVertexAttribPointer(buf.index, (GLint) buf.shape[1], gl_type,
+                                              buf.normalized ? GL_TRUE : GL_FALSE,
+                                              (GLsizei) buf.stride, pointer));
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+                CHK(glVertexAttribDivisor(buf.index, buf.per_instance ? 1 : 0));
+#endif
+                }
                 break;
 
             case UniformBuffer:
@@ -502,56 +1630,367 @@ void Shader::begin() {
                 throw std::runtime_error("\"" + m_name + "\": uniform attribute \"" + key +
                                          "\" has an unsupported dtype/shape configuration:" + buf.to_string());
         }
+    };
 
+#if defined(NANOGUI_USE_OPENGL)
+    // The program and vertex array object retain their state, so only
+    // arguments that changed since the last call need to be sent again
+    for (size_t handle : m_dirty) {
+        Buffer &buf = m_buffers[handle];
+        if (buf.type == VertexTexture || buf.type == FragmentTexture ||
+            buf.type == UniformBlockBuffer)
+            continue;
+        if (buf.buffer)
+            bind_argument(buf);
+        buf.dirty = false;
+    }
+#else
+    for (Buffer &buf : m_buffers) {
+        if (buf.buffer && buf.type != VertexTexture && buf.type != FragmentTexture &&
+            buf.type != UniformBlockBuffer) {
+            bind_argument(buf);
+            buf.dirty = false;
+        }
+    }
+#endif
+    m_dirty.clear();
+
+    for (size_t i = 0; i < m_textures.size(); ++i) {
+        Buffer &buf = m_buffers[m_textures[i]];
+        if (!buf.buffer)
+            continue;
+        state.bind_texture_unit((GLuint) i, (GLuint) ((uintptr_t) buf.buffer));
+        if (buf.dirty)
+            CHK(glUniform1i(buf.index, (GLint) i));
         buf.dirty = false;
     }
 
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+    for (size_t handle : m_uniform_blocks) {
+        Buffer &buf = m_buffers[handle];
+        if (!buf.buffer)
+            continue;
+        UniformBlock *block = (UniformBlock *) buf.buffer;
+        block->upload();
+        CHK(glBindBufferBase(GL_UNIFORM_BUFFER, (GLuint) buf.index,
+                             block->buffer_handle()));
+    }
+#endif
+
     if (m_blend_mode == BlendMode::AlphaBlend) {
-        CHK(glEnable(GL_BLEND));
-        CHK(glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA));
+        state.acquire(GLState::Blend);
+        state.set_blend_func(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA);
+    } else {
+        state.settle(GLState::Blend);
     }
 
 #if defined(NANOGUI_USE_OPENGL)
     if (m_uses_point_size)
-        CHK(glEnable(GL_PROGRAM_POINT_SIZE));
+        state.acquire(GLState::ProgramPointSize);
+    else
+        state.settle(GLState::ProgramPointSize);
 #endif
 }
 
 void Shader::end() {
+    if (m_skip_draws)
+        return;
+
+    /* Within a render pass, the program, vertex array, and capabilities stay
+       in place so that the next draw call does not need to set them again */
+    GLState &state = gl_state();
     if (m_blend_mode == BlendMode::AlphaBlend)
-        CHK(glDisable(GL_BLEND));
+        state.release(GLState::Blend);
 #if defined(NANOGUI_USE_OPENGL)
     if (m_uses_point_size)
-        CHK(glDisable(GL_PROGRAM_POINT_SIZE));
-    CHK(glBindVertexArray(0));
+        state.release(GLState::ProgramPointSize);
+    if (state.pass_depth == 0)
+        state.bind_vertex_array(0);
 #else
-    for (const auto &[key, buf] : m_buffers) {
+    for (const Buffer &buf : m_buffers) {
         if (buf.type != VertexBuffer)
             continue;
         CHK(glDisableVertexAttribArray(buf.index));
+#  if NANOGUI_GLES_VERSION != 2
+        // Without a vertex array object, the divisor is global state
+        if (buf.per_instance)
+            CHK(glVertexAttribDivisor(buf.index, 0));
+#  endif
     }
 #endif
-    CHK(glUseProgram(0));
+    if (state.pass_depth == 0)
+        state.use_program(0);
+
+#if defined(NANOGUI_HAS_STREAM_BUFFER)
+    if (m_stream_buffer)
+        m_stream_buffer->fence();
+#endif
+}
+
+/// Return the OpenGL type of an index buffer with the given dtype
+static GLenum gl_index_type(VariableType dtype) {
+    switch (dtype) {
+        case VariableType::UInt8:  return GL_UNSIGNED_BYTE;
+        case VariableType::UInt16: return GL_UNSIGNED_SHORT;
+        default:                   return GL_UNSIGNED_INT;
+    }
+}
+
+static GLenum gl_primitive_type(Shader::PrimitiveType primitive_type,
+                                const char *caller) {
+    switch (primitive_type) {
+        case Shader::PrimitiveType::Point:         return GL_POINTS;
+        case Shader::PrimitiveType::Line:          return GL_LINES;
+        case Shader::PrimitiveType::LineStrip:     return GL_LINE_STRIP;
+        case Shader::PrimitiveType::Triangle:      return GL_TRIANGLES;
+        case Shader::PrimitiveType::TriangleStrip: return GL_TRIANGLE_STRIP;
+        default: throw std::runtime_error(std::string(caller) +
+                                          ": invalid primitive type!");
+    }
 }
 
 void Shader::draw_array(PrimitiveType primitive_type,
                         size_t offset, size_t count,
                         bool indexed) {
-    GLenum primitive_type_gl;
-    switch (primitive_type) {
-        case PrimitiveType::Point:         primitive_type_gl = GL_POINTS;         break;
-        case PrimitiveType::Line:          primitive_type_gl = GL_LINES;          break;
-        case PrimitiveType::LineStrip:     primitive_type_gl = GL_LINE_STRIP;     break;
-        case PrimitiveType::Triangle:      primitive_type_gl = GL_TRIANGLES;      break;
-        case PrimitiveType::TriangleStrip: primitive_type_gl = GL_TRIANGLE_STRIP; break;
-        default: throw std::runtime_error("Shader::draw_array(): invalid primitive type!");
-    }
+    GLenum primitive_type_gl =
+        gl_primitive_type(primitive_type, "Shader::draw_array()");
+
+    if (m_skip_draws)
+        return;
 
+    const Buffer &indices = m_buffers[m_indices];
     if (!indexed)
         CHK(glDrawArrays(primitive_type_gl, (GLint) offset, (GLsizei) count));
     else
-        CHK(glDrawElements(primitive_type_gl, (GLsizei) count, GL_UNSIGNED_INT,
-                           (const void *) (offset * sizeof(uint32_t))));
+        CHK(glDrawElements(primitive_type_gl, (GLsizei) count,
+                           gl_index_type(indices.dtype),
+                           (const void *) (indices.offset +
+                                           offset * type_size(indices.dtype))));
+}
+
+void Shader::draw_array_instanced(PrimitiveType primitive_type,
+                                  size_t offset, size_t count,
+                                  size_t instance_count,
+                                  bool indexed) {
+    GLenum primitive_type_gl =
+        gl_primitive_type(primitive_type, "Shader::draw_array_instanced()");
+
+    if (m_skip_draws)
+        return;
+
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    (void) primitive_type_gl; (void) offset; (void) count;
+    (void) instance_count; (void) indexed;
+    throw std::runtime_error(
+        "Shader::draw_array_instanced(): not supported on GLES 2!");
+#else
+    const Buffer &indices = m_buffers[m_indices];
+    if (!indexed)
+        CHK(glDrawArraysInstanced(primitive_type_gl, (GLint) offset,
+                                  (GLsizei) count, (GLsizei) instance_count));
+    else
+        CHK(glDrawElementsInstanced(primitive_type_gl, (GLsizei) count,
+                                    gl_index_type(indices.dtype),
+                                    (const void *) (indices.offset +
+                                                    offset * type_size(indices.dtype)),
+                                    (GLsizei) instance_count));
+#endif
+}
+
+void Shader::draw_multi(PrimitiveType primitive_type, size_t draw_count,
+                        const int32_t *offsets, const int32_t *counts,
+                        bool indexed) {
+    GLenum primitive_type_gl =
+        gl_primitive_type(primitive_type, "Shader::draw_multi()");
+
+    if (m_skip_draws || draw_count == 0)
+        return;
+
+    const Buffer &indices = m_buffers[m_indices];
+    size_t index_offset = indices.offset,
+           index_size   = type_size(indices.dtype);
+    GLenum index_type   = gl_index_type(indices.dtype);
+
+#if defined(NANOGUI_USE_OPENGL)
+    if (!indexed) {
+        CHK(glMultiDrawArrays(primitive_type_gl, (const GLint *) offsets,
+                              (const GLsizei *) counts, (GLsizei) draw_count));
+    } else {
+        // glMultiDrawElements() expects byte offsets into the index buffer
+        m_multi_draw_offsets.resize(draw_count);
+        for (size_t i = 0; i < draw_count; ++i)
+            m_multi_draw_offsets[i] =
+                (const void *) (index_offset + (size_t) offsets[i] * index_size);
+        CHK(glMultiDrawElements(primitive_type_gl, (const GLsizei *) counts,
+                                index_type, m_multi_draw_offsets.data(),
+                                (GLsizei) draw_count));
+    }
+#else
+    // Multi-draw is not part of OpenGL ES, issue the ranges one by one
+    for (size_t i = 0; i < draw_count; ++i) {
+        if (!indexed)
+            CHK(glDrawArrays(primitive_type_gl, (GLint) offsets[i], (GLsizei) counts[i]));
+        else
+            CHK(glDrawElements(primitive_type_gl, (GLsizei) counts[i], index_type,
+                               (const void *) (index_offset + (size_t) offsets[i] *
+                                                              index_size)));
+    }
+#endif
+}
+
+UniformBlock::UniformBlock(const Shader *shader, const std::string &name)
+    : m_name(name) {
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+    GLuint program = shader->shader_handle(),
+           block_index = glGetUniformBlockIndex(program, name.c_str());
+    if (block_index == GL_INVALID_INDEX)
+        throw std::runtime_error("UniformBlock::UniformBlock(): shader \"" +
+                                 shader->name() + "\" has no uniform block named \"" +
+                                 name + "\"");
+
+    GLint block_size = 0, member_count = 0;
+    CHK(glGetActiveUniformBlockiv(program, block_index, GL_UNIFORM_BLOCK_DATA_SIZE,
+                                  &block_size));
+    CHK(glGetActiveUniformBlockiv(program, block_index, GL_UNIFORM_BLOCK_ACTIVE_UNIFORMS,
+                                  &member_count));
+
+    std::vector<GLint> indices(member_count), offsets(member_count),
+        array_strides(member_count), matrix_strides(member_count),
+        row_major(member_count);
+    CHK(glGetActiveUniformBlockiv(program, block_index,
+                                  GL_UNIFORM_BLOCK_ACTIVE_UNIFORM_INDICES,
+                                  indices.data()));
+
+    const GLuint *indices_u = (const GLuint *) indices.data();
+    CHK(glGetActiveUniformsiv(program, member_count, indices_u,
+                              GL_UNIFORM_OFFSET, offsets.data()));
+    CHK(glGetActiveUniformsiv(program, member_count, indices_u,
+                              GL_UNIFORM_ARRAY_STRIDE, array_strides.data()));
+    CHK(glGetActiveUniformsiv(program, member_count, indices_u,
+                              GL_UNIFORM_MATRIX_STRIDE, matrix_strides.data()));
+    CHK(glGetActiveUniformsiv(program, member_count, indices_u,
+                              GL_UNIFORM_IS_ROW_MAJOR, row_major.data()));
+
+    for (int i = 0; i < member_count; ++i) {
+        char member_name[128];
+        GLenum type = 0;
+        GLint size = 0;
+        CHK(glGetActiveUniform(program, indices_u[i], sizeof(member_name), nullptr,
+                               &size, &type, member_name));
+
+        // Strip the instance name prefix and the array suffix
+        std::string key = member_name;
+        if (key.compare(0, name.length() + 1, name + ".") == 0)
+            key = key.substr(name.length() + 1);
+        if (key.length() > 3 && key.compare(key.length() - 3, 3, "[0]") == 0)
+            key = key.substr(0, key.length() - 3);
+
+        Member member;
+        member.ndim = 1;
+        if (!gl_parse_type(type, member.dtype, member.ndim, member.shape))
+            throw std::runtime_error("UniformBlock::UniformBlock(): member \"" + key +
+                                     "\" has an unsupported type!");
+        else if (row_major[i])
+            throw std::runtime_error("UniformBlock::UniformBlock(): member \"" + key +
+                                     "\" uses an unsupported row-major layout!");
+
+        if (array_strides[i] > 0) {
+            for (int j = (int) member.ndim - 1; j >= 0; --j)
+                member.shape[j + 1] = member.shape[j];
+            member.shape[0] = (size_t) size;
+            member.ndim++;
+            member.array_stride = (size_t) array_strides[i];
+        }
+
+        member.offset = (size_t) offsets[i];
+        member.matrix_stride = (size_t) matrix_strides[i];
+        m_members[key] = member;
+    }
+
+    m_data.resize((size_t) block_size);
+
+    CHK(glGenBuffers(1, &m_buffer_handle));
+    CHK(glBindBuffer(GL_UNIFORM_BUFFER, m_buffer_handle));
+    CHK(glBufferData(GL_UNIFORM_BUFFER, block_size, m_data.data(), GL_DYNAMIC_DRAW));
+    CHK(glBindBuffer(GL_UNIFORM_BUFFER, 0));
+#else
+    (void) shader;
+    throw std::runtime_error("UniformBlock::UniformBlock(): not supported on GLES 2!");
+#endif
+}
+
+UniformBlock::~UniformBlock() {
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+    CHK(glDeleteBuffers(1, &m_buffer_handle));
+#endif
+}
+
+void UniformBlock::upload() {
+#if defined(NANOGUI_HAS_UNIFORM_BLOCKS)
+    if (m_dirty_start >= m_dirty_end)
+        return;
+
+    CHK(glBindBuffer(GL_UNIFORM_BUFFER, m_buffer_handle));
+    CHK(glBufferSubData(GL_UNIFORM_BUFFER, (GLintptr) m_dirty_start,
+                        (GLsizeiptr) (m_dirty_end - m_dirty_start),
+                        m_data.data() + m_dirty_start));
+    CHK(glBindBuffer(GL_UNIFORM_BUFFER, 0));
+    m_dirty_start = m_dirty_end = 0;
+#endif
+}
+
+Buffer::Buffer(Type type) : m_type(type) {
+    CHK(glGenBuffers(1, &m_buffer_handle));
+}
+
+Buffer::~Buffer() {
+    CHK(glDeleteBuffers(1, &m_buffer_handle));
+}
+
+void Buffer::upload(VariableType dtype, size_t ndim, const size_t *shape,
+                    const void *data) {
+    if (m_type == Type::Index) {
+        if (ndim != 1)
+            throw std::runtime_error("Buffer::upload(): index buffers must be one-dimensional!");
+        else if (!(dtype == VariableType::UInt32 || dtype == VariableType::UInt16 ||
+                   dtype == VariableType::UInt8))
+            throw std::runtime_error(
+                "Buffer::upload(): index buffers must have dtype uint32, uint16, "
+                "or uint8 (got " + std::string(type_name(dtype)) + ")!");
+    } else if (ndim != 2) {
+        throw std::runtime_error("Buffer::upload(): vertex buffers must be two-dimensional!");
+    }
+
+    size_t size = type_size(dtype);
+    for (size_t i = 0; i < 3; ++i) {
+        m_shape[i] = i < ndim ? shape[i] : 1;
+        size *= m_shape[i];
+    }
+
+    /* Bind the buffer to a target that is not part of the vertex array state.
+       WebGL furthermore forbids binding index buffers to GL_ARRAY_BUFFER. */
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    GLenum target = m_type == Type::Index ? GL_ELEMENT_ARRAY_BUFFER : GL_ARRAY_BUFFER;
+#else
+    GLenum target = GL_COPY_WRITE_BUFFER;
+#endif
+    CHK(glBindBuffer(target, m_buffer_handle));
+    if (size < m_capacity) {
+        // Orphan the storage before replacing its contents (see Shader::upload_buffer())
+        CHK(glBufferData(target, m_capacity, nullptr, GL_DYNAMIC_DRAW));
+        CHK(glBufferSubData(target, 0, size, data));
+    } else if (size == m_capacity) {
+        CHK(glBufferData(target, size, data, GL_DYNAMIC_DRAW));
+    } else {
+        CHK(glBufferData(target, size, data, GL_DYNAMIC_DRAW));
+        m_capacity = size;
+    }
+    CHK(glBindBuffer(target, 0));
+
+    m_dtype = dtype;
+    m_ndim = ndim;
+    m_size = size;
+    m_revision++;
 }
 
 NAMESPACE_END(nanogui)
@@ -58,7 +58,8 @@ Shader::Shader(RenderPass *render_pass,
                const std::string &name,
                const std::string &vertex_shader,
                const std::string &fragment_shader,
-               BlendMode blend_mode)
+               BlendMode blend_mode,
+               bool /* async_compile */)
     : m_render_pass(render_pass), m_name(name), m_blend_mode(blend_mode), m_pipeline_state(nullptr) {
     id<MTLDevice> device = (__bridge id<MTLDevice>) metal_device();
     id<MTLFunction> vertex_func   = compile_metal_shader(device, name, "vertex", vertex_shader),
@@ -138,17 +139,13 @@ Shader::Shader(RenderPass *render_pass,
 
     m_pipeline_state = (__bridge_retained void *) pipeline_state;
 
+    m_indices = register_argument("indices");
+    m_buffers[m_indices].index = -1;
+    m_buffers[m_indices].type = IndexBuffer;
+
     for (MTLArgument *arg in [reflection vertexArguments]) {
         std::string name = [arg.name UTF8String];
-        if (m_buffers.find(name) != m_buffers.end())
-            throw std::runtime_error(
-                "Shader::Shader(): \"" + name +
-                "\": duplicate argument name in shader code!");
-        else if (name == "indices")
-            throw std::runtime_error(
-                "Shader::Shader(): argument name 'indices' is reserved!");
-
-        Buffer &buf = m_buffers[name];
+        Buffer &buf = m_buffers[register_argument(name)];
         buf.index = arg.index;
         if (arg.type == MTLArgumentTypeBuffer)
             buf.type = VertexBuffer;
@@ -163,15 +160,7 @@ Shader::Shader(RenderPass *render_pass,
 
     for (MTLArgument *arg in [reflection fragmentArguments]) {
         std::string name = [arg.name UTF8String];
-        if (m_buffers.find(name) != m_buffers.end())
-            throw std::runtime_error(
-                "Shader::Shader(): \"" + name +
-                "\": duplicate argument name in shader code!");
-        else if (name == "indices")
-            throw std::runtime_error(
-                "Shader::Shader(): argument name 'indices' is reserved!");
-
-        Buffer &buf = m_buffers[name];
+        Buffer &buf = m_buffers[register_argument(name)];
         buf.index = arg.index;
         if (arg.type == MTLArgumentTypeBuffer)
             buf.type = FragmentBuffer;
@@ -183,14 +172,15 @@ Shader::Shader(RenderPass *render_pass,
             throw std::runtime_error("Shader::Shader(): \"" + name +
                                      "\": unsupported argument type!");
     }
+}
 
-    Buffer &buf = m_buffers["indices"];
-    buf.index = -1;
-    buf.type = IndexBuffer;
+bool Shader::ready() {
+    // Pipeline states are created synchronously
+    return true;
 }
 
 Shader::~Shader() {
-    for (const auto &[key, buf] : m_buffers) {
+    for (const Buffer &buf : m_buffers) {
         if (!buf.buffer)
             continue;
         if (buf.type == VertexBuffer ||
@@ -213,21 +203,37 @@ Shader::~Shader() {
     (void) (__bridge_transfer id<MTLRenderPipelineState>) m_pipeline_state;
 }
 
-void Shader::set_buffer(const std::string &name,
+void Shader::set_buffer(size_t handle,
                         VariableType dtype,
                         size_t ndim,
                         const size_t *shape,
-                        const void *data) {
-    auto it = m_buffers.find(name);
-    if (it == m_buffers.end())
-        throw std::runtime_error(
-            "Shader::set_buffer(): could not find argument named \"" + name + "\"");
-    Buffer &buf = m_buffers[name];
+                        const void *data,
+                        bool per_instance,
+                        bool normalized) {
+    Buffer &buf = argument(handle, "Shader::set_buffer()");
+    const std::string &name = buf.name;
     if (!(buf.type == VertexBuffer ||
           buf.type == FragmentBuffer ||
           buf.type == IndexBuffer))
         throw std::runtime_error(
             "Shader::set_buffer(): argument named \"" + name + "\" is not a buffer!");
+    else if (per_instance && buf.type != VertexBuffer)
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + name +
+            "\" is not a vertex buffer and cannot be per-instance!");
+    else if (buf.type == IndexBuffer && !(dtype == VariableType::UInt32 ||
+                                          dtype == VariableType::UInt16))
+        throw std::runtime_error(
+            "Shader::set_buffer(): the index buffer must have dtype uint32 or "
+            "uint16 (got " + std::string(type_name(dtype)) + ")!");
+    else if (normalized)
+        throw std::runtime_error(
+            "Shader::set_buffer(): argument named \"" + name +
+            "\": normalized vertex data is not supported by the Metal backend!");
+
+    /* Metal vertex functions index buffers explicitly (using [[vertex_id]] or
+       [[instance_id]]), so 'per_instance' only records the intended usage. */
+    buf.per_instance = per_instance;
 
     for (size_t i = 0; i < 3; ++i)
         buf.shape[i] = i < ndim ? shape[i] : 1;
@@ -241,10 +247,24 @@ void Shader::set_buffer(const std::string &name,
         buf.buffer = nullptr;
     }
 
-    if (size <= NANOGUI_BUFFER_THRESHOLD && name != "indices") {
+    if (size <= NANOGUI_BUFFER_THRESHOLD && buf.type != IndexBuffer) {
         if (!buf.buffer)
             buf.buffer = new uint8_t[size];
         memcpy(buf.buffer, data, size);
+    } else if (buf.streaming) {
+        /* Streaming buffers: write into a fresh shared buffer. This avoids
+           stalling on a blit, and command buffers in flight retain the
+           previous one. */
+        if (buf.buffer) {
+            (void) (__bridge_transfer id<MTLBuffer>) buf.buffer;
+            buf.buffer = nullptr;
+        }
+        id<MTLDevice> device = (__bridge id<MTLDevice>) metal_device();
+        id<MTLBuffer> mtl_buffer =
+            [device newBufferWithBytes: data
+                                length: size
+                               options: MTLResourceStorageModeShared];
+        buf.buffer = (__bridge_retained void *) mtl_buffer;
     } else {
         /* Procedure recommended by Apple: create a temporary shared buffer and
            blit into a private GPU-only buffer */
@@ -282,17 +302,158 @@ void Shader::set_buffer(const std::string &name,
         buf.buffer = (__bridge_retained void *) mtl_buffer;
     }
 
-    buf.dtype = dtype;
-    buf.ndim  = ndim;
-    buf.size  = size;
+    buf.dtype    = dtype;
+    buf.ndim     = ndim;
+    buf.size     = size;
+    buf.capacity = size;
 }
 
-void Shader::set_texture(const std::string &name, Texture *texture) {
-    auto it = m_buffers.find(name);
-    if (it == m_buffers.end())
+/// Blit 'size' bytes between two Metal buffers and wait for completion
+static void metal_buffer_copy(id<MTLBuffer> src, size_t src_offset,
+                              id<MTLBuffer> dst, size_t dst_offset,
+                              size_t size) {
+    id<MTLCommandQueue> command_queue =
+        (__bridge id<MTLCommandQueue>) metal_command_queue();
+    id<MTLCommandBuffer> command_buffer = [command_queue commandBuffer];
+    id<MTLBlitCommandEncoder> blit_encoder =
+        [command_buffer blitCommandEncoder];
+
+    [blit_encoder copyFromBuffer: src
+                    sourceOffset: src_offset
+                        toBuffer: dst
+               destinationOffset: dst_offset
+                            size: size];
+
+    [blit_encoder endEncoding];
+    [command_buffer commit];
+    [command_buffer waitUntilCompleted];
+}
+
+void Shader::update_buffer_region(size_t handle,
+                                  VariableType dtype,
+                                  size_t offset,
+                                  size_t ndim,
+                                  const size_t *shape,
+                                  const void *data) {
+    Buffer &buf = argument(handle, "Shader::update_buffer_region()");
+    const std::string &name = buf.name;
+    if (!(buf.type == VertexBuffer ||
+          buf.type == FragmentBuffer ||
+          buf.type == IndexBuffer))
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name + "\" is not a buffer!");
+    else if (!buf.buffer)
         throw std::runtime_error(
-            "Shader::set_texture(): could not find argument named \"" + name + "\"");
-    Buffer &buf = m_buffers[name];
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" must first be initialized using set_buffer()!");
+    else if (buf.streaming)
+        throw std::runtime_error(
+            "Shader::update_buffer_region(): argument named \"" + name +
+            "\" is a streaming buffer!");
+
+    bool mismatch = ndim != buf.ndim || dtype != buf.dtype;
+    for (size_t i = 1; i < ndim; ++i)
+        mismatch |= shape[i] != buf.shape[i];
+    if (mismatch || ndim == 0)
+        throw std::runtime_error("Shader::update_buffer_region(\"" + name +
+                                 "\"): shape/dtype mismatch!");
+    if (offset > buf.shape[0])
+        throw std::runtime_error("Shader::update_buffer_region(\"" + name +
+                                 "\"): offset exceeds the buffer size!");
+
+    size_t row_size = type_size(dtype) * buf.shape[1] * buf.shape[2],
+           start    = offset * row_size,
+           size     = shape[0] * row_size,
+           end      = start + size;
+
+    id<MTLDevice> device = (__bridge id<MTLDevice>) metal_device();
+    bool host_memory = buf.size <= NANOGUI_BUFFER_THRESHOLD && buf.type != IndexBuffer;
+
+    if (host_memory && end <= NANOGUI_BUFFER_THRESHOLD) {
+        if (end > buf.capacity) {
+            uint8_t *buffer = new uint8_t[end];
+            memcpy(buffer, buf.buffer, start);
+            delete[] (uint8_t *) buf.buffer;
+            buf.buffer = buffer;
+            buf.capacity = end;
+        }
+        memcpy((uint8_t *) buf.buffer + start, data, size);
+    } else {
+        id<MTLBuffer> mtl_buffer;
+
+        if (host_memory) {
+            /* The buffer outgrew the inline storage, move it to the GPU */
+            buf.capacity = std::max(end, (size_t) 2 * NANOGUI_BUFFER_THRESHOLD);
+            mtl_buffer = [device newBufferWithLength: buf.capacity
+                                             options: MTLResourceStorageModePrivate];
+            if (start > 0) {
+                id<MTLBuffer> temp_buffer =
+                    [device newBufferWithBytes: buf.buffer
+                                        length: start
+                                       options: MTLResourceStorageModeShared];
+                metal_buffer_copy(temp_buffer, 0, mtl_buffer, 0, start);
+            }
+            delete[] (uint8_t *) buf.buffer;
+        } else {
+            mtl_buffer = (__bridge_transfer id<MTLBuffer>) buf.buffer;
+
+            if (end > buf.capacity) {
+                buf.capacity = std::max(end, buf.capacity + buf.capacity / 2);
+                id<MTLBuffer> new_buffer =
+                    [device newBufferWithLength: buf.capacity
+                                        options: MTLResourceStorageModePrivate];
+                if (start > 0)
+                    metal_buffer_copy(mtl_buffer, 0, new_buffer, 0, start);
+                mtl_buffer = new_buffer;
+            }
+        }
+
+        if (size > 0) {
+            id<MTLBuffer> temp_buffer =
+                [device newBufferWithBytes: data
+                                    length: size
+                                   options: MTLResourceStorageModeShared];
+            metal_buffer_copy(temp_buffer, 0, mtl_buffer, start, size);
+        }
+
+        buf.buffer = (__bridge_retained void *) mtl_buffer;
+    }
+
+    if (end > buf.size) {
+        buf.size = end;
+        buf.shape[0] = offset + shape[0];
+    }
+}
+
+void Shader::set_buffer_streaming(const std::string &name, bool streaming) {
+    Buffer &buf = m_buffers[find_argument(name, "Shader::set_buffer_streaming()")];
+    if (!(buf.type == VertexBuffer ||
+          buf.type == FragmentBuffer ||
+          buf.type == IndexBuffer))
+        throw std::runtime_error(
+            "Shader::set_buffer_streaming(): argument named \"" + name + "\" is not a buffer!");
+
+    buf.streaming = streaming;
+}
+
+void Shader::set_buffer(size_t handle, nanogui::Buffer *, bool, bool) {
+    Buffer &buf = argument(handle, "Shader::set_buffer()");
+    throw std::runtime_error(
+        "Shader::set_buffer(\"" + buf.name +
+        "\"): shared buffers are not supported by the Metal backend!");
+}
+
+void Shader::set_buffer_interleaved(const std::vector<VertexAttribute> &,
+                                    size_t, size_t, const void *, bool) {
+    /* Metal vertex functions fetch their inputs from buffers explicitly, so
+       the layout of a vertex is determined by the shader code */
+    throw std::runtime_error(
+        "Shader::set_buffer_interleaved(): not supported by the Metal backend!");
+}
+
+void Shader::set_texture(size_t handle, Texture *texture) {
+    Buffer &buf = argument(handle, "Shader::set_texture()");
+    const std::string &name = buf.name;
     if (!(buf.type == VertexTexture || buf.type == FragmentTexture))
         throw std::runtime_error(
             "Shader::set_texture(): argument named \"" + name + "\" is not a texture!");
@@ -311,9 +472,10 @@ void Shader::set_texture(const std::string &name, Texture *texture) {
     else
         sampler_name = name + "_sampler";
 
-    if (m_buffers.find(sampler_name) != m_buffers.end()) {
+    auto it = m_argument_handles.find(sampler_name);
+    if (it != m_argument_handles.end()) {
         /* Also set the sampler state */
-        Buffer &buf2 = m_buffers[sampler_name];
+        Buffer &buf2 = m_buffers[it->second];
 
         if (buf2.buffer) {
             (void) (__bridge_transfer id<MTLTexture>) buf2.buffer;
@@ -326,6 +488,13 @@ void Shader::set_texture(const std::string &name, Texture *texture) {
     }
 }
 
+void Shader::set_uniform_block(size_t handle, UniformBlock *) {
+    Buffer &buf = argument(handle, "Shader::set_uniform_block()");
+    throw std::runtime_error(
+        "Shader::set_uniform_block(\"" + buf.name +
+        "\"): uniform blocks are not supported by the Metal backend!");
+}
+
 void Shader::begin() {
     id<MTLRenderPipelineState> pipeline_state =
         (__bridge id<MTLRenderPipelineState>) m_pipeline_state;
@@ -334,14 +503,16 @@ void Shader::begin() {
 
     [command_enc setRenderPipelineState: pipeline_state];
 
-    for (const auto &[key, buf] : m_buffers) {
+    /* The command encoder is new in every render pass, so all arguments
+       must be bound again */
+    for (const Buffer &buf : m_buffers) {
         bool indices = buf.type == IndexBuffer;
         if (!buf.buffer) {
             if (!indices)
                 fprintf(stderr,
                         "Shader::begin(): shader \"%s\" has an unbound "
                         "argument \"%s\"!\n",
-                        m_name.c_str(), key.c_str());
+                        m_name.c_str(), buf.name.c_str());
             continue;
         }
 
@@ -402,18 +573,29 @@ void Shader::end() {
     /* No-op */
 }
 
+static MTLPrimitiveType metal_primitive_type(Shader::PrimitiveType primitive_type,
+                                             const char *caller) {
+    switch (primitive_type) {
+        case Shader::PrimitiveType::Point:         return MTLPrimitiveTypePoint;
+        case Shader::PrimitiveType::Line:          return MTLPrimitiveTypeLine;
+        case Shader::PrimitiveType::LineStrip:     return MTLPrimitiveTypeLineStrip;
+        case Shader::PrimitiveType::Triangle:      return MTLPrimitiveTypeTriangle;
+        case Shader::PrimitiveType::TriangleStrip: return MTLPrimitiveTypeTriangleStrip;
+        default: throw std::runtime_error(std::string(caller) +
+                                          ": invalid primitive type!");
+    }
+}
+
+/// Return the Metal type of an index buffer with the given dtype
+static MTLIndexType metal_index_type(VariableType dtype) {
+    return dtype == VariableType::UInt16 ? MTLIndexTypeUInt16 : MTLIndexTypeUInt32;
+}
+
 void Shader::draw_array(PrimitiveType primitive_type,
                         size_t offset, size_t count,
                         bool indexed) {
-    MTLPrimitiveType primitive_type_mtl;
-    switch (primitive_type) {
-        case PrimitiveType::Point:         primitive_type_mtl = MTLPrimitiveTypePoint;         break;
-        case PrimitiveType::Line:          primitive_type_mtl = MTLPrimitiveTypeLine;          break;
-        case PrimitiveType::LineStrip:     primitive_type_mtl = MTLPrimitiveTypeLineStrip;     break;
-        case PrimitiveType::Triangle:      primitive_type_mtl = MTLPrimitiveTypeTriangle;      break;
-        case PrimitiveType::TriangleStrip: primitive_type_mtl = MTLPrimitiveTypeTriangleStrip; break;
-        default: throw std::runtime_error("Shader::draw_array(): invalid primitive type!");
-    }
+    MTLPrimitiveType primitive_type_mtl =
+        metal_primitive_type(primitive_type, "Shader::draw_array()");
 
     id<MTLRenderCommandEncoder> command_enc =
         (__bridge id<MTLRenderCommandEncoder>) m_render_pass->command_encoder();
@@ -423,14 +605,89 @@ void Shader::draw_array(PrimitiveType primitive_type,
                         vertexStart: offset
                         vertexCount: count];
     } else {
-        id<MTLBuffer> index_buffer =
-            (__bridge id<MTLBuffer>) m_buffers["indices"].buffer;
+        const Buffer &indices = m_buffers[m_indices];
+        id<MTLBuffer> index_buffer = (__bridge id<MTLBuffer>) indices.buffer;
         [command_enc drawIndexedPrimitives: primitive_type_mtl
                                 indexCount: count
-                                 indexType: MTLIndexTypeUInt32
+                                 indexType: metal_index_type(indices.dtype)
                                indexBuffer: index_buffer
-                         indexBufferOffset: offset * 4];
+                         indexBufferOffset: offset * type_size(indices.dtype)];
     }
 }
 
+void Shader::draw_array_instanced(PrimitiveType primitive_type,
+                                  size_t offset, size_t count,
+                                  size_t instance_count,
+                                  bool indexed) {
+    MTLPrimitiveType primitive_type_mtl =
+        metal_primitive_type(primitive_type, "Shader::draw_array_instanced()");
+
+    id<MTLRenderCommandEncoder> command_enc =
+        (__bridge id<MTLRenderCommandEncoder>) m_render_pass->command_encoder();
+
+    if (!indexed) {
+        [command_enc drawPrimitives: primitive_type_mtl
+                        vertexStart: offset
+                        vertexCount: count
+                      instanceCount: instance_count];
+    } else {
+        const Buffer &indices = m_buffers[m_indices];
+        id<MTLBuffer> index_buffer = (__bridge id<MTLBuffer>) indices.buffer;
+        [command_enc drawIndexedPrimitives: primitive_type_mtl
+                                indexCount: count
+                                 indexType: metal_index_type(indices.dtype)
+                               indexBuffer: index_buffer
+                         indexBufferOffset: offset * type_size(indices.dtype)
+                             instanceCount: instance_count];
+    }
+}
+
+void Shader::draw_multi(PrimitiveType primitive_type, size_t draw_count,
+                        const int32_t *offsets, const int32_t *counts,
+                        bool indexed) {
+    MTLPrimitiveType primitive_type_mtl =
+        metal_primitive_type(primitive_type, "Shader::draw_multi()");
+
+    id<MTLRenderCommandEncoder> command_enc =
+        (__bridge id<MTLRenderCommandEncoder>) m_render_pass->command_encoder();
+    const Buffer &indices = m_buffers[m_indices];
+    id<MTLBuffer> index_buffer = (__bridge id<MTLBuffer>) indices.buffer;
+    MTLIndexType index_type = metal_index_type(indices.dtype);
+    size_t index_size = type_size(indices.dtype);
+
+    /* Metal has no direct multi-draw equivalent, but encoding draw commands
+       is cheap */
+    for (size_t i = 0; i < draw_count; ++i) {
+        if (!indexed) {
+            [command_enc drawPrimitives: primitive_type_mtl
+                            vertexStart: (NSUInteger) offsets[i]
+                            vertexCount: (NSUInteger) counts[i]];
+        } else {
+            [command_enc drawIndexedPrimitives: primitive_type_mtl
+                                    indexCount: (NSUInteger) counts[i]
+                                     indexType: index_type
+                                   indexBuffer: index_buffer
+                             indexBufferOffset: (NSUInteger) offsets[i] * index_size];
+        }
+    }
+}
+
+UniformBlock::UniformBlock(const Shader *, const std::string &name)
+    : m_name(name) {
+    throw std::runtime_error(
+        "UniformBlock::UniformBlock(): not supported by the Metal backend!");
+}
+
+UniformBlock::~UniformBlock() { }
+
+void UniformBlock::upload() { }
+
+Buffer::Buffer(Type type) : m_type(type) {
+    throw std::runtime_error("Buffer::Buffer(): not supported by the Metal backend!");
+}
+
+Buffer::~Buffer() { }
+
+void Buffer::upload(VariableType, size_t, const size_t *, const void *) { }
+
 NAMESPACE_END(nanogui)
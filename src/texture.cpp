@@ -1,9 +1,37 @@
 #include <nanogui/texture.h>
 #include <stb_image.h>
+#include <algorithm>
+#include <cstring>
 #include <memory>
+#include <tuple>
+
+#if defined(_WIN32)
+#  ifndef NOMINMAX
+#  define NOMINMAX 1
+#  endif
+#  include <windows.h>
+#else
+#  include <fcntl.h>
+#  include <sys/mman.h>
+#  include <sys/stat.h>
+#  include <unistd.h>
+#endif
 
 NAMESPACE_BEGIN(nanogui)
 
+extern void __nanogui_run_worker(std::function<void()> &&func);
+
+static Texture::PixelFormat pixel_format_from_channels(int n, const char *caller) {
+    switch (n) {
+        case 1: return Texture::PixelFormat::R;
+        case 2: return Texture::PixelFormat::RA;
+        case 3: return Texture::PixelFormat::RGB;
+        case 4: return Texture::PixelFormat::RGBA;
+        default:
+            throw std::runtime_error(std::string(caller) + ": unsupported channel count!");
+    }
+}
+
 Texture::Texture(PixelFormat pixel_format,
                  ComponentFormat component_format,
                  const Vector2i &size,
@@ -44,14 +72,7 @@ Texture::Texture(const std::string &filename,
     if (!texture_data)
         throw std::runtime_error("Could not load texture data from file \"" + filename + "\".");
 
-    switch (n) {
-        case 1: m_pixel_format = PixelFormat::R;    break;
-        case 2: m_pixel_format = PixelFormat::RA;   break;
-        case 3: m_pixel_format = PixelFormat::RGB;  break;
-        case 4: m_pixel_format = PixelFormat::RGBA; break;
-        default:
-            throw std::runtime_error("Texture::Texture(): unsupported channel count!");
-    }
+    m_pixel_format = pixel_format_from_channels(n, "Texture::Texture()");
     PixelFormat pixel_format = m_pixel_format;
     init();
     if (m_pixel_format != pixel_format)
@@ -59,7 +80,563 @@ Texture::Texture(const std::string &filename,
     upload((const uint8_t *) texture_data.get());
 }
 
+std::vector<std::future<ref<Texture>>>
+Texture::load_async(const std::vector<std::string> &filenames,
+                    const std::function<void(size_t, Texture *)> &callback,
+                    InterpolationMode min_interpolation_mode,
+                    InterpolationMode mag_interpolation_mode,
+                    WrapMode wrap_mode) {
+    std::vector<std::future<ref<Texture>>> result;
+    result.reserve(filenames.size());
+
+    for (size_t i = 0; i < filenames.size(); ++i) {
+        auto promise = std::make_shared<std::promise<ref<Texture>>>();
+        result.push_back(promise->get_future());
+
+        __nanogui_run_worker([=, filename = filenames[i]]() {
+            // Decode on the worker thread ..
+            int n = 0;
+            Vector2i size;
+            std::shared_ptr<uint8_t> data(
+                stbi_load(filename.c_str(), &size.x(), &size.y(), &n, 0),
+                stbi_image_free);
+
+            // .. and create the texture on the main thread
+            async([=]() {
+                ref<Texture> texture;
+                try {
+                    if (!data)
+                        throw std::runtime_error(
+                            "Could not load texture data from file \"" +
+                            filename + "\".");
+                    PixelFormat pixel_format = pixel_format_from_channels(n, "Texture::Texture()");
+                    texture = new Texture(pixel_format, ComponentFormat::UInt8, size,
+                                          min_interpolation_mode, mag_interpolation_mode,
+                                          wrap_mode, 1, TextureFlags::ShaderRead);
+                    if (texture->pixel_format() != pixel_format)
+                        throw std::runtime_error("Texture::Texture(): pixel format "
+                                                 "not supported by the hardware!");
+                    texture->upload(data.get());
+                    promise->set_value(texture);
+                } catch (...) {
+                    texture = nullptr;
+                    promise->set_exception(std::current_exception());
+                }
+                if (callback)
+                    callback(i, texture.get());
+            });
+        });
+    }
+
+    return result;
+}
+
+/// Read-only memory mapping of a file
+class MappedFile {
+public:
+    MappedFile(const std::string &filename) {
+#if defined(_WIN32)
+        m_file = CreateFileA(filename.c_str(), GENERIC_READ, FILE_SHARE_READ, nullptr,
+                             OPEN_EXISTING, FILE_FLAG_SEQUENTIAL_SCAN, nullptr);
+        LARGE_INTEGER size;
+        if (m_file == INVALID_HANDLE_VALUE || !GetFileSizeEx(m_file, &size))
+            throw std::runtime_error("Could not open file \"" + filename + "\".");
+        m_size = (size_t) size.QuadPart;
+        if (m_size > 0) {
+            m_mapping = CreateFileMappingA(m_file, nullptr, PAGE_READONLY, 0, 0, nullptr);
+            if (m_mapping)
+                m_data = (const uint8_t *) MapViewOfFile(m_mapping, FILE_MAP_READ, 0, 0, 0);
+        }
+#else
+        m_fd = open(filename.c_str(), O_RDONLY);
+        struct stat st;
+        if (m_fd == -1 || fstat(m_fd, &st) != 0)
+            throw std::runtime_error("Could not open file \"" + filename + "\".");
+        m_size = (size_t) st.st_size;
+        if (m_size > 0) {
+            void *ptr = mmap(nullptr, m_size, PROT_READ, MAP_PRIVATE, m_fd, 0);
+            if (ptr != MAP_FAILED) {
+                m_data = (const uint8_t *) ptr;
+                madvise(ptr, m_size, MADV_SEQUENTIAL);
+            }
+        }
+#endif
+        if (!m_data)
+            throw std::runtime_error("Could not map file \"" + filename + "\" into memory.");
+    }
+
+    ~MappedFile() {
+#if defined(_WIN32)
+        if (m_data)
+            UnmapViewOfFile(m_data);
+        if (m_mapping)
+            CloseHandle(m_mapping);
+        if (m_file != INVALID_HANDLE_VALUE)
+            CloseHandle(m_file);
+#else
+        if (m_data)
+            munmap((void *) m_data, m_size);
+        if (m_fd != -1)
+            close(m_fd);
+#endif
+    }
+
+    /// Allow the OS to evict the pages of a region that is no longer needed
+    void release(size_t offset, size_t size) {
+#if !defined(_WIN32)
+        size_t page = (size_t) sysconf(_SC_PAGESIZE),
+               start = (offset + page - 1) / page * page,
+               end = (offset + size) / page * page;
+        if (end > start)
+            madvise((void *) (m_data + start), end - start, MADV_DONTNEED);
+#else
+        (void) offset; (void) size;
+#endif
+    }
+
+    const uint8_t *data() const { return m_data; }
+    size_t size() const { return m_size; }
+
+private:
+#if defined(_WIN32)
+    HANDLE m_file = INVALID_HANDLE_VALUE;
+    HANDLE m_mapping = nullptr;
+#else
+    int m_fd = -1;
+#endif
+    const uint8_t *m_data = nullptr;
+    size_t m_size = 0;
+};
+
+/// Pixel layout described by the header of a mapped file
+struct MappedLayout {
+    Texture::PixelFormat pixel_format;
+    Texture::ComponentFormat component_format;
+    Vector2i size { 0 };
+    size_t offset = 0;
+
+    /// Number of mip levels stored in the file
+    uint32_t levels = 1;
+
+    /// KTX files precede each mip level by its size and pad it to 4 bytes
+    bool ktx = false;
+};
+
+template <typename T> static T read_le(const uint8_t *ptr) {
+    T value = 0;
+    for (size_t i = 0; i < sizeof(T); ++i)
+        value |= (T) ptr[i] << (8 * i);
+    return value;
+}
+
+/// Parse the header of a NumPy array file (format version 1.0-3.0)
+static MappedLayout parse_npy(const MappedFile &file) {
+    const char *caller = "Texture::from_file_mapped()";
+    const uint8_t *data = file.data();
+    uint8_t version = file.size() >= 10 ? data[6] : 0;
+    size_t header_offset = version == 1 ? 10 : 12;
+    if ((version < 1 || version > 3) || file.size() < header_offset)
+        throw std::runtime_error(std::string(caller) + ": unsupported NumPy file version!");
+    size_t header_size = version == 1 ? read_le<uint16_t>(data + 8)
+                                      : read_le<uint32_t>(data + 8);
+    if (file.size() < header_offset + header_size)
+        throw std::runtime_error(std::string(caller) + ": truncated NumPy header!");
+
+    std::string header((const char *) data + header_offset, header_size);
+    auto value = [&](const char *key) -> std::string {
+        size_t pos = header.find(std::string("'") + key + "'");
+        pos = pos == std::string::npos ? pos : header.find(':', pos);
+        if (pos == std::string::npos)
+            throw std::runtime_error(std::string(caller) + ": NumPy header lacks \"" +
+                                     key + "\" entry!");
+        pos = header.find_first_not_of(' ', pos + 1);
+        return pos == std::string::npos ? std::string() : header.substr(pos);
+    };
+
+    // Data type, e.g. '<f4'
+    std::string descr = value("descr");
+    size_t quote = descr.find_first_of("'\"");
+    descr = quote == std::string::npos ? "" : descr.substr(quote + 1, 3);
+    if (descr.size() != 3 || (descr[0] == '>' && descr[2] != '1'))
+        throw std::runtime_error(std::string(caller) + ": unsupported NumPy dtype!");
+
+    MappedLayout layout;
+    switch (descr[1] << 8 | descr[2]) {
+        case 'u' << 8 | '1': layout.component_format = Texture::ComponentFormat::UInt8;   break;
+        case 'i' << 8 | '1': layout.component_format = Texture::ComponentFormat::Int8;    break;
+        case 'u' << 8 | '2': layout.component_format = Texture::ComponentFormat::UInt16;  break;
+        case 'i' << 8 | '2': layout.component_format = Texture::ComponentFormat::Int16;   break;
+        case 'f' << 8 | '2': layout.component_format = Texture::ComponentFormat::Float16; break;
+        case 'f' << 8 | '4': layout.component_format = Texture::ComponentFormat::Float32; break;
+        default:
+            throw std::runtime_error(std::string(caller) + ": unsupported NumPy dtype \"" +
+                                     descr + "\"!");
+    }
+
+    if (value("fortran_order").compare(0, 4, "True") == 0)
+        throw std::runtime_error(std::string(caller) + ": NumPy arrays must be stored in C order!");
+
+    // Shape, e.g. (512, 1024, 4)
+    std::string shape = value("shape");
+    shape = shape.substr(0, shape.find(')'));
+    std::vector<long long> dims;
+    for (const char *ptr = shape.c_str(); *ptr; ) {
+        if (*ptr >= '0' && *ptr <= '9') {
+            char *end;
+            dims.push_back(strtoll(ptr, &end, 10));
+            ptr = end;
+        } else {
+            ptr++;
+        }
+    }
+    if (dims.size() == 2)
+        dims.push_back(1);
+    if (dims.size() != 3)
+        throw std::runtime_error(std::string(caller) + ": NumPy arrays must be 2 or 3-dimensional!");
+
+    layout.pixel_format = pixel_format_from_channels((int) dims[2], caller);
+    layout.size = Vector2i((int) dims[1], (int) dims[0]);
+    layout.offset = header_offset + header_size;
+    return layout;
+}
+
+/// Parse the header of an uncompressed DirectDraw surface
+static MappedLayout parse_dds(const MappedFile &file) {
+    using PixelFormat = Texture::PixelFormat;
+    using ComponentFormat = Texture::ComponentFormat;
+    const char *caller = "Texture::from_file_mapped()";
+    const uint8_t *data = file.data();
+    if (file.size() < 128 || read_le<uint32_t>(data + 4) != 124)
+        throw std::runtime_error(std::string(caller) + ": invalid DDS header!");
+
+    uint32_t header_flags = read_le<uint32_t>(data + 8),
+             height = read_le<uint32_t>(data + 12),
+             width  = read_le<uint32_t>(data + 16),
+             depth  = read_le<uint32_t>(data + 24),
+             levels = read_le<uint32_t>(data + 28),
+             flags  = read_le<uint32_t>(data + 80),
+             fourcc = read_le<uint32_t>(data + 84),
+             bits   = read_le<uint32_t>(data + 88),
+             rmask  = read_le<uint32_t>(data + 92),
+             bmask  = read_le<uint32_t>(data + 100),
+             amask  = read_le<uint32_t>(data + 104),
+             caps2  = read_le<uint32_t>(data + 112);
+
+    if ((caps2 & 0x200 /* DDSCAPS2_CUBEMAP */) || depth > 1)
+        throw std::runtime_error(std::string(caller) + ": DDS cube maps and volume "
+                                 "textures are not supported!");
+
+    MappedLayout layout;
+    layout.size = Vector2i((int) width, (int) height);
+    layout.offset = 128;
+    if ((header_flags & 0x20000 /* DDSD_MIPMAPCOUNT */) && levels > 1)
+        layout.levels = levels;
+    bool found = true;
+
+    if (flags & 0x4 /* DDPF_FOURCC */) {
+        uint32_t format = fourcc;
+        if (fourcc == 0x30315844 /* "DX10" */) {
+            if (file.size() < 148 || read_le<uint32_t>(data + 140) > 1 /* array size */)
+                throw std::runtime_error(std::string(caller) + ": DDS texture arrays are not supported!");
+            format = read_le<uint32_t>(data + 128) | 0x10000;
+            layout.offset = 148;
+        }
+        std::tie(layout.pixel_format, layout.component_format) = [&]() -> std::pair<PixelFormat, ComponentFormat> {
+            switch (format) {
+                // Legacy D3DFORMAT codes
+                case 116: return { PixelFormat::RGBA, ComponentFormat::Float32 };
+                case 113: return { PixelFormat::RGBA, ComponentFormat::Float16 };
+                case 115: return { PixelFormat::RA,   ComponentFormat::Float32 };
+                case 112: return { PixelFormat::RA,   ComponentFormat::Float16 };
+                case 114: return { PixelFormat::R,    ComponentFormat::Float32 };
+                case 111: return { PixelFormat::R,    ComponentFormat::Float16 };
+                case 36:  return { PixelFormat::RGBA, ComponentFormat::UInt16  };
+                case 0x31545844 /* DXT1 */: return { PixelFormat::RGBA, ComponentFormat::BC1 };
+                case 0x32545844 /* DXT2 */:
+                case 0x33545844 /* DXT3 */: return { PixelFormat::RGBA, ComponentFormat::BC2 };
+                case 0x34545844 /* DXT4 */:
+                case 0x35545844 /* DXT5 */: return { PixelFormat::RGBA, ComponentFormat::BC3 };
+                case 0x31495441 /* ATI1 */:
+                case 0x55344342 /* BC4U */: return { PixelFormat::R,    ComponentFormat::BC4 };
+                case 0x32495441 /* ATI2 */:
+                case 0x55354342 /* BC5U */: return { PixelFormat::RA,   ComponentFormat::BC5 };
+
+                // DXGI_FORMAT codes (DX10 header)
+                case 0x10000 | 2:  return { PixelFormat::RGBA, ComponentFormat::Float32 };
+                case 0x10000 | 6:  return { PixelFormat::RGB,  ComponentFormat::Float32 };
+                case 0x10000 | 10: return { PixelFormat::RGBA, ComponentFormat::Float16 };
+                case 0x10000 | 11: return { PixelFormat::RGBA, ComponentFormat::UInt16  };
+                case 0x10000 | 16: return { PixelFormat::RA,   ComponentFormat::Float32 };
+                case 0x10000 | 28: return { PixelFormat::RGBA, ComponentFormat::UInt8   };
+                case 0x10000 | 34: return { PixelFormat::RA,   ComponentFormat::Float16 };
+                case 0x10000 | 35: return { PixelFormat::RA,   ComponentFormat::UInt16  };
+                case 0x10000 | 41: return { PixelFormat::R,    ComponentFormat::Float32 };
+                case 0x10000 | 49: return { PixelFormat::RA,   ComponentFormat::UInt8   };
+                case 0x10000 | 54: return { PixelFormat::R,    ComponentFormat::Float16 };
+                case 0x10000 | 56: return { PixelFormat::R,    ComponentFormat::UInt16  };
+                case 0x10000 | 61: return { PixelFormat::R,    ComponentFormat::UInt8   };
+                case 0x10000 | 87: return { PixelFormat::BGRA, ComponentFormat::UInt8   };
+                case 0x10000 | 71: return { PixelFormat::RGBA, ComponentFormat::BC1     };
+                case 0x10000 | 74: return { PixelFormat::RGBA, ComponentFormat::BC2     };
+                case 0x10000 | 77: return { PixelFormat::RGBA, ComponentFormat::BC3     };
+                case 0x10000 | 80: return { PixelFormat::R,    ComponentFormat::BC4     };
+                case 0x10000 | 83: return { PixelFormat::RA,   ComponentFormat::BC5     };
+                case 0x10000 | 95: return { PixelFormat::RGB,  ComponentFormat::BC6H    };
+                case 0x10000 | 98: return { PixelFormat::RGBA, ComponentFormat::BC7     };
+                default: found = false; return { PixelFormat::R, ComponentFormat::UInt8 };
+            }
+        }();
+    } else {
+        // Uncompressed data described by bit masks
+        layout.component_format = ComponentFormat::UInt8;
+        if (bits == 32 && rmask == 0xff && bmask == 0xff0000 && amask == 0xff000000)
+            layout.pixel_format = PixelFormat::RGBA;
+        else if (bits == 32 && rmask == 0xff0000 && bmask == 0xff && amask == 0xff000000)
+            layout.pixel_format = PixelFormat::BGRA;
+        else if (bits == 24 && rmask == 0xff && bmask == 0xff0000)
+            layout.pixel_format = PixelFormat::RGB;
+        else if (bits == 24 && rmask == 0xff0000 && bmask == 0xff)
+            layout.pixel_format = PixelFormat::BGR;
+        else if (bits == 8 && rmask == 0xff)
+            layout.pixel_format = PixelFormat::R;
+        else
+            found = false;
+    }
+
+    if (!found)
+        throw std::runtime_error(std::string(caller) + ": unsupported DDS pixel format!");
+    return layout;
+}
+
+/// Parse the header of a KTX 1.1 file
+static MappedLayout parse_ktx(const MappedFile &file) {
+    using PixelFormat = Texture::PixelFormat;
+    using ComponentFormat = Texture::ComponentFormat;
+    const char *caller = "Texture::from_file_mapped()";
+    const uint8_t *data = file.data();
+    if (file.size() < 64 || read_le<uint32_t>(data + 12) != 0x04030201)
+        throw std::runtime_error(std::string(caller) + ": invalid or big endian KTX header!");
+
+    uint32_t type            = read_le<uint32_t>(data + 16),
+             format          = read_le<uint32_t>(data + 24),
+             internal_format = read_le<uint32_t>(data + 28),
+             width           = read_le<uint32_t>(data + 36),
+             height          = read_le<uint32_t>(data + 40),
+             depth           = read_le<uint32_t>(data + 44),
+             array_size      = read_le<uint32_t>(data + 48),
+             faces           = read_le<uint32_t>(data + 52),
+             levels          = read_le<uint32_t>(data + 56),
+             kv_size         = read_le<uint32_t>(data + 60);
+
+    if (depth > 0 || array_size > 0 || faces > 1 || height == 0)
+        throw std::runtime_error(std::string(caller) + ": KTX cube maps, arrays, and "
+                                 "1D/3D textures are not supported!");
+
+    MappedLayout layout;
+    layout.size = Vector2i((int) width, (int) height);
+    layout.offset = 64 + (size_t) kv_size;
+    layout.levels = std::max(levels, 1u);
+    layout.ktx = true;
+    bool found = true;
+
+    if (type == 0) {
+        // Compressed data, identified by the OpenGL internal format
+        std::tie(layout.pixel_format, layout.component_format) = [&]() -> std::pair<PixelFormat, ComponentFormat> {
+            switch (internal_format) {
+                case 0x83F0: return { PixelFormat::RGB,  ComponentFormat::BC1 };
+                case 0x83F1: return { PixelFormat::RGBA, ComponentFormat::BC1 };
+                case 0x83F2: return { PixelFormat::RGBA, ComponentFormat::BC2 };
+                case 0x83F3: return { PixelFormat::RGBA, ComponentFormat::BC3 };
+                case 0x8DBB: return { PixelFormat::R,    ComponentFormat::BC4 };
+                case 0x8DBD: return { PixelFormat::RA,   ComponentFormat::BC5 };
+                case 0x8E8F: return { PixelFormat::RGB,  ComponentFormat::BC6H };
+                case 0x8E8C: return { PixelFormat::RGBA, ComponentFormat::BC7 };
+                case 0x9270: return { PixelFormat::R,    ComponentFormat::ETC2 };
+                case 0x9272: return { PixelFormat::RA,   ComponentFormat::ETC2 };
+                case 0x9274: return { PixelFormat::RGB,  ComponentFormat::ETC2 };
+                case 0x9278: return { PixelFormat::RGBA, ComponentFormat::ETC2 };
+                case 0x93B0: return { PixelFormat::RGBA, ComponentFormat::ASTC4x4 };
+                case 0x93B7: return { PixelFormat::RGBA, ComponentFormat::ASTC8x8 };
+                default: found = false; return { PixelFormat::R, ComponentFormat::UInt8 };
+            }
+        }();
+    } else {
+        switch (format) {
+            case 0x1903 /* GL_RED */:  layout.pixel_format = PixelFormat::R;    break;
+            case 0x8227 /* GL_RG */:   layout.pixel_format = PixelFormat::RA;   break;
+            case 0x1907 /* GL_RGB */:  layout.pixel_format = PixelFormat::RGB;  break;
+            case 0x1908 /* GL_RGBA */: layout.pixel_format = PixelFormat::RGBA; break;
+            case 0x80E1 /* GL_BGRA */: layout.pixel_format = PixelFormat::BGRA; break;
+            default: found = false; break;
+        }
+        switch (type) {
+            case 0x1401 /* GL_UNSIGNED_BYTE */:  layout.component_format = ComponentFormat::UInt8;   break;
+            case 0x1400 /* GL_BYTE */:           layout.component_format = ComponentFormat::Int8;    break;
+            case 0x1403 /* GL_UNSIGNED_SHORT */: layout.component_format = ComponentFormat::UInt16;  break;
+            case 0x1402 /* GL_SHORT */:          layout.component_format = ComponentFormat::Int16;   break;
+            case 0x140B /* GL_HALF_FLOAT */:     layout.component_format = ComponentFormat::Float16; break;
+            case 0x1406 /* GL_FLOAT */:          layout.component_format = ComponentFormat::Float32; break;
+            default: found = false; break;
+        }
+    }
+
+    if (!found)
+        throw std::runtime_error(std::string(caller) + ": unsupported KTX pixel format!");
+    return layout;
+}
+
+ref<Texture> Texture::from_file_mapped(const std::string &filename,
+                                       PixelFormat pixel_format,
+                                       ComponentFormat component_format,
+                                       const Vector2i &size,
+                                       InterpolationMode min_interpolation_mode,
+                                       InterpolationMode mag_interpolation_mode,
+                                       WrapMode wrap_mode) {
+    // Number of bytes per call to upload_sub_region()
+    const size_t chunk_size = 16 * 1024 * 1024;
+
+    MappedFile file(filename);
+    const uint8_t *data = file.data();
+
+    MappedLayout layout;
+    layout.pixel_format = pixel_format;
+    layout.component_format = component_format;
+    layout.size = size;
+
+    bool has_header = true;
+    if (file.size() >= 6 && memcmp(data, "\x93NUMPY", 6) == 0)
+        layout = parse_npy(file);
+    else if (file.size() >= 4 && memcmp(data, "DDS ", 4) == 0)
+        layout = parse_dds(file);
+    else if (file.size() >= 12 && memcmp(data, "\xabKTX 11\xbb\r\n\x1a\n", 12) == 0)
+        layout = parse_ktx(file);
+    else
+        has_header = false;
+
+    if (has_header && size != Vector2i(0) &&
+        (layout.size != size || layout.pixel_format != pixel_format ||
+         layout.component_format != component_format))
+        throw std::runtime_error("Texture::from_file_mapped(): the contents of \"" +
+                                 filename + "\" do not match the requested format!");
+    else if (layout.size.x() <= 0 || layout.size.y() <= 0)
+        throw std::runtime_error("Texture::from_file_mapped(): the size of \"" + filename +
+                                 "\" must be specified!");
+
+    bool is_compressed = (uint8_t) layout.component_format >= (uint8_t) ComponentFormat::BC1,
+         trilinear = min_interpolation_mode == InterpolationMode::Trilinear ||
+                     mag_interpolation_mode == InterpolationMode::Trilinear;
+
+    // Use precomputed mip maps if the file provides a complete chain
+    uint32_t full_levels = 1;
+    for (int i = std::max(layout.size.x(), layout.size.y()); i > 1; i /= 2)
+        full_levels++;
+#if defined(NANOGUI_USE_METAL)
+    bool upload_levels = false;
+#else
+    bool upload_levels = trilinear && layout.levels >= full_levels;
+#endif
+    if (is_compressed && trilinear && !upload_levels)
+        throw std::runtime_error("Texture::from_file_mapped(): trilinear interpolation of "
+                                 "block-compressed textures requires a complete mip "
+                                 "chain in \"" + filename + "\"!");
+
+    // Mip maps are either uploaded or generated once at the end
+    ref<Texture> texture =
+        new Texture(layout.pixel_format, layout.component_format, layout.size,
+                    min_interpolation_mode, mag_interpolation_mode, wrap_mode, 1,
+                    TextureFlags::ShaderRead, true);
+
+    /* Backends without BGR(A) textures (OpenGL) substitute RGB(A), in which
+       case the red and blue channels are swapped while uploading */
+    bool swap_red_blue =
+        (layout.pixel_format == PixelFormat::BGR &&
+         texture->pixel_format() == PixelFormat::RGB) ||
+        (layout.pixel_format == PixelFormat::BGRA &&
+         texture->pixel_format() == PixelFormat::RGBA);
+
+    if ((texture->pixel_format() != layout.pixel_format && !swap_red_blue) ||
+        texture->component_format() != layout.component_format)
+        throw std::runtime_error("Texture::from_file_mapped(): pixel format not "
+                                 "supported by the hardware!");
+
+    std::unique_ptr<uint8_t[]> scratch;
+    size_t scratch_size = 0;
+    auto convert = [&](const uint8_t *ptr, const Vector2i &size) -> const uint8_t * {
+        if (!swap_red_blue)
+            return ptr;
+        size_t n = texture->data_size(size),
+               bpp = texture->bytes_per_pixel(),
+               component_size = bpp / texture->channels();
+        if (n > scratch_size) {
+            scratch.reset(new uint8_t[n]);
+            scratch_size = n;
+        }
+        memcpy(scratch.get(), ptr, n);
+        for (uint8_t *pixel = scratch.get(); pixel < scratch.get() + n; pixel += bpp)
+            std::swap_ranges(pixel, pixel + component_size, pixel + 2 * component_size);
+        return scratch.get();
+    };
+
+    // Determine the position of the mip levels within the file
+    std::vector<size_t> offsets;
+    size_t offset = layout.offset;
+    for (uint32_t i = 0; i < (upload_levels ? full_levels : 1); ++i) {
+        Vector2i level_size(std::max(layout.size.x() >> i, 1),
+                            std::max(layout.size.y() >> i, 1));
+        if (layout.ktx) {
+            offset += 4;
+            if (!is_compressed && (texture->data_size(Vector2i(level_size.x(), 1)) % 4) != 0)
+                throw std::runtime_error("Texture::from_file_mapped(): the rows of \"" +
+                                         filename + "\" are padded to 4 bytes!");
+        }
+        offsets.push_back(offset);
+        offset += texture->data_size(level_size);
+        if (layout.ktx)
+            offset = (offset + 3) / 4 * 4;
+    }
+
+    if (has_header ? (file.size() < offset) : (file.size() != offset))
+        throw std::runtime_error("Texture::from_file_mapped(): the size of \"" + filename +
+                                 "\" does not match the pixel format (expected " +
+                                 std::to_string(offset) + " bytes, got " +
+                                 std::to_string(file.size()) + ")!");
+
+#if !defined(NANOGUI_USE_METAL)
+    // Allocate storage, which upload_sub_region() then fills
+    texture->upload(nullptr);
+#endif
+
+    // Upload the first level in chunks consisting of whole rows of blocks
+    Vector2i block = texture->block_size();
+    size_t row_size = texture->data_size(Vector2i(layout.size.x(), block.y()));
+    int rows = (int) std::max((size_t) 1, chunk_size / row_size) * block.y();
+    for (int y = 0; y < layout.size.y(); y += rows) {
+        Vector2i chunk(layout.size.x(), std::min(rows, layout.size.y() - y));
+        size_t chunk_offset = offsets[0] + (size_t) (y / block.y()) * row_size;
+        texture->upload_sub_region(convert(data + chunk_offset, chunk), Vector2i(0, y), chunk);
+        file.release(chunk_offset, texture->data_size(chunk));
+    }
+
+    for (uint32_t i = 1; i < (uint32_t) offsets.size(); ++i) {
+        Vector2i level_size(std::max(layout.size.x() >> i, 1),
+                            std::max(layout.size.y() >> i, 1));
+        texture->upload_mipmap(i, convert(data + offsets[i], level_size));
+    }
+
+    texture->m_mipmap_manual = is_compressed;
+    if (trilinear && !upload_levels)
+        texture->generate_mipmap();
+
+    return texture;
+}
+
 size_t Texture::bytes_per_pixel() const {
+    /* 24-bit depth and 8-bit stencil are packed into a single 32-bit word
+       (the floating point variant occupies two words, as computed below) */
+    if (m_pixel_format == PixelFormat::DepthStencil &&
+        m_component_format == ComponentFormat::UInt32)
+        return 4;
+
     size_t result = 0;
     switch (m_component_format) {
         case ComponentFormat::UInt8:   result = 1; break;
@@ -70,13 +647,57 @@ size_t Texture::bytes_per_pixel() const {
         case ComponentFormat::Int32:   result = 4; break;
         case ComponentFormat::Float16: result = 2; break;
         case ComponentFormat::Float32: result = 4; break;
-        default: throw std::runtime_error("Texture::bytes_per_pixel(): "
-                                          "invalid component format!");
+        default:
+            if (compressed())
+                throw std::runtime_error("Texture::bytes_per_pixel(): not defined for "
+                                         "block-compressed formats!");
+            throw std::runtime_error("Texture::bytes_per_pixel(): "
+                                     "invalid component format!");
     }
 
     return result * channels();
 }
 
+bool Texture::compressed() const {
+    return (uint8_t) m_component_format >= (uint8_t) ComponentFormat::BC1;
+}
+
+Vector2i Texture::block_size() const {
+    switch (m_component_format) {
+        case ComponentFormat::ASTC8x8: return Vector2i(8);
+        default: return Vector2i(compressed() ? 4 : 1);
+    }
+}
+
+size_t Texture::bytes_per_block() const {
+    switch (m_component_format) {
+        case ComponentFormat::BC1:
+        case ComponentFormat::BC4:
+            return 8;
+
+        case ComponentFormat::BC2:
+        case ComponentFormat::BC3:
+        case ComponentFormat::BC5:
+        case ComponentFormat::BC6H:
+        case ComponentFormat::BC7:
+        case ComponentFormat::ASTC4x4:
+        case ComponentFormat::ASTC8x8:
+            return 16;
+
+        case ComponentFormat::ETC2:
+            return m_pixel_format == PixelFormat::R || m_pixel_format == PixelFormat::RGB ? 8 : 16;
+
+        default:
+            return bytes_per_pixel();
+    }
+}
+
+size_t Texture::data_size(const Vector2i &size) const {
+    Vector2i block = block_size();
+    return (size_t) ((size.x() + block.x() - 1) / block.x()) *
+           (size_t) ((size.y() + block.y() - 1) / block.y()) * bytes_per_block();
+}
+
 size_t Texture::channels() const {
     size_t result = 1;
     switch (m_pixel_format) {
@@ -94,4 +715,7 @@ size_t Texture::channels() const {
     return result;
 }
 
+Texture::Download::Download(Texture *texture, size_t size)
+    : m_texture(texture), m_size(size) { }
+
 NAMESPACE_END(nanogui)
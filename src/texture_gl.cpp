@@ -1,7 +1,11 @@
 #include <nanogui/texture.h>
 #include <nanogui/opengl.h>
 #include "opengl_check.h"
+#include "opengl_state.h"
+#include <algorithm>
+#include <cstring>
 #include <memory>
+#include <tuple>
 
 #if !defined(GL_HALF_FLOAT)
 #  define GL_HALF_FLOAT 0x140B
@@ -9,6 +13,14 @@
 #if !defined(GL_DEPTH_STENCIL)
 #  define GL_DEPTH_STENCIL 0x84F9
 #endif
+#if !defined(GL_DEPTH24_STENCIL8)
+#  define GL_DEPTH24_STENCIL8 0x88F0
+#  define GL_UNSIGNED_INT_24_8 0x84FA
+#endif
+#if !defined(GL_DEPTH32F_STENCIL8)
+#  define GL_DEPTH32F_STENCIL8 0x8CAD
+#  define GL_FLOAT_32_UNSIGNED_INT_24_8_REV 0x8DAD
+#endif
 #if !defined(GL_R8)
 #  define GL_R8 0x8229
 #  define GL_RG8 0x822B
@@ -48,8 +60,117 @@
 #  define GL_DEPTH_COMPONENT32F 0x8CAC
 #endif
 
+#if !defined(GL_COMPRESSED_RGB_S3TC_DXT1_EXT)
+#  define GL_COMPRESSED_RGB_S3TC_DXT1_EXT 0x83F0
+#  define GL_COMPRESSED_RGBA_S3TC_DXT1_EXT 0x83F1
+#  define GL_COMPRESSED_RGBA_S3TC_DXT3_EXT 0x83F2
+#  define GL_COMPRESSED_RGBA_S3TC_DXT5_EXT 0x83F3
+#endif
+#if !defined(GL_COMPRESSED_RED_RGTC1)
+#  define GL_COMPRESSED_RED_RGTC1 0x8DBB
+#  define GL_COMPRESSED_RG_RGTC2 0x8DBD
+#endif
+#if !defined(GL_COMPRESSED_RGBA_BPTC_UNORM)
+#  define GL_COMPRESSED_RGBA_BPTC_UNORM 0x8E8C
+#  define GL_COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT 0x8E8F
+#endif
+#if !defined(GL_COMPRESSED_RGB8_ETC2)
+#  define GL_COMPRESSED_R11_EAC 0x9270
+#  define GL_COMPRESSED_RG11_EAC 0x9272
+#  define GL_COMPRESSED_RGB8_ETC2 0x9274
+#  define GL_COMPRESSED_RGBA8_ETC2_EAC 0x9278
+#endif
+#if !defined(GL_COMPRESSED_RGBA_ASTC_4x4_KHR)
+#  define GL_COMPRESSED_RGBA_ASTC_4x4_KHR 0x93B0
+#  define GL_COMPRESSED_RGBA_ASTC_8x8_KHR 0x93B7
+#endif
+
+#if !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_PIXEL_BUFFERS 1
+#endif
+
+#if defined(GL_TEXTURE_IMMUTABLE_FORMAT) && \
+    !(defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2)
+#  define NANOGUI_HAS_TEXTURE_STORAGE 1
+#endif
+
 NAMESPACE_BEGIN(nanogui)
 
+#if defined(NANOGUI_HAS_TEXTURE_STORAGE)
+/// Check whether the current context supports immutable texture storage
+static bool gl_has_texture_storage() {
+#if defined(NANOGUI_USE_GLES)
+    return true;
+#else
+    static int cached = -1;
+    if (cached != -1)
+        return cached == 1;
+
+    GLint major = 0, minor = 0, extension_count = 0;
+    CHK(glGetIntegerv(GL_MAJOR_VERSION, &major));
+    CHK(glGetIntegerv(GL_MINOR_VERSION, &minor));
+    bool result = major > 4 || (major == 4 && minor >= 2);
+
+    CHK(glGetIntegerv(GL_NUM_EXTENSIONS, &extension_count));
+    for (GLint i = 0; i < extension_count && !result; ++i) {
+        const char *name = (const char *) glGetStringi(GL_EXTENSIONS, (GLuint) i);
+        result = name && strcmp(name, "GL_ARB_texture_storage") == 0;
+    }
+
+    cached = result ? 1 : 0;
+    return result;
+#endif
+}
+#endif
+
+/// Check whether the current context supports a given extension
+static bool gl_has_extension(const char *extension) {
+#if defined(NANOGUI_USE_GLES) && NANOGUI_GLES_VERSION == 2
+    const char *extensions = (const char *) glGetString(GL_EXTENSIONS);
+    size_t length = strlen(extension);
+    for (const char *ptr = extensions; ptr && (ptr = strstr(ptr, extension)); ptr += length) {
+        if ((ptr == extensions || ptr[-1] == ' ') && (ptr[length] == ' ' || ptr[length] == '\0'))
+            return true;
+    }
+    return false;
+#else
+    GLint extension_count = 0;
+    CHK(glGetIntegerv(GL_NUM_EXTENSIONS, &extension_count));
+    for (GLint i = 0; i < extension_count; ++i) {
+        const char *name = (const char *) glGetStringi(GL_EXTENSIONS, (GLuint) i);
+        if (name && strcmp(name, extension) == 0)
+            return true;
+    }
+    return false;
+#endif
+}
+
+std::tuple<bool, bool, bool> test_texture_compression_support() {
+    bool bc = gl_has_extension("GL_EXT_texture_compression_s3tc"),
+         etc2, astc = gl_has_extension("GL_KHR_texture_compression_astc_ldr");
+
+#if defined(NANOGUI_USE_GLES)
+    bc = bc && gl_has_extension("GL_EXT_texture_compression_rgtc") &&
+         gl_has_extension("GL_EXT_texture_compression_bptc");
+#  if NANOGUI_GLES_VERSION == 2
+    etc2 = false;
+#  else
+    etc2 = true;
+#  endif
+#else
+    GLint major = 0, minor = 0;
+    CHK(glGetIntegerv(GL_MAJOR_VERSION, &major));
+    CHK(glGetIntegerv(GL_MINOR_VERSION, &minor));
+    int version = major * 10 + minor;
+
+    bc = bc && (version >= 30 || gl_has_extension("GL_ARB_texture_compression_rgtc")) &&
+               (version >= 42 || gl_has_extension("GL_ARB_texture_compression_bptc"));
+    etc2 = version >= 43 || gl_has_extension("GL_ARB_ES3_compatibility");
+#endif
+
+    return { bc, etc2, astc };
+}
+
 static void gl_map_texture_format(Texture::PixelFormat &pixel_format,
                                   Texture::ComponentFormat &component_format,
                                   GLenum &pixel_format_gl,
@@ -103,16 +224,60 @@ void Texture::init() {
 
     GLenum tex_mode = m_samples > 1 ? GL_TEXTURE_2D_MULTISAMPLE : GL_TEXTURE_2D;
 
+    if (m_flags & (uint8_t) TextureFlags::Streaming) {
+        if (!(m_flags & (uint8_t) TextureFlags::ShaderRead) ||
+            (m_flags & (uint8_t) TextureFlags::RenderTarget))
+            throw std::runtime_error(
+                "Texture::Texture(): streaming textures must specify ShaderRead "
+                "and cannot be render targets!");
+        else if (m_samples > 1)
+            throw std::runtime_error(
+                "Texture::Texture(): streaming textures cannot use MSAA!");
+    }
+
+    if (compressed()) {
+        if ((m_flags & (uint8_t) (TextureFlags::RenderTarget | TextureFlags::Streaming)) ||
+            m_samples > 1)
+            throw std::runtime_error(
+                "Texture::Texture(): block-compressed textures cannot be render "
+                "targets, streaming textures, or use MSAA!");
+        else if (!m_mipmap_manual &&
+                 (m_min_interpolation_mode == InterpolationMode::Trilinear ||
+                  m_mag_interpolation_mode == InterpolationMode::Trilinear))
+            throw std::runtime_error(
+                "Texture::Texture(): block-compressed textures with trilinear "
+                "interpolation require mipmap_manual=true, since their mip maps "
+                "cannot be generated on the GPU (see upload_mipmap())!");
+    }
+
     if (m_flags & (uint8_t) TextureFlags::ShaderRead) {
         CHK(glGenTextures(1, &m_texture_handle));
-        CHK(glBindTexture(tex_mode, m_texture_handle));
+        gl_state().bind_texture(tex_mode, m_texture_handle);
         CHK(glTexParameteri(tex_mode, GL_TEXTURE_MIN_FILTER, interpolation_mode_gl[0]));
         CHK(glTexParameteri(tex_mode, GL_TEXTURE_MAG_FILTER, interpolation_mode_gl[1]));
         CHK(glTexParameteri(tex_mode, GL_TEXTURE_WRAP_S, wrap_mode_gl));
         CHK(glTexParameteri(tex_mode, GL_TEXTURE_WRAP_T, wrap_mode_gl));
 
-        if (m_flags & (uint8_t) TextureFlags::RenderTarget)
+        if (m_flags & (uint8_t) TextureFlags::Streaming) {
+            // Storage is allocated once, and upload() only replaces its contents
+#if defined(NANOGUI_HAS_TEXTURE_STORAGE)
+            if (gl_has_texture_storage()) {
+                GLsizei levels = 1;
+                if (m_min_interpolation_mode == InterpolationMode::Trilinear ||
+                    m_mag_interpolation_mode == InterpolationMode::Trilinear) {
+                    for (int32_t i = std::max(m_size.x(), m_size.y()); i > 1; i /= 2)
+                        levels++;
+                }
+                CHK(glTexStorage2D(GL_TEXTURE_2D, levels, internal_format_gl,
+                                   (GLsizei) m_size.x(), (GLsizei) m_size.y()));
+            } else
+#endif
+                CHK(glTexImage2D(GL_TEXTURE_2D, 0, internal_format_gl, (GLsizei) m_size.x(),
+                                 (GLsizei) m_size.y(), 0, pixel_format_gl,
+                                 component_format_gl, nullptr));
+        } else if (m_flags & (uint8_t) TextureFlags::RenderTarget) {
             upload(nullptr);
+        }
     } else if (m_flags & (uint8_t) TextureFlags::RenderTarget) {
         CHK(glGenRenderbuffers(1, &m_renderbuffer_handle));
         CHK(glBindRenderbuffer(GL_RENDERBUFFER, m_renderbuffer_handle));
@@ -134,14 +299,39 @@ void Texture::init() {
 }
 
 Texture::~Texture() {
+    gl_state().forget_texture(m_texture_handle);
     CHK(glDeleteTextures(1, &m_texture_handle));
     CHK(glDeleteRenderbuffers(1, &m_renderbuffer_handle));
+
+#if defined(NANOGUI_HAS_PIXEL_BUFFERS)
+    for (int i = 0; i < 3; ++i) {
+        if (m_upload_fences[i])
+            CHK(glDeleteSync((GLsync) m_upload_fences[i]));
+    }
+    CHK(glDeleteBuffers(3, m_upload_buffer_handles));
+#endif
+
+    for (auto [buffer_handle, capacity] : m_download_buffers)
+        CHK(glDeleteBuffers(1, &buffer_handle));
+    if (m_flip_texture_handle) {
+        gl_state().forget_texture(m_flip_texture_handle);
+        gl_state().forget_framebuffer(m_flip_framebuffer_handles[0]);
+        gl_state().forget_framebuffer(m_flip_framebuffer_handles[1]);
+        CHK(glDeleteTextures(1, &m_flip_texture_handle));
+        CHK(glDeleteFramebuffers(2, m_flip_framebuffer_handles));
+    }
 }
 
 void Texture::upload(const uint8_t *data) {
     if (m_samples > 1 && data != nullptr)
         throw std::runtime_error("Texture::upload(): only implemented for samples=1!");
 
+    if (m_flags & (uint8_t) TextureFlags::Streaming) {
+        if (data)
+            upload_streaming(data);
+        return;
+    }
+
     GLenum pixel_format_gl,
            component_format_gl,
            internal_format_gl;
@@ -154,7 +344,7 @@ void Texture::upload(const uint8_t *data) {
 
     if (m_texture_handle != 0) {
         GLenum tex_mode = m_samples > 1 ? GL_TEXTURE_2D_MULTISAMPLE : GL_TEXTURE_2D;
-        CHK(glBindTexture(tex_mode, m_texture_handle));
+        gl_state().bind_texture(tex_mode, m_texture_handle);
 
         if (data)
             CHK(glPixelStorei(GL_UNPACK_ALIGNMENT, 1));
@@ -165,16 +355,23 @@ void Texture::upload(const uint8_t *data) {
             CHK(glPixelStorei(GL_UNPACK_SKIP_ROWS, 0));
             CHK(glPixelStorei(GL_UNPACK_SKIP_PIXELS, 0));
         }
+#endif
 
-        if (m_samples == 1)
+        if (compressed())
+            CHK(glCompressedTexImage2D(tex_mode, 0, internal_format_gl, (GLsizei) m_size.x(),
+                                       (GLsizei) m_size.y(), 0, (GLsizei) data_size(m_size),
+                                       data));
+#if defined(NANOGUI_USE_OPENGL)
+        else if (m_samples == 1)
             CHK(glTexImage2D(tex_mode, 0, internal_format_gl, (GLsizei) m_size.x(),
                              (GLsizei) m_size.y(), 0, pixel_format_gl, component_format_gl, data));
         else
             CHK(glTexImage2DMultisample(tex_mode, m_samples, internal_format_gl,
                                         (GLsizei) m_size.x(), (GLsizei) m_size.y(), false));
 #else
-        CHK(glTexImage2D(tex_mode, 0, internal_format_gl, (GLsizei) m_size.x(),
-                         (GLsizei) m_size.y(), 0, pixel_format_gl, component_format_gl, data));
+        else
+            CHK(glTexImage2D(tex_mode, 0, internal_format_gl, (GLsizei) m_size.x(),
+                             (GLsizei) m_size.y(), 0, pixel_format_gl, component_format_gl, data));
 #endif
 
         if (!m_mipmap_manual && (m_min_interpolation_mode == InterpolationMode::Trilinear ||
@@ -196,6 +393,79 @@ void Texture::upload(const uint8_t *data) {
     }
 }
 
+void Texture::upload_streaming(const uint8_t *data) {
+    GLenum pixel_format_gl,
+           component_format_gl,
+           internal_format_gl;
+
+    gl_map_texture_format(m_pixel_format,
+                          m_component_format,
+                          pixel_format_gl,
+                          component_format_gl,
+                          internal_format_gl);
+
+    (void) internal_format_gl;
+    gl_state().bind_texture(GL_TEXTURE_2D, m_texture_handle);
+    CHK(glPixelStorei(GL_UNPACK_ALIGNMENT, 1));
+#if defined(NANOGUI_USE_OPENGL)
+    CHK(glPixelStorei(GL_UNPACK_ROW_LENGTH, 0));
+    CHK(glPixelStorei(GL_UNPACK_SKIP_ROWS, 0));
+    CHK(glPixelStorei(GL_UNPACK_SKIP_PIXELS, 0));
+#endif
+
+#if defined(NANOGUI_HAS_PIXEL_BUFFERS)
+    size_t size = bytes_per_pixel() * (size_t) m_size.x() * (size_t) m_size.y();
+    uint32_t index = m_upload_index;
+    m_upload_index = (m_upload_index + 1) % 3;
+
+    // Wait until the GPU has consumed the frame previously stored in this buffer
+    GLsync sync = (GLsync) m_upload_fences[index];
+    while (sync) {
+        GLenum rv = glClientWaitSync(sync, GL_SYNC_FLUSH_COMMANDS_BIT, 1000000000ull);
+        if (rv == GL_ALREADY_SIGNALED || rv == GL_CONDITION_SATISFIED) {
+            CHK(glDeleteSync(sync));
+            sync = nullptr;
+            m_upload_fences[index] = nullptr;
+        } else if (rv == GL_WAIT_FAILED) {
+            throw std::runtime_error("Texture::upload(): glClientWaitSync() failed!");
+        }
+    }
+
+    GLuint &buffer_handle = m_upload_buffer_handles[index];
+    bool allocate = buffer_handle == 0;
+    if (allocate)
+        CHK(glGenBuffers(1, &buffer_handle));
+    CHK(glBindBuffer(GL_PIXEL_UNPACK_BUFFER, buffer_handle));
+    if (allocate)
+        CHK(glBufferData(GL_PIXEL_UNPACK_BUFFER, size, nullptr, GL_STREAM_DRAW));
+
+    // The fence guarantees that the buffer is idle, hence no synchronization is needed
+    void *ptr = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, size,
+                                 GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT |
+                                 GL_MAP_UNSYNCHRONIZED_BIT);
+    if (!ptr) {
+        CHK(glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0));
+        throw std::runtime_error("Texture::upload(): could not map the pixel "
+                                 "unpack buffer!");
+    }
+    memcpy(ptr, data, size);
+    CHK(glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER));
+
+    // With an unpack buffer bound, the 'pixels' argument is an offset into it
+    CHK(glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, (GLsizei) m_size.x(), (GLsizei) m_size.y(),
+                        pixel_format_gl, component_format_gl, nullptr));
+    CHK(glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0));
+    m_upload_fences[index] = (void *) glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0);
+#else
+    CHK(glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, (GLsizei) m_size.x(), (GLsizei) m_size.y(),
+                        pixel_format_gl, component_format_gl, data));
+#endif
+
+    if (!m_mipmap_manual && (m_min_interpolation_mode == InterpolationMode::Trilinear ||
+        m_mag_interpolation_mode == InterpolationMode::Trilinear))
+        generate_mipmap();
+}
+
 void Texture::upload_sub_region(const uint8_t *data, const Vector2i& origin, const Vector2i& size) {
     if (m_samples > 1 && data != nullptr)
         throw std::runtime_error("Texture::upload_sub_region(): only implemented for samples=1!");
@@ -216,8 +486,15 @@ void Texture::upload_sub_region(const uint8_t *data, const Vector2i& origin, con
     if (origin.x() + size.x() > m_size.x() || origin.y() + size.y() > m_size.y())
         throw std::runtime_error("Texture::upload_sub_region(): out of bounds!");
 
+    Vector2i block = block_size();
+    if (origin.x() % block.x() != 0 || origin.y() % block.y() != 0 ||
+        (size.x() % block.x() != 0 && origin.x() + size.x() != m_size.x()) ||
+        (size.y() % block.y() != 0 && origin.y() + size.y() != m_size.y()))
+        throw std::runtime_error("Texture::upload_sub_region(): the region must be "
+                                 "aligned to the compression block size!");
+
     GLenum tex_mode = m_samples > 1 ? GL_TEXTURE_2D_MULTISAMPLE : GL_TEXTURE_2D;
-    CHK(glBindTexture(tex_mode, m_texture_handle));
+    gl_state().bind_texture(tex_mode, m_texture_handle);
 
     if (data)
         CHK(glPixelStorei(GL_UNPACK_ALIGNMENT, 1));
@@ -230,14 +507,61 @@ void Texture::upload_sub_region(const uint8_t *data, const Vector2i& origin, con
     }
 #endif
 
-    CHK(glTexSubImage2D(tex_mode, 0, (GLsizei) origin.x(), (GLsizei) origin.y(), (GLsizei) size.x(),
-                        (GLsizei) size.y(), pixel_format_gl, component_format_gl, data));
+    if (compressed())
+        CHK(glCompressedTexSubImage2D(tex_mode, 0, (GLsizei) origin.x(), (GLsizei) origin.y(),
+                                      (GLsizei) size.x(), (GLsizei) size.y(), internal_format_gl,
+                                      (GLsizei) data_size(size), data));
+    else
+        CHK(glTexSubImage2D(tex_mode, 0, (GLsizei) origin.x(), (GLsizei) origin.y(), (GLsizei) size.x(),
+                            (GLsizei) size.y(), pixel_format_gl, component_format_gl, data));
 
     if (!m_mipmap_manual && (m_min_interpolation_mode == InterpolationMode::Trilinear ||
         m_mag_interpolation_mode == InterpolationMode::Trilinear))
         generate_mipmap();
 }
 
+void Texture::upload_mipmap(uint32_t level, const uint8_t *data) {
+    if (level == 0) {
+        upload(data);
+        return;
+    } else if (m_texture_handle == 0 || m_samples > 1)
+        throw std::runtime_error("Texture::upload_mipmap(): only implemented for "
+                                 "non-MSAA textures with ShaderRead access!");
+    else if (m_flags & (uint8_t) TextureFlags::Streaming)
+        throw std::runtime_error("Texture::upload_mipmap(): not supported for "
+                                 "streaming textures!");
+
+    if (level >= 32 || ((m_size.x() >> level) == 0 && (m_size.y() >> level) == 0))
+        throw std::runtime_error("Texture::upload_mipmap(): invalid mip level!");
+    Vector2i size(std::max(m_size.x() >> level, 1), std::max(m_size.y() >> level, 1));
+
+    GLenum pixel_format_gl,
+           component_format_gl,
+           internal_format_gl;
+
+    gl_map_texture_format(m_pixel_format,
+                          m_component_format,
+                          pixel_format_gl,
+                          component_format_gl,
+                          internal_format_gl);
+
+    gl_state().bind_texture(GL_TEXTURE_2D, m_texture_handle);
+    CHK(glPixelStorei(GL_UNPACK_ALIGNMENT, 1));
+#if defined(NANOGUI_USE_OPENGL)
+    CHK(glPixelStorei(GL_UNPACK_ROW_LENGTH, 0));
+    CHK(glPixelStorei(GL_UNPACK_SKIP_ROWS, 0));
+    CHK(glPixelStorei(GL_UNPACK_SKIP_PIXELS, 0));
+#endif
+
+    if (compressed())
+        CHK(glCompressedTexImage2D(GL_TEXTURE_2D, (GLint) level, internal_format_gl,
+                                   (GLsizei) size.x(), (GLsizei) size.y(), 0,
+                                   (GLsizei) data_size(size), data));
+    else
+        CHK(glTexImage2D(GL_TEXTURE_2D, (GLint) level, internal_format_gl, (GLsizei) size.x(),
+                         (GLsizei) size.y(), 0, pixel_format_gl, component_format_gl, data));
+}
+
 void Texture::download(uint8_t *data) {
 #if defined(NANOGUI_USE_GLES)
     (void) data;
@@ -247,6 +571,9 @@ void Texture::download(uint8_t *data) {
         throw std::runtime_error("Texture::download(): no texture handle!");
     else if (m_samples > 1)
         throw std::runtime_error("Texture::download(): only implemented for samples=1!");
+    else if (compressed())
+        throw std::runtime_error("Texture::download(): not supported for "
+                                 "block-compressed formats!");
 
     GLenum pixel_format_gl,
            component_format_gl,
@@ -259,7 +586,8 @@ void Texture::download(uint8_t *data) {
                           internal_format_gl);
 
     (void) internal_format_gl;
-    CHK(glBindTexture(GL_TEXTURE_2D, m_texture_handle));
+    CHK(glPixelStorei(GL_PACK_ALIGNMENT, 1));
+    gl_state().bind_texture(GL_TEXTURE_2D, m_texture_handle);
     CHK(glGetTexImage(GL_TEXTURE_2D, 0, pixel_format_gl, component_format_gl, data));
 
     if (m_flags & (uint8_t) TextureFlags::RenderTarget) {
@@ -278,16 +606,182 @@ void Texture::download(uint8_t *data) {
 #endif
 }
 
+ref<Texture::Download> Texture::download_async(bool flip) {
+#if defined(NANOGUI_USE_GLES)
+    (void) flip;
+    throw std::runtime_error("Texture::download_async(): not supported on GLES!");
+#else
+    if (m_texture_handle == 0)
+        throw std::runtime_error("Texture::download_async(): no texture handle!");
+    else if (m_samples > 1)
+        throw std::runtime_error("Texture::download_async(): only implemented for samples=1!");
+    else if (compressed())
+        throw std::runtime_error("Texture::download_async(): not supported for "
+                                 "block-compressed formats!");
+
+    GLenum pixel_format_gl,
+           component_format_gl,
+           internal_format_gl;
+
+    gl_map_texture_format(m_pixel_format,
+                          m_component_format,
+                          pixel_format_gl,
+                          component_format_gl,
+                          internal_format_gl);
+
+    // download() reverses the rows of render targets
+    bool render_target = (m_flags & (uint8_t) TextureFlags::RenderTarget) != 0;
+    GLuint source_handle = m_texture_handle;
+
+    if (flip != render_target) {
+        if (m_flip_texture_handle == 0) {
+            CHK(glGenTextures(1, &m_flip_texture_handle));
+            CHK(glGenFramebuffers(2, m_flip_framebuffer_handles));
+        }
+
+        gl_state().bind_texture(GL_TEXTURE_2D, m_flip_texture_handle);
+        if (m_flip_size != m_size) {
+            CHK(glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST));
+            CHK(glTexImage2D(GL_TEXTURE_2D, 0, internal_format_gl, (GLsizei) m_size.x(),
+                             (GLsizei) m_size.y(), 0, pixel_format_gl,
+                             component_format_gl, nullptr));
+            m_flip_size = m_size;
+        }
+
+        GLenum attachment = GL_COLOR_ATTACHMENT0;
+        GLbitfield what = GL_COLOR_BUFFER_BIT;
+        if (m_pixel_format == PixelFormat::Depth) {
+            attachment = GL_DEPTH_ATTACHMENT;
+            what = GL_DEPTH_BUFFER_BIT;
+        } else if (m_pixel_format == PixelFormat::DepthStencil) {
+            attachment = GL_DEPTH_STENCIL_ATTACHMENT;
+            what = GL_DEPTH_BUFFER_BIT | GL_STENCIL_BUFFER_BIT;
+        }
+
+        GLState &state = gl_state();
+        GLuint framebuffer_backup = state.framebuffer;
+        bool scissor_test_backup = state.is_enabled(GLState::ScissorTest);
+        state.set_enabled(GLState::ScissorTest, false);
+
+        CHK(glBindFramebuffer(GL_READ_FRAMEBUFFER, m_flip_framebuffer_handles[0]));
+        CHK(glFramebufferTexture2D(GL_READ_FRAMEBUFFER, attachment, GL_TEXTURE_2D,
+                                   m_texture_handle, 0));
+        CHK(glBindFramebuffer(GL_DRAW_FRAMEBUFFER, m_flip_framebuffer_handles[1]));
+        CHK(glFramebufferTexture2D(GL_DRAW_FRAMEBUFFER, attachment, GL_TEXTURE_2D,
+                                   m_flip_texture_handle, 0));
+        if (attachment != GL_COLOR_ATTACHMENT0) {
+            CHK(glReadBuffer(GL_NONE));
+            CHK(glDrawBuffer(GL_NONE));
+        }
+        state.framebuffer = GLState::Unknown;
+
+        // Swapping the vertical bounds of the destination reverses the rows
+        CHK(glBlitFramebuffer(0, 0, (GLint) m_size.x(), (GLint) m_size.y(),
+                              0, (GLint) m_size.y(), (GLint) m_size.x(), 0,
+                              what, GL_NEAREST));
+
+        if (framebuffer_backup != GLState::Unknown)
+            state.bind_framebuffer(framebuffer_backup);
+        state.set_enabled(GLState::ScissorTest, scissor_test_backup);
+        source_handle = m_flip_texture_handle;
+    }
+
+    ref<Download> download =
+        new Download(this, bytes_per_pixel() * (size_t) m_size.x() * (size_t) m_size.y());
+
+    // Reuse the pixel buffer object of a previous download if possible
+    if (!m_download_buffers.empty()) {
+        std::tie(download->m_buffer_handle, download->m_capacity) = m_download_buffers.back();
+        m_download_buffers.pop_back();
+    } else {
+        CHK(glGenBuffers(1, &download->m_buffer_handle));
+    }
+
+    CHK(glBindBuffer(GL_PIXEL_PACK_BUFFER, download->m_buffer_handle));
+    if (download->m_capacity < download->m_size) {
+        CHK(glBufferData(GL_PIXEL_PACK_BUFFER, download->m_size, nullptr, GL_STREAM_READ));
+        download->m_capacity = download->m_size;
+    }
+
+    // With a pack buffer bound, the 'pixels' argument is an offset into it
+    CHK(glPixelStorei(GL_PACK_ALIGNMENT, 1));
+    gl_state().bind_texture(GL_TEXTURE_2D, source_handle);
+    CHK(glGetTexImage(GL_TEXTURE_2D, 0, pixel_format_gl, component_format_gl, nullptr));
+    CHK(glBindBuffer(GL_PIXEL_PACK_BUFFER, 0));
+
+    download->m_fence = (void *) glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0);
+    return download;
+#endif
+}
+
+Texture::Download::~Download() {
+#if !defined(NANOGUI_USE_GLES)
+    if (m_fence)
+        CHK(glDeleteSync((GLsync) m_fence));
+#endif
+    // Return the pixel buffer object to the texture for reuse
+    if (m_buffer_handle)
+        m_texture->m_download_buffers.emplace_back(m_buffer_handle, m_capacity);
+}
+
+bool Texture::Download::ready() {
+#if !defined(NANOGUI_USE_GLES)
+    if (m_fence) {
+        GLenum rv = glClientWaitSync((GLsync) m_fence, GL_SYNC_FLUSH_COMMANDS_BIT, 0);
+        if (rv == GL_TIMEOUT_EXPIRED)
+            return false;
+        else if (rv == GL_WAIT_FAILED)
+            throw std::runtime_error(
+                "Texture::Download::ready(): glClientWaitSync() failed!");
+        CHK(glDeleteSync((GLsync) m_fence));
+        m_fence = nullptr;
+    }
+#endif
+    return true;
+}
+
+void Texture::Download::read(uint8_t *data) {
+#if defined(NANOGUI_USE_GLES)
+    (void) data;
+#else
+    while (m_fence) {
+        GLenum rv = glClientWaitSync((GLsync) m_fence, GL_SYNC_FLUSH_COMMANDS_BIT,
+                                     1000000000ull);
+        if (rv == GL_ALREADY_SIGNALED || rv == GL_CONDITION_SATISFIED) {
+            CHK(glDeleteSync((GLsync) m_fence));
+            m_fence = nullptr;
+        } else if (rv == GL_WAIT_FAILED) {
+            throw std::runtime_error(
+                "Texture::Download::read(): glClientWaitSync() failed!");
+        }
+    }
+
+    CHK(glBindBuffer(GL_PIXEL_PACK_BUFFER, m_buffer_handle));
+    void *ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, m_size, GL_MAP_READ_BIT);
+    if (!ptr) {
+        CHK(glBindBuffer(GL_PIXEL_PACK_BUFFER, 0));
+        throw std::runtime_error("Texture::Download::read(): could not map the "
+                                 "pixel buffer object!");
+    }
+    memcpy(data, ptr, m_size);
+    CHK(glUnmapBuffer(GL_PIXEL_PACK_BUFFER));
+    CHK(glBindBuffer(GL_PIXEL_PACK_BUFFER, 0));
+#endif
+}
+
 void Texture::resize(const Vector2i &size) {
     if (m_size == size)
         return;
+    else if (m_flags & (uint8_t) TextureFlags::Streaming)
+        throw std::runtime_error(
+            "Texture::resize(): the storage of streaming textures cannot be resized!");
     m_size = size;
     upload(nullptr);
 }
 
 void Texture::generate_mipmap() {
     GLenum tex_mode = m_samples > 1 ? GL_TEXTURE_2D_MULTISAMPLE : GL_TEXTURE_2D;
-    CHK(glBindTexture(tex_mode, m_texture_handle));
+    gl_state().bind_texture(tex_mode, m_texture_handle);
     CHK(glGenerateMipmap(tex_mode));
 }
 
@@ -306,6 +800,43 @@ static void gl_map_texture_format(Texture::PixelFormat &pixel_format,
 
     pixel_format_gl = component_format_gl = internal_format_gl = 0;
 
+    /* Block-compressed formats are fully specified by the internal format,
+       which is passed to glCompressedTex(Sub)Image2D() */
+    if ((uint8_t) component_format >= (uint8_t) ComponentFormat::BC1) {
+        bool r = pixel_format == PixelFormat::R, ra = pixel_format == PixelFormat::RA,
+             rgb = pixel_format == PixelFormat::RGB, rgba = pixel_format == PixelFormat::RGBA;
+
+        switch (component_format) {
+            case ComponentFormat::BC1:
+                internal_format_gl = rgb ? GL_COMPRESSED_RGB_S3TC_DXT1_EXT :
+                                    (rgba ? GL_COMPRESSED_RGBA_S3TC_DXT1_EXT : 0);
+                break;
+            case ComponentFormat::BC2:  internal_format_gl = rgba ? GL_COMPRESSED_RGBA_S3TC_DXT3_EXT : 0; break;
+            case ComponentFormat::BC3:  internal_format_gl = rgba ? GL_COMPRESSED_RGBA_S3TC_DXT5_EXT : 0; break;
+            case ComponentFormat::BC4:  internal_format_gl = r    ? GL_COMPRESSED_RED_RGTC1 : 0; break;
+            case ComponentFormat::BC5:  internal_format_gl = ra   ? GL_COMPRESSED_RG_RGTC2 : 0; break;
+            case ComponentFormat::BC6H: internal_format_gl = rgb  ? GL_COMPRESSED_RGB_BPTC_UNSIGNED_FLOAT : 0; break;
+            case ComponentFormat::BC7:  internal_format_gl = rgba ? GL_COMPRESSED_RGBA_BPTC_UNORM : 0; break;
+            case ComponentFormat::ETC2:
+                internal_format_gl = r ? GL_COMPRESSED_R11_EAC : ra ? GL_COMPRESSED_RG11_EAC :
+                                     rgb ? GL_COMPRESSED_RGB8_ETC2 :
+                                     rgba ? GL_COMPRESSED_RGBA8_ETC2_EAC : 0;
+                break;
+            case ComponentFormat::ASTC4x4: internal_format_gl = rgba ? GL_COMPRESSED_RGBA_ASTC_4x4_KHR : 0; break;
+            case ComponentFormat::ASTC8x8: internal_format_gl = rgba ? GL_COMPRESSED_RGBA_ASTC_8x8_KHR : 0; break;
+            default:
+                throw std::runtime_error("gl_map_texture_format(): invalid component format!");
+        }
+
+        if (internal_format_gl == 0)
+            throw std::runtime_error("gl_map_texture_format(): compressed format unsupported "
+                                     "for the given pixel format!");
+
+        pixel_format_gl = rgba ? GL_RGBA : GL_RGB;
+        component_format_gl = GL_UNSIGNED_BYTE;
+        return;
+    }
+
     switch (pixel_format) {
         case PixelFormat::R:
 #if defined(NANOGUI_USE_OPENGL)
@@ -419,13 +950,13 @@ static void gl_map_texture_format(Texture::PixelFormat &pixel_format,
                 case ComponentFormat::Int32:
                 case ComponentFormat::UInt32:
                     component_format = ComponentFormat::UInt32;
-                    internal_format_gl = GL_DEPTH_COMPONENT24;
+                    internal_format_gl = GL_DEPTH24_STENCIL8;
                     break;
 
                 case ComponentFormat::Float16:
                 case ComponentFormat::Float32:
                     component_format = ComponentFormat::Float32;
-                    internal_format_gl = GL_DEPTH_COMPONENT32F;
+                    internal_format_gl = GL_DEPTH32F_STENCIL8;
                     break;
 
                 default:
@@ -448,6 +979,12 @@ static void gl_map_texture_format(Texture::PixelFormat &pixel_format,
             break;
     }
 
+    // Packed depth/stencil formats need a matching packed component type
+    if (pixel_format == PixelFormat::DepthStencil)
+        component_format_gl = component_format == ComponentFormat::Float32
+                                  ? GL_FLOAT_32_UNSIGNED_INT_24_8_REV
+                                  : GL_UNSIGNED_INT_24_8;
+
     if (component_format_gl == 0)
         throw std::runtime_error("gl_map_texture_format(): invalid component format!");
     if (pixel_format_gl == 0)
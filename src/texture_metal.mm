@@ -4,7 +4,15 @@
 
 NAMESPACE_BEGIN(nanogui)
 
+std::tuple<bool, bool, bool> test_texture_compression_support() {
+    return { false, false, false };
+}
+
 void Texture::init() {
+    if (compressed())
+        throw std::runtime_error("Texture::Texture(): block-compressed formats are "
+                                 "not supported by the Metal backend!");
+
     Vector2i size = m_size;
     m_size = 0;
     resize(size);
@@ -125,6 +133,11 @@ void Texture::upload_sub_region(const uint8_t *data, const Vector2i& origin, con
         generate_mipmap();
 }
 
+void Texture::upload_mipmap(uint32_t, const uint8_t *) {
+    throw std::runtime_error(
+        "Texture::upload_mipmap(): not supported by the Metal backend!");
+}
+
 void Texture::download(uint8_t *data) {
     id<MTLCommandQueue> command_queue =
         (__bridge id<MTLCommandQueue>) metal_command_queue();
@@ -158,6 +171,17 @@ void Texture::download(uint8_t *data) {
     memcpy(data, buffer.contents, img_bytes);
 }
 
+ref<Texture::Download> Texture::download_async(bool) {
+    throw std::runtime_error(
+        "Texture::download_async(): not supported by the Metal backend!");
+}
+
+Texture::Download::~Download() { }
+
+bool Texture::Download::ready() { return true; }
+
+void Texture::Download::read(uint8_t *) { }
+
 void Texture::resize(const Vector2i &size) {
     if (m_size == size)
         return;
@@ -31,6 +31,8 @@
 using nanogui::Vector3f;
 using nanogui::Vector2i;
 using nanogui::Shader;
+using nanogui::UniformBlock;
+using nanogui::Buffer;
 using nanogui::Canvas;
 using nanogui::ref;
 
@@ -50,7 +52,9 @@ public:
             // Vertex shader
             R"(
             #version 330
-            uniform mat4 mvp;
+            layout(std140) uniform Camera {
+                mat4 mvp;
+            };
             in vec3 position;
             in vec3 color;
 
@@ -86,7 +90,9 @@ public:
             // Vertex shader
             R"(
             #version 330
-            uniform mat4 mvp;
+            layout(std140) uniform Camera {
+                mat4 mvp;
+            };
             in vec3 position;
             void main() {
                 gl_Position = mvp * vec4(position, 1.0);
@@ -146,7 +152,11 @@ public:
             0.f,  0.f,  -1.f
         };*/
 
-        model_shader->set_buffer("indices", VariableType::UInt32, { 3 * 12 }, indices);
+        // Both shaders draw the same triangles from a single index buffer
+        indices_buffer = new Buffer(Buffer::Type::Index);
+        indices_buffer->upload(VariableType::UInt32, { 3 * 12 }, indices);
+
+        model_shader->set_buffer("indices", indices_buffer);
         model_shader->set_buffer("position", VariableType::Float32, { 8, 3 }, positions);
         model_shader->set_buffer("color", VariableType::Float32, { 8, 3 }, colors);
         model_shader->set_uniform("light_color", light_color);
@@ -163,8 +173,13 @@ public:
             2.f,  2.f,  1.5f
         };
 
-        light_shader->set_buffer("indices", VariableType::UInt32, { 3 * 12 }, indices);
+        light_shader->set_buffer("indices", indices_buffer);
         light_shader->set_buffer("position", VariableType::Float32, { 8, 3 }, positions_light);
+
+        // Both shaders share the camera transformation
+        camera = new UniformBlock(model_shader, "Camera");
+        model_shader->set_uniform_block("Camera", camera);
+        light_shader->set_uniform_block("Camera", camera);
     }
 
     void set_rotation(float rotation) {
@@ -199,9 +214,7 @@ public:
 
         Matrix4f mvp = proj * view * model * model2;
 
-        model_shader->set_uniform("mvp", mvp);
-
-        light_shader->set_uniform("mvp", mvp);
+        camera->set_uniform("mvp", mvp);
 
         // Draw 12 triangles starting at index 0
         model_shader->begin();
@@ -218,6 +231,8 @@ public:
 private:
     ref<Shader> model_shader;
     ref<Shader> light_shader;
+    ref<UniformBlock> camera;
+    ref<Buffer> indices_buffer;
     float m_rotation;
 };
 
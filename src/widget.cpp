@@ -15,6 +15,8 @@
 #include <nanogui/window.h>
 #include <nanogui/opengl.h>
 #include <nanogui/screen.h>
+#include <cmath>
+#include <limits>
 
 /* Uncomment the following definition to draw red bounding
    boxes around widgets (useful for debugging drawing code) */
@@ -26,7 +28,8 @@ NAMESPACE_BEGIN(nanogui)
 Widget::Widget(Widget *parent)
     : m_parent(nullptr), m_theme(nullptr), m_layout(nullptr),
       m_pos(0), m_size(0), m_fixed_size(0), m_visible(true), m_enabled(true),
-      m_focused(false), m_mouse_focus(false), m_tooltip(""), m_font_size(-1.f),
+      m_focused(false), m_mouse_focus(false), m_spatial_index_dirty(false),
+      m_tooltip(""), m_font_size(-1.f),
       m_icon_extra_scale(1.f), m_cursor(Cursor::Arrow) {
     if (parent)
         parent->add_child(this);
@@ -81,23 +84,160 @@ void Widget::perform_layout(NVGcontext *ctx) {
 }
 
 Widget *Widget::find_widget(const Vector2i &p) {
-    for (auto it = m_children.rbegin(); it != m_children.rend(); ++it) {
-        Widget *child = *it;
-        if (child->visible() && child->contains(p - m_pos))
+    if (m_spatial_index) {
+        Widget *child = spatial_index_lookup(p - m_pos);
+        if (child)
             return child->find_widget(p - m_pos);
+    } else {
+        for (auto it = m_children.rbegin(); it != m_children.rend(); ++it) {
+            Widget *child = *it;
+            if (child->visible() && child->contains(p - m_pos))
+                return child->find_widget(p - m_pos);
+        }
     }
     return contains(p) ? this : nullptr;
 }
 
 const Widget *Widget::find_widget(const Vector2i &p) const {
-    for (auto it = m_children.rbegin(); it != m_children.rend(); ++it) {
-        Widget *child = *it;
-        if (child->visible() && child->contains(p - m_pos))
+    if (m_spatial_index) {
+        const Widget *child = spatial_index_lookup(p - m_pos);
+        if (child)
             return child->find_widget(p - m_pos);
+    } else {
+        for (auto it = m_children.rbegin(); it != m_children.rend(); ++it) {
+            Widget *child = *it;
+            if (child->visible() && child->contains(p - m_pos))
+                return child->find_widget(p - m_pos);
+        }
     }
     return contains(p) ? this : nullptr;
 }
 
+struct Widget::SpatialIndex {
+    /// Bounding box of the children and size/number of grid cells
+    Vector2i origin, extent, cell_size, res;
+
+    /// Children overlapping each cell (topmost first), indexed via 'offsets'
+    std::vector<uint32_t> offsets, entries;
+
+    /// Children covering many cells, which are tested by every query
+    std::vector<uint32_t> large;
+};
+
+/// Children covering more cells than this are stored in a separate list
+static const int spatial_index_large_threshold = 16;
+
+void Widget::set_spatial_index(bool value) {
+    if (value == spatial_index())
+        return;
+    if (value)
+        m_spatial_index.reset(new SpatialIndex());
+    else
+        m_spatial_index.reset();
+    m_spatial_index_dirty = true;
+}
+
+Widget *Widget::spatial_index_lookup(const Vector2i &p) const {
+    SpatialIndex &index = *m_spatial_index;
+
+    if (m_spatial_index_dirty) {
+        m_spatial_index_dirty = false;
+        index.entries.clear();
+        index.large.clear();
+
+        Vector2i lo(std::numeric_limits<int>::max()),
+                 hi(std::numeric_limits<int>::min());
+        for (const Widget *child : m_children) {
+            if (child->m_size.x() <= 0 || child->m_size.y() <= 0)
+                continue;
+            lo = min(lo, child->m_pos);
+            hi = max(hi, child->m_pos + child->m_size);
+        }
+
+        if (lo.x() >= hi.x() || lo.y() >= hi.y()) {
+            index.origin = index.extent = index.res = Vector2i(0);
+            index.cell_size = Vector2i(1);
+            index.offsets.assign(1, 0);
+        } else {
+            /* Use roughly one (approximately square) cell per child */
+            Vector2i extent = hi - lo;
+            float n = (float) m_children.size(),
+                  aspect = extent.x() / (float) extent.y();
+            int res_x = (int) std::ceil(std::sqrt(n * aspect)),
+                res_y = (int) std::ceil(n / (float) std::max(res_x, 1));
+            Vector2i res(std::max(1, std::min({ res_x, extent.x(), 1024 })),
+                         std::max(1, std::min({ res_y, extent.y(), 1024 })));
+
+            index.origin = lo;
+            index.extent = extent;
+            index.cell_size = (extent + res - 1) / res;
+            index.res = (extent + index.cell_size - 1) / index.cell_size;
+            index.offsets.assign((size_t) (index.res.x() * index.res.y()) + 1, 0);
+
+            /* Two passes: count the children overlapping each cell, then
+               fill the cells. Children are visited from the topmost one. */
+            for (int pass = 0; pass < 2; ++pass) {
+                if (pass == 1) {
+                    for (size_t i = 1; i < index.offsets.size(); ++i)
+                        index.offsets[i] += index.offsets[i - 1];
+                    index.entries.resize(index.offsets.back());
+                }
+                std::vector<uint32_t> cursor;
+                if (pass == 1)
+                    cursor.assign(index.offsets.begin(), index.offsets.end() - 1);
+
+                for (size_t i = m_children.size(); i-- > 0; ) {
+                    const Widget *child = m_children[i];
+                    if (child->m_size.x() <= 0 || child->m_size.y() <= 0)
+                        continue;
+                    Vector2i c0 = (child->m_pos - lo) / index.cell_size,
+                             c1 = (child->m_pos + child->m_size - 1 - lo) / index.cell_size;
+                    int span = (c1.x() - c0.x() + 1) * (c1.y() - c0.y() + 1);
+                    if (span > spatial_index_large_threshold) {
+                        if (pass == 1)
+                            index.large.push_back((uint32_t) i);
+                        continue;
+                    }
+                    for (int y = c0.y(); y <= c1.y(); ++y) {
+                        for (int x = c0.x(); x <= c1.x(); ++x) {
+                            size_t cell = (size_t) (y * index.res.x() + x);
+                            if (pass == 0)
+                                index.offsets[cell + 1]++;
+                            else
+                                index.entries[cursor[cell]++] = (uint32_t) i;
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    Vector2i d = p - index.origin;
+    if (d.x() < 0 || d.y() < 0 || d.x() >= index.extent.x() || d.y() >= index.extent.y())
+        return nullptr;
+
+    Vector2i c = d / index.cell_size;
+    size_t cell = (size_t) (c.y() * index.res.x() + c.x());
+    const uint32_t *it1 = index.entries.data() + index.offsets[cell],
+                   *end1 = index.entries.data() + index.offsets[cell + 1],
+                   *it2 = index.large.data(),
+                   *end2 = it2 + index.large.size();
+
+    /* Merge both lists, which are sorted from the topmost child */
+    while (it1 != end1 || it2 != end2) {
+        uint32_t i;
+        if (it2 == end2 || (it1 != end1 && *it1 > *it2))
+            i = *it1++;
+        else
+            i = *it2++;
+        Widget *child = m_children[i];
+        if (child->visible() && child->contains(p))
+            return child;
+    }
+
+    return nullptr;
+}
+
 bool Widget::mouse_button_event(const Vector2i &p, int button, bool down, int modifiers) {
     for (auto it = m_children.rbegin(); it != m_children.rend(); ++it) {
         Widget *child = *it;
@@ -167,6 +307,7 @@ bool Widget::keyboard_character_event(unsigned int) {
 void Widget::add_child(int index, Widget * widget) {
     assert(index <= child_count());
     m_children.insert(m_children.begin() + index, widget);
+    m_spatial_index_dirty = true;
     widget->inc_ref();
     widget->set_parent(this);
     widget->set_theme(m_theme);
@@ -182,6 +323,7 @@ void Widget::remove_child(const Widget *widget) {
                      m_children.end());
     if (m_children.size() == child_count)
         throw std::runtime_error("Widget::remove_child(): widget not found!");
+    m_spatial_index_dirty = true;
     widget->dec_ref();
 }
 
@@ -190,6 +332,7 @@ void Widget::remove_child_at(int index) {
         throw std::runtime_error("Widget::remove_child_at(): out of bounds!");
     Widget *widget = m_children[index];
     m_children.erase(m_children.begin() + index);
+    m_spatial_index_dirty = true;
     widget->dec_ref();
 }
 
@@ -224,6 +367,17 @@ Screen *Widget::screen() {
     }
 }
 
+void Widget::request_animation_frame(double delay) {
+    Screen *screen = this->screen();
+    if (!screen)
+        return;
+
+    double time = glfwGetTime() + std::max(delay, 0.0);
+    if (screen->m_target_fps > 0.f)
+        time = std::max(time, screen->m_last_frame + 1.0 / screen->m_target_fps);
+    screen->m_frame_deadline = std::min(screen->m_frame_deadline, time);
+}
+
 const Screen *Widget::screen() const { return const_cast<Widget*>(this)->screen(); }
 const Window *Widget::window() const { return const_cast<Widget*>(this)->window(); }
 
@@ -165,9 +165,8 @@ bool Window::mouse_enter_event(const Vector2i &p, bool enter) {
 bool Window::mouse_drag_event(const Vector2i &, const Vector2i &rel,
                             int button, int /* modifiers */) {
     if (m_drag && (button & (1 << GLFW_MOUSE_BUTTON_1)) != 0) {
-        m_pos += rel;
-        m_pos = max(m_pos, Vector2i(0));
-        m_pos = min(m_pos, parent()->size() - m_size);
+        Vector2i pos = max(m_pos + rel, Vector2i(0));
+        set_position(min(pos, parent()->size() - m_size));
         return true;
     }
     return false;